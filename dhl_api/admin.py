@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import Shipment, TrackingEvent, RateQuote, EPODDocument, UserActivity, Contact, ServiceZone
-from .models import ServiceAreaCityMap, CountryISO
+from .models import ServiceAreaCityMap, CountryISO, CityServiceAreaMap, PostalRangeCompaction, ActivityPayload
+from .models import UserActivityDailyRollup
 
 
 @admin.register(Shipment)
@@ -224,6 +225,40 @@ class ServiceAreaCityMapAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
 
 
+@admin.register(CityServiceAreaMap)
+class CityServiceAreaMapAdmin(admin.ModelAdmin):
+    list_display = ('country_code', 'state_code', 'city_name', 'service_area', 'postal_coverage', 'candidate_count', 'updated_at')
+    list_filter = ('country_code',)
+    search_fields = ('country_code', 'state_code', 'city_name', 'city_key', 'service_area')
+    ordering = ('country_code', 'state_code', 'city_key')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(PostalRangeCompaction)
+class PostalRangeCompactionAdmin(admin.ModelAdmin):
+    list_display = ('dataset', 'country_code', 'row_id', 'postal_code_from', 'postal_code_to', 'source_rows', 'created_at')
+    list_filter = ('dataset', 'country_code')
+    search_fields = ('country_code', 'postal_code_from', 'postal_code_to')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(UserActivityDailyRollup)
+class UserActivityDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'user', 'action', 'status', 'count')
+    list_filter = ('action', 'status')
+    search_fields = ('user__username',)
+    date_hierarchy = 'day'
+
+
+@admin.register(ActivityPayload)
+class ActivityPayloadAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'codec', 'size', 'stored_size', 'created_at')
+    list_filter = ('codec',)
+    search_fields = ('digest',)
+    readonly_fields = ('digest', 'codec', 'size', 'stored_size', 'created_at')
+    exclude = ('data',)
+
+
 @admin.register(CountryISO)
 class CountryISOAdmin(admin.ModelAdmin):
     list_display = ('code', 'display_name', 'currency_code', 'numeric_code')
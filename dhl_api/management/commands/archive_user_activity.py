@@ -0,0 +1,52 @@
+"""
+Retención de UserActivity: crea las particiones mensuales siguientes
+(PostgreSQL) y archiva en JSONL comprimido los meses fuera de la retención,
+eliminándolos después (DETACH + DROP de la partición, o borrado en lotes en
+otros motores). Ver dhl_api/utils/activity_partitions.py.
+
+Pensado para ejecutarse a diario (cron):
+  django-manage.bat archive_user_activity
+  django-manage.bat archive_user_activity --retention-months 6 --dry-run
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dhl_api.utils.activity_partitions import archive_activity, ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones de UserActivity y archiva/elimina los meses fuera de la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int,
+                            default=getattr(settings, 'USER_ACTIVITY_RETENTION_MONTHS', 12),
+                            help='Meses completos a conservar además del actual')
+        parser.add_argument('--archive-dir', type=str,
+                            default=getattr(settings, 'USER_ACTIVITY_ARCHIVE_DIR', 'logs/archive'),
+                            help='Directorio de los archivos user_activity-YYYY-MM.jsonl.gz')
+        parser.add_argument('--months-ahead', type=int, default=3, help='Particiones futuras a mantener creadas')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas por lote al exportar/borrar')
+        parser.add_argument('--dry-run', action='store_true', help='Solo listar lo que se archivaría')
+
+    def handle(self, *args, **opts):
+        dry_run = opts['dry_run']
+        if is_partitioned() and not dry_run:
+            created = ensure_partitions(months_ahead=max(0, opts['months_ahead']))
+            for name in created:
+                self.stdout.write(f'  partición creada: {name}')
+
+        results = archive_activity(
+            retention_months=opts['retention_months'],
+            archive_dir=opts['archive_dir'],
+            chunk_size=max(1, opts['chunk_size']),
+            dry_run=dry_run,
+        )
+        if not results:
+            self.stdout.write(self.style.SUCCESS('✔ No hay actividades fuera de la retención'))
+            return
+
+        prefix = '[dry-run] ' if dry_run else ''
+        for entry in results:
+            self.stdout.write(f"  {prefix}{entry['month']}: {entry['rows']} filas → {entry['path']} ({entry['method']})")
+        total = sum(entry['rows'] for entry in results)
+        self.stdout.write(self.style.SUCCESS(f'✔ {prefix}{total} actividades archivadas en {len(results)} meses'))
@@ -0,0 +1,153 @@
+"""
+Benchmark de serialización de listados: serializers de DRF vs FastSerializer.
+
+Mide serialización + render JSON de cada listado, cuenta consultas y verifica
+que ambas salidas sean idénticas. Con --synthetic crea filas de prueba dentro
+de una transacción que se revierte al terminar:
+  django-manage.bat benchmark_serializers --rows 1000 --repeat 10
+  django-manage.bat benchmark_serializers --datasets shipments,rates --synthetic 2000
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from dhl_api import serializers as api_serializers
+from dhl_api.models import RateQuote, ServiceAreaCityMap, ServiceZone, Shipment, UserActivity
+from dhl_api.utils.benchmark import format_stats, speedup, time_callable
+from dhl_api.utils.fast_serializers import render_json
+from dhl_api.utils.reference_snapshot import db_country_list
+
+
+def _shipments(rows):
+    return Shipment.objects.order_by('-created_at', '-id')[:rows]
+
+
+def _rates(rows):
+    return RateQuote.objects.order_by('-created_at', '-id')[:rows]
+
+
+def _activities(rows):
+    return UserActivity.objects.order_by('-created_at', '-id')[:rows]
+
+
+def _zones(rows):
+    return ServiceZone.objects.order_by('country_name', 'state_name', 'city_name', 'id')[:rows]
+
+
+def _countries(rows):
+    return db_country_list()[0][:rows]
+
+
+def _postal_codes(rows):
+    return list(ServiceAreaCityMap.objects.values('postal_code_from', 'postal_code_to')[:rows])
+
+
+# nombre -> (serializer de DRF, FastSerializer, filas)
+DATASETS = {
+    'shipments': (api_serializers.ShipmentSerializer, api_serializers.FAST_SHIPMENTS, _shipments),
+    'rates': (api_serializers.RateQuoteSerializer, api_serializers.FAST_RATE_QUOTES, _rates),
+    'activities': (api_serializers.UserActivitySerializer, api_serializers.FAST_USER_ACTIVITIES, _activities),
+    'zones': (api_serializers.ServiceZoneSerializer, api_serializers.FAST_SERVICE_ZONES, _zones),
+    'countries': (api_serializers.CountrySerializer, api_serializers.FAST_COUNTRIES, _countries),
+    'postal_codes': (api_serializers.PostalCodeSerializer, api_serializers.FAST_POSTAL_CODES, _postal_codes),
+}
+
+# Listados que --synthetic puebla
+SYNTHETIC_DATASETS = ('shipments', 'rates', 'activities')
+
+
+def _synthetic_rows(count: int) -> None:
+    users = [User.objects.create_user(f'bench_serializers_{i}') for i in range(max(1, count // 100))]
+    Shipment.objects.bulk_create([
+        Shipment(
+            tracking_number=f'BENCH{i:08d}', shipper_name=f'Remitente {i}', shipper_phone='6000-0000',
+            shipper_email=f's{i}@example.com', shipper_address='Calle 50', shipper_city='Panamá',
+            shipper_postal_code='0801', shipper_country='PA', recipient_name=f'Destinatario {i}',
+            recipient_phone='305-000-0000', recipient_email=f'r{i}@example.com', recipient_address='NW 1st St',
+            recipient_city='Miami', recipient_postal_code='33126', recipient_country='US',
+            package_weight=Decimal('1.50'), package_length=10, package_width=10, package_height=10,
+            package_description='Documentos', package_value=Decimal('100'), created_by=users[i % len(users)],
+        ) for i in range(count)
+    ], batch_size=1000)
+    RateQuote.objects.bulk_create([
+        RateQuote(
+            origin_postal_code='0801', origin_city='Panamá', origin_country='PA', destination_postal_code='33126',
+            destination_city='Miami', destination_country='US', weight=Decimal('1.5'), length=10, width=10,
+            height=10, service_name='EXPRESS WORLDWIDE', service_code='P', total_price=Decimal(f'{i % 500}.37'),
+            delivery_time='2 días', created_by=users[i % len(users)],
+        ) for i in range(count)
+    ], batch_size=1000)
+    UserActivity.objects.bulk_create([
+        UserActivity(user=users[i % len(users)], action='get_rate', description=f'Cotización {i}',
+                     resource_type='rate', metadata={'i': i, 'service': 'P'})
+        for i in range(count)
+    ], batch_size=1000)
+
+
+class Command(BaseCommand):
+    help = 'Compara serialización + render de listados (DRF vs FastSerializer) y verifica que la salida sea igual'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--datasets', type=str, default=','.join(DATASETS),
+                            help=f"Separados por coma: {', '.join(DATASETS)}")
+        parser.add_argument('--rows', type=int, default=1000, help='Filas por listado')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por listado')
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help='Crear N envíos, cotizaciones y actividades de prueba (se revierten al final)')
+
+    def handle(self, *args, **opts):
+        names = [n.strip() for n in (opts.get('datasets') or '').split(',') if n.strip()]
+        unknown = sorted(set(names) - set(DATASETS))
+        if unknown:
+            raise CommandError(f"Listados desconocidos: {', '.join(unknown)}")
+        rows = max(1, int(opts.get('rows') or 1000))
+        repeat = max(1, int(opts.get('repeat') or 5))
+
+        with transaction.atomic():
+            if opts.get('synthetic'):
+                _synthetic_rows(int(opts['synthetic']))
+            for name in names:
+                self._bench(name, rows, repeat)
+            # Los datos sintéticos nunca se conservan
+            transaction.set_rollback(True)
+
+    def _bench(self, name: str, rows: int, repeat: int) -> None:
+        drf_class, fast, source = DATASETS[name]
+        renderer = JSONRenderer()
+
+        def drf():
+            return renderer.render(drf_class(source(rows), many=True).data)
+
+        def fast_path():
+            return render_json(fast.serialize(source(rows)))
+
+        # El registro de consultas (DEBUG) tiene tope: vaciarlo para que el conteo sea exacto
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as drf_queries:
+            drf_bytes = drf()
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as fast_queries:
+            fast_bytes = fast_path()
+        count = len(json.loads(fast_bytes))
+        if not count:
+            hint = 'use --synthetic' if name in SYNTHETIC_DATASETS else 'cargue los datos de referencia'
+            self.stdout.write(self.style.WARNING(f"{name}: sin filas ({hint})"))
+            return
+
+        before = time_callable(drf, repeat=repeat)
+        after = time_callable(fast_path, repeat=repeat)
+        same = json.loads(drf_bytes) == json.loads(fast_bytes)
+        self.stdout.write(self.style.SUCCESS(
+            f"=== {name}: {count} filas, {len(fast_bytes) / 1024:.0f} KiB, consultas "
+            f"{len(drf_queries)} → {len(fast_queries)} ==="
+        ))
+        self.stdout.write('  ' + format_stats('DRF serializer', before))
+        self.stdout.write('  ' + format_stats('FastSerializer', after))
+        self.stdout.write(f"  speedup p50: x{speedup(before, after):.1f}")
+        if not same:
+            self.stdout.write(self.style.ERROR('  ¡La salida difiere de la del serializer de DRF!'))
@@ -0,0 +1,54 @@
+"""
+Benchmark de search_service_zones: implementación previa vs backend indexado.
+
+Ejecutar tras cargar el ESD completo (load_esd_data) para comparar latencias:
+  django-manage.bat benchmark_zone_search --queries "bogota,panama,new york,yhm,san" --repeat 10
+"""
+from django.core.management.base import BaseCommand
+
+from dhl_api.models import ServiceZone
+from dhl_api.utils.benchmark import format_stats, speedup, time_callable
+from dhl_api.utils.zone_search import get_backend_name, legacy_search_zones, search_zones
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de la búsqueda de zonas (icontains+Paginator vs search_text indexado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=str, default='bogota,panama,new york,yhm,san,toronto',
+                            help='Términos separados por coma')
+        parser.add_argument('--country', type=str, default='', help='Filtrar por país ISO2 (opcional)')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por término')
+        parser.add_argument('--page', type=int, default=1, help='Página a solicitar')
+        parser.add_argument('--page-size', type=int, default=50, help='Tamaño de página')
+
+    def handle(self, *args, **opts):
+        queries = [q.strip() for q in (opts.get('queries') or '').split(',') if q.strip()]
+        country = (opts.get('country') or '').strip().upper()
+        repeat = max(1, int(opts.get('repeat') or 5))
+        page = max(1, int(opts.get('page') or 1))
+        page_size = max(1, int(opts.get('page_size') or 50))
+
+        total_rows = ServiceZone.objects.count()
+        missing = ServiceZone.objects.filter(search_text='').count()
+        self.stdout.write(self.style.SUCCESS(
+            f"=== Benchmark búsqueda de zonas (filas={total_rows}, backend={get_backend_name()}) ==="
+        ))
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"{missing} filas sin search_text: ejecute las migraciones o recargue el ESD"
+            ))
+
+        for q in queries:
+            before = time_callable(
+                lambda: legacy_search_zones(q, country, page, page_size), repeat=repeat
+            )
+            after = time_callable(
+                lambda: search_zones(q, country, page, page_size), repeat=repeat
+            )
+            result = search_zones(q, country, page, page_size)
+            pag = result['pagination']
+            self.stdout.write(f"q='{q}' total={'~' if pag['total_is_estimate'] else ''}{pag['total_count']}")
+            self.stdout.write('  ' + format_stats('antes (icontains+count)', before))
+            self.stdout.write('  ' + format_stats('después (search_text)', after))
+            self.stdout.write(f"  speedup p50: x{speedup(before, after):.1f}")
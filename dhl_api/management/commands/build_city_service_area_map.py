@@ -0,0 +1,30 @@
+"""
+Reconstruye la tabla CityServiceAreaMap (área de servicio canónica por ciudad).
+
+Debe ejecutarse después de load_esd_data / load_service_area_map:
+  django-manage.bat build_city_service_area_map --countries CA,US
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.service_area_mapping import rebuild_city_service_area_map
+
+
+class Command(BaseCommand):
+    help = 'Deriva el área de servicio canónica por (país, estado, ciudad) desde ServiceAreaCityMap y ServiceZone'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--countries', type=str, default='', help='ISO2 separados por coma (vacío = todos)')
+
+    def handle(self, *args, **opts):
+        countries = [c.strip().upper() for c in (opts.get('countries') or '').split(',') if c.strip()]
+        t0 = time.time()
+        stats = rebuild_city_service_area_map(countries or None)
+        bump_dataset_version(reason='build_city_service_area_map')
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Mapeo ciudad→área reconstruido: {stats['rows']} filas, "
+            f"{stats['countries']} países, {stats['conflicts']} ciudades con varias áreas "
+            f"({time.time()-t0:.1f}s)"
+        ))
@@ -0,0 +1,32 @@
+"""
+Genera los bundles JSON estáticos por país (estados, ciudades y estructura)
+con nombres por hash de contenido, más el manifiesto que publica
+/api/service-zones/bundles/. nginx/whitenoise los sirven como immutable.
+
+Debe ejecutarse después de cargar los datos y compilar el snapshot
+(load_reference_all lo hace al final):
+  django-manage.bat build_reference_bundles
+  django-manage.bat build_reference_bundles --output-dir /app/staticfiles/reference
+"""
+from django.core.management.base import BaseCommand
+
+from dhl_api.utils.reference_bundles import build_reference_bundles
+
+
+class Command(BaseCommand):
+    help = 'Pre-renderiza los datos de referencia por país en bundles JSON estáticos con hash de contenido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', type=str, default='',
+                            help='Directorio de los bundles (por defecto settings.REFERENCE_BUNDLES_DIR)')
+        parser.add_argument('--manifest', type=str, default='',
+                            help='Ruta del manifiesto (por defecto settings.REFERENCE_BUNDLES_MANIFEST)')
+
+    def handle(self, *args, **opts):
+        stats = build_reference_bundles(opts.get('output_dir') or None, opts.get('manifest') or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Bundles v{stats['version']} en {stats['directory']}: {stats['countries']} países, "
+            f"{stats['new_files']} archivos nuevos, {stats['removed']} eliminados, "
+            f"{stats['bytes'] / 1024:,.0f} KB ({stats['gzip_bytes'] / 1024:,.0f} KB gzip) "
+            f"({stats['elapsed']:.1f}s)"
+        ))
@@ -0,0 +1,26 @@
+"""
+Compila el snapshot binario de datos de referencia (países, estados, ciudades)
+que los workers mapean en memoria para responder sin consultar la BD.
+
+Debe ejecutarse después de cargar los datos (load_reference_all lo hace al final):
+  django-manage.bat build_reference_snapshot
+"""
+from django.core.management.base import BaseCommand
+
+from dhl_api.utils.reference_snapshot import build_reference_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Compila CountryISO, ServiceZone y ServiceAreaCityMap en un snapshot binario de solo lectura'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, default='',
+                            help='Ruta del snapshot (por defecto settings.REFERENCE_SNAPSHOT_PATH)')
+
+    def handle(self, *args, **opts):
+        stats = build_reference_snapshot(opts.get('output') or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Snapshot v{stats['version']} escrito en {stats['path']}: {stats['bytes'] / 1024:,.0f} KB, "
+            f"{stats['countries']} países, {stats['lists']} listas, {stats['strings']} cadenas "
+            f"({stats['elapsed']:.1f}s)"
+        ))
@@ -0,0 +1,73 @@
+"""
+Compacta los rangos postales de ServiceAreaCityMap y ServiceZone: fusiona los
+códigos contiguos con los mismos datos (país, estado, área, ciudad) en un solo
+rango y archiva los originales en PostalRangeCompaction.
+
+Debe ejecutarse después de las cargas (load_reference_all lo hace antes del snapshot):
+  django-manage.bat compact_postal_ranges --dataset map --countries CA,US
+  django-manage.bat compact_postal_ranges --dry-run
+  django-manage.bat compact_postal_ranges --expand     # revertir
+"""
+from django.core.management.base import BaseCommand
+
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.postal_ranges import (
+    SERVICE_AREA_MAP, SERVICE_ZONE, compact_postal_ranges, expand_postal_ranges,
+)
+
+_DATASETS = {
+    'map': [SERVICE_AREA_MAP],
+    'esd': [SERVICE_ZONE],
+    'all': [SERVICE_AREA_MAP, SERVICE_ZONE],
+}
+
+
+class Command(BaseCommand):
+    help = 'Fusiona códigos postales contiguos en rangos (reversible con --expand) y reporta la reducción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=sorted(_DATASETS), default='all',
+                            help='map = ServiceAreaCityMap, esd = ServiceZone, all = ambos')
+        parser.add_argument('--countries', type=str, default='', help='ISO2 separados por coma (vacío = todos)')
+        parser.add_argument('--dry-run', action='store_true', help='Calcular la reducción sin escribir')
+        parser.add_argument('--expand', action='store_true', help='Restaurar las filas originales archivadas')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Tamaño de lote para escrituras')
+
+    def handle(self, *args, **opts):
+        countries = [c.strip().upper() for c in (opts.get('countries') or '').split(',') if c.strip()]
+        batch_size = max(1, int(opts.get('batch_size') or 2000))
+        changed = False
+
+        for dataset in _DATASETS[opts['dataset']]:
+            if opts.get('expand'):
+                stats = expand_postal_ranges(dataset, countries or None, batch_size=batch_size)
+                changed = changed or bool(stats['expanded'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"✔ {dataset}: {stats['expanded']} rangos expandidos en {stats['rows_restored']} filas "
+                    f"({stats['purged']} entradas obsoletas descartadas, {stats['elapsed']:.1f}s)"
+                ))
+                continue
+
+            stats = compact_postal_ranges(dataset, countries or None, dry_run=bool(opts.get('dry_run')),
+                                          batch_size=batch_size)
+            changed = changed or (bool(stats['merged_runs']) and not opts.get('dry_run'))
+            self._report(stats, opts)
+
+        if changed:
+            bump_dataset_version(reason='compact_postal_ranges --expand' if opts.get('expand') else 'compact_postal_ranges')
+
+    def _report(self, stats: dict, opts: dict) -> None:
+        before, after = stats['rows_before'], stats['rows_after']
+        ratio = after / before if before else 1.0
+        prefix = '[dry-run] ' if opts.get('dry_run') else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {prefix}{stats['dataset']}: {before} → {after} filas "
+            f"({stats['merged_runs']} rangos fusionados, tamaño {ratio:.1%}, reducción {before / after if after else 1:.1f}x, "
+            f"{stats['elapsed']:.1f}s)"
+        ))
+        if stats['purged']:
+            self.stdout.write(f"  {stats['purged']} entradas de archivo obsoletas descartadas")
+        if int(opts.get('verbosity') or 1) >= 2:
+            for cc, (b, a) in sorted(stats['by_country'].items(), key=lambda kv: kv[1][1] - kv[1][0]):
+                if b != a:
+                    self.stdout.write(f"  {cc}: {b} → {a}")
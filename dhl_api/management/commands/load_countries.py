@@ -6,6 +6,8 @@ import os
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from dhl_api.models import ServiceZone
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.esd_loader import COUNTRY_PLACEHOLDER_AREA
 
 
 class Command(BaseCommand):
@@ -78,13 +80,13 @@ class Command(BaseCommand):
             
             # Solo agregar si no existe ya
             if country_code not in existing_countries:
-                countries_to_create.append(
-                    ServiceZone(
-                        country_code=country_code,
-                        country_name=country_name,
-                        service_area='DEFAULT'  # Área de servicio por defecto para países
-                    )
+                zone = ServiceZone(
+                    country_code=country_code,
+                    country_name=country_name,
+                    service_area=COUNTRY_PLACEHOLDER_AREA  # Área de servicio por defecto para países
                 )
+                zone.refresh_search_text()
+                countries_to_create.append(zone)
             else:
                 self.stdout.write(
                     self.style.WARNING(f'País {country_code} ya existe, saltando...')
@@ -116,6 +118,8 @@ class Command(BaseCommand):
                 
             except Exception as e:
                 raise CommandError(f'Error al insertar países: {e}')
+
+            bump_dataset_version(reason='load_countries')
         else:
             self.stdout.write(
                 self.style.WARNING('No hay países nuevos para cargar')
@@ -1,11 +1,25 @@
 """
 Comando para cargar datos de zonas de servicio desde el archivo ESD.TXT
+
+Con --incremental compara la huella de cada fila con la almacenada y solo
+inserta, actualiza o elimina las diferencias (ver dhl_api/utils/esd_loader.py).
+La carga completa es un pipeline en streaming (parseo → normalización →
+COPY/executemany por bloques) que reporta el rendimiento de cada fase.
+
+Con --clear la recarga completa se hace en una tabla sombra que reemplaza a la
+actual en una sola transacción tras validar el número de filas (ver
+dhl_api/utils/table_swap.py); --in-place conserva el borrado directo.
+
+La recarga incremental compara contra las filas del archivo, así que si la
+tabla está compactada (compact_postal_ranges) primero se expanden los rangos.
 """
 import os
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from django.db.models import Count
-from dhl_api.models import ServiceZone, CountryISO
+from dhl_api.models import PostalRangeCompaction, ServiceZone
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.esd_loader import bulk_load_esd, incremental_load_esd
+from dhl_api.utils.postal_ranges import SERVICE_ZONE, expand_postal_ranges
+from dhl_api.utils.table_swap import TableSwapError, shadow_reload
 
 
 class Command(BaseCommand):
@@ -21,13 +35,40 @@ class Command(BaseCommand):
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Limpia la tabla antes de cargar los datos'
+            help='Reemplaza la tabla completa (carga en tabla sombra + intercambio atómico)'
+        )
+        parser.add_argument(
+            '--in-place',
+            action='store_true',
+            help='Con --clear: borrar y recargar directamente sobre la tabla viva'
+        )
+        parser.add_argument(
+            '--swap-min-ratio',
+            type=float,
+            default=0.5,
+            help='Con --clear: fracción mínima de las filas actuales que debe tener la recarga (por defecto: 0.5)'
         )
         parser.add_argument(
             '--batch-size',
             type=int,
             default=1000,
-            help='Tamaño del lote para inserción masiva (por defecto: 1000)'
+            help='Tamaño del lote para escrituras de --incremental (por defecto: 1000)'
+        )
+        parser.add_argument(
+            '--copy-chunk-size',
+            type=int,
+            default=100000,
+            help='Filas por bloque enviado a COPY/executemany en la carga completa (por defecto: 100000)'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Aplica solo las diferencias con la tabla actual (inserta, actualiza y elimina)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Con --incremental: muestra el resumen de cambios sin escribir'
         )
 
     def handle(self, *args, **options):
@@ -39,130 +80,121 @@ class Command(BaseCommand):
         if not os.path.exists(file_path):
             raise CommandError(f'El archivo {file_path} no existe')
         
-        # Limpiar tabla si se especifica
-        if clear_table:
-            self.stdout.write('Limpiando tabla ServiceZone...')
-            ServiceZone.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('Tabla limpiada'))
+        if options['incremental']:
+            if clear_table:
+                raise CommandError('--incremental y --clear son excluyentes')
+            self._load_incremental(file_path, batch_size, options['dry_run'])
+            return
         
-        # Procesar archivo
-        self.stdout.write(f'Procesando archivo {file_path}...')
-        
-        created_count = 0
-        error_count = 0
-        batch = []
+        chunk_size = options['copy_chunk_size']
+        if clear_table and not options['in_place']:
+            # Cargar en una tabla sombra e intercambiarla: el tráfico nunca ve la tabla vacía
+            self.stdout.write('Recargando ServiceZone en tabla sombra...')
+            try:
+                with shadow_reload(ServiceZone, min_ratio=options['swap_min_ratio']) as swap:
+                    stats = self._load_rows(file_path, chunk_size)
+            except TableSwapError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'Tabla intercambiada ({swap.method}): {swap.previous_rows} → {swap.rows} filas '
+                f'(índices {swap.index_seconds:.1f}s, intercambio {swap.swap_seconds:.2f}s)'
+            ))
+        else:
+            # Limpiar tabla si se especifica
+            if clear_table:
+                self.stdout.write('Limpiando tabla ServiceZone...')
+                ServiceZone.objects.all().delete()
+                self.stdout.write(self.style.SUCCESS('Tabla limpiada'))
+            stats = self._load_rows(file_path, chunk_size)
+
+        version = bump_dataset_version(reason='load_esd_data')
+
+        # Mostrar resumen
+        phases = stats['phases']
+        rows = stats['rows']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Proceso completado ({stats["method"]}, {stats["elapsed"]:.1f}s):\n'
+                f'  - Registros creados: {stats["inserted"]}\n'
+                f'  - Duplicados/existentes: {stats["skipped"]}\n'
+                f'  - Errores: {stats["errors"]}\n'
+                f'  - Total de zonas de servicio en DB: {ServiceZone.objects.count()}\n'
+                f'  - Versión de datos de referencia: v{version}'
+            )
+        )
+        self.stdout.write('\n⏱  Fases:')
+        for name, label in (('parse', 'Parseo'), ('normalize', 'Normalización'), ('write', 'Escritura')):
+            seconds = phases[name]
+            self.stdout.write(f'  {label}: {seconds:.1f}s ({rows / seconds if seconds else 0:,.0f} filas/s)')
         
+        # Estadísticas por país calculadas durante la carga (sin consultas adicionales)
+        self.stdout.write('\n📊 Filas por país en el archivo:')
+        top = sorted(stats['by_country'].items(), key=lambda kv: -kv[1])[:10]
+        for country_code, count in top:
+            self.stdout.write(f"  {country_code}: {count} zonas")
+
+    def _load_rows(self, file_path, chunk_size):
+        """Carga el archivo vía COPY/executemany (ver esd_loader.bulk_load_esd)."""
+        self.stdout.write(f'Procesando archivo {file_path}...')
+
+        def on_error(line_number, reason, line):
+            self.stdout.write(self.style.WARNING(f'Línea {line_number}: {reason} - {line}'))
+
+        def progress(staged):
+            self.stdout.write(f'Procesados: {staged} registros')
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                for line_number, line in enumerate(file, 1):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    try:
-                        # Parsear línea del formato ESD
-                        # Formato: CO|COLOMBIA||||BUN|051430|051430|
-                        parts = line.split('|')
-                        
-                        if len(parts) < 8:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f'Línea {line_number}: formato inválido - {line}'
-                                )
-                            )
-                            error_count += 1
-                            continue
-                        
-                        country_code = parts[0].strip()
-                        # Normalizar nombre de país: preferir CountryISO si disponible
-                        raw_country_name = parts[1].strip()
-                        country_name = CountryISO.resolve_name(country_code, fallback=raw_country_name)
-                        state_code = parts[2].strip() if parts[2] else ''
-                        state_name = parts[3].strip() if parts[3] else ''
-                        city_name = parts[4].strip() if parts[4] else ''
-                        service_area = parts[5].strip()
-                        postal_code_from = parts[6].strip() if parts[6] else ''
-                        postal_code_to = parts[7].strip() if parts[7] else ''
-                        
-                        # Validaciones básicas
-                        if not country_code or not country_name or not service_area:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f'Línea {line_number}: datos obligatorios faltantes - {line}'
-                                )
-                            )
-                            error_count += 1
-                            continue
-                        
-                        # Crear objeto ServiceZone
-                        service_zone = ServiceZone(
-                            country_code=country_code,
-                            country_name=country_name,
-                            state_code=state_code,
-                            state_name=state_name,
-                            city_name=city_name,
-                            service_area=service_area,
-                            postal_code_from=postal_code_from,
-                            postal_code_to=postal_code_to
-                        )
-                        
-                        batch.append(service_zone)
-                        
-                        # Insertar lote cuando alcance el tamaño especificado
-                        if len(batch) >= batch_size:
-                            with transaction.atomic():
-                                ServiceZone.objects.bulk_create(
-                                    batch, 
-                                    ignore_conflicts=True,
-                                    batch_size=batch_size
-                                )
-                            created_count += len(batch)
-                            batch = []
-                            
-                            # Mostrar progreso cada 10,000 registros
-                            if created_count % 10000 == 0:
-                                self.stdout.write(f'Procesados: {created_count} registros')
-                    
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f'Error en línea {line_number}: {str(e)} - {line}'
-                            )
-                        )
-                        error_count += 1
-                        continue
-                
-                # Insertar lote restante
-                if batch:
-                    with transaction.atomic():
-                        ServiceZone.objects.bulk_create(
-                            batch, 
-                            ignore_conflicts=True,
-                            batch_size=len(batch)
-                        )
-                    created_count += len(batch)
-        
+            return bulk_load_esd(file_path, chunk_size=chunk_size, on_error=on_error, progress=progress)
         except Exception as e:
             raise CommandError(f'Error procesando archivo: {str(e)}')
-        
-        # Mostrar resumen
+
+    def _load_incremental(self, file_path, batch_size, dry_run):
+        """Recarga por diferencias y muestra el resumen de cambios."""
+        self.stdout.write(f'Comparando {file_path} con la tabla ServiceZone...')
+        errors = []
+
+        def on_error(line_number, reason, line):
+            errors.append(line_number)
+            self.stdout.write(self.style.WARNING(f'Línea {line_number}: {reason} - {line}'))
+
+        if PostalRangeCompaction.objects.filter(dataset=SERVICE_ZONE).exists():
+            if dry_run:
+                self.stdout.write(self.style.WARNING(
+                    'La tabla tiene rangos compactados: la simulación los contará como cambios '
+                    '(la recarga real los expande antes de comparar)'
+                ))
+            else:
+                expanded = expand_postal_ranges(SERVICE_ZONE, batch_size=batch_size)
+                self.stdout.write(
+                    f"Rangos compactados expandidos antes de comparar: {expanded['expanded']} "
+                    f"→ {expanded['rows_restored']} filas"
+                )
+
+        try:
+            stats = incremental_load_esd(file_path, batch_size=batch_size, dry_run=dry_run, on_error=on_error)
+        except Exception as e:
+            raise CommandError(f'Error procesando archivo: {str(e)}')
+
+        changes = stats['inserted'] + stats['updated'] + stats['deleted']
+        version = None
+        if changes and not dry_run:
+            version = bump_dataset_version(reason='load_esd_data --incremental')
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'\n✅ Proceso completado:\n'
-                f'  - Registros creados: {created_count}\n'
-                f'  - Errores: {error_count}\n'
-                f'  - Total de zonas de servicio en DB: {ServiceZone.objects.count()}'
+                f'\n✅ {"Simulación" if dry_run else "Recarga incremental"} completada '
+                f'({stats["elapsed"]:.1f}s, {stats["rows"]} filas en el archivo):\n'
+                f'  - Nuevas: {stats["inserted"]}\n'
+                f'  - Modificadas: {stats["updated"]}\n'
+                f'  - Eliminadas: {stats["deleted"]}\n'
+                f'  - Sin cambios: {stats["unchanged"]}\n'
+                f'  - Duplicadas en el archivo: {stats["duplicates"]}\n'
+                f'  - Errores: {len(errors)}'
+                + (f'\n  - Versión de datos de referencia: v{version}' if version else '')
             )
         )
-        
-        # Mostrar estadísticas por país
-        self.stdout.write('\n📊 Estadísticas por país:')
-        countries = ServiceZone.objects.values('country_code', 'country_name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
-        
-        for country in countries:
-            self.stdout.write(
-                f"  {country['country_name']} ({country['country_code']}): "
-                f"{country['count']} zonas"
-            )
+        if stats['by_country']:
+            self.stdout.write('\n📊 Cambios por país:')
+            top = sorted(stats['by_country'].items(), key=lambda kv: -kv[1])[:10]
+            for country_code, count in top:
+                self.stdout.write(f'  {country_code}: {count}')
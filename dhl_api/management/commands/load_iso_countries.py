@@ -7,6 +7,7 @@ import os
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from dhl_api.models import CountryISO
+from dhl_api.utils.dataset_version import bump_dataset_version
 
 
 class Command(BaseCommand):
@@ -77,6 +78,7 @@ class Command(BaseCommand):
                 else:
                     updated += 1
 
+        bump_dataset_version(reason='load_iso_countries')
         self.stdout.write(self.style.SUCCESS(
             f'✅ Carga completada. Creados: {created}, Actualizados: {updated}, Total: {CountryISO.objects.count()}'
         ))
@@ -4,6 +4,10 @@ Orquestador de carga de datos de referencia:
 - load_countries
 - load_esd_data
 - load_service_area_map
+- build_city_service_area_map
+- compact_postal_ranges
+- build_reference_snapshot
+- build_reference_bundles
 
 Uso (dentro del contenedor vía django-manage.bat):
   django-manage.bat load_reference_all \
@@ -11,8 +15,9 @@ Uso (dentro del contenedor vía django-manage.bat):
     --countries CA,US --max-rows 50000 --upsert
 
 Flags útiles:
-  --skip-migrate --skip-countries --skip-esd --skip-map
-  --delimiter ","  --derive-service-area
+  --skip-migrate --skip-countries --skip-esd --skip-map --skip-city-map --skip-compaction --skip-snapshot
+  --skip-bundles
+  --delimiter ","  --derive-service-area  --fast  --incremental-esd
 """
 from django.core.management.base import BaseCommand, CommandError
 from django.core.management import call_command
@@ -28,6 +33,12 @@ class Command(BaseCommand):
         parser.add_argument('--skip-countries', action='store_true', help='Omitir carga de countries.json')
         parser.add_argument('--skip-esd', action='store_true', help='Omitir carga de ESD.TXT')
         parser.add_argument('--skip-map', action='store_true', help='Omitir carga del CSV de mapeo')
+        parser.add_argument('--skip-city-map', action='store_true', help='Omitir reconstrucción del mapeo ciudad→área canónico')
+        parser.add_argument('--skip-compaction', action='store_true',
+                            help='Omitir la compactación de rangos postales')
+        parser.add_argument('--skip-snapshot', action='store_true', help='Omitir compilación del snapshot de referencia')
+        parser.add_argument('--skip-bundles', action='store_true',
+                            help='Omitir la generación de bundles estáticos por país')
 
         # CSV mapping options
         parser.add_argument('--csv-file', type=str, default='/app/dhl_api/Postal_Locations_fullset_20250811010020.csv',
@@ -37,11 +48,18 @@ class Command(BaseCommand):
         parser.add_argument('--delimiter', type=str, default='', help='Delimitador CSV; vacío = auto-sniff')
         parser.add_argument('--upsert', action='store_true', help='Actualizar si existe el registro (upsert)')
         parser.add_argument('--derive-service-area', action='store_true', help='Derivar service_area por postal con ServiceZone')
+        parser.add_argument('--fast', action='store_true', help='Cargar el CSV de mapeo vía COPY/staging (ver load_service_area_map --fast)')
+        parser.add_argument('--incremental-esd', action='store_true',
+                            help='Recargar ESD.TXT aplicando solo diferencias (ver load_esd_data --incremental)')
 
         # Clear switches
-        parser.add_argument('--clear-map', action='store_true', help='Vaciar tabla de mapeo antes de cargar')
+        parser.add_argument('--clear-map', action='store_true',
+                            help='Reemplazar la tabla de mapeo (carga en tabla sombra + intercambio atómico)')
 
     def handle(self, *args, **opts):
+        if opts.get('fast') and opts.get('upsert'):
+            # Validar antes de migrar/cargar: load_service_area_map rechaza la combinación
+            raise CommandError('--fast y --upsert no se combinan: use --upsert para actualizar o --fast para solo insertar')
         t0 = time.time()
 
         def step(name: str, fn):
@@ -64,7 +82,9 @@ class Command(BaseCommand):
 
         # 3) ESD
         if not opts.get('skip_esd'):
-            step('Cargando ESD.TXT', lambda: call_command('load_esd_data', file='/app/dhl_api/ESD.TXT'))
+            step('Cargando ESD.TXT', lambda: call_command(
+                'load_esd_data', file='/app/dhl_api/ESD.TXT', incremental=bool(opts.get('incremental_esd'))
+            ))
         else:
             self.stdout.write('↷ ESD omitido por bandera --skip-esd')
 
@@ -85,9 +105,35 @@ class Command(BaseCommand):
                 kwargs['derive_service_area'] = True
             if opts.get('clear_map'):
                 kwargs['clear'] = True
+            if opts.get('fast'):
+                kwargs['fast'] = True
 
             step('Cargando mapeo service_area -> ciudad', lambda: call_command('load_service_area_map', **kwargs))
         else:
             self.stdout.write('↷ Mapeo CSV omitido por bandera --skip-map')
 
+        # 5) Mapeo canónico ciudad -> service_area (todos los países: el ESD no se filtra por --countries)
+        if not opts.get('skip_city_map'):
+            step('Reconstruyendo mapeo ciudad -> service_area', lambda: call_command('build_city_service_area_map'))
+        else:
+            self.stdout.write('↷ Mapeo ciudad→área omitido por bandera --skip-city-map')
+
+        # 6) Compactación de rangos postales (después del mapeo canónico, que suma cobertura por fila)
+        if not opts.get('skip_compaction'):
+            step('Compactando rangos postales', lambda: call_command('compact_postal_ranges'))
+        else:
+            self.stdout.write('↷ Compactación omitida por bandera --skip-compaction')
+
+        # 7) Snapshot binario para los workers (último: toma la versión final del dataset)
+        if not opts.get('skip_snapshot'):
+            step('Compilando snapshot de referencia', lambda: call_command('build_reference_snapshot'))
+        else:
+            self.stdout.write('↷ Snapshot omitido por bandera --skip-snapshot')
+
+        # 8) Bundles estáticos por país (después del snapshot, que usan como fuente)
+        if not opts.get('skip_bundles'):
+            step('Generando bundles estáticos de referencia', lambda: call_command('build_reference_bundles'))
+        else:
+            self.stdout.write('↷ Bundles omitidos por bandera --skip-bundles')
+
         self.stdout.write(self.style.SUCCESS(f"🎉 Proceso completo en {time.time()-t0:.1f}s"))
@@ -4,16 +4,41 @@ Comando para cargar mapeos de área de servicio → ciudad amigable desde CSV o
 Formatos soportados:
 - CSV con encabezados: country_code,service_area,state_code?,city_name,display_name,postal_code_from?,postal_code_to?,notes?
 - JSON: lista de objetos con las mismas claves.
+
+Con --fast (recomendado para el fullset de Postal_Locations) las filas se
+cargan vía COPY a una tabla de staging y se fusionan con una sola sentencia
+en PostgreSQL; en SQLite se usa executemany. Con --upsert las filas se aplican
+por lotes con INSERT ... ON CONFLICT DO UPDATE, reportando creados/actualizados
+por lote (-v 2). Las dos opciones son excluyentes. Ver dhl_api/utils/bulk_load.py.
+
+Con --workers N y/o --checkpoint el CSV se divide en shards por rango de bytes
+(alineados a líneas) que se procesan en paralelo, cada uno con su propia
+conexión; los shards completados se registran en el checkpoint y una carga
+interrumpida se reanuda desde el primer shard pendiente. Ver dhl_api/utils/csv_shards.py.
+
+Con --clear la tabla se recarga en una tabla sombra que reemplaza a la actual
+en una sola transacción (ver dhl_api/utils/table_swap.py); --in-place conserva
+el borrado directo (siempre el caso en modo por shards).
 """
+import argparse
 import csv
+import io
 import json
 import os
-from typing import List, Dict, Tuple, Iterable
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Iterable, Optional
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, connections, transaction
 
-from dhl_api.models import ServiceAreaCityMap, ServiceZone
+from dhl_api.models import ServiceAreaCityMap
+from dhl_api.utils.bulk_load import bulk_insert_ignore, bulk_upsert
+from dhl_api.utils.csv_shards import ShardCheckpoint, iter_lines, plan_shards, read_first_line
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.postal_intervals import ServiceAreaPostalIndex
+from dhl_api.utils.table_swap import TableSwapError, shadow_reload
 
 
 class Command(BaseCommand):
@@ -21,8 +46,15 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--file', type=str, required=True, help='Ruta al archivo CSV o JSON con el mapeo')
-        parser.add_argument('--clear', action='store_true', help='Limpiar tabla antes de cargar')
-        parser.add_argument('--upsert', action='store_true', help='Actualizar si existe el registro (por unique_together)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Reemplazar la tabla completa (carga en tabla sombra + intercambio atómico)')
+        parser.add_argument('--in-place', action='store_true',
+                            help='Con --clear: borrar y recargar directamente sobre la tabla viva')
+        parser.add_argument('--swap-min-ratio', type=float, default=0.5,
+                            help='Con --clear: fracción mínima de las filas actuales que debe tener la recarga')
+        parser.add_argument('--upsert', action='store_true',
+                            help='Insertar o actualizar por unique_together en lotes (INSERT ... ON CONFLICT DO UPDATE)')
+        parser.add_argument('--upsert-batch-size', type=int, default=2000, help='Filas por lote en modo --upsert')
         parser.add_argument('--batch-size', type=int, default=500, help='Tamaño de lote para inserción')
         parser.add_argument('--countries', type=str, default='', help='ISO2 separados por coma para filtrar (ej: CA,US)')
         parser.add_argument('--max-rows', type=int, default=0, help='Máximo de filas a procesar (0 = sin límite)')
@@ -33,6 +65,18 @@ class Command(BaseCommand):
         parser.add_argument('--format', type=str, default='auto', choices=['auto', 'postal_locations'],
                             help='Formato del archivo CSV. "postal_locations" para el fullset sin encabezados')
         parser.add_argument('--no-header', action='store_true', help='Indica que el CSV no tiene encabezados')
+        parser.add_argument('--fast', action='store_true',
+                            help='Carga masiva vía COPY + staging (PostgreSQL) / executemany (SQLite)')
+        parser.add_argument('--copy-chunk-size', type=int, default=100000,
+                            help='Filas por bloque enviado a COPY/executemany en modo --fast')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Procesos en paralelo (shards por rango de bytes; solo CSV)')
+        parser.add_argument('--checkpoint', type=str, default='',
+                            help='Archivo JSON de checkpoint para reanudar cargas por shards')
+        parser.add_argument('--shard-mb', type=int, default=64, help='Tamaño aproximado de cada shard en MB')
+        # Uso interno de los workers
+        parser.add_argument('--byte-range', type=str, default='', help=argparse.SUPPRESS)
+        parser.add_argument('--no-version-bump', action='store_true', help=argparse.SUPPRESS)
 
     def handle(self, *args, **options):
         file_path = options['file']
@@ -43,10 +87,25 @@ class Command(BaseCommand):
         max_rows = int(options.get('max_rows') or 0)
         delimiter_opt = options.get('delimiter') or ''
         derive_sa = bool(options.get('derive_service_area'))
+        fast = bool(options.get('fast'))
+        byte_range = self._parse_byte_range(options.get('byte_range') or '')
+        self.stats = {}
+
+        if fast and upsert:
+            # --upsert actualiza filas existentes; --fast solo inserta las nuevas
+            raise CommandError('--fast y --upsert no se combinan: use --upsert para actualizar o --fast para solo insertar')
 
         if not os.path.exists(file_path):
             raise CommandError(f'El archivo {file_path} no existe')
 
+        if not byte_range and (int(options.get('workers') or 1) > 1 or options.get('checkpoint')):
+            self._load_sharded(file_path, options)
+            return
+
+        if clear and not options.get('in_place') and not byte_range:
+            self._load_swapped(file_path, options)
+            return
+
         if clear:
             self.stdout.write('Limpiando tabla ServiceAreaCityMap...')
             ServiceAreaCityMap.objects.all().delete()
@@ -56,9 +115,11 @@ class Command(BaseCommand):
         if ext == '.csv':
             if options.get('format') == 'postal_locations':
                 # CSV sin encabezado con columnas fijas del fullset de ubicaciones postales
-                records, csv_meta = self._read_postal_locations_csv(file_path, delimiter_opt, has_header=not options.get('no_header'))
+                records, csv_meta = self._read_postal_locations_csv(
+                    file_path, delimiter_opt, has_header=not options.get('no_header'), byte_range=byte_range
+                )
             else:
-                records, csv_meta = self._read_csv_stream(file_path, delimiter_opt)
+                records, csv_meta = self._read_csv_stream(file_path, delimiter_opt, byte_range=byte_range)
         elif ext in ('.json', '.jsonl'):
             records = self._read_json(file_path)
             csv_meta = {'source': 'json'}
@@ -68,6 +129,11 @@ class Command(BaseCommand):
         created, updated, errors = 0, 0, 0
         batch: List[ServiceAreaCityMap] = []
 
+        postal_index = ServiceAreaPostalIndex()
+        if derive_sa and countries_filter:
+            postal_index.preload(countries_filter)
+            self.stdout.write(f'Rangos postales precargados para derivar service_area: {postal_index.loaded_ranges}')
+
         def _first_key(d: dict, keys: List[str], default: str = '') -> str:
             for k in keys:
                 if k in d and d[k] is not None and str(d[k]).strip() != '':
@@ -89,17 +155,12 @@ class Command(BaseCommand):
             pto = _normalize_postal(_first_key(rec, ['postal_code_to', 'zip_to', 'postcode_to', 'PostalTo', 'PostalToCode']))
             notes = _first_key(rec, ['notes', 'comment', 'source']).strip()
 
-            # Derivar service_area por postal si falta y se solicitó
-            if derive_sa and not service_area and country_code and (pc or pfrom):
+            # Derivar service_area por postal si falta y se solicitó (índice en memoria, sin consulta por fila)
+            if (derive_sa and not service_area and country_code and (pc or pfrom)
+                    and (not countries_filter or country_code in countries_filter)):
                 pc_norm = _normalize_postal(pc or pfrom)
                 if pc_norm:
-                    sa = ServiceZone.objects.filter(
-                        country_code=country_code,
-                        postal_code_from__lte=pc_norm,
-                        postal_code_to__gte=pc_norm,
-                    ).values_list('service_area', flat=True).first()
-                    if sa:
-                        service_area = sa
+                    service_area = postal_index.derive(country_code, pc_norm) or ''
 
             # Si solo hay un código postal (pc) y no hay rango, usarlo como from/to para que endpoints funcionen
             if pc and not pfrom and not pto:
@@ -139,6 +200,12 @@ class Command(BaseCommand):
                 'postal_code_to': pto,
                 'notes': notes,
             }
+        if fast or upsert:
+            self._load_bulk(records, normalize, countries_filter, max_rows, options, upsert=upsert)
+            self._report_derivation(derive_sa, postal_index)
+            return
+
+        t0 = time.perf_counter()
         try:
             processed = 0
             seen_any = False
@@ -160,32 +227,14 @@ class Command(BaseCommand):
                     errors += 1
                     continue
 
-                if upsert:
-                    obj, created_flag = ServiceAreaCityMap.objects.update_or_create(
-                        country_code=n['country_code'],
-                        state_code=n['state_code'],
-                        service_area=n['service_area'],
-                        postal_code_from=n['postal_code_from'],
-                        postal_code_to=n['postal_code_to'],
-                        defaults={
-                            'city_name': n['city_name'] or n['display_name'],
-                            'display_name': n['display_name'],
-                            'notes': n['notes'],
-                        }
-                    )
-                    if created_flag:
-                        created += 1
-                    else:
-                        updated += 1
-                else:
-                    batch.append(ServiceAreaCityMap(**{
-                        **n,
-                        'city_name': n['city_name'] or n['display_name'],
-                    }))
-                    if len(batch) >= batch_size:
-                        ServiceAreaCityMap.objects.bulk_create(batch, ignore_conflicts=True, batch_size=batch_size)
-                        created += len(batch)
-                        batch = []
+                batch.append(ServiceAreaCityMap(**{
+                    **n,
+                    'city_name': n['city_name'] or n['display_name'],
+                }))
+                if len(batch) >= batch_size:
+                    ServiceAreaCityMap.objects.bulk_create(batch, ignore_conflicts=True, batch_size=batch_size)
+                    created += len(batch)
+                    batch = []
 
                 if progress_every and processed % progress_every == 0:
                     self.stdout.write(f"Progreso: {processed} filas procesadas...")
@@ -200,21 +249,258 @@ class Command(BaseCommand):
         if not seen_any:
             self.stdout.write(self.style.WARNING('No se procesaron filas (verifique filtros --countries y --start-row).'))
         else:
+            self.stats = {'processed': processed, 'created': created, 'updated': updated,
+                          'unchanged': 0, 'errors': errors}
+            self._bump_version(options, 'load_service_area_map')
+            elapsed = time.perf_counter() - t0
             self.stdout.write(self.style.SUCCESS(
-                f'✅ Mapeo cargado. Procesados: {processed}, Creados: {created}, Actualizados: {updated}, Errores: {errors}'
+                f'✅ Mapeo cargado. Procesados: {processed}, Creados: {created}, Actualizados: {updated}, Errores: {errors} '
+                f'({elapsed:.1f}s, {processed / elapsed if elapsed else 0:,.0f} filas/s)'
             ))
+        self._report_derivation(derive_sa, postal_index)
 
-    def _read_csv_stream(self, path: str, delimiter_opt: str = '') -> Tuple[Iterable[dict], Dict[str, str]]:
-        # Sniff delimitador con una lectura corta
+    def _load_swapped(self, file_path: str, options: dict) -> None:
+        """Recarga completa en tabla sombra + intercambio; el tráfico nunca ve la tabla vacía."""
+        self.stdout.write('Recargando ServiceAreaCityMap en tabla sombra...')
+        try:
+            with shadow_reload(ServiceAreaCityMap, min_ratio=options.get('swap_min_ratio') or 0.0) as swap:
+                self.handle(**{**options, 'clear': False, 'no_version_bump': True})
+        except TableSwapError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'Tabla intercambiada ({swap.method}): {swap.previous_rows} → {swap.rows} filas '
+            f'(índices {swap.index_seconds:.1f}s, intercambio {swap.swap_seconds:.2f}s)'
+        ))
+        # Versionar después del intercambio para que cachés e índices en memoria recarguen
+        self._bump_version(options, 'load_service_area_map --clear')
+
+    def _bump_version(self, options: dict, reason: str) -> None:
+        # Los shards no versionan: el proceso padre lo hace una vez al terminar
+        if not options.get('no_version_bump'):
+            bump_dataset_version(reason=reason)
+
+    def _parse_byte_range(self, value: str) -> Optional[Tuple[int, int]]:
+        if not value:
+            return None
+        try:
+            start, end = (int(v) for v in value.split(':', 1))
+        except ValueError:
+            raise CommandError(f'--byte-range inválido: {value} (use INICIO:FIN)')
+        return start, end
+
+    def _load_sharded(self, file_path: str, options: dict) -> None:
+        """Divide el CSV en shards por rango de bytes y los carga en paralelo con checkpoint."""
+        if os.path.splitext(file_path)[1].lower() != '.csv':
+            raise CommandError('--workers/--checkpoint solo aplican a archivos CSV')
+        if options.get('start_row') or options.get('max_rows'):
+            raise CommandError('--start-row y --max-rows no se combinan con --workers/--checkpoint')
+
+        workers = max(1, int(options.get('workers') or 1))
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite no admite escrituras concurrentes: se usa --workers 1'))
+            workers = 1
+
+        has_header = options.get('format') != 'postal_locations' or not options.get('no_header')
+        shard_bytes = max(1, int(options.get('shard_mb') or 64)) * 1024 * 1024
+        shards = plan_shards(file_path, shard_bytes, skip_header=has_header)
+
+        # Opciones que se reenvían a cada shard (delimitador resuelto una vez aquí)
+        shard_options = {
+            key: options.get(key) for key in (
+                'countries', 'derive_service_area', 'format', 'no_header', 'fast', 'upsert',
+                'upsert_batch_size', 'batch_size', 'copy_chunk_size', 'progress_every', 'verbosity',
+            )
+        }
+        shard_options['file'] = file_path
+        shard_options['delimiter'] = self._sniff_delimiter(file_path, options.get('delimiter') or '')
+
+        checkpoint = None
+        if options.get('checkpoint'):
+            signature = {
+                **ShardCheckpoint.file_signature(file_path),
+                'shard_bytes': shard_bytes,
+                'options': {k: shard_options[k] for k in ('countries', 'format', 'fast', 'upsert', 'derive_service_area')},
+            }
+            checkpoint = ShardCheckpoint(options['checkpoint'], signature)
+            if options.get('clear'):
+                checkpoint.reset()
+            else:
+                try:
+                    if checkpoint.load():
+                        self.stdout.write(f'Checkpoint {checkpoint.path}: {len(checkpoint.completed)} shards ya completados')
+                except ValueError as e:
+                    raise CommandError(str(e))
+
+        if options.get('clear'):
+            self.stdout.write(self.style.WARNING(
+                'Modo por shards: los workers escriben en la tabla viva, --clear borra en el lugar'
+            ))
+            self.stdout.write('Limpiando tabla ServiceAreaCityMap...')
+            ServiceAreaCityMap.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS('Tabla limpiada'))
+
+        pending = [s for s in shards if not (checkpoint and checkpoint.is_done(s[0]))]
+        self.stdout.write(
+            f'{len(shards)} shards de ~{shard_bytes // (1024 * 1024)} MB; pendientes: {len(pending)}; workers: {workers}'
+        )
+
+        totals = {'processed': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        failures = []
+        t0 = time.perf_counter()
+
+        def record(index: int, stats: dict) -> None:
+            for key in totals:
+                totals[key] += stats.get(key, 0)
+            if checkpoint:
+                checkpoint.mark_done(index, stats)
+            self.stdout.write(
+                f"Shard {index + 1}/{len(shards)}: procesados {stats.get('processed', 0)}, "
+                f"creados {stats.get('created', 0)}, actualizados {stats.get('updated', 0)}, "
+                f"errores {stats.get('errors', 0)}"
+            )
+
+        if workers == 1:
+            for shard in pending:
+                try:
+                    record(*_run_shard(shard, shard_options))
+                except Exception as e:
+                    failures.append((shard[0], e))
+        else:
+            # Cada proceso abre su propia conexión; no heredar la del padre
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = {pool.submit(_run_shard, shard, shard_options): shard for shard in pending}
+                for future in as_completed(futures):
+                    try:
+                        record(*future.result())
+                    except Exception as e:
+                        failures.append((futures[future][0], e))
+
+        elapsed = time.perf_counter() - t0
+        if totals['processed']:
+            self._bump_version(options, 'load_service_area_map --workers')
+        self.stats = totals
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Shards completados: {len(pending) - len(failures)}/{len(pending)}. "
+            f"Procesados: {totals['processed']}, Creados: {totals['created']}, Actualizados: {totals['updated']}, "
+            f"Sin cambios: {totals['unchanged']}, Errores: {totals['errors']} "
+            f"({elapsed:.1f}s, {totals['processed'] / elapsed if elapsed else 0:,.0f} filas/s)"
+        ))
+        if failures:
+            detail = '; '.join(f'shard {i + 1}: {e}' for i, e in sorted(failures, key=lambda f: f[0]))
+            hint = ' Vuelva a ejecutar con el mismo --checkpoint para reintentar solo los pendientes.' if checkpoint else ''
+            raise CommandError(f'{len(failures)} shards fallaron ({detail}).{hint}')
+
+    def _report_derivation(self, derive_sa: bool, postal_index: ServiceAreaPostalIndex) -> None:
+        if derive_sa:
+            self.stdout.write(
+                f'service_area derivado por código postal: {postal_index.derived}, '
+                f'sin resolver: {postal_index.unresolved} ({postal_index.loaded_ranges} rangos en memoria)'
+            )
+
+    def _load_bulk(self, records, normalize, countries_filter: List[str], max_rows: int, options: dict,
+                   upsert: bool = False) -> None:
+        """Ruta masiva: normaliza en streaming y delega en bulk_insert_ignore o bulk_upsert."""
+        columns = ('country_code', 'state_code', 'service_area', 'city_name', 'display_name',
+                   'postal_code_from', 'postal_code_to', 'notes')
+        conflict_columns = ('country_code', 'state_code', 'service_area', 'postal_code_from', 'postal_code_to')
+        start_row = max(0, int(options.get('start_row') or 0))
+        progress_every = max(1, int(options.get('progress_every') or 100000))
+        counters = {'processed': 0, 'errors': 0}
+
+        def rows():
+            for idx, rec in enumerate(records, 1):
+                if start_row and idx <= start_row:
+                    continue
+                n = normalize(rec)
+                if countries_filter and n['country_code'] not in countries_filter:
+                    continue
+                counters['processed'] += 1
+                if max_rows and counters['processed'] > max_rows:
+                    counters['processed'] -= 1
+                    break
+                if not n['country_code'] or not n['service_area'] or not n['display_name']:
+                    counters['errors'] += 1
+                    continue
+                n['city_name'] = n['city_name'] or n['display_name']
+                yield tuple(n[c] for c in columns)
+
+        next_report = [progress_every]
+
+        def progress(staged: int) -> None:
+            if staged >= next_report[0]:
+                self.stdout.write(f"Progreso: {staged} filas enviadas...")
+                next_report[0] = (staged // progress_every + 1) * progress_every
+
+        def on_batch(number: int, created: int, updated: int, unchanged: int) -> None:
+            # Detalle por lote con -v 2; con verbosidad normal basta el progreso periódico
+            if int(options.get('verbosity') or 1) >= 2:
+                self.stdout.write(f"Lote {number}: creados {created}, actualizados {updated}, sin cambios {unchanged}")
+            else:
+                progress(counters['processed'])
+
+        try:
+            if upsert:
+                stats = bulk_upsert(
+                    ServiceAreaCityMap, columns, rows(), conflict_columns,
+                    update_columns=('city_name', 'display_name', 'notes'),
+                    batch_size=max(1, int(options.get('upsert_batch_size') or 2000)),
+                    on_batch=on_batch,
+                )
+            else:
+                stats = bulk_insert_ignore(
+                    ServiceAreaCityMap, columns, rows(), conflict_columns,
+                    chunk_size=max(1, int(options.get('copy_chunk_size') or 100000)),
+                    progress=progress,
+                )
+        except Exception as e:
+            raise CommandError(f'Error cargando mapeo (modo masivo): {e}')
+
+        if not counters['processed']:
+            self.stdout.write(self.style.WARNING('No se procesaron filas (verifique filtros --countries y --start-row).'))
+            return
+
+        if upsert:
+            self.stats = {'processed': counters['processed'], 'created': stats['created'],
+                          'updated': stats['updated'], 'unchanged': stats['unchanged'], 'errors': counters['errors']}
+            self._bump_version(options, 'load_service_area_map --upsert')
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Mapeo cargado (upsert, {stats['method']}, {stats['batches']} lotes). "
+                f"Procesados: {counters['processed']}, Creados: {stats['created']}, Actualizados: {stats['updated']}, "
+                f"Sin cambios: {stats['unchanged']}, Errores: {counters['errors']} "
+                f"({stats['elapsed']:.1f}s, {stats['rows_per_sec']:,.0f} filas/s)"
+            ))
+            return
+
+        self.stats = {'processed': counters['processed'], 'created': stats['inserted'], 'updated': 0,
+                      'unchanged': stats['skipped'], 'errors': counters['errors']}
+        self._bump_version(options, 'load_service_area_map --fast')
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Mapeo cargado ({stats['method']}). Procesados: {counters['processed']}, "
+            f"Creados: {stats['inserted']}, Duplicados/existentes: {stats['skipped']}, Errores: {counters['errors']} "
+            f"({stats['elapsed']:.1f}s, {stats['rows_per_sec']:,.0f} filas/s)"
+        ))
+
+    def _sniff_delimiter(self, path: str, delimiter_opt: str = '') -> str:
+        if delimiter_opt:
+            return delimiter_opt
         with open(path, 'r', encoding='utf-8-sig', newline='') as sniff:
             sample = sniff.read(8192)
-            delimiter = delimiter_opt
-            if not delimiter:
-                try:
-                    dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
-                    delimiter = dialect.delimiter
-                except Exception:
-                    delimiter = ','
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except Exception:
+            return ','
+
+    def _read_csv_stream(self, path: str, delimiter_opt: str = '',
+                         byte_range: Optional[Tuple[int, int]] = None) -> Tuple[Iterable[dict], Dict[str, str]]:
+        # Sniff delimitador con una lectura corta
+        delimiter = self._sniff_delimiter(path, delimiter_opt)
+        if byte_range:
+            # Shard: el encabezado se toma de la primera línea y las filas del rango de bytes
+            columns = next(csv.reader([read_first_line(path)], delimiter=delimiter), [])
+            rows = csv.DictReader(iter_lines(path, *byte_range), fieldnames=columns, delimiter=delimiter)
+            return rows, {'delimiter': delimiter, 'columns': columns, 'byte_range': byte_range}
+
         def iterator():
             with open(path, 'r', encoding='utf-8-sig', newline='') as f:
                 reader = csv.DictReader(f, delimiter=delimiter)
@@ -233,7 +519,8 @@ class Command(BaseCommand):
             columns = reader2.fieldnames or []
         return iterator(), {'delimiter': delimiter, 'columns': columns}
 
-    def _read_postal_locations_csv(self, path: str, delimiter_opt: str = '', has_header: bool = False) -> Tuple[Iterable[dict], Dict[str, str]]:
+    def _read_postal_locations_csv(self, path: str, delimiter_opt: str = '', has_header: bool = False,
+                                   byte_range: Optional[Tuple[int, int]] = None) -> Tuple[Iterable[dict], Dict[str, str]]:
         """
         Lector para el CSV de Postal_Locations_fullset (sin encabezados), con columnas:
         0: country_code, 1: service_area, 2: city_name, 3: (unused), 4: postal_code,
@@ -242,35 +529,34 @@ class Command(BaseCommand):
         Devuelve un iterador de dicts con claves canónicas usadas por normalize().
         """
         # Sniff delimitador
-        with open(path, 'r', encoding='utf-8-sig', newline='') as sniff:
-            sample = sniff.read(8192)
-            delimiter = delimiter_opt
-            if not delimiter:
-                try:
-                    dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
-                    delimiter = dialect.delimiter
-                except Exception:
-                    delimiter = ','
+        delimiter = self._sniff_delimiter(path, delimiter_opt)
 
-        def iterator():
+        def lines():
+            if byte_range:
+                # En modo shard el plan ya excluye el encabezado
+                yield from iter_lines(path, *byte_range)
+                return
             with open(path, 'r', encoding='utf-8-sig', newline='') as f:
-                reader = csv.reader(f, delimiter=delimiter)
-                row_idx = 0
-                for row in reader:
-                    row_idx += 1
-                    if has_header and row_idx == 1:
-                        # Saltar encabezado si lo hay
-                        continue
-                    # Asegurar longitud mínima
-                    cols = row + [''] * (10 - len(row))
-                    yield {
-                        'country_code': (cols[0] or '').strip(),
-                        'service_area': (cols[1] or '').strip(),
-                        'city_name': (cols[2] or '').strip(),
-                        'PostalCode': (cols[4] or '').strip(),
-                        'state_code': (cols[8] or '').strip(),
-                        # display_name y rangos se derivan en normalize()
-                    }
+                yield from f
+
+        def iterator():
+            reader = csv.reader(lines(), delimiter=delimiter)
+            row_idx = 0
+            for row in reader:
+                row_idx += 1
+                if has_header and row_idx == 1 and not byte_range:
+                    # Saltar encabezado si lo hay
+                    continue
+                # Asegurar longitud mínima
+                cols = row + [''] * (10 - len(row))
+                yield {
+                    'country_code': (cols[0] or '').strip(),
+                    'service_area': (cols[1] or '').strip(),
+                    'city_name': (cols[2] or '').strip(),
+                    'PostalCode': (cols[4] or '').strip(),
+                    'state_code': (cols[8] or '').strip(),
+                    # display_name y rangos se derivan en normalize()
+                }
 
         return iterator(), {'delimiter': delimiter, 'columns': ['0','1','2','3','4','5','6','7','8','9'], 'format': 'postal_locations'}
 
@@ -282,3 +568,29 @@ class Command(BaseCommand):
             if isinstance(data, list):
                 return data
             return []
+
+
+_in_worker = False
+
+
+def _init_worker() -> None:
+    """Inicializa Django en cada proceso del pool (conexiones propias)."""
+    import django
+
+    global _in_worker
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dhl_project.settings')
+    django.setup()
+    connections.close_all()
+    _in_worker = True
+
+
+def _run_shard(shard: Tuple[int, int, int], shard_options: dict) -> Tuple[int, dict]:
+    """Carga un shard ``(índice, inicio, fin)`` y retorna ``(índice, estadísticas)``."""
+    index, start, end = shard
+    cmd = Command()
+    try:
+        call_command(cmd, byte_range=f'{start}:{end}', no_version_bump=True, stdout=io.StringIO(), **shard_options)
+    finally:
+        if _in_worker:
+            connections.close_all()
+    return index, cmd.stats
@@ -0,0 +1,37 @@
+"""
+Recalcula los resúmenes diarios de actividad (UserActivityDailyRollup) desde
+UserActivity. El pipeline de auditoría los mantiene al escribir cada lote;
+este comando corrige desalineaciones (ej. tras borrar actividades a mano).
+No usar sobre días ya archivados: sus actividades ya no están en la tabla.
+
+  django-manage.bat rebuild_activity_rollups               # últimos 7 días
+  django-manage.bat rebuild_activity_rollups --date-from 2025-01-01 --date-to 2025-01-31
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dhl_api.utils.activity_rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los conteos diarios de actividad por usuario, acción y estado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Días hacia atrás desde hoy (si no hay rango)')
+        parser.add_argument('--date-from', type=str, default='', help='Fecha inicial YYYY-MM-DD')
+        parser.add_argument('--date-to', type=str, default='', help='Fecha final YYYY-MM-DD (por defecto hoy)')
+
+    def handle(self, *args, **opts):
+        try:
+            date_to = date.fromisoformat(opts['date_to']) if opts['date_to'] else timezone.localdate()
+            date_from = (date.fromisoformat(opts['date_from']) if opts['date_from']
+                         else date_to - timedelta(days=max(1, opts['days']) - 1))
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        if date_from > date_to:
+            raise CommandError('--date-from debe ser anterior o igual a --date-to')
+
+        rows = rebuild_rollups(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'✔ {rows} resúmenes recalculados entre {date_from} y {date_to}'))
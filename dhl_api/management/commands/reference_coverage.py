@@ -0,0 +1,36 @@
+"""
+Reporte de cobertura de ServiceZone (ESD) y ServiceAreaCityMap: por país y
+estado, filas, ciudades y áreas distintas, rangos y códigos postales cubiertos
+y ciudades con más rangos. Un recorrido por tabla, cacheado por versión del
+dataset (ver dhl_api/utils/coverage.py).
+
+  django-manage.bat reference_coverage --dataset esd --country CO
+  django-manage.bat reference_coverage --format csv > cobertura.csv
+"""
+from django.core.management.base import BaseCommand
+
+from dhl_api.utils.coverage import DATASETS, get_coverage, render_coverage
+
+
+class Command(BaseCommand):
+    help = 'Cobertura de los datos de referencia por país y estado (tabla, JSON o CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=DATASETS + ('all',), default='all',
+                            help='esd = ServiceZone, map = ServiceAreaCityMap, all = ambos')
+        parser.add_argument('--country', '-c', type=str, default='', help='Filtrar por código de país ISO (2 letras)')
+        parser.add_argument('--format', '-f', choices=('table', 'json', 'csv'), default='table')
+        parser.add_argument('--top', '-n', type=int, default=15,
+                            help='Ciudades/áreas a listar por país (por orden de más rangos postales)')
+        parser.add_argument('--refresh', action='store_true', help='Recalcular aunque exista en caché')
+
+    def handle(self, *args, **opts):
+        datasets = DATASETS if opts['dataset'] == 'all' else (opts['dataset'],)
+        reports = [
+            get_coverage(dataset, opts.get('country') or None, top=opts['top'], refresh=opts['refresh'])
+            for dataset in datasets
+        ]
+        if not any(r['totals']['rows'] for r in reports):
+            self.stdout.write(self.style.WARNING('No hay datos de referencia cargados para el filtro indicado.'))
+            return
+        self.stdout.write(render_coverage(reports, opts['format']))
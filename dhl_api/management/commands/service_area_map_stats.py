@@ -1,14 +1,12 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from dhl_api.models import ServiceAreaCityMap
 
 
 class Command(BaseCommand):
-    help = 'Muestra estadísticas del mapeo ServiceAreaCityMap'
+    help = 'Muestra estadísticas del mapeo ServiceAreaCityMap (alias de reference_coverage --dataset map)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', '-c', type=str, default=None, help='Filtrar por código de país ISO (2 letras)')
 
     def handle(self, *args, **options):
-        total = ServiceAreaCityMap.objects.count()
-        self.stdout.write(self.style.SUCCESS(f'Total mappings: {total}'))
-        # Mostrar algunos ejemplos
-        sample = ServiceAreaCityMap.objects.all()[:5]
-        for s in sample:
-            self.stdout.write(f'- {s.country_code} {s.service_area} -> {s.display_name}')
+        call_command('reference_coverage', dataset='map', country=options.get('country') or '', stdout=self.stdout)
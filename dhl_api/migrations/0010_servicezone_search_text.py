@@ -0,0 +1,67 @@
+from django.db import migrations, models, transaction
+
+
+TRGM_INDEX_NAME = 'dhl_api_servicezone_search_trgm'
+
+
+def backfill_search_text(apps, schema_editor):
+    """Rellena search_text para las filas existentes en lotes."""
+    from dhl_api.utils.text_search import build_search_text
+
+    ServiceZone = apps.get_model('dhl_api', 'ServiceZone')
+    batch = []
+    qs = ServiceZone.objects.only(
+        'id', 'city_name', 'state_name', 'state_code', 'service_area', 'country_name'
+    ).order_by('id')
+    for zone in qs.iterator(chunk_size=5000):
+        zone.search_text = build_search_text(
+            zone.city_name, zone.state_name, zone.state_code, zone.service_area, zone.country_name
+        )
+        batch.append(zone)
+        if len(batch) >= 5000:
+            ServiceZone.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        ServiceZone.objects.bulk_update(batch, ['search_text'])
+
+
+def create_trigram_index(apps, schema_editor):
+    """Crea pg_trgm + índice GIN trigram (solo PostgreSQL).
+
+    Si la extensión no está disponible o faltan permisos, se omite: el backend
+    de búsqueda detecta la ausencia y cae al modo LIKE.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} '
+                f'ON dhl_api_servicezone USING gin (search_text gin_trgm_ops)'
+            )
+    except Exception as e:  # pragma: no cover - depende de permisos del servidor
+        print(f'\n  [0010] Índice trigram omitido: {e}')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRGM_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0009_rename_dhl_api_cou_code_idx_dhl_api_cou_code_cea843_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicezone',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Texto de búsqueda normalizado (ciudad, estado, área, país)', max_length=400),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0010_servicezone_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityServiceAreaMap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country_code', models.CharField(help_text='Código de país ISO (2 letras)', max_length=2)),
+                ('state_code', models.CharField(blank=True, help_text='Código de estado/provincia (vacío = todo el país)', max_length=10)),
+                ('city_key', models.CharField(help_text='Nombre de ciudad normalizado (sin acentos, minúsculas)', max_length=120)),
+                ('city_name', models.CharField(help_text='Nombre de ciudad tal como aparece en los datos', max_length=120)),
+                ('service_area', models.CharField(help_text='Área de servicio canónica', max_length=10)),
+                ('postal_coverage', models.BigIntegerField(default=0, help_text='Códigos postales cubiertos por el área ganadora')),
+                ('candidate_count', models.PositiveIntegerField(default=1, help_text='Áreas de servicio candidatas para la ciudad')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Área de Servicio Canónica por Ciudad',
+                'verbose_name_plural': 'Áreas de Servicio Canónicas por Ciudad',
+                'indexes': [models.Index(fields=['country_code', 'city_key'], name='dhl_api_cit_country_e828b0_idx')],
+                'unique_together': {('country_code', 'state_code', 'city_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0011_cityserviceareamap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nombre del dataset (ej: reference)', max_length=50, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('reason', models.CharField(blank=True, help_text='Último comando que incrementó la versión', max_length=200)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versión de Dataset',
+                'verbose_name_plural': 'Versiones de Dataset',
+            },
+        ),
+    ]
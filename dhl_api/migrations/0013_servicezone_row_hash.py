@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def backfill_row_hash(apps, schema_editor):
+    """Calcula row_hash para las filas existentes en lotes."""
+    from dhl_api.utils.esd_loader import ESD_FIELDS, row_hash
+
+    ServiceZone = apps.get_model('dhl_api', 'ServiceZone')
+    batch = []
+    qs = ServiceZone.objects.only('id', *ESD_FIELDS).order_by('id')
+    for zone in qs.iterator(chunk_size=5000):
+        zone.row_hash = row_hash({f: getattr(zone, f) for f in ESD_FIELDS})
+        batch.append(zone)
+        if len(batch) >= 5000:
+            ServiceZone.objects.bulk_update(batch, ['row_hash'])
+            batch = []
+    if batch:
+        ServiceZone.objects.bulk_update(batch, ['row_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0012_datasetversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicezone',
+            name='row_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Huella de los campos del ESD (carga incremental)', max_length=32),
+        ),
+        migrations.RunPython(backfill_row_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0013_servicezone_row_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostalRangeCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(choices=[('service_zone', 'ServiceZone (ESD)'), ('service_area_map', 'ServiceAreaCityMap')], max_length=20)),
+                ('row_id', models.BigIntegerField(help_text='id de la fila compactada')),
+                ('country_code', models.CharField(max_length=2)),
+                ('postal_code_from', models.CharField(max_length=20)),
+                ('postal_code_to', models.CharField(max_length=20)),
+                ('source_rows', models.PositiveIntegerField(help_text='Filas originales fusionadas')),
+                ('original_ranges', models.TextField(help_text='JSON [[desde, hasta], ...] de las filas originales')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Compactación de Rango Postal',
+                'verbose_name_plural': 'Compactaciones de Rangos Postales',
+                'indexes': [models.Index(fields=['dataset', 'country_code'], name='dhl_api_pos_dataset_5a4214_idx')],
+                'unique_together': {('dataset', 'row_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:29
+
+from django.db import migrations
+
+
+def partition_user_activity(apps, schema_editor):
+    """PostgreSQL: convierte la tabla en particionada por mes (en otros motores no hace nada)."""
+    from dhl_api.utils.activity_partitions import partition_activity_table
+
+    partition_activity_table()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0015_user_activity_contact_actions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='useractivity',
+            name='dhl_api_use_action_5a04d5_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='useractivity',
+            name='dhl_api_use_status_9edd24_idx',
+        ),
+        # Sin reversa: la tabla particionada sigue siendo compatible con el modelo
+        migrations.RunPython(partition_user_activity, migrations.RunPython.noop),
+    ]
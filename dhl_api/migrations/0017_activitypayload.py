@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0016_useractivity_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityPayload',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('codec', models.CharField(choices=[('zlib', 'zlib'), ('zstd', 'zstd')], default='zlib', max_length=8)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Bytes del JSON sin comprimir')),
+                ('stored_size', models.PositiveIntegerField(help_text='Bytes comprimidos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Payload de Actividad',
+                'verbose_name_plural': 'Payloads de Actividad',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0017_activitypayload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ratequote',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='dhl_api_rat_created_50e4f8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='dhl_api_shi_created_3fc569_idx'),
+        ),
+    ]
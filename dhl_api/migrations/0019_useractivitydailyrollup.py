@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    """Resúmenes diarios de las actividades existentes."""
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+
+    UserActivity = apps.get_model('dhl_api', 'UserActivity')
+    UserActivityDailyRollup = apps.get_model('dhl_api', 'UserActivityDailyRollup')
+    rows = (
+        UserActivity.objects.annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day', 'action', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    UserActivityDailyRollup.objects.bulk_create(
+        [
+            UserActivityDailyRollup(user_id=r['user_id'], day=r['day'], action=r['action'],
+                                    status=r['status'], count=r['n'])
+            for r in rows.iterator()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dhl_api', '0018_history_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('action', models.CharField(choices=[('login', 'Inicio de sesión'), ('logout', 'Cierre de sesión'), ('create_shipment', 'Crear envío'), ('view_shipment', 'Ver envío'), ('edit_shipment', 'Editar envío'), ('delete_shipment', 'Eliminar envío'), ('track_shipment', 'Rastrear envío'), ('get_rate', 'Obtener cotización'), ('compare_rates', 'Comparar cotizaciones'), ('create_account', 'Crear cuenta DHL'), ('edit_account', 'Editar cuenta DHL'), ('delete_account', 'Eliminar cuenta DHL'), ('set_default_account', 'Establecer cuenta por defecto'), ('landed_cost_quote', 'Cotización Landed Cost'), ('validate_landed_cost', 'Validar Landed Cost'), ('epod_request', 'Solicitud ePOD'), ('create_contact', 'Crear contacto'), ('update_contact', 'Editar contacto'), ('delete_contact', 'Eliminar contacto'), ('add_favorite', 'Agregar contacto a favoritos'), ('remove_favorite', 'Quitar contacto de favoritos'), ('auto_create_contacts', 'Crear contactos desde envío'), ('api_error', 'Error de API'), ('system_action', 'Acción del sistema')], max_length=30)),
+                ('status', models.CharField(choices=[('success', 'Exitoso'), ('error', 'Error'), ('warning', 'Advertencia'), ('info', 'Información')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Actividad',
+                'verbose_name_plural': 'Resúmenes Diarios de Actividad',
+                'indexes': [models.Index(fields=['day'], name='dhl_api_use_day_9328b3_idx')],
+                'unique_together': {('user', 'day', 'action', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
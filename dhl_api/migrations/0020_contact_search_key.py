@@ -0,0 +1,65 @@
+from django.db import migrations, models, transaction
+
+
+TRGM_INDEX_NAME = 'dhl_api_contact_search_trgm'
+
+
+def backfill_search_key(apps, schema_editor):
+    """Rellena search_key para los contactos existentes en lotes."""
+    from dhl_api.utils.contact_search import build_search_key
+
+    Contact = apps.get_model('dhl_api', 'Contact')
+    batch = []
+    qs = Contact.objects.only('id', 'name', 'company', 'email', 'phone', 'city').order_by('id')
+    for contact in qs.iterator(chunk_size=5000):
+        contact.search_key = build_search_key(
+            contact.name, contact.company, contact.email, contact.phone, contact.city
+        )
+        batch.append(contact)
+        if len(batch) >= 5000:
+            Contact.objects.bulk_update(batch, ['search_key'])
+            batch = []
+    if batch:
+        Contact.objects.bulk_update(batch, ['search_key'])
+
+
+def create_trigram_index(apps, schema_editor):
+    """Crea pg_trgm + índice GIN trigram sobre search_key (solo PostgreSQL).
+
+    Si la extensión no está disponible o faltan permisos, se omite: la
+    búsqueda sigue funcionando con LIKE.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} '
+                f'ON dhl_api_contact USING gin (search_key gin_trgm_ops)'
+            )
+    except Exception as e:  # pragma: no cover - depende de permisos del servidor
+        print(f'\n  [0020] Índice trigram omitido: {e}')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRGM_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0019_useractivitydailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='search_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Texto de búsqueda normalizado (nombre, empresa, email, teléfono, ciudad)', max_length=600),
+        ),
+        migrations.RunPython(backfill_search_key, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0020_contact_search_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useractivity',
+            name='action',
+            field=models.CharField(choices=[('login', 'Inicio de sesión'), ('logout', 'Cierre de sesión'), ('create_shipment', 'Crear envío'), ('view_shipment', 'Ver envío'), ('edit_shipment', 'Editar envío'), ('delete_shipment', 'Eliminar envío'), ('track_shipment', 'Rastrear envío'), ('get_rate', 'Obtener cotización'), ('compare_rates', 'Comparar cotizaciones'), ('create_account', 'Crear cuenta DHL'), ('edit_account', 'Editar cuenta DHL'), ('delete_account', 'Eliminar cuenta DHL'), ('set_default_account', 'Establecer cuenta por defecto'), ('landed_cost_quote', 'Cotización Landed Cost'), ('validate_landed_cost', 'Validar Landed Cost'), ('epod_request', 'Solicitud ePOD'), ('create_contact', 'Crear contacto'), ('update_contact', 'Editar contacto'), ('delete_contact', 'Eliminar contacto'), ('add_favorite', 'Agregar contacto a favoritos'), ('remove_favorite', 'Quitar contacto de favoritos'), ('auto_create_contacts', 'Crear contactos desde envío'), ('import_contacts', 'Importar contactos'), ('export_contacts', 'Exportar contactos'), ('api_error', 'Error de API'), ('system_action', 'Acción del sistema')], max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='useractivitydailyrollup',
+            name='action',
+            field=models.CharField(choices=[('login', 'Inicio de sesión'), ('logout', 'Cierre de sesión'), ('create_shipment', 'Crear envío'), ('view_shipment', 'Ver envío'), ('edit_shipment', 'Editar envío'), ('delete_shipment', 'Eliminar envío'), ('track_shipment', 'Rastrear envío'), ('get_rate', 'Obtener cotización'), ('compare_rates', 'Comparar cotizaciones'), ('create_account', 'Crear cuenta DHL'), ('edit_account', 'Editar cuenta DHL'), ('delete_account', 'Eliminar cuenta DHL'), ('set_default_account', 'Establecer cuenta por defecto'), ('landed_cost_quote', 'Cotización Landed Cost'), ('validate_landed_cost', 'Validar Landed Cost'), ('epod_request', 'Solicitud ePOD'), ('create_contact', 'Crear contacto'), ('update_contact', 'Editar contacto'), ('delete_contact', 'Eliminar contacto'), ('add_favorite', 'Agregar contacto a favoritos'), ('remove_favorite', 'Quitar contacto de favoritos'), ('auto_create_contacts', 'Crear contactos desde envío'), ('import_contacts', 'Importar contactos'), ('export_contacts', 'Exportar contactos'), ('api_error', 'Error de API'), ('system_action', 'Acción del sistema')], max_length=30),
+        ),
+    ]
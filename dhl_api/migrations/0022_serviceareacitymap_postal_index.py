@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0021_useractivity_contact_io_actions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceareacitymap',
+            index=models.Index(fields=['country_code', 'postal_code_from', 'postal_code_to'], name='dhl_api_sacm_postal_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dhl_api', '0022_serviceareacitymap_postal_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitypayload',
+            name='last_referenced_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Último lote escrito que referenció el payload'),
+        ),
+    ]
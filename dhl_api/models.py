@@ -122,6 +122,10 @@ class Shipment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Envío'
         verbose_name_plural = 'Envíos'
+        # Historial por usuario (paginación por cursor sobre created_at, id)
+        indexes = [
+            models.Index(fields=['created_by', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"Envío {self.tracking_number or self.id} - {self.shipper_name}"
@@ -177,6 +181,10 @@ class RateQuote(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Cotización'
         verbose_name_plural = 'Cotizaciones'
+        # Historial por usuario (paginación por cursor sobre created_at, id)
+        indexes = [
+            models.Index(fields=['created_by', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"Cotización {self.id} - {self.service_name}"
@@ -314,7 +322,13 @@ class LandedCostQuote(models.Model):
 
 
 class UserActivity(models.Model):
-    """Modelo para almacenar el historial de actividades de usuarios"""
+    """Modelo para almacenar el historial de actividades de usuarios
+
+    En PostgreSQL la tabla está particionada por mes de ``created_at`` y los
+    meses fuera de la retención se archivan con ``archive_user_activity``
+    (ver dhl_api/utils/activity_partitions.py). Las consultas deben acotar
+    ``created_at`` para leer solo las particiones necesarias.
+    """
     
     ACTION_CHOICES = [
         ('login', 'Inicio de sesión'),
@@ -333,6 +347,14 @@ class UserActivity(models.Model):
         ('landed_cost_quote', 'Cotización Landed Cost'),
         ('validate_landed_cost', 'Validar Landed Cost'),
         ('epod_request', 'Solicitud ePOD'),
+        ('create_contact', 'Crear contacto'),
+        ('update_contact', 'Editar contacto'),
+        ('delete_contact', 'Eliminar contacto'),
+        ('add_favorite', 'Agregar contacto a favoritos'),
+        ('remove_favorite', 'Quitar contacto de favoritos'),
+        ('auto_create_contacts', 'Crear contactos desde envío'),
+        ('import_contacts', 'Importar contactos'),
+        ('export_contacts', 'Exportar contactos'),
         ('api_error', 'Error de API'),
         ('system_action', 'Acción del sistema'),
     ]
@@ -371,10 +393,9 @@ class UserActivity(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Actividad de Usuario'
         verbose_name_plural = 'Actividades de Usuario'
+        # Un solo índice secundario: cada índice extra se paga en cada INSERT
         indexes = [
             models.Index(fields=['user', '-created_at']),
-            models.Index(fields=['action', '-created_at']),
-            models.Index(fields=['status', '-created_at']),
         ]
     
     def __str__(self):
@@ -385,24 +406,22 @@ class UserActivity(models.Model):
         """
         Método de utilidad para registrar actividades de usuario
         
+        El evento se encola y se escribe en lotes fuera de la petición
+        (ver dhl_api/utils/audit.py); puede omitirse según AUDIT_SAMPLING.
+        
         Args:
             user: Usuario que realiza la acción
             action: Tipo de acción (debe estar en ACTION_CHOICES)
             description: Descripción de la acción
             status: Estado de la acción (success, error, warning, info)
             **kwargs: Argumentos adicionales (ip_address, user_agent, resource_type, resource_id, metadata)
+        
+        Returns:
+            True si el evento quedó encolado (o escrito)
         """
-        return cls.objects.create(
-            user=user,
-            action=action,
-            description=description,
-            status=status,
-            ip_address=kwargs.get('ip_address'),
-            user_agent=kwargs.get('user_agent'),
-            resource_type=kwargs.get('resource_type'),
-            resource_id=kwargs.get('resource_id'),
-            metadata=kwargs.get('metadata')
-        )
+        from .utils.audit import log_activity
+
+        return log_activity(user, action, description, status=status, **kwargs)
     
     def to_dict(self):
         """Convierte la actividad a diccionario para serialización"""
@@ -422,6 +441,65 @@ class UserActivity(models.Model):
         }
 
 
+class UserActivityDailyRollup(models.Model):
+    """Conteo diario de actividades por (usuario, acción, estado).
+
+    Se incrementa en la misma transacción en que el pipeline de auditoría
+    escribe cada lote de ``UserActivity`` y se puede recalcular con
+    ``rebuild_activity_rollups``. Las estadísticas leen de aquí, así que
+    sobreviven al archivo de actividades antiguas.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups')
+    day = models.DateField()
+    action = models.CharField(max_length=30, choices=UserActivity.ACTION_CHOICES)
+    status = models.CharField(max_length=10, choices=UserActivity.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Actividad'
+        verbose_name_plural = 'Resúmenes Diarios de Actividad'
+        unique_together = [['user', 'day', 'action', 'status']]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} {self.day} {self.action}/{self.status}: {self.count}"
+
+
+class ActivityPayload(models.Model):
+    """Payload grande de una actividad (request/response), comprimido y deduplicado.
+
+    ``UserActivity.metadata`` guarda solo un resumen y el ``digest`` (SHA-256
+    del JSON canónico) en ``metadata['payload_refs']``; el contenido se carga
+    bajo demanda desde el detalle de la actividad. Respuestas idénticas (ej.
+    el mismo error de DHL) comparten una fila. Ver dhl_api/utils/activity_payloads.py.
+    """
+
+    CODEC_CHOICES = [
+        ('zlib', 'zlib'),
+        ('zstd', 'zstd'),
+    ]
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    codec = models.CharField(max_length=8, choices=CODEC_CHOICES, default='zlib')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(help_text="Bytes del JSON sin comprimir")
+    stored_size = models.PositiveIntegerField(help_text="Bytes comprimidos")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Se actualiza en cada lote de auditoría que lo referencia (también si ya existía)
+    last_referenced_at = models.DateTimeField(default=timezone.now, db_index=True,
+                                              help_text="Último lote escrito que referenció el payload")
+
+    class Meta:
+        verbose_name = 'Payload de Actividad'
+        verbose_name_plural = 'Payloads de Actividad'
+
+    def __str__(self) -> str:
+        return f"{self.digest[:12]} ({self.codec}, {self.size} → {self.stored_size} bytes)"
+
+
 class Contact(models.Model):
     """Modelo para almacenar agenda de contactos general para remitentes y destinatarios"""
     
@@ -444,10 +522,18 @@ class Contact(models.Model):
     usage_count = models.PositiveIntegerField(default=0, verbose_name='Veces Usado')
     last_used = models.DateTimeField(null=True, blank=True, verbose_name='Último Uso')
     
+    # Columna de búsqueda plegada (nombre, empresa, email, teléfono, ciudad) mantenida por save().
+    # En PostgreSQL tiene un índice GIN trigram (ver migración 0020).
+    search_key = models.CharField(max_length=600, blank=True, default='', editable=False,
+                                  help_text="Texto de búsqueda normalizado (nombre, empresa, email, teléfono, ciudad)")
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Campos que componen ``search_key``
+    SEARCH_FIELDS = ('name', 'company', 'email', 'phone', 'city')
+    
     class Meta:
         ordering = ['-is_favorite', '-usage_count', '-last_used', '-created_at']
         verbose_name = 'Contacto'
@@ -458,6 +544,36 @@ class Contact(models.Model):
     def __str__(self):
         return f"{self.name} ({self.email})"
     
+    @staticmethod
+    def compose_search_key(name='', company='', email='', phone='', city='') -> str:
+        """Construye el valor de ``search_key``; el orden de los campos es el que usa el ranking."""
+        from .utils.contact_search import build_search_key
+        return build_search_key(name, company, email, phone, city)
+    
+    def refresh_search_key(self):
+        """Recalcula ``search_key`` a partir de los campos de búsqueda."""
+        self.search_key = self.compose_search_key(self.name, self.company, self.email, self.phone, self.city)
+        return self.search_key
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.refresh_search_key()
+        elif set(update_fields) & set(self.SEARCH_FIELDS):
+            self.refresh_search_key()
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+        # Favorito, uso y recencia también cambian el ranking del autocompletado
+        from .utils.contact_search import invalidate_contact_search
+        invalidate_contact_search(self.created_by_id)
+    
+    def delete(self, *args, **kwargs):
+        user_id = self.created_by_id
+        result = super().delete(*args, **kwargs)
+        from .utils.contact_search import invalidate_contact_search
+        invalidate_contact_search(user_id)
+        return result
+    
     def increment_usage(self):
         """Incrementa el contador de uso y actualiza last_used"""
         self.usage_count += 1
@@ -497,6 +613,14 @@ class ServiceZone(models.Model):
     postal_code_from = models.CharField(max_length=20, blank=True, help_text="Código postal inicial")
     postal_code_to = models.CharField(max_length=20, blank=True, help_text="Código postal final")
     
+    # Columna de búsqueda plegada (sin acentos, minúsculas) mantenida por la aplicación.
+    # En PostgreSQL tiene un índice GIN trigram (ver migración 0010).
+    search_text = models.CharField(max_length=400, blank=True, default='', editable=False,
+                                   help_text="Texto de búsqueda normalizado (ciudad, estado, área, país)")
+    # Huella de la fila normalizada del ESD; la recarga incremental compara contra ella
+    row_hash = models.CharField(max_length=32, blank=True, default='', editable=False,
+                                help_text="Huella de los campos del ESD (carga incremental)")
+    
     # Campos para optimizar consultas
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -526,6 +650,24 @@ class ServiceZone(models.Model):
         else:
             return f"{location} - {self.service_area}"
     
+    @staticmethod
+    def compose_search_text(city_name='', state_name='', state_code='', service_area='', country_name='') -> str:
+        """Construye el valor de ``search_text``; el orden define la prioridad del ranking."""
+        from .utils.text_search import build_search_text
+        return build_search_text(city_name, state_name, state_code, service_area, country_name)
+    
+    def refresh_search_text(self):
+        """Recalcula ``search_text`` a partir de los campos de ubicación."""
+        self.search_text = self.compose_search_text(
+            self.city_name, self.state_name, self.state_code, self.service_area, self.country_name
+        )
+        return self.search_text
+    
+    def save(self, *args, **kwargs):
+        # bulk_create no pasa por aquí: los cargadores llaman refresh_search_text() explícitamente
+        self.refresh_search_text()
+        super().save(*args, **kwargs)
+    
     @classmethod
     def get_countries(cls):
         """Obtiene lista única de países"""
@@ -730,6 +872,8 @@ class ServiceAreaCityMap(models.Model):
             models.Index(fields=['country_code', 'state_code', 'service_area']),
             models.Index(fields=['country_code', 'city_name']),
             models.Index(fields=['country_code', 'state_code', 'city_name']),
+            # Búsqueda por rango postal (resolve-display): desde <= código <= hasta
+            models.Index(fields=['country_code', 'postal_code_from', 'postal_code_to'], name='dhl_api_sacm_postal_idx'),
         ]
         unique_together = [
             ['country_code', 'state_code', 'service_area', 'postal_code_from', 'postal_code_to']
@@ -775,8 +919,15 @@ class ServiceAreaCityMap(models.Model):
             rng_match = rng_match.filter(postal_code_from__lte=pc, postal_code_to__gte=pc)
             obj = rng_match.order_by('-state_code').first()
             if obj:
+                display = obj.display_name
+                if obj.postal_code_from != obj.postal_code_to:
+                    from .utils.postal_ranges import SERVICE_AREA_MAP, is_compacted, map_display_name
+
+                    # Rango compactado: el display original era por código ("Ciudad L4B1B1")
+                    if is_compacted(SERVICE_AREA_MAP, obj.id):
+                        display = map_display_name(obj.city_name, pc, pc)
                 return {
-                    'display_name': obj.display_name,
+                    'display_name': display,
                     'source': 'range',
                     'used_mapping': obj.id,
                 }
@@ -797,4 +948,98 @@ class ServiceAreaCityMap(models.Model):
             'display_name': display,
             'source': 'fallback',
             'used_mapping': None,
-        }
\ No newline at end of file
+        }
+
+class CityServiceAreaMap(models.Model):
+    """Área de servicio canónica por (país, estado, ciudad normalizada).
+
+    Se deriva en tiempo de carga desde ServiceAreaCityMap y ServiceZone
+    (comando ``build_city_service_area_map``). Cuando una ciudad aparece con
+    varias áreas de servicio gana la de mayor cobertura postal. Las filas con
+    ``state_code`` vacío agregan todos los estados del país.
+    """
+
+    country_code = models.CharField(max_length=2, help_text="Código de país ISO (2 letras)")
+    state_code = models.CharField(max_length=10, blank=True, help_text="Código de estado/provincia (vacío = todo el país)")
+    city_key = models.CharField(max_length=120, help_text="Nombre de ciudad normalizado (sin acentos, minúsculas)")
+    city_name = models.CharField(max_length=120, help_text="Nombre de ciudad tal como aparece en los datos")
+    service_area = models.CharField(max_length=10, help_text="Área de servicio canónica")
+
+    postal_coverage = models.BigIntegerField(default=0, help_text="Códigos postales cubiertos por el área ganadora")
+    candidate_count = models.PositiveIntegerField(default=1, help_text="Áreas de servicio candidatas para la ciudad")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Área de Servicio Canónica por Ciudad'
+        verbose_name_plural = 'Áreas de Servicio Canónicas por Ciudad'
+        indexes = [
+            models.Index(fields=['country_code', 'city_key']),
+        ]
+        unique_together = [
+            ['country_code', 'state_code', 'city_key']
+        ]
+
+    def __str__(self) -> str:
+        scope = self.country_code
+        if self.state_code:
+            scope += f"-{self.state_code}"
+        return f"{scope} {self.city_name} → {self.service_area}"
+
+
+class PostalRangeCompaction(models.Model):
+    """Rangos postales originales de una fila producida por la compactación.
+
+    ``compact_postal_ranges`` fusiona códigos contiguos con los mismos datos en
+    un único rango y guarda aquí los pares (desde, hasta) fusionados, de modo
+    que ``compact_postal_ranges --expand`` pueda restaurar las filas
+    originales. ``postal_code_from``/``postal_code_to`` son los límites de la
+    fila compactada al momento de fusionar: si la fila se reemplaza en una
+    recarga, la entrada deja de coincidir y se descarta.
+    """
+
+    DATASET_CHOICES = [
+        ('service_zone', 'ServiceZone (ESD)'),
+        ('service_area_map', 'ServiceAreaCityMap'),
+    ]
+
+    dataset = models.CharField(max_length=20, choices=DATASET_CHOICES)
+    row_id = models.BigIntegerField(help_text="id de la fila compactada")
+    country_code = models.CharField(max_length=2)
+    postal_code_from = models.CharField(max_length=20)
+    postal_code_to = models.CharField(max_length=20)
+    source_rows = models.PositiveIntegerField(help_text="Filas originales fusionadas")
+    original_ranges = models.TextField(help_text="JSON [[desde, hasta], ...] de las filas originales")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Compactación de Rango Postal'
+        verbose_name_plural = 'Compactaciones de Rangos Postales'
+        indexes = [
+            models.Index(fields=['dataset', 'country_code']),
+        ]
+        unique_together = [['dataset', 'row_id']]
+
+    def __str__(self) -> str:
+        return f"{self.dataset}#{self.row_id} [{self.postal_code_from}-{self.postal_code_to}] ({self.source_rows} filas)"
+
+
+class DatasetVersion(models.Model):
+    """Contador de versión de un conjunto de datos de referencia.
+
+    Los comandos de carga lo incrementan; la versión forma parte de las claves
+    de caché de los endpoints de referencia, de modo que una recarga invalida
+    todas las respuestas cacheadas en todos los workers.
+    """
+
+    name = models.CharField(max_length=50, unique=True, help_text="Nombre del dataset (ej: reference)")
+    version = models.PositiveBigIntegerField(default=0)
+    reason = models.CharField(max_length=200, blank=True, help_text="Último comando que incrementó la versión")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versión de Dataset'
+        verbose_name_plural = 'Versiones de Dataset'
+
+    def __str__(self) -> str:
+        return f"{self.name} v{self.version}"
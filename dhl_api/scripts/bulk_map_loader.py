@@ -6,6 +6,8 @@ Características:
 - Filtros por países (CA,US,...) y delimitador opcional
 - Modo interactivo para decidir cuándo subir el siguiente chunk
 - Reintentos por chunk y pausa configurable entre chunks
+- Con --workers/--checkpoint delega en el modo por shards del command (rangos de
+  bytes en paralelo, reanudable): no relee el archivo desde el inicio en cada chunk
 
 Uso dentro del contenedor (Windows):
   django-manage.bat shell -c "import dhl_api.scripts.bulk_map_loader as m; m.main()"
@@ -46,6 +48,11 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     p.add_argument('--delimiter', default='', help='Delimitador CSV (auto si vacío)')
     p.add_argument('--derive-service-area', action='store_true', help='Inferir service_area por postal con ServiceZone')
     p.add_argument('--upsert', action='store_true', help='Actualizar si existe (idempotente)')
+    p.add_argument('--fast', action='store_true', help='Carga masiva vía COPY/executemany')
+
+    p.add_argument('--workers', type=positive_int, default=1, help='Procesos en paralelo (modo por shards)')
+    p.add_argument('--checkpoint', default='', help='Checkpoint JSON para reanudar (modo por shards)')
+    p.add_argument('--shard-mb', type=positive_int, default=64, help='Tamaño aproximado de cada shard en MB')
 
     p.add_argument('--start-row', type=positive_int, default=0, help='Fila inicial (datos) para empezar (skip)')
     p.add_argument('--chunk-rows', type=positive_int, default=1_000_000, help='Filas por chunk (ej: 1,000,000)')
@@ -75,14 +82,43 @@ def run_chunk(args: argparse.Namespace, start_row: int, rows: int) -> None:
         kwargs['derive_service_area'] = True
     if args.upsert:
         kwargs['upsert'] = True
+    if args.fast:
+        kwargs['fast'] = True
 
     print(f"[chunk] start_row={start_row} rows={rows} countries={kwargs.get('countries','ALL')} upsert={args.upsert}")
     call_command('load_service_area_map', **kwargs)
 
 
+def run_sharded(args: argparse.Namespace) -> None:
+    kwargs = {
+        'file': args.file,
+        'workers': args.workers,
+        'checkpoint': args.checkpoint,
+        'shard_mb': args.shard_mb or 64,
+        'progress_every': args.progress_every,
+    }
+    for flag in ('countries', 'delimiter', 'derive_service_area', 'upsert', 'fast'):
+        value = getattr(args, flag)
+        if value:
+            kwargs[flag] = value
+
+    print(f"[shards] workers={args.workers} checkpoint={args.checkpoint or '-'} countries={kwargs.get('countries','ALL')}")
+    if args.dry_run:
+        print("[dry-run] Sin ejecutar inserciones. Solo plan.")
+        return
+    call_command('load_service_area_map', **kwargs)
+
+
 def main(argv: Optional[list[str]] = None) -> None:
     args = parse_args(argv)
 
+    if args.workers > 1 or args.checkpoint:
+        print("=== Carga por shards del mapeo service_area ===")
+        t0 = time.time()
+        run_sharded(args)
+        print(f"=== Finalizado en {time.time() - t0:.1f}s ===")
+        return
+
     start = args.start_row
     chunk = args.chunk_rows
     max_chunks = args.max_chunks or float('inf')
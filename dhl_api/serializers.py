@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Shipment, TrackingEvent, RateQuote, EPODDocument, DHLAccount, UserActivity, Contact, ServiceZone, ServiceAreaCityMap
+from .utils.fast_serializers import FastSerializer
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -393,4 +394,14 @@ class PostalCodeSerializer(serializers.Serializer):
     """Serializer para códigos postales"""
     postal_code_from = serializers.CharField(max_length=20)
     postal_code_to = serializers.CharField(max_length=20)
-    service_area = serializers.CharField(max_length=10)
\ No newline at end of file
+    service_area = serializers.CharField(max_length=10)
+
+# Versiones compiladas de solo lectura para listados grandes (ver utils/fast_serializers.py)
+FAST_SHIPMENTS = FastSerializer(ShipmentSerializer)
+FAST_RATE_QUOTES = FastSerializer(RateQuoteSerializer)
+FAST_USER_ACTIVITIES = FastSerializer(UserActivitySerializer)
+FAST_SERVICE_ZONES = FastSerializer(ServiceZoneSerializer)
+FAST_COUNTRIES = FastSerializer(CountrySerializer)
+FAST_STATES = FastSerializer(StateSerializer)
+FAST_CITIES = FastSerializer(CitySerializer)
+FAST_POSTAL_CODES = FastSerializer(PostalCodeSerializer)
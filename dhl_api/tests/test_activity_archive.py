@@ -0,0 +1,86 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from dhl_api.models import UserActivity
+from dhl_api.utils.activity_partitions import add_months, archive_activity, archive_path, month_bounds
+
+
+def _activity(user, when, action='get_rate'):
+    activity = UserActivity.objects.create(user=user, action=action, description=f'{action} {when:%Y-%m-%d}')
+    UserActivity.objects.filter(pk=activity.pk).update(created_at=when)
+    return activity.pk
+
+
+class ActivityArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('archiver', password='x')
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+
+    def test_month_helpers(self):
+        self.assertEqual(add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        lower, upper = month_bounds(date(2024, 12, 1))
+        self.assertEqual((lower.month, upper.year, upper.month), (12, 2025, 1))
+
+    def test_archives_old_months_in_chunks(self):
+        old = [_activity(self.user, datetime(2025, 1, d, 12, tzinfo=dt_timezone.utc)) for d in range(1, 6)]
+        _activity(self.user, datetime(2025, 2, 10, tzinfo=dt_timezone.utc), action='track_shipment')
+        recent = _activity(self.user, datetime(2025, 6, 1, tzinfo=dt_timezone.utc))
+
+        results = archive_activity(retention_months=3, archive_dir=self.archive_dir, chunk_size=2,
+                                   today=date(2025, 6, 15))
+
+        self.assertEqual([(r['month'], r['rows'], r['method']) for r in results],
+                         [('2025-01', 5, 'chunked-delete'), ('2025-02', 1, 'chunked-delete')])
+        self.assertEqual(list(UserActivity.objects.values_list('pk', flat=True)), [recent])
+        with gzip.open(archive_path(self.archive_dir, date(2025, 1, 1)), 'rt') as fh:
+            rows = [json.loads(line) for line in fh]
+        self.assertEqual([r['id'] for r in rows], old)
+        self.assertEqual(rows[0]['user_id'], self.user.pk)
+
+    def test_dry_run_keeps_rows(self):
+        _activity(self.user, datetime(2024, 3, 1, tzinfo=dt_timezone.utc))
+        out = StringIO()
+        call_command('archive_user_activity', '--retention-months', '1', '--archive-dir', self.archive_dir,
+                     '--dry-run', stdout=out)
+        self.assertIn('2024-03: 1 filas', out.getvalue())
+        self.assertEqual(UserActivity.objects.count(), 1)
+
+
+class UserActivitiesViewTests(APITestCase):
+    def test_lists_only_the_requested_window(self):
+        user = User.objects.create_user('viewer', password='x')
+        self.client.force_authenticate(user)
+        recent = _activity(user, timezone.now() - timezone.timedelta(days=2))
+        _activity(user, timezone.now() - timezone.timedelta(days=40))
+
+        response = self.client.get(reverse('user_activities'), {'days': 30})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['id'] for a in response.data['data']], [recent])
+        self.assertEqual(response.data['window']['days'], 30)
+
+    def test_explicit_range_overrides_default_window(self):
+        user = User.objects.create_user('historian', password='x')
+        self.client.force_authenticate(user)
+        old = _activity(user, datetime(2024, 3, 15, 12, tzinfo=dt_timezone.utc))
+        _activity(user, datetime(2024, 5, 2, 12, tzinfo=dt_timezone.utc))
+
+        response = self.client.get(reverse('user_activities'), {'date_from': '2024-03-01T00:00', 'date_to': '2024-03-31'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['id'] for a in response.data['data']], [old])
+        self.assertIsNone(response.data['window']['days'])
+        self.assertEqual(self.client.get(reverse('user_activities'), {'date_from': 'ayer'}).status_code, 400)
@@ -0,0 +1,118 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import ActivityPayload, UserActivity
+from dhl_api.utils.activity_partitions import archive_activity, archive_path
+from dhl_api.utils.activity_payloads import REFS_KEY, load_payloads, purge_orphan_payloads, split_payloads
+from dhl_api.utils.write_behind import WriteBehindRecorder
+
+BIG_RESPONSE = {'success': False, 'message': 'Servicio no disponible', 'raw_response_preview': 'x' * 4000}
+
+
+def _log(user, weight='1.50'):
+    UserActivity.log_activity(user, 'get_rate', 'Error en cotización', status='error', metadata={
+        'origin_country': 'PA',
+        'request_payload': {'weight': Decimal(weight), 'notes': 'y' * 2000},
+        'response_payload': BIG_RESPONSE,
+    })
+    return UserActivity.objects.filter(user=user).latest('id')
+
+
+@override_settings(AUDIT_PAYLOAD_INLINE_MAX=1024)
+class ActivityPayloadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('payloads', password='x')
+
+    def test_split_keeps_small_values_inline(self):
+        metadata, records = split_payloads({'a': 1, 'big': ['z' * 50] * 40}, inline_max=1024)
+        self.assertEqual(metadata['a'], 1)
+        self.assertNotIn('big', metadata)
+        self.assertEqual(metadata[REFS_KEY]['big']['summary'], 'lista, 40 elementos')
+        self.assertLess(records[0]['stored_size'], records[0]['size'])
+
+    def test_identical_payloads_are_stored_once(self):
+        first = _log(self.user, '1.50')
+        second = _log(self.user, '2.00')
+
+        # Mismo response en ambas, request distinto: 3 payloads
+        self.assertEqual(ActivityPayload.objects.count(), 3)
+        self.assertEqual(first.metadata[REFS_KEY]['response_payload'], second.metadata[REFS_KEY]['response_payload'])
+        self.assertEqual(first.metadata['origin_country'], 'PA')
+        full = load_payloads(second.metadata)
+        self.assertEqual(full['response_payload'], BIG_RESPONSE)
+        self.assertEqual(full['request_payload']['weight'], '2.00')
+        self.assertNotIn(REFS_KEY, full)
+
+    def test_archive_inlines_payloads_and_purges_orphans(self):
+        activity = _log(self.user)
+        UserActivity.objects.filter(pk=activity.pk).update(created_at=datetime(2024, 1, 5, tzinfo=dt_timezone.utc))
+        old = datetime(2024, 1, 5, tzinfo=dt_timezone.utc)
+        ActivityPayload.objects.update(created_at=old, last_referenced_at=old)
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir, True)
+
+        archive_activity(retention_months=1, archive_dir=archive_dir, today=date(2024, 6, 1))
+
+        with gzip.open(archive_path(archive_dir, date(2024, 1, 1)), 'rt') as fh:
+            row = json.loads(fh.readline())
+        self.assertEqual(row['metadata']['response_payload'], BIG_RESPONSE)
+        self.assertEqual(ActivityPayload.objects.count(), 0)
+
+    def test_purge_keeps_referenced_payloads(self):
+        _log(self.user)
+        ActivityPayload.objects.update(created_at=datetime(2024, 1, 5, tzinfo=dt_timezone.utc))
+        self.assertEqual(purge_orphan_payloads(datetime(2025, 1, 1, tzinfo=dt_timezone.utc)), 0)
+        self.assertEqual(ActivityPayload.objects.count(), 2)
+
+    def test_purge_keeps_old_payload_reused_by_a_new_event(self):
+        old = datetime(2024, 1, 5, tzinfo=dt_timezone.utc)
+        first = _log(self.user)
+        UserActivity.objects.filter(pk=first.pk).delete()  # ya archivada
+        ActivityPayload.objects.update(created_at=old, last_referenced_at=old)
+
+        # El evento nuevo reutiliza los mismos payloads: el lote que lo escribe los marca
+        second = _log(self.user)
+        self.assertEqual(ActivityPayload.objects.filter(last_referenced_at__gt=old).count(), 2)
+        self.assertEqual(purge_orphan_payloads(datetime(2025, 1, 1, tzinfo=dt_timezone.utc)), 0)
+        self.assertEqual(load_payloads(second.metadata)['response_payload'], BIG_RESPONSE)
+
+    def test_spilled_payloads_replay_with_binary_data(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir, True)
+        recorder = WriteBehindRecorder('payload-test', spill_dir=spill_dir, enabled=False,
+                                       ignore_conflicts=('dhl_api.ActivityPayload',))
+        _, records = split_payloads({'response_payload': BIG_RESPONSE})
+        recorder._spill([('dhl_api.ActivityPayload', r) for r in records * 2])
+
+        self.assertEqual(recorder.replay_spill(), 2)
+        payload = ActivityPayload.objects.get()
+        self.assertEqual(bytes(payload.data), records[0]['data'])
+
+
+@override_settings(AUDIT_PAYLOAD_INLINE_MAX=1024)
+class ActivityDetailViewTests(APITestCase):
+    def test_list_returns_refs_and_detail_loads_payloads(self):
+        user = User.objects.create_user('detail', password='x')
+        other = User.objects.create_user('other', password='x')
+        activity = _log(user)
+        self.client.force_authenticate(user)
+
+        listed = self.client.get(reverse('user_activities')).data['data'][0]
+        self.assertIn(REFS_KEY, listed['metadata'])
+        self.assertNotIn('response_payload', listed['metadata'])
+
+        detail = self.client.get(reverse('user_activity_detail', args=[activity.id]))
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data['data']['metadata']['response_payload'], BIG_RESPONSE)
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(reverse('user_activity_detail', args=[activity.id])).status_code, 404)
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from dhl_api.models import UserActivity, UserActivityDailyRollup
+from dhl_api.utils.activity_rollups import rollup_stats
+
+
+class ActivityRollupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('rollup', password='x')
+        self.other = User.objects.create_user('rollup-other', password='x')
+
+    def test_pipeline_maintains_daily_counts(self):
+        for _ in range(3):
+            UserActivity.log_activity(self.user, 'get_rate', 'Cotización')
+        UserActivity.log_activity(self.user, 'get_rate', 'Error', status='error')
+        UserActivity.log_activity(self.other, 'login', 'Ingreso')
+
+        today = timezone.localdate()
+        self.assertEqual(
+            UserActivityDailyRollup.objects.get(user=self.user, day=today, action='get_rate', status='success').count, 3
+        )
+        stats = rollup_stats(today, today, user=self.user)
+        self.assertEqual(stats['summary']['total_activities'], 4)
+        self.assertEqual(stats['summary']['success_rate'], 75.0)
+        self.assertEqual(stats['by_status'], {'success': 3, 'error': 1})
+
+    def test_rebuild_recomputes_range_from_activities(self):
+        UserActivity.log_activity(self.user, 'login', 'Ingreso')
+        activity = UserActivity.objects.get()
+        UserActivity.objects.filter(pk=activity.pk).update(created_at=datetime(2025, 3, 2, 10, tzinfo=dt_timezone.utc))
+        UserActivityDailyRollup.objects.all().delete()
+
+        call_command('rebuild_activity_rollups', '--date-from', '2025-03-01', '--date-to', '2025-03-31', stdout=StringIO())
+
+        rollup = UserActivityDailyRollup.objects.get()
+        self.assertEqual((rollup.day, rollup.action, rollup.count), (date(2025, 3, 2), 'login', 1))
+
+    def test_stats_view_reads_rollups_for_a_range(self):
+        UserActivityDailyRollup.objects.bulk_create([
+            UserActivityDailyRollup(user=self.user, day=date(2025, 1, 1), action='get_rate', status='success', count=5),
+            UserActivityDailyRollup(user=self.user, day=date(2025, 1, 9), action='login', status='success', count=2),
+            UserActivityDailyRollup(user=self.user, day=date(2025, 2, 1), action='login', status='success', count=7),
+            UserActivityDailyRollup(user=self.other, day=date(2025, 1, 9), action='login', status='error', count=1),
+        ])
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(reverse('user_activity_stats'), {'date_from': '2025-01-01', 'date_to': '2025-01-31'})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual(data['summary']['total_activities'], 7)
+        self.assertEqual(data['by_action'], {'get_rate': 5, 'login': 2})
+        self.assertEqual(data['summary']['period_days'], 31)
+        self.assertNotIn('top_users', data)
+        self.assertEqual(
+            self.client.get(reverse('user_activity_stats'), {'date_from': 'ayer'}).status_code, 400
+        )
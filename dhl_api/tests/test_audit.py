@@ -0,0 +1,98 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from dhl_api.models import UserActivity, UserActivityDailyRollup
+from dhl_api.utils import audit
+from dhl_api.utils.write_behind import WriteBehindRecorder
+
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('audit', password='x')
+
+    def test_sync_mode_writes_immediately(self):
+        metadata = {'weight': Decimal('1.50'), 'service': 'P'}
+        self.assertTrue(UserActivity.log_activity(self.user, 'get_rate', 'Cotización', metadata=metadata,
+                                                  ip_address='10.0.0.1'))
+        metadata['service'] = 'D'
+
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual(activity.action, 'get_rate')
+        self.assertEqual(activity.ip_address, '10.0.0.1')
+        # Se guarda la instantánea tomada al encolar, ya serializada a JSON
+        self.assertEqual(activity.metadata, {'weight': '1.50', 'service': 'P'})
+
+    @override_settings(AUDIT_SAMPLING={'track_shipment': 0.0, '*': 1.0})
+    def test_sampling_skips_success_but_keeps_errors(self):
+        recorder = audit.audit_recorder()
+        sampled_before = recorder.counters['sampled_out']
+
+        self.assertFalse(UserActivity.log_activity(self.user, 'track_shipment', 'Rastreo'))
+        self.assertTrue(UserActivity.log_activity(self.user, 'track_shipment', 'Rastreo fallido', status='error'))
+        self.assertTrue(UserActivity.log_activity(self.user, 'get_rate', 'Cotización'))
+
+        self.assertEqual(
+            list(UserActivity.objects.filter(user=self.user).order_by('id').values_list('action', 'status')),
+            [('track_shipment', 'error'), ('get_rate', 'success')],
+        )
+        self.assertEqual(recorder.counters['sampled_out'] - sampled_before, 1)
+        # El resumen diario cuenta también el evento omitido
+        self.assertEqual(
+            sorted(UserActivityDailyRollup.objects.filter(user=self.user).values_list('action', 'status', 'count')),
+            [('get_rate', 'success', 1), ('track_shipment', 'error', 1), ('track_shipment', 'success', 1)],
+        )
+
+    @patch('dhl_api.views.DHLService')
+    def test_pickup_activity_updates_rollups(self, service):
+        service.return_value.create_pickup.return_value = {'success': True, 'dispatch_confirmation_number': 'PRG1'}
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {f: {} for f in ['shipper', 'receiver', 'bookingRequestor', 'pickupDetails']}
+        payload.update(plannedPickupDateAndTime='2026-10-20T10:00:00', account_number='123')
+
+        response = client.post(reverse('pickup'), payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(UserActivityDailyRollup.objects.filter(user=self.user).values_list('action', 'status', 'count')),
+            [('system_action', 'success', 1)],
+        )
+
+
+class AuditAsyncTests(TransactionTestCase):
+    def test_events_are_batched_until_flush(self):
+        user = User.objects.create_user('audit-async', password='x')
+        recorder = WriteBehindRecorder('audit-test', flush_size=1000, flush_interval=60, spill_dir=None)
+        self.addCleanup(recorder.shutdown)
+
+        with patch.object(audit, 'audit_recorder', return_value=recorder):
+            for i in range(5):
+                UserActivity.log_activity(user, 'view_shipment', f'Envío {i}', resource_id=str(i))
+            self.assertEqual(UserActivity.objects.count(), 0)
+            self.assertEqual(audit.flush_audit(), 5)
+
+        self.assertEqual(UserActivity.objects.filter(user=user).count(), 5)
+        self.assertEqual(recorder.stats()['queue_depth'], 0)
+
+    @override_settings(AUDIT_SAMPLING={'*': 0.0})
+    def test_sampled_out_events_reach_rollups_on_flush(self):
+        user = User.objects.create_user('audit-sampled', password='x')
+        recorder = WriteBehindRecorder('audit-sampled', flush_size=1000, flush_interval=60, spill_dir=None,
+                                       on_flush=audit._sampled_rollups.apply)
+        self.addCleanup(recorder.shutdown)
+
+        with patch.object(audit, 'audit_recorder', return_value=recorder):
+            for i in range(3):
+                self.assertFalse(UserActivity.log_activity(user, 'view_shipment', f'Envío {i}'))
+            self.assertEqual(UserActivityDailyRollup.objects.count(), 0)
+            audit.flush_audit()
+
+        self.assertEqual(UserActivity.objects.count(), 0)
+        rollup = UserActivityDailyRollup.objects.get(user=user)
+        self.assertEqual((rollup.action, rollup.status, rollup.count), ('view_shipment', 'success', 3))
+        self.assertEqual(audit._sampled_rollups.pending(), 0)
@@ -0,0 +1,67 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from dhl_api.models import ServiceAreaCityMap
+from dhl_api.utils.bulk_load import bulk_insert_ignore, bulk_upsert
+
+COLUMNS = ('country_code', 'state_code', 'service_area', 'city_name', 'display_name',
+           'postal_code_from', 'postal_code_to', 'notes')
+CONFLICT = ('country_code', 'state_code', 'service_area', 'postal_code_from', 'postal_code_to')
+
+
+class BulkInsertIgnoreTests(TestCase):
+    def test_skips_existing_rows_and_keeps_first_duplicate(self):
+        ServiceAreaCityMap.objects.create(
+            country_code='CA', state_code='ON', service_area='YHM', city_name='Hamilton',
+            display_name='Existente', postal_code_from='L8A', postal_code_to='L8A',
+        )
+        rows = [
+            ('CA', 'ON', 'YHM', 'Hamilton', 'Nuevo', 'L8A', 'L8A', ''),
+            ('CA', 'ON', 'YYZ', 'Toronto', 'Primero', 'M1A', 'M1A', ''),
+            ('CA', 'ON', 'YYZ', 'Toronto', 'Segundo', 'M1A', 'M1A', ''),
+            ('US', '', 'NYC', 'New York', 'New York', '', '', ''),
+        ]
+        stats = bulk_insert_ignore(ServiceAreaCityMap, COLUMNS, iter(rows), CONFLICT, chunk_size=2)
+
+        self.assertEqual(stats['staged'], 4)
+        self.assertEqual(stats['inserted'], 2)
+        self.assertEqual(ServiceAreaCityMap.objects.count(), 3)
+        self.assertEqual(ServiceAreaCityMap.objects.get(service_area='YHM').display_name, 'Existente')
+        self.assertEqual(ServiceAreaCityMap.objects.get(service_area='YYZ').display_name, 'Primero')
+        self.assertIsNotNone(ServiceAreaCityMap.objects.get(service_area='NYC').created_at)
+
+
+class BulkUpsertTests(TestCase):
+    def test_reports_created_updated_and_unchanged_per_batch(self):
+        ServiceAreaCityMap.objects.create(
+            country_code='CA', state_code='ON', service_area='YHM', city_name='Hamilton',
+            display_name='Viejo', postal_code_from='L8A', postal_code_to='L8A',
+        )
+        ServiceAreaCityMap.objects.create(
+            country_code='CA', state_code='ON', service_area='YYZ', city_name='Toronto',
+            display_name='Toronto', postal_code_from='M1A', postal_code_to='M1A',
+        )
+        rows = [
+            ('CA', 'ON', 'YHM', 'Hamilton', 'Nuevo', 'L8A', 'L8A', ''),
+            ('CA', 'ON', 'YYZ', 'Toronto', 'Toronto', 'M1A', 'M1A', ''),
+            ('US', 'NY', 'NYC', 'New York', 'Primero', '10001', '10001', ''),
+            ('US', 'NY', 'NYC', 'New York', 'Último', '10001', '10001', ''),
+        ]
+        batches = []
+        stats = bulk_upsert(
+            ServiceAreaCityMap, COLUMNS, iter(rows), CONFLICT,
+            update_columns=('city_name', 'display_name', 'notes'),
+            batch_size=2, on_batch=lambda *args: batches.append(args),
+        )
+
+        self.assertEqual(batches, [(1, 0, 1, 1), (2, 1, 0, 1)])
+        self.assertEqual((stats['created'], stats['updated']), (1, 1))
+        self.assertEqual(ServiceAreaCityMap.objects.get(service_area='YHM').display_name, 'Nuevo')
+        self.assertEqual(ServiceAreaCityMap.objects.get(service_area='NYC').display_name, 'Último')
+
+    def test_command_rejects_fast_with_upsert(self):
+        for command, options in [('load_service_area_map', {'file': 'mapa.csv'}), ('load_reference_all', {})]:
+            with self.assertRaisesMessage(CommandError, '--fast y --upsert no se combinan'):
+                call_command(command, fast=True, upsert=True, **options)
+        self.assertFalse(ServiceAreaCityMap.objects.exists())
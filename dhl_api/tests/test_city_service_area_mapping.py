@@ -0,0 +1,50 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import CityServiceAreaMap, ServiceAreaCityMap, ServiceZone
+from dhl_api.utils.service_area_mapping import (
+    get_city_service_area_mapping,
+    postal_span,
+    rebuild_city_service_area_map,
+)
+
+
+class CityServiceAreaMappingTests(APITestCase):
+    def setUp(self):
+        # Richmond Hill aparece con dos áreas: YYZ cubre más códigos postales que YHM
+        for sa, pf, pt in [('YHM', 'L4B1A1', 'L4B1A9'), ('YYZ', 'L4C0A0', 'L4C9Z9')]:
+            ServiceAreaCityMap.objects.create(
+                country_code='CA', state_code='ON', service_area=sa, city_name='Richmond Hill',
+                display_name=f'Richmond Hill {sa}', postal_code_from=pf, postal_code_to=pt,
+            )
+        ServiceZone.objects.create(
+            country_code='CO', country_name='COLOMBIA', state_code='DC', state_name='Cundinamarca',
+            city_name='Bogotá', service_area='BOG', postal_code_from='110111', postal_code_to='110999',
+        )
+        ServiceZone.objects.create(
+            country_code='CO', country_name='COLOMBIA', state_code='DC', state_name='Cundinamarca',
+            city_name='Bogota', service_area='XBG', postal_code_from='111000', postal_code_to='111001',
+        )
+        rebuild_city_service_area_map()
+
+    def test_postal_span(self):
+        self.assertEqual(postal_span('110111', '110999'), 889)
+        self.assertEqual(postal_span('', ''), 1)
+        self.assertGreater(postal_span('L4C0A0', 'L4C9Z9'), postal_span('L4B1A1', 'L4B1A9'))
+
+    def test_conflict_resolved_by_postal_coverage(self):
+        self.assertEqual(get_city_service_area_mapping('ca', 'richmond hill'), 'YYZ')
+        self.assertEqual(get_city_service_area_mapping('CA', 'Richmond Hill', 'ON'), 'YYZ')
+        # Acentos y mayúsculas se normalizan a la misma clave
+        self.assertEqual(get_city_service_area_mapping('CO', 'BOGOTÁ'), 'BOG')
+        self.assertIsNone(get_city_service_area_mapping('CO', 'Cali'))
+        row = CityServiceAreaMap.objects.get(country_code='CO', state_code='', city_key='bogota')
+        self.assertEqual(row.candidate_count, 2)
+
+    def test_postal_codes_filtered_by_canonical_area(self):
+        resp = self.client.get(
+            reverse('get_service_areas', args=['CO']), {'city_name': 'Bogotá', 'debug': '1'}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['debug']['detected_service_area'], 'BOG')
+        self.assertEqual({r['service_area'] for r in resp.data['data']}, {'BOG'})
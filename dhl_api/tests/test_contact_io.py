@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import Contact
+from dhl_api.utils.contact_io import JSONL, export_contacts, import_contacts, iter_records
+
+CSV_HEADER = 'name,company,phone,email,address,city,state,postal_code,country,is_favorite\n'
+
+
+class ContactImportExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('operador', password='x')
+        self.existing = Contact.objects.create(
+            created_by=self.user, name='Ana Ruiz', phone='6000-0000', email='ana@example.com',
+            address='Calle 50, Edificio Global', city='Panamá', postal_code='0801', country='PA', is_favorite=True,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_import_reports_each_row_and_deduplicates(self):
+        records = [
+            # Mismo email con otro formato: actualiza la empresa, conserva favorito
+            {'name': 'Ana Ruiz', 'company': 'ACME', 'phone': '6000-0000', 'email': ' ANA@example.com',
+             'address': 'Calle 50, Edificio Global', 'city': 'Panamá', 'postal_code': '0801', 'country': 'pa'},
+            # Misma dirección normalizada (sin email coincidente)
+            {'name': 'ana ruiz', 'phone': '6000-0000', 'email': 'ana.ruiz@example.com',
+             'address': 'calle 50 edificio global', 'city': 'Panamá', 'postal_code': '0801', 'country': 'PA'},
+            {'name': 'Luis Gómez', 'phone': '6111-1111', 'email': 'luis@example.com', 'address': 'Av. Balboa',
+             'city': 'Panamá', 'postal_code': '0801', 'country': 'PA', 'is_favorite': 'sí'},
+            {'name': 'Luis Gómez', 'phone': '6111-1111', 'email': 'LUIS@example.com', 'address': 'Av. Balboa',
+             'city': 'Panamá', 'postal_code': '0801', 'country': 'PA'},
+            {'name': 'Sin email', 'phone': '1', 'email': 'no-es-email', 'address': 'X', 'city': 'Y',
+             'postal_code': '1', 'country': 'Panama'},
+        ]
+        result = import_contacts(self.user, records, batch_size=2)
+        self.assertEqual([r['status'] for r in result['rows']],
+                         ['updated', 'duplicate', 'created', 'duplicate', 'error'])
+        self.assertEqual(result['rows'][1]['duplicate_of'], 1)
+        self.assertEqual(set(result['rows'][4]['errors']), {'email', 'country'})
+        self.assertEqual(result['summary']['total'], 5)
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.company, 'ACME')
+        self.assertTrue(self.existing.is_favorite)
+        luis = Contact.objects.get(email='luis@example.com')
+        self.assertTrue(luis.is_favorite)
+        self.assertIn('|luis gomez|', luis.search_key)
+
+        # Reimportar es idempotente
+        again = import_contacts(self.user, records[:1])
+        self.assertEqual(again['rows'][0]['status'], 'unchanged')
+
+    def test_email_of_another_person_is_a_conflict(self):
+        records = [
+            {'name': 'Pedro Díaz', 'phone': '6222-2222', 'email': 'ana@example.com', 'address': 'Vía España',
+             'city': 'Panamá', 'postal_code': '0802', 'country': 'PA'},
+            # Misma persona por dirección, aunque cambie el email: sí actualiza
+            {'name': 'Ana Ruiz', 'phone': '6000-0001', 'email': 'ana.ruiz@example.com',
+             'address': 'Calle 50, Edificio Global', 'city': 'Panamá', 'postal_code': '0801', 'country': 'PA'},
+        ]
+        result = import_contacts(self.user, records)
+
+        self.assertEqual([r['status'] for r in result['rows']], ['conflict', 'updated'])
+        self.assertEqual(result['rows'][0]['conflict_with'], self.existing.pk)
+        self.assertIn('email', result['rows'][0]['errors'])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.phone), ('Ana Ruiz', '6000-0001'))
+        self.assertFalse(Contact.objects.filter(name='Pedro Díaz').exists())
+
+    def test_malformed_line_is_reported_and_later_rows_are_imported(self):
+        row = {'phone': '1', 'address': 'A', 'city': 'B', 'postal_code': '1', 'country': 'PA'}
+        lines = [
+            json.dumps({**row, 'name': 'Uno', 'email': 'uno@example.com'}),
+            '{"name": "Roto",',
+            json.dumps({**row, 'name': 'Tres', 'email': 'tres@example.com'}),
+        ]
+        records = iter_records(io.StringIO('\n'.join(lines) + '\n'), JSONL)
+        with patch('dhl_api.utils.contact_io.invalidate_contact_search') as invalidate:
+            result = import_contacts(self.user, records, batch_size=1)
+
+        self.assertEqual([r['status'] for r in result['rows']], ['created', 'error', 'created'])
+        self.assertIn('Línea 2', result['rows'][1]['errors']['non_field_errors'])
+        self.assertTrue(Contact.objects.filter(email='tres@example.com').exists())
+        invalidate.assert_called_once_with(self.user.pk)
+
+    def test_dry_run_does_not_write(self):
+        result = import_contacts(self.user, [
+            {'name': 'Nuevo', 'phone': '1', 'email': 'nuevo@example.com', 'address': 'A', 'city': 'B',
+             'postal_code': '1', 'country': 'PA'},
+        ], dry_run=True)
+        self.assertEqual(result['rows'][0]['status'], 'created')
+        self.assertFalse(Contact.objects.filter(email='nuevo@example.com').exists())
+
+    def test_csv_export_round_trips_through_import_endpoint(self):
+        content = ''.join(export_contacts(Contact.objects.filter(created_by=self.user), 'csv'))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(rows[0]['email'], 'ana@example.com')
+
+        upload = CSV_HEADER + 'Carlos Díaz,,6222,carlos@example.com,"Calle 1, Casa 2",David,,0401,PA,\n'
+        response = self.client.post(reverse('contacts_import'), {
+            'file': SimpleUploadedFile('contactos.csv', (content + upload.split('\n', 1)[1]).encode('utf-8')),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        statuses = [r['status'] for r in response.json()['data']['rows']]
+        self.assertEqual(statuses, ['unchanged', 'created'])
+        self.assertTrue(Contact.objects.filter(email='carlos@example.com', address='Calle 1, Casa 2').exists())
+
+    def test_streaming_export_endpoint(self):
+        response = self.client.get(reverse('contacts_export'), {'export': 'jsonl'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(json.loads(lines[0])['name'], 'Ana Ruiz')
+
+        response = self.client.get(reverse('contacts_export'), {'export': 'json'})
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 1)
@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import Contact
+from dhl_api.utils.contact_search import autocomplete_contacts, get_candidates
+
+
+def _contact(user, name, **extra):
+    data = {'phone': '6000-0000', 'email': f'{name.split()[0].lower()}@example.com', 'address': 'Calle 1',
+            'city': 'Panamá', 'postal_code': '0801', 'country': 'PA'}
+    data.update(extra)
+    return Contact.objects.create(created_by=user, name=name, **data)
+
+
+class ContactSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('agenda', password='x')
+        self.jose = _contact(self.user, 'José Pérez', company='Logística Andina', phone='+507 6123-4567')
+        self.josefina = _contact(self.user, 'Josefina Ruiz', city='Colón')
+        self.maria = _contact(self.user, 'María José Gómez', email='mjg@example.com')
+        self.client.force_authenticate(self.user)
+
+    def test_search_key_is_folded_and_kept_current(self):
+        self.assertIn('|jose perez|logistica andina|', self.jose.search_key)
+        self.assertIn('|50761234567|', self.jose.search_key)
+        self.jose.name = 'José Ángel Pérez'
+        self.jose.save(update_fields=['name'])
+        self.jose.refresh_from_db()
+        self.assertIn('|jose angel perez|', self.jose.search_key)
+
+    def test_ranking_blends_match_quality_and_signals(self):
+        names = [c.name for c, _ in autocomplete_contacts(self.user, 'jose')['results']]
+        # Prefijo de campo antes que prefijo de palabra
+        self.assertEqual(names[-1], 'María José Gómez')
+        self.maria.is_favorite = True
+        self.maria.save(update_fields=['is_favorite'])
+        for _ in range(5):
+            self.maria.increment_usage()
+        names = [c.name for c, _ in autocomplete_contacts(self.user, 'jose')['results']]
+        self.assertEqual(names[0], 'María José Gómez')
+
+    def test_multi_term_accent_and_digit_queries(self):
+        self.assertEqual([c.id for c, _ in autocomplete_contacts(self.user, 'perez andina')['results']],
+                         [self.jose.id])
+        self.assertEqual([c.id for c, _ in autocomplete_contacts(self.user, '61234567')['results']],
+                         [self.jose.id])
+        self.assertEqual([c.id for c, _ in autocomplete_contacts(self.user, 'COLON')['results']],
+                         [self.josefina.id])
+
+    def test_candidates_are_cached_and_invalidated_on_write(self):
+        get_candidates(self.user.id)
+        with self.assertNumQueries(1):  # solo la carga por PK de los ganadores
+            autocomplete_contacts(self.user, 'jo')
+        _contact(self.user, 'Jorge Vega')
+        names = [c.name for c, _ in autocomplete_contacts(self.user, 'jorge')['results']]
+        self.assertEqual(names, ['Jorge Vega'])
+        self.maria.delete()
+        self.assertEqual(autocomplete_contacts(self.user, 'gomez')['results'], [])
+
+    def test_empty_address_book_is_served_from_cache(self):
+        user = User.objects.create_user('sin-agenda', password='x')
+        self.assertEqual(get_candidates(user.id), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_candidates(user.id), [])
+
+    @override_settings(CONTACT_SEARCH_MAX_CANDIDATES=2)
+    def test_large_address_book_ranks_from_database(self):
+        result = autocomplete_contacts(self.user, 'jose')
+        self.assertEqual(result['backend'], 'like')
+        self.assertEqual(len(result['results']), 3)
+
+    def test_endpoints(self):
+        response = self.client.get(reverse('contact_autocomplete'), {'q': 'josé', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(len(data['contacts']), 2)
+        self.assertIn('score', data['contacts'][0])
+
+        response = self.client.get(reverse('contacts_list'), {'search': 'jose'})
+        names = [c['name'] for c in response.json()['data']['contacts']]
+        self.assertEqual(names[-1], 'María José Gómez')
+        self.assertEqual(len(names), 3)
@@ -0,0 +1,55 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from dhl_api.models import ServiceAreaCityMap
+from dhl_api.utils.csv_shards import iter_lines, plan_shards
+
+HEADER = 'country_code,service_area,state_code,city_name,display_name,postal_code_from,postal_code_to\n'
+
+
+def _write_csv(directory, rows):
+    path = os.path.join(directory, 'mapa.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(HEADER)
+        for i in range(rows):
+            f.write(f'CA,Y{i:02d},ON,Ciudad {i},Ciudad {i},K{i:03d},K{i:03d}\n')
+    return path
+
+
+class PlanShardsTests(TestCase):
+    def test_shards_cover_file_on_line_boundaries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = _write_csv(tmp, 50)
+            shards = plan_shards(path, 200, skip_header=True)
+
+            self.assertGreater(len(shards), 1)
+            self.assertEqual(shards[0][1], len(HEADER))
+            self.assertEqual(shards[-1][2], os.path.getsize(path))
+            for (_, _, end), (_, start, _) in zip(shards, shards[1:]):
+                self.assertEqual(end, start)
+            lines = [line for _, s, e in shards for line in iter_lines(path, s, e)]
+            self.assertEqual(len(lines), 50)
+            self.assertTrue(all(line.startswith('CA,') for line in lines))
+
+
+class ShardedLoadTests(TestCase):
+    def test_checkpoint_resumes_only_pending_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = _write_csv(tmp, 30)
+            checkpoint_path = os.path.join(tmp, 'carga.json')
+            options = dict(file=path, checkpoint=checkpoint_path, shard_mb=1, fast=True)
+
+            call_command('load_service_area_map', stdout=io.StringIO(), **options)
+            self.assertEqual(ServiceAreaCityMap.objects.count(), 30)
+            with open(checkpoint_path, encoding='utf-8') as f:
+                self.assertEqual(list(json.load(f)['completed']), ['0'])
+
+            # Con el checkpoint completo no se vuelve a procesar ningún shard
+            ServiceAreaCityMap.objects.all().delete()
+            call_command('load_service_area_map', stdout=io.StringIO(), **options)
+            self.assertEqual(ServiceAreaCityMap.objects.count(), 0)
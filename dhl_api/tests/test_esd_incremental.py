@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from dhl_api.models import CountryISO, ServiceZone
+from dhl_api.utils.esd_loader import bulk_load_esd, incremental_load_esd
+
+
+def _write_esd(directory, lines):
+    path = os.path.join(directory, 'ESD.TXT')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+class IncrementalEsdLoadTests(TestCase):
+    def test_applies_only_differences(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = _write_esd(tmp, [
+                'CO|COLOMBIA||||BOG|110111|110111|',
+                'CO|COLOMBIA||||MDE|050001|050001|',
+                'CO|COLOMBIA||||CLO|760001|760001|',
+            ])
+            call_command('load_esd_data', file=path, stdout=io.StringIO())
+            self.assertEqual(ServiceZone.objects.count(), 3)
+            mde_id = ServiceZone.objects.get(postal_code_from='050001').id
+
+            # MDE cambia de área, CLO desaparece, BAQ es nueva y BOG se repite
+            path = _write_esd(tmp, [
+                'CO|COLOMBIA||||BOG|110111|110111|',
+                'CO|COLOMBIA||||MDX|050001|050001|',
+                'CO|COLOMBIA||||BAQ|080001|080001|',
+                'CO|COLOMBIA||||XXX|110111|110111|',
+                'CO|INCOMPLETA',
+            ])
+            errors = []
+            stats = incremental_load_esd(path, on_error=lambda n, reason, line: errors.append(n))
+
+        self.assertEqual(
+            (stats['inserted'], stats['updated'], stats['deleted'], stats['unchanged'], stats['duplicates']),
+            (1, 1, 1, 1, 1),
+        )
+        self.assertEqual(errors, [5])
+        self.assertEqual(stats['by_country'], {'CO': 3})
+        self.assertEqual(
+            sorted(ServiceZone.objects.values_list('service_area', flat=True)), ['BAQ', 'BOG', 'MDX']
+        )
+        mde = ServiceZone.objects.get(postal_code_from='050001')
+        self.assertEqual(mde.id, mde_id)
+        self.assertIn('|mdx|', mde.search_text)
+        self.assertEqual(len(mde.row_hash), 32)
+
+    def test_keeps_country_rows_from_load_countries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            countries = os.path.join(tmp, 'countries.json')
+            with open(countries, 'w', encoding='utf-8') as f:
+                json.dump({'success': True, 'data': [
+                    {'country_code': 'PA', 'country_name': 'PANAMA'},
+                    {'country_code': 'US', 'country_name': 'UNITED STATES'},
+                ]}, f)
+            call_command('load_countries', file=countries, stdout=io.StringIO())
+            pa_id = ServiceZone.objects.get(country_code='PA').id
+
+            # US trae una fila con la misma clave que su fila de país
+            path = _write_esd(tmp, [
+                'CO|COLOMBIA||||BOG|110111|110111|',
+                'US|UNITED STATES||||NYC|||',
+            ])
+            stats = incremental_load_esd(path)
+            self.assertEqual((stats['inserted'], stats['updated'], stats['deleted']), (1, 1, 0))
+
+            stats = incremental_load_esd(path)
+            self.assertEqual((stats['inserted'], stats['updated'], stats['deleted'], stats['unchanged']), (0, 0, 0, 2))
+
+        self.assertEqual(ServiceZone.objects.get(country_code='PA').id, pa_id)
+        self.assertEqual(
+            sorted(ServiceZone.objects.values_list('country_code', 'service_area')),
+            [('CO', 'BOG'), ('PA', 'DEFAULT'), ('US', 'NYC')],
+        )
+
+    def test_dry_run_does_not_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = _write_esd(tmp, ['US|UNITED STATES||||NYC|10001|10001|'])
+            stats = incremental_load_esd(path, dry_run=True)
+        self.assertEqual(stats['inserted'], 1)
+        self.assertFalse(ServiceZone.objects.exists())
+
+
+class BulkEsdLoadTests(TestCase):
+    def test_streams_rows_with_preloaded_country_names(self):
+        CountryISO.objects.create(code='CO', iso_short_name='Colombia')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = _write_esd(tmp, [
+                'CO|COL||||BOG|110111|110111|',
+                'CO|COL||||XXX|110111|110111|',
+                'ZZ|Desconocido||Antioquia|Medellín|MDE|050001|050001|',
+                '',
+                'CO|INCOMPLETA',
+            ])
+            with CaptureQueriesContext(connection) as queries:
+                stats = bulk_load_esd(path, chunk_size=2)
+
+        # Una sola consulta de países para todo el archivo
+        self.assertEqual(sum('dhl_api_countryiso' in q['sql'] for q in queries.captured_queries), 1)
+
+        self.assertEqual((stats['rows'], stats['inserted'], stats['skipped'], stats['errors']), (3, 2, 1, 1))
+        self.assertEqual(stats['by_country'], {'CO': 2, 'ZZ': 1})
+        self.assertEqual(set(stats['phases']), {'parse', 'normalize', 'write'})
+        bog = ServiceZone.objects.get(country_code='CO')
+        self.assertEqual((bog.country_name, bog.service_area), ('COLOMBIA', 'BOG'))
+        mde = ServiceZone.objects.get(country_code='ZZ')
+        self.assertEqual(mde.country_name, 'DESCONOCIDO')
+        self.assertEqual(mde.search_text, ServiceZone.compose_search_text('Medellín', 'Antioquia', '', 'MDE', 'DESCONOCIDO'))
+        self.assertEqual(len(mde.row_hash), 32)
@@ -0,0 +1,71 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from dhl_api import serializers as api_serializers
+from dhl_api.models import RateQuote, UserActivity
+from dhl_api.utils import fast_serializers
+from dhl_api.utils.fast_serializers import render_json
+
+
+def _rate(user, i):
+    return RateQuote(
+        origin_postal_code='0801', origin_city='Panamá', origin_country='PA',
+        destination_postal_code='33126', destination_city='Miami', destination_country='US',
+        weight=Decimal('1.5'), length=1, width=1, height=1, service_name='EXPRESS', service_code='P',
+        total_price=Decimal(f'{i}.375'), delivery_time='2 días', created_by=user,
+    )
+
+
+class FastSerializerTests(APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'rapido{i}', email=f'r{i}@example.com') for i in range(3)]
+        RateQuote.objects.bulk_create([_rate(self.users[i % 3], i) for i in range(6)])
+        UserActivity.objects.bulk_create([
+            UserActivity(user=self.users[i % 3], action='get_rate', description=f'Cotización {i}',
+                         metadata={'i': i, 'ñ': 'sí'})
+            for i in range(4)
+        ])
+
+    def _drf(self, serializer_class, rows):
+        return json.loads(JSONRenderer().render(serializer_class(rows, many=True).data))
+
+    def test_matches_drf_output_without_per_row_queries(self):
+        qs = RateQuote.objects.order_by('-created_at', '-id')
+        with self.assertNumQueries(1):
+            fast = api_serializers.FAST_RATE_QUOTES.serialize(qs)
+        self.assertEqual(json.loads(render_json(fast)), self._drf(api_serializers.RateQuoteSerializer, qs))
+        self.assertEqual(fast[0]['created_by']['username'], 'rapido2')
+
+        # Instancias ya evaluadas: una consulta para los usuarios, no una por fila
+        rows = list(RateQuote.objects.all())
+        with self.assertNumQueries(1):
+            api_serializers.FAST_RATE_QUOTES.serialize(rows)
+
+    def test_method_fields_fall_back_to_drf(self):
+        qs = UserActivity.objects.order_by('-created_at', '-id')
+        with self.assertNumQueries(1):
+            fast = api_serializers.FAST_USER_ACTIVITIES.serialize(qs)
+        self.assertEqual(json.loads(render_json(fast)), self._drf(api_serializers.UserActivitySerializer, qs))
+        self.assertEqual(fast[0]['action_display'], 'Obtener cotización')
+
+    def test_dict_rows_and_stdlib_rendering(self):
+        countries = [{'country_code': 'PA', 'country_name': 'Panamá'}, {'country_code': 'US', 'country_name': None}]
+        fast = api_serializers.FAST_COUNTRIES.serialize(countries)
+        self.assertEqual(fast, self._drf(api_serializers.CountrySerializer, countries))
+        with mock.patch.object(fast_serializers, 'orjson', None):
+            self.assertEqual(render_json(fast), JSONRenderer().render(fast))
+
+    def test_list_endpoint_renders_bytes(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get(reverse('rates_history'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        body = response.json()
+        self.assertEqual(len(body['data']), 2)
+        self.assertEqual(body['data'][0]['total_price'], '3.38')
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import Contact, RateQuote, ServiceZone
+from dhl_api.utils.pagination import encode_cursor, keyset_paginate
+from dhl_api.utils.zone_search import search_zones
+
+ORDERING = ('-created_at', '-id')
+
+
+def _rate(user, i):
+    return RateQuote(
+        origin_postal_code='0801', origin_city='Panama', origin_country='PA',
+        destination_postal_code='33126', destination_city='Miami', destination_country='US',
+        weight='1.00', length=1, width=1, height=1, service_name='EXPRESS', service_code='P',
+        total_price=str(10 + i), delivery_time='2 días', created_by=user,
+    )
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('pager', password='x')
+        RateQuote.objects.bulk_create([_rate(self.user, i) for i in range(7)])
+        # Empates en created_at: el id desempata
+        RateQuote.objects.filter(id__in=list(RateQuote.objects.values_list('id', flat=True))[:4]).update(
+            created_at=datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc)
+        )
+        self.expected = list(RateQuote.objects.order_by(*ORDERING).values_list('id', flat=True))
+
+    def test_walks_forward_and_back_without_gaps(self):
+        qs = RateQuote.objects.all()
+        seen, cursor, pages = [], None, []
+        while True:
+            page = keyset_paginate(qs, ORDERING, 3, cursor=cursor)
+            pages.append(page)
+            seen += [r.id for r in page['results']]
+            if not page['has_next']:
+                break
+            cursor = page['next_cursor']
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+
+        back = keyset_paginate(qs, ORDERING, 3, cursor=pages[-1]['prev_cursor'])
+        self.assertEqual([r.id for r in back['results']], self.expected[3:6])
+        self.assertTrue(back['has_previous'])
+        self.assertTrue(back['has_next'])
+
+    def test_rates_history_cursor_mode(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('rates_history')
+
+        first = self.client.get(url, {'pagination': 'cursor', 'page_size': 5, 'include_total': 1}).data
+        self.assertEqual([r['id'] for r in first['data']], self.expected[:5])
+        self.assertEqual(first['pagination']['total_count'], 7)
+        second = self.client.get(first['pagination']['next']).data
+        self.assertEqual([r['id'] for r in second['data']], self.expected[5:])
+        self.assertIsNone(second['pagination']['next'])
+
+        # El modo por página sigue funcionando (y filtra por created_by)
+        paged = self.client.get(url, {'page': 2, 'page_size': 5}).data
+        self.assertEqual([r['id'] for r in paged['data']], self.expected[5:])
+
+        self.assertEqual(self.client.get(url, {'cursor': 'no-es-un-cursor'}).status_code, 400)
+        # Cursores bien codificados con valores de otro tipo
+        for values in ([{'a': 1}, 1], [None, 1], ['2025-01-01T00:00:00', [1]], ['ayer', 1]):
+            self.assertEqual(self.client.get(url, {'cursor': encode_cursor(values)}).status_code, 400, values)
+
+    def test_contacts_cursor_handles_empty_last_used(self):
+        for i, used in enumerate([3, 0, 0, 5]):
+            Contact.objects.create(
+                created_by=self.user, name=f'Contacto {i}', phone='1', email=f'c{i}@example.com',
+                address='Calle 1', city='Panamá', postal_code='0801', country='PA', usage_count=used,
+                last_used=datetime(2025, 1, i + 1, tzinfo=dt_timezone.utc) if used else None,
+            )
+        self.client.force_authenticate(self.user)
+        url = reverse('contacts_list')
+
+        names, cursor = [], ''
+        while cursor is not None:
+            data = self.client.get(url, {'cursor': cursor, 'page_size': 3}).data['data']
+            names += [c['name'] for c in data['contacts']]
+            cursor = data['pagination']['next_cursor']
+        self.assertEqual(names[:2], ['Contacto 3', 'Contacto 0'])
+        self.assertEqual(sorted(names), [f'Contacto {i}' for i in range(4)])
+
+    def test_zone_search_cursor(self):
+        for city in ('Alpha', 'Beta', 'Gamma', 'Delta'):
+            ServiceZone.objects.create(country_code='PA', country_name='PANAMA', city_name=city, service_area='PTY')
+        first = search_zones('', country_code='PA', page_size=3, cursor='')
+        second = search_zones('', country_code='PA', page_size=3, cursor=first['pagination']['next_cursor'])
+        cities = [z.city_name for z in first['results'] + second['results']]
+        self.assertEqual(cities, ['Alpha', 'Beta', 'Delta', 'Gamma'])
+        self.assertEqual(first['pagination']['total_count'], 4)
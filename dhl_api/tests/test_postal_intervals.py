@@ -0,0 +1,34 @@
+import random
+
+from django.test import TestCase
+
+from dhl_api.models import ServiceZone
+from dhl_api.utils.postal_intervals import PostalIntervalIndex, ServiceAreaPostalIndex
+
+
+class PostalIntervalIndexTests(TestCase):
+    def test_lookup_matches_range_query_semantics(self):
+        rng = random.Random(7)
+        intervals = []
+        for i in range(300):
+            start = rng.randint(10000, 99000)
+            end = start + rng.choice([0, 5, 50, 2000])
+            intervals.append((f'{start:05d}', f'{end:05d}', f'S{i}', i))
+        index = PostalIntervalIndex(intervals)
+
+        for _ in range(500):
+            code = f'{rng.randint(9000, 99999):05d}'
+            matches = [iv for iv in intervals if iv[0] <= code <= iv[1]]
+            expected = min(matches, key=lambda iv: iv[3])[2] if matches else None
+            self.assertEqual(index.lookup(code), expected, code)
+
+    def test_service_area_index_counts_derived_and_unresolved(self):
+        ServiceZone.objects.create(
+            country_code='CO', country_name='COLOMBIA', city_name='Bogotá', service_area='BOG',
+            postal_code_from='110111', postal_code_to='110999',
+        )
+        index = ServiceAreaPostalIndex()
+        with self.assertNumQueries(1):
+            self.assertEqual(index.derive('CO', '110500'), 'BOG')
+            self.assertIsNone(index.derive('CO', '500001'))
+        self.assertEqual((index.derived, index.unresolved), (1, 1))
@@ -0,0 +1,99 @@
+from django.test import TestCase
+
+from dhl_api.models import PostalRangeCompaction, ServiceAreaCityMap, ServiceZone
+from dhl_api.utils.esd_loader import ESD_FIELDS, row_hash
+from dhl_api.utils.postal_ranges import (
+    SERVICE_AREA_MAP, SERVICE_ZONE, compact_postal_ranges, expand_postal_ranges, postal_ordinal,
+)
+from dhl_api.utils.service_area_mapping import postal_span
+
+
+def _map_row(city, pc, sa='YYZ', display=None):
+    return ServiceAreaCityMap.objects.create(
+        country_code='CA', state_code='ON', service_area=sa, city_name=city,
+        display_name=display or f'{city} {pc}', postal_code_from=pc, postal_code_to=pc,
+    )
+
+
+def _map_state():
+    return sorted(ServiceAreaCityMap.objects.values_list('city_name', 'display_name', 'postal_code_from', 'postal_code_to'))
+
+
+class PostalOrdinalTests(TestCase):
+    def test_odometer_order(self):
+        self.assertEqual(postal_ordinal('L4B1Z9')[1] + 1, postal_ordinal('L4B2A0')[1])
+        self.assertEqual(postal_ordinal('0999')[1] + 1, postal_ordinal('1000')[1])
+        self.assertNotEqual(postal_ordinal('L4B1Z9')[0], postal_ordinal('L4B19Z')[0])
+        self.assertIsNone(postal_ordinal('L4B 1Z9'))
+        # Un rango compactado cuenta lo mismo que sus códigos individuales
+        self.assertEqual(postal_span('L4B1Z8', 'L4B2A1'), 4)
+
+
+class CompactPostalRangesTests(TestCase):
+    def setUp(self):
+        for pc in ['M5A1Z8', 'M5A1Z9', 'M5A2A0', 'M5A2A2']:
+            _map_row('Toronto', pc)
+        _map_row('Toronto', 'M5A2A3', display='Toronto Centro')  # display propio: no se fusiona
+        _map_row('North York', 'M5A1Z7')
+        _map_row('North York', 'M5A1Z8', sa='YTZ')
+        for pf, pt in [('0100', '0199'), ('0200', '0250'), ('0240', '0299'), ('0400', '0499')]:
+            ServiceZone.objects.create(
+                country_code='CO', country_name='COLOMBIA', state_code='DC', city_name='Bogotá',
+                service_area='BOG', postal_code_from=pf, postal_code_to=pt,
+            )
+
+    def test_map_compaction_is_reversible(self):
+        original = _map_state()
+
+        dry = compact_postal_ranges(SERVICE_AREA_MAP, dry_run=True)
+        self.assertEqual((dry['rows_before'], dry['rows_after']), (7, 5))
+        self.assertEqual(ServiceAreaCityMap.objects.count(), 7)
+
+        stats = compact_postal_ranges(SERVICE_AREA_MAP)
+        self.assertEqual((stats['rows_before'], stats['rows_after'], stats['merged_runs']), (7, 5, 1))
+        merged = ServiceAreaCityMap.objects.get(city_name='Toronto', postal_code_from='M5A1Z8')
+        self.assertEqual((merged.postal_code_to, merged.display_name), ('M5A2A0', 'Toronto M5A1Z8-M5A2A0'))
+
+        # El display por código se conserva al resolver dentro del rango compactado
+        resolved = ServiceAreaCityMap.resolve_display(country_code='CA', service_area='YYZ', postal_code='M5A1Z9')
+        self.assertEqual(resolved['display_name'], 'Toronto M5A1Z9')
+
+        # Compactar de nuevo no cambia nada
+        self.assertEqual(compact_postal_ranges(SERVICE_AREA_MAP)['merged_runs'], 0)
+
+        expanded = expand_postal_ranges(SERVICE_AREA_MAP)
+        self.assertEqual((expanded['expanded'], expanded['rows_restored']), (1, 3))
+        self.assertEqual(_map_state(), original)
+        self.assertFalse(PostalRangeCompaction.objects.exists())
+
+    def test_reloaded_codes_merge_into_existing_range(self):
+        compact_postal_ranges(SERVICE_AREA_MAP)
+        # Una recarga vuelve a insertar códigos individuales dentro y junto al rango
+        _map_row('Toronto', 'M5A1Z9')
+        _map_row('Toronto', 'M5A2A1')
+        stats = compact_postal_ranges(SERVICE_AREA_MAP)
+        self.assertEqual((stats['rows_before'], stats['rows_after']), (7, 4))
+        merged = ServiceAreaCityMap.objects.get(city_name='Toronto', postal_code_from='M5A1Z8')
+        self.assertEqual(merged.postal_code_to, 'M5A2A2')
+        self.assertEqual(PostalRangeCompaction.objects.get(row_id=merged.id).source_rows, 5)
+
+        expand_postal_ranges(SERVICE_AREA_MAP)
+        codes = sorted(ServiceAreaCityMap.objects.filter(city_name='Toronto').values_list('postal_code_from', flat=True))
+        self.assertEqual(codes, ['M5A1Z8', 'M5A1Z9', 'M5A2A0', 'M5A2A1', 'M5A2A2', 'M5A2A3'])
+
+    def test_esd_ranges_merge_and_keep_row_hash(self):
+        stats = compact_postal_ranges(SERVICE_ZONE)
+        self.assertEqual((stats['rows_before'], stats['rows_after']), (4, 2))
+        zone = ServiceZone.objects.get(postal_code_from='0100')
+        self.assertEqual(zone.postal_code_to, '0299')
+        self.assertEqual(zone.row_hash, row_hash({f: getattr(zone, f) for f in ESD_FIELDS}))
+
+        expand_postal_ranges(SERVICE_ZONE)
+        ranges = sorted(ServiceZone.objects.values_list('postal_code_from', 'postal_code_to'))
+        self.assertEqual(ranges, [('0100', '0199'), ('0200', '0250'), ('0240', '0299'), ('0400', '0499')])
+
+    def test_replaced_rows_discard_archive(self):
+        compact_postal_ranges(SERVICE_ZONE)
+        ServiceZone.objects.filter(postal_code_from='0100').update(postal_code_to='0150')
+        self.assertEqual(expand_postal_ranges(SERVICE_ZONE)['purged'], 1)
+        self.assertEqual(ServiceZone.objects.count(), 2)
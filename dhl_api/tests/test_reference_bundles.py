@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import CountryISO, ServiceAreaCityMap, ServiceZone
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.reference_bundles import build_reference_bundles
+from dhl_api.utils.reference_snapshot import build_reference_snapshot, reset_reference_snapshot
+
+
+class ReferenceBundleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_reference_snapshot()
+        self.addCleanup(reset_reference_snapshot)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = os.path.join(tmp.name, 'reference')
+        settings_override = override_settings(
+            REFERENCE_SNAPSHOT_PATH=os.path.join(tmp.name, 'reference.snap'),
+            REFERENCE_BUNDLES_DIR=self.dir,
+            REFERENCE_BUNDLES_MANIFEST=os.path.join(tmp.name, 'reference-bundles.json'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        CountryISO.objects.create(code='CA', iso_short_name='Canada')
+        for sc, sa, city in [('ON', 'YHM', 'Hamilton'), ('ON', 'YYZ', 'Toronto'), ('QC', 'YUL', 'Montréal')]:
+            ServiceAreaCityMap.objects.create(
+                country_code='CA', state_code=sc, service_area=sa, city_name=city, display_name=city,
+            )
+        ServiceAreaCityMap.objects.create(country_code='PA', service_area='PTY', city_name='Panamá', display_name='Panamá')
+        zones = [
+            ('CA', 'CANADA', 'ON', 'Hamilton', 'YHM'), ('CA', 'CANADA', 'ON', 'Ancaster', 'YHM'),
+            ('CA', 'CANADA', 'QC', '', 'YUL'), ('PA', 'PANAMA', '', 'Colón', 'PTY'),
+        ]
+        for i, (cc, name, sc, city, sa) in enumerate(zones):
+            ServiceZone.objects.create(
+                country_code=cc, country_name=name, state_code=sc, city_name=city, service_area=sa,
+                postal_code_from=str(i), postal_code_to=str(i),
+            )
+        bump_dataset_version(reason='test')
+
+    def _manifest(self):
+        response = self.client.get(reverse('reference_bundles_manifest'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def _bundle(self, url):
+        name = url.rsplit('/', 1)[1]
+        with open(os.path.join(self.dir, name), 'rb') as f:
+            raw = f.read()
+        with open(os.path.join(self.dir, f'{name}.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), raw)
+        return json.loads(raw)
+
+    def test_bundles_match_api_responses(self):
+        self.assertEqual(self.client.get(reverse('reference_bundles_manifest')).status_code, 404)
+        build_reference_snapshot()
+        build_reference_bundles()
+        manifest = self._manifest()
+        self.assertEqual(sorted(manifest['bundles']), ['CA', 'PA'])
+        self.assertRegex(manifest['bundles']['CA']['url'], r'^/static/reference/CA\.[0-9a-f]{12}\.json$')
+
+        ca = self._bundle(manifest['bundles']['CA']['url'])
+        api = self.client.get(reverse('get_states_by_country', args=['CA'])).json()
+        self.assertEqual(ca['states'], api['data'])
+        for sc in ['', 'ON', 'QC']:
+            args = ['CA', sc] if sc else ['CA']
+            name = 'get_cities_by_country_state' if sc else 'get_cities_by_country'
+            api = self.client.get(reverse(name, args=args)).json()
+            self.assertEqual(ca['cities'][sc], api['data'], sc)
+        api = self.client.get(reverse('analyze_country_structure', args=['CA'])).json()
+        self.assertEqual({'success': True, **ca['structure']}, api)
+
+        countries = self._bundle(manifest['countries']['url'])
+        self.assertEqual(countries['countries'], self.client.get(reverse('get_countries')).json()['data'])
+
+    def test_hash_follows_content_and_old_generations_are_pruned(self):
+        build_reference_bundles()
+        first = self._manifest()
+        # Recarga sin cambios en CA: mismo archivo; PA cambia de nombre
+        ServiceAreaCityMap.objects.create(country_code='PA', service_area='ARJ', city_name='Arraiján', display_name='Arraiján')
+        bump_dataset_version(reason='test')
+        self.assertEqual(self.client.get(reverse('reference_bundles_manifest')).status_code, 404)
+        build_reference_bundles()
+        second = self._manifest()
+        self.assertEqual(first['bundles']['CA']['url'], second['bundles']['CA']['url'])
+        self.assertNotEqual(first['bundles']['PA']['url'], second['bundles']['PA']['url'])
+        self.assertIn('Arraiján', [c['name'] for c in self._bundle(second['bundles']['PA']['url'])['cities']['']])
+
+        # La generación previa se conserva; la anterior a ella se borra
+        ServiceAreaCityMap.objects.filter(city_name='Arraiján').delete()
+        ServiceAreaCityMap.objects.create(country_code='PA', service_area='CHO', city_name='Chorrera', display_name='Chorrera')
+        bump_dataset_version(reason='test')
+        build_reference_bundles()
+        files = os.listdir(self.dir)
+        self.assertIn(second['bundles']['PA']['url'].rsplit('/', 1)[1], files)
+        self.assertNotIn(first['bundles']['PA']['url'].rsplit('/', 1)[1], files)
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import DatasetVersion, ServiceAreaCityMap
+from dhl_api.utils.dataset_version import bump_dataset_version, get_dataset_version
+
+
+class ReferenceCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        ServiceAreaCityMap.objects.create(
+            country_code='CA', state_code='ON', service_area='YHM', city_name='Hamilton', display_name='Hamilton',
+        )
+
+    def test_bump_increments_version(self):
+        self.assertEqual(get_dataset_version(), 0)
+        self.assertEqual(bump_dataset_version(reason='test'), 1)
+        self.assertEqual(bump_dataset_version(reason='test'), 2)
+        self.assertEqual(get_dataset_version(), 2)
+
+    @override_settings(DATASET_VERSION_CACHE_TIMEOUT=5)
+    def test_per_process_cache_rereads_version_after_timeout(self):
+        bump_dataset_version(reason='test')
+        # Otro proceso publica una versión nueva: esta caché local no se entera
+        DatasetVersion.objects.filter(name='reference').update(version=7)
+        self.assertEqual(get_dataset_version(), 1)
+        cache.delete('dataset_version:reference')  # equivale a que expire el TTL
+        self.assertEqual(get_dataset_version(), 7)
+        self.assertIsNotNone(cache._expire_info.get(cache.make_key('dataset_version:reference')))
+
+    def test_dataset_bump_invalidates_cached_responses(self):
+        url = reverse('get_states_by_country', args=['CA'])
+        self.assertEqual(self.client.get(url).data['count'], 1)
+
+        ServiceAreaCityMap.objects.create(
+            country_code='CA', state_code='QC', service_area='YUL', city_name='Montreal', display_name='Montreal',
+        )
+        # Sin cambio de versión se sirve la respuesta cacheada
+        self.assertEqual(self.client.get(url).data['count'], 1)
+
+        bump_dataset_version(reason='test')
+        self.assertEqual(self.client.get(url).data['count'], 2)
+
+    def test_conditional_get_returns_304_until_version_changes(self):
+        bump_dataset_version(reason='test')
+        url = reverse('get_states_by_country', args=['CA'])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(first.has_header('Last-Modified'))
+        self.assertIn('must-revalidate', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        other = self.client.get(reverse('get_states_by_country', args=['US']), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+
+        bump_dataset_version(reason='test')
+        after_reload = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_reload.status_code, 200)
+        self.assertNotEqual(after_reload['ETag'], etag)
@@ -0,0 +1,96 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import CountryISO, ServiceAreaCityMap, ServiceZone
+from dhl_api.throttles import ServiceZoneThrottle
+from dhl_api.utils.coverage import ESD, MAP, get_coverage
+from dhl_api.utils.dataset_version import bump_dataset_version
+
+
+class ReferenceCoverageTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        CountryISO.objects.create(code='CA', iso_short_name='Canada')
+        zones = [
+            ('CO', 'COLOMBIA', 'DC', 'Bogotá', 'BOG', '110111', '110999'),
+            ('CO', 'COLOMBIA', 'DC', 'Bogotá', 'BOG', '111000', '111009'),
+            ('CO', 'COLOMBIA', 'ANT', 'Medellín', 'MDE', '050001', '050001'),
+            ('PA', 'PANAMA', '', '', 'PTY', '', ''),
+        ]
+        for cc, name, sc, city, sa, pf, pt in zones:
+            ServiceZone.objects.create(
+                country_code=cc, country_name=name, state_code=sc, city_name=city, service_area=sa,
+                postal_code_from=pf, postal_code_to=pt,
+            )
+        for pc in ['L4B1A1', 'L4B1A2']:
+            ServiceAreaCityMap.objects.create(
+                country_code='CA', state_code='ON', service_area='YYZ', city_name='Richmond Hill',
+                display_name=f'Richmond Hill {pc}', postal_code_from=pc, postal_code_to=pc,
+            )
+        bump_dataset_version(reason='test')
+
+    def test_single_scan_report(self):
+        with CaptureQueriesContext(connection) as ctx:
+            report = get_coverage(ESD)
+        self.assertEqual(sum('dhl_api_servicezone' in q['sql'] for q in ctx.captured_queries), 1)
+
+        self.assertEqual(report['totals']['rows'], 4)
+        self.assertEqual(report['totals']['countries'], 2)
+        co = next(c for c in report['countries'] if c['country_code'] == 'CO')
+        self.assertEqual((co['cities'], co['service_areas'], co['postal_ranges']), (2, 2, 3))
+        self.assertEqual(co['postal_coverage'], 889 + 10 + 1)
+        self.assertEqual(co['top'][0], {'name': 'Bogotá', 'ranges': 2})
+        self.assertEqual([s['state_code'] for s in co['states']], ['ANT', 'DC'])
+        pa = next(c for c in report['countries'] if c['country_code'] == 'PA')
+        self.assertEqual((pa['mode'], pa['top']), (None, []))
+
+        # Segunda lectura desde caché; una recarga (nueva versión) la invalida
+        with self.assertNumQueries(0):
+            get_coverage(ESD)
+        ServiceZone.objects.filter(country_code='PA').delete()
+        bump_dataset_version(reason='test')
+        self.assertEqual(get_coverage(ESD)['totals']['countries'], 1)
+
+    def test_map_report_command_and_endpoint(self):
+        report = get_coverage(MAP, 'ca')
+        self.assertEqual(report['countries'][0]['country_name'], 'CANADA')
+        self.assertEqual(report['countries'][0]['postal_coverage'], 2)
+
+        out = StringIO()
+        call_command('reference_coverage', dataset='esd', format='csv', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['dataset', 'country_code', 'country_name'])
+        self.assertIn('esd,CO,COLOMBIA,DC,2,1,1,2,899', lines)
+
+        out = StringIO()
+        call_command('esd_stats', country='CO', stdout=out)
+        self.assertIn('Bogotá: 2 rangos', out.getvalue())
+
+        url = reverse('reference_coverage')
+        data = self.client.get(url, {'dataset': 'map', 'country': 'CA'}).data['data']
+        self.assertEqual(data['totals']['rows'], 2)
+        resp = self.client.get(url, {'export': 'csv'})
+        self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(self.client.get(url, {'dataset': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'top': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'top': '100000'}).status_code, 200)
+
+        stats = self.client.get(reverse('map_stats_by_country', args=['CA'])).data
+        self.assertEqual(stats['totals'], {'rows': 2, 'distinct_cities': 1, 'distinct_service_areas': 1})
+        self.assertEqual(stats['sample_cities'], ['Richmond Hill'])
+
+        self.assertEqual(json.loads(json.dumps(report))['dataset'], 'map')
+
+    def test_anonymous_requests_are_throttled(self):
+        url = reverse('reference_coverage')
+        with patch.dict(ServiceZoneThrottle.THROTTLE_RATES, {'service_zones': '2/hour'}):
+            codes = [self.client.get(url, {'top': i}).status_code for i in (1, 2, 3)]
+        self.assertEqual(codes, [200, 200, 429])
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import CountryISO, ServiceAreaCityMap, ServiceZone
+from dhl_api.utils.dataset_version import bump_dataset_version
+from dhl_api.utils.reference_snapshot import (
+    build_reference_snapshot, db_country_list, get_reference_snapshot, reset_reference_snapshot,
+)
+
+
+class ReferenceSnapshotTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_reference_snapshot()
+        self.addCleanup(reset_reference_snapshot)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(REFERENCE_SNAPSHOT_PATH=os.path.join(tmp.name, 'reference.snap'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        CountryISO.objects.create(code='CA', iso_short_name='Canada')
+        for sc, sa, city in [('ON', 'YHM', 'Hamilton'), ('ON', 'YYZ', 'Toronto'), ('QC', 'YUL', 'Montréal')]:
+            ServiceAreaCityMap.objects.create(
+                country_code='CA', state_code=sc, service_area=sa, city_name=city, display_name=city,
+            )
+        ServiceAreaCityMap.objects.create(country_code='PA', service_area='PTY', city_name='Panamá', display_name='Panamá')
+        zones = [
+            ('CA', 'CANADA', 'ON', 'Hamilton', 'YHM'), ('CA', 'CANADA', 'ON', 'Ancaster', 'YHM'),
+            ('CA', 'CANADA', 'QC', '', 'YUL'), ('PA', 'PANAMA', '', 'Colón', 'PTY'),
+        ]
+        for i, (cc, name, sc, city, sa) in enumerate(zones):
+            ServiceZone.objects.create(
+                country_code=cc, country_name=name, state_code=sc, city_name=city, service_area=sa,
+                postal_code_from=str(i), postal_code_to=str(i),
+            )
+        bump_dataset_version(reason='test')
+
+    def test_snapshot_matches_database_queries(self):
+        build_reference_snapshot()
+        snapshot = get_reference_snapshot()
+        self.assertIsNotNone(snapshot)
+
+        self.assertEqual(snapshot.countries(), db_country_list())
+        self.assertEqual(snapshot.states('CA'), ['ON', 'QC'])
+        self.assertEqual(snapshot.map_cities('CA'), ['Hamilton', 'Montréal', 'Toronto'])
+        self.assertEqual(snapshot.map_cities('CA', 'ON', q='TOR'), ['Toronto'])
+        for cc, sc in [('CA', None), ('CA', 'ON'), ('CA', 'QC'), ('PA', None), ('US', None)]:
+            self.assertEqual(snapshot.esd_cities(cc, sc), ServiceZone.get_cities_smart(cc, sc), (cc, sc))
+
+    def test_views_answer_without_queries_and_follow_version(self):
+        build_reference_snapshot()
+        url = reverse('get_states_by_country', args=['CA'])
+        get_reference_snapshot()
+        with self.assertNumQueries(0):
+            self.assertEqual([s['state_code'] for s in self.client.get(url).data['data']], ['ON', 'QC'])
+
+        # Tras una recarga el snapshot queda desactualizado y se consulta la BD
+        ServiceAreaCityMap.objects.create(
+            country_code='CA', state_code='BC', service_area='YVR', city_name='Vancouver', display_name='Vancouver',
+        )
+        bump_dataset_version(reason='test')
+        self.assertIsNone(get_reference_snapshot())
+        self.assertEqual(self.client.get(url).data['count'], 3)
+
+        build_reference_snapshot()
+        self.assertEqual(get_reference_snapshot().states('CA'), ['BC', 'ON', 'QC'])
@@ -0,0 +1,89 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import ServiceAreaCityMap
+from dhl_api.utils.postal_ranges import SERVICE_AREA_MAP, compact_postal_ranges
+
+
+class ServiceAreaDisplayBulkTests(APITestCase):
+    def setUp(self):
+        rows = [
+            ('CA', 'ON', 'YHM', 'Hamilton', 'Hamilton ON', '', ''),
+            ('CA', 'ON', 'YHM', 'Hamilton', 'Hamilton (dup)', 'L8A', 'L8Z'),
+            ('CA', 'ON', 'YYZ', 'Toronto', 'Toronto ON', 'M1A', 'M9Z'),
+            ('US', 'NY', 'NYC', 'New York', 'New York NY', '10001', '10299'),
+        ]
+        for cc, sc, sa, city, display, pf, pt in rows:
+            ServiceAreaCityMap.objects.create(
+                country_code=cc, state_code=sc, service_area=sa, city_name=city,
+                display_name=display, postal_code_from=pf, postal_code_to=pt,
+            )
+
+    def test_bulk_matches_single_endpoint_semantics(self):
+        items = [
+            {'country_code': 'ca', 'service_area': 'yhm'},
+            {'country_code': 'CA', 'service_area': 'XXX', 'fallback_city': 'toronto'},
+            {'country_code': 'US', 'service_area': 'ZZZ', 'postal_code': '10010'},
+            {'country_code': 'US', 'service_area': 'ZZZ', 'postal_code': '99999'},
+            {'country_code': '', 'service_area': 'YHM'},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse('resolve_service_area_display_bulk'), {'items': items}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        types = [r['type'] for r in resp.data['data']]
+        self.assertEqual(types, ['direct', 'fallback_city', 'fallback_postal', 'not_found', 'invalid'])
+        self.assertEqual(resp.data['data'][0]['display_name'], 'Hamilton ON')
+        self.assertEqual(resp.data['resolved'], 3)
+        # Por país: directa, ciudad y compactaciones, más una consulta acotada por código postal pendiente
+        self.assertLessEqual(len(ctx.captured_queries), 7)
+
+        for item, bulk in zip(items[:4], resp.data['data']):
+            single = self.client.get(reverse('resolve_service_area_display'), item)
+            self.assertEqual(single.data['success'], bulk['success'])
+            if bulk['success']:
+                self.assertEqual(single.data['display_name'], bulk['display_name'])
+                self.assertEqual(single.data['type'], bulk['type'])
+
+    def test_area_with_one_row_per_code_fetches_one_row(self):
+        for i in range(30):
+            ServiceAreaCityMap.objects.create(
+                country_code='CA', state_code='QC', service_area='YUL', city_name='Montréal',
+                display_name=f'Montréal H{i:02d}', postal_code_from=f'H{i:02d}', postal_code_to=f'H{i:02d}',
+            )
+        items = [
+            {'country_code': 'CA', 'service_area': 'YUL'},
+            {'country_code': 'CA', 'service_area': 'X', 'fallback_city': 'MONTRÉAL'},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse('resolve_service_area_display_bulk'), {'items': items}, format='json')
+        self.assertEqual([r['display_name'] for r in resp.data['data']], ['Montréal H00', 'Montréal H00'])
+        # Las filas por área/ciudad se eligen con MIN(id) agrupado en la BD
+        lookups = [q['sql'] for q in ctx.captured_queries if 'MIN(' in q['sql']]
+        self.assertEqual(len(lookups), 2)
+
+    def test_bulk_rejects_oversized_payload(self):
+        items = [{'country_code': 'CA', 'service_area': 'YHM'}] * 501
+        resp = self.client.post(reverse('resolve_service_area_display_bulk'), {'items': items}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_compaction_does_not_change_resolved_names(self):
+        for pc in ['N5A1Z8', 'N5A1Z9', 'N5A2A0']:
+            ServiceAreaCityMap.objects.create(
+                country_code='CA', state_code='ON', service_area='YTO', city_name='London',
+                display_name=f'London {pc}', postal_code_from=pc, postal_code_to=pc,
+            )
+        items = [
+            {'country_code': 'CA', 'service_area': 'ZZZ', 'postal_code': 'N5A1Z9'},
+            {'country_code': 'CA', 'service_area': 'YTO'},
+            {'country_code': 'CA', 'service_area': 'ZZZ', 'fallback_city': 'LONDON'},
+        ]
+        url = reverse('resolve_service_area_display_bulk')
+        before = self.client.post(url, {'items': items}, format='json').data['data']
+        self.assertEqual(before[0]['display_name'], 'London N5A1Z9')
+
+        self.assertEqual(compact_postal_ranges(SERVICE_AREA_MAP)['merged_runs'], 1)
+        self.assertEqual(self.client.post(url, {'items': items}, format='json').data['data'], before)
+        single = self.client.get(reverse('resolve_service_area_display'), items[0])
+        self.assertEqual(single.data['display_name'], 'London N5A1Z9')
@@ -0,0 +1,46 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from dhl_api.models import ServiceZone
+from dhl_api.utils.table_swap import TableSwapError, shadow_reload
+
+
+def _zone(service_area, postal_code):
+    return ServiceZone(
+        country_code='CO', country_name='COLOMBIA', service_area=service_area,
+        postal_code_from=postal_code, postal_code_to=postal_code,
+    )
+
+
+class ShadowReloadTests(TestCase):
+    def setUp(self):
+        ServiceZone.objects.bulk_create([_zone('BOG', '110111'), _zone('MDE', '050001')])
+
+    def test_replaces_table_when_validation_passes(self):
+        with shadow_reload(ServiceZone, min_ratio=0.5) as swap:
+            ServiceZone.objects.bulk_create([_zone('CLO', '760001'), _zone('BAQ', '080001')])
+
+        self.assertEqual((swap.previous_rows, swap.rows), (2, 2))
+        self.assertEqual(sorted(ServiceZone.objects.values_list('service_area', flat=True)), ['BAQ', 'CLO'])
+
+    def test_keeps_current_table_when_reload_is_too_small(self):
+        with self.assertRaises(TableSwapError):
+            with shadow_reload(ServiceZone, min_ratio=0.9):
+                ServiceZone.objects.bulk_create([_zone('CLO', '760001')])
+
+        self.assertEqual(sorted(ServiceZone.objects.values_list('service_area', flat=True)), ['BOG', 'MDE'])
+
+    def test_load_esd_clear_rolls_back_on_empty_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ESD.TXT')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('CO|INCOMPLETA\n')
+            with self.assertRaises(CommandError):
+                call_command('load_esd_data', file=path, clear=True, stdout=io.StringIO())
+
+        self.assertEqual(ServiceZone.objects.count(), 2)
@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from dhl_api.models import RateQuote
+from dhl_api.utils.write_behind import WriteBehindRecorder
+
+
+def _quote(user, service_code='P'):
+    return {
+        'origin_postal_code': '0801', 'origin_city': 'Panama', 'origin_country': 'PA',
+        'destination_postal_code': '33126', 'destination_city': 'Miami', 'destination_country': 'US',
+        'weight': '1.50', 'length': 10, 'width': 10, 'height': 10,
+        'service_name': 'EXPRESS WORLDWIDE', 'service_code': service_code, 'total_price': '42.10',
+        'currency': 'USD', 'delivery_time': '2 días', 'created_by_id': user.id,
+    }
+
+
+class WriteBehindThreadTests(TransactionTestCase):
+    def test_background_flush_by_size(self):
+        user = User.objects.create_user('wb', password='x')
+        recorder = WriteBehindRecorder('test', flush_size=3, flush_interval=60, spill_dir=None)
+        self.addCleanup(recorder.shutdown)
+        recorder.enqueue(RateQuote, [_quote(user, c) for c in 'PDK'])
+
+        deadline = time.monotonic() + 5
+        while recorder.counters['written'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(RateQuote.objects.filter(created_by=user).count(), 3)
+        self.assertEqual(recorder.stats()['queue_depth'], 0)
+
+        # Lo que queda por debajo del umbral se escribe al cerrar
+        recorder.enqueue(RateQuote, [_quote(user, 'Y')])
+        recorder.shutdown()
+        self.assertEqual(RateQuote.objects.count(), 4)
+
+    def test_overflow_spills_or_drops(self):
+        user = User.objects.create_user('wb', password='x')
+        spill_dir = tempfile.mkdtemp()
+        recorder = WriteBehindRecorder('test', flush_size=100, flush_interval=60, max_queue=2, spill_dir=spill_dir)
+        self.addCleanup(recorder.shutdown)
+        self.assertTrue(recorder.enqueue(RateQuote, [_quote(user, c) for c in 'PDK']))
+        self.assertEqual((recorder.stats()['queue_depth'], recorder.counters['spilled']), (2, 1))
+
+        no_spill = WriteBehindRecorder('test2', flush_interval=60, max_queue=1, spill_dir=None)
+        self.addCleanup(no_spill.shutdown)
+        self.assertFalse(no_spill.enqueue(RateQuote, [_quote(user, c) for c in 'PD']))
+        self.assertEqual(no_spill.stats()['dropped'], 1)
+        recorder.shutdown()
+        no_spill.shutdown()
+        self.assertEqual(RateQuote.objects.count(), 3 + 1)
+        shutil.rmtree(spill_dir)
+
+
+    def test_invalid_row_does_not_block_valid_rows_or_later_spills(self):
+        user = User.objects.create_user('wb', password='x')
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        recorder = WriteBehindRecorder('test', spill_dir=spill_dir, enabled=False)
+        bad = dict(_quote(user, 'X'), created_by_id=999999)
+
+        # Lote nuevo: las válidas se escriben, la inválida se aparta
+        recorder.enqueue(RateQuote, [_quote(user, 'P'), bad, _quote(user, 'D')])
+        self.assertEqual(sorted(RateQuote.objects.values_list('service_code', flat=True)), ['D', 'P'])
+        self.assertEqual((recorder.counters['rejected'], recorder.spill_files()), (1, []))
+
+        # Volcado con una fila inválida seguido de otro archivo: ambos se reintentan
+        for pid, rows in ((1, [_quote(user, 'K'), bad]), (2, [_quote(user, 'Y')])):
+            with open(os.path.join(spill_dir, f'write_behind-test-{pid}.jsonl'), 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({'model': 'dhl_api.RateQuote', 'fields': row}) + '\n')
+        self.assertEqual(recorder.flush(), 2)
+        self.assertEqual(RateQuote.objects.count(), 4)
+        self.assertEqual(recorder.spill_files(), [])
+        with open(os.path.join(spill_dir, f'write_behind-test-{os.getpid()}.jsonl.failed'), encoding='utf-8') as f:
+            failed = [json.loads(line) for line in f]
+        self.assertEqual([r['fields']['service_code'] for r in failed], ['X', 'X'])
+        self.assertIn('IntegrityError', failed[0]['error'])
+
+class WriteBehindDurabilityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('wb', password='x')
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.spill_dir = tmp.name
+
+    def test_spill_when_database_fails_and_replay_with_original_date(self):
+        recorder = WriteBehindRecorder('test', spill_dir=self.spill_dir, enabled=False)
+        with patch.object(RateQuote.objects, 'bulk_create', side_effect=OperationalError('db caída')):
+            self.assertTrue(recorder.enqueue(RateQuote, [_quote(self.user)]))
+        self.assertEqual((recorder.counters['spilled'], recorder.counters['flush_errors']), (1, 1))
+        self.assertEqual(len(recorder.spill_files()), 1)
+        self.assertFalse(RateQuote.objects.exists())
+
+        with patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=2)):
+            self.assertEqual(recorder.flush(), 1)
+        quote = RateQuote.objects.get()
+        self.assertLess(quote.created_at, timezone.now() + timedelta(minutes=1))
+        self.assertEqual(recorder.spill_files(), [])
+        self.assertEqual(recorder.stats()['replayed'], 1)
+
+
+class WriteBehindStatsViewTests(APITestCase):
+    def test_requires_admin(self):
+        url = reverse('write_behind_stats')
+        user = User.objects.create_user('staff', password='x', is_staff=True)
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        self.client.force_authenticate(user)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsInstance(resp.data['data'], list)
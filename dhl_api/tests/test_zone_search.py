@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from dhl_api.models import ServiceZone
+from dhl_api.utils.text_search import fold_text
+from dhl_api.utils.zone_search import search_zones
+
+
+class ZoneSearchTests(APITestCase):
+    def setUp(self):
+        rows = [
+            ('CO', 'COLOMBIA', 'DC', 'Cundinamarca', 'Bogotá', 'BOG', '110111', '110111'),
+            ('CO', 'COLOMBIA', 'ANT', 'Antioquia', 'Medellín', 'MDE', '050001', '050001'),
+            ('PA', 'PANAMA', '', '', 'Panamá City', 'PTY', '', ''),
+            ('PA', 'PANAMA', '', '', 'Ciudad de Bogota Vieja', 'PTY', '0801', '0801'),
+        ]
+        for cc, cn, sc, sn, city, sa, pf, pt in rows:
+            ServiceZone.objects.create(
+                country_code=cc, country_name=cn, state_code=sc, state_name=sn,
+                city_name=city, service_area=sa, postal_code_from=pf, postal_code_to=pt,
+            )
+
+    def test_fold_text_removes_accents_and_case(self):
+        self.assertEqual(fold_text('  Bogotá   D.C. '), 'bogota d.c.')
+        self.assertEqual(fold_text(None), '')
+
+    def test_save_populates_search_text(self):
+        zone = ServiceZone.objects.get(city_name='Medellín')
+        self.assertEqual(zone.search_text, '|medellin|antioquia|ant|mde|colombia|')
+
+    def test_accent_insensitive_search_ranks_exact_city_first(self):
+        result = search_zones('BOGOTA')
+        cities = [z.city_name for z in result['results']]
+        self.assertEqual(cities, ['Bogotá', 'Ciudad de Bogota Vieja'])
+        self.assertFalse(result['pagination']['total_is_estimate'])
+        self.assertEqual(result['pagination']['total_count'], 2)
+
+    def test_pagination_uses_lookahead_for_has_next(self):
+        result = search_zones('', page=1, page_size=3)
+        self.assertTrue(result['pagination']['has_next'])
+        self.assertEqual(len(result['results']), 3)
+        result = search_zones('', page=2, page_size=3)
+        self.assertFalse(result['pagination']['has_next'])
+        self.assertTrue(result['pagination']['has_previous'])
+
+    def test_search_endpoint(self):
+        user = User.objects.create_user(username='tester', password='x')
+        self.client.force_authenticate(user=user)
+        resp = self.client.get(reverse('search_service_zones'), {'q': 'medellin'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['data'][0]['city_name'], 'Medellín')
+        self.assertIn('total_is_estimate', resp.data['pagination'])
@@ -37,9 +37,13 @@ urlpatterns = [
     # Endpoints para historial de actividades de usuarios
     path('user-activities/', views.user_activities_view, name='user_activities'),
     path('user-activities/stats/', views.user_activity_stats_view, name='user_activity_stats'),
+    path('user-activities/<int:activity_id>/', views.user_activity_detail_view, name='user_activity_detail'),
     
     # Endpoints para agenda de contactos
     path('contacts/', views.contacts_view, name='contacts_list'),
+    path('contacts/autocomplete/', views.contact_autocomplete_view, name='contact_autocomplete'),
+    path('contacts/import/', views.contacts_import_view, name='contacts_import'),
+    path('contacts/export/', views.contacts_export_view, name='contacts_export'),
     path('contacts/<int:contact_id>/', views.contact_detail_view, name='contact_detail'),
     path('contacts/<int:contact_id>/favorite/', views.contact_toggle_favorite_view, name='contact_toggle_favorite'),
     path('contacts/<int:contact_id>/use/', views.contact_use_view, name='contact_use'),
@@ -51,11 +55,15 @@ urlpatterns = [
     path('service-zones/cities/<str:country_code>/', views.get_cities_by_country_state, name='get_cities_by_country'),
     path('service-zones/cities/<str:country_code>/<str:state_code>/', views.get_cities_by_country_state, name='get_cities_by_country_state'),
     path('service-zones/map-stats/<str:country_code>/', views.map_stats_by_country, name='map_stats_by_country'),
+    path('service-zones/coverage/', views.reference_coverage_view, name='reference_coverage'),
+    path('diagnostics/write-behind/', views.write_behind_stats_view, name='write_behind_stats'),
     path('service-zones/areas/<str:country_code>/', views.get_service_areas_by_location, name='get_service_areas'),
     path('service-zones/postal-codes/<str:country_code>/', views.get_postal_codes_by_location, name='get_postal_codes'),
     path('service-zones/test-city-mapping/<str:country_code>/<str:city_name>/', views.test_city_service_area_mapping, name='test_city_mapping'),
     path('service-zones/debug-city-analysis/<str:country_code>/<str:city_name>/', views.debug_city_analysis, name='debug_city_analysis'),
     path('service-zones/resolve-display/', views.resolve_service_area_display, name='resolve_service_area_display'),
+    path('service-zones/resolve-display/bulk/', views.resolve_service_area_display_bulk, name='resolve_service_area_display_bulk'),
     path('service-zones/search/', views.search_service_zones, name='search_service_zones'),
     path('service-zones/analyze-country/<str:country_code>/', views.analyze_country_structure, name='analyze_country_structure'),
+    path('service-zones/bundles/', views.reference_bundles_manifest, name='reference_bundles_manifest'),
 ]
@@ -0,0 +1,300 @@
+"""Particionado mensual y retención de ``UserActivity``.
+
+PostgreSQL: ``partition_activity_table()`` (migración 0016) convierte
+``dhl_api_useractivity`` en una tabla particionada por rango de
+``created_at``: una partición por mes (``<tabla>_pYYYYMM``) y una partición
+``<tabla>_default`` que recibe lo que no tenga mes creado. La PK pasa a ser
+``(id, created_at)`` porque PostgreSQL exige la clave de partición en las
+restricciones únicas; Django sigue usando ``id``. ``ensure_partitions()``
+crea los meses siguientes y mueve a su partición las filas que hayan caído en
+la default.
+
+Otros motores (SQLite en desarrollo): la tabla no se particiona; el mes es la
+unidad lógica de archivo y el borrado se hace en lotes por rango de ``id``.
+
+``archive_activity()`` exporta cada mes anterior al corte (con sus payloads
+de ``ActivityPayload`` incluidos) a ``user_activity-YYYY-MM.jsonl.gz`` y luego
+lo elimina: en PostgreSQL separa y
+borra la partición completa (DETACH + DROP, sin generar filas muertas); en
+los demás casos borra en lotes de ``chunk_size`` filas.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .activity_payloads import fetch_payloads, load_payloads, payload_digests, purge_orphan_payloads
+from .table_swap import _CREATE_INDEX_RE, _pg_indexes, _quote, _serial_sequence
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'dhl_api_useractivity'
+LEGACY_SUFFIX = '__legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_PREFIX = 'user_activity'
+
+_PARTITION_RE = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+EXPORT_FIELDS = (
+    'id', 'user_id', 'action', 'status', 'description', 'ip_address', 'user_agent',
+    'resource_type', 'resource_id', 'metadata', 'created_at',
+)
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    """Límites UTC ``[inicio, fin)`` del mes (TIME_ZONE es UTC)."""
+    nxt = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc),
+        datetime(nxt.year, nxt.month, 1, tzinfo=dt_timezone.utc),
+    )
+
+
+def partition_name(month: date) -> str:
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions() -> dict[date, str]:
+    """Particiones mensuales existentes ``{mes: tabla}`` (sin la default)."""
+    if not is_partitioned():
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    out = {}
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            out[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return out
+
+
+def _attach_month(cursor, month: date) -> None:
+    """Crea la partición del mes moviendo antes las filas que estén en la default."""
+    name = partition_name(month)
+    lower, upper = month_bounds(month)
+    cursor.execute(f'CREATE TABLE {_quote(name)} (LIKE {_quote(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {_quote(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s '
+        f'RETURNING *) INSERT INTO {_quote(name)} SELECT * FROM moved',
+        [lower, upper],
+    )
+    if cursor.rowcount:
+        logger.info(f'{cursor.rowcount} actividades movidas de {DEFAULT_PARTITION} a {name}')
+    # Los índices del padre se crean en la partición al adjuntarla
+    cursor.execute(
+        f'ALTER TABLE {_quote(TABLE)} ATTACH PARTITION {_quote(name)} FOR VALUES FROM (%s) TO (%s)',
+        [lower, upper],
+    )
+
+
+def ensure_partitions(months_ahead: int = 3, today: date | None = None) -> list[str]:
+    """Crea las particiones desde el mes actual hasta ``months_ahead`` meses después.
+
+    También crea los meses anteriores que tengan filas en la partición default.
+    No hace nada si la tabla no está particionada.
+    """
+    if not is_partitioned():
+        return []
+    current = month_start(today or datetime.now(dt_timezone.utc))
+    wanted = {add_months(current, i) for i in range(months_ahead + 1)}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date "
+            f'FROM {_quote(DEFAULT_PARTITION)}'
+        )
+        wanted.update(month_start(row[0]) for row in cursor.fetchall())
+
+    existing = list_partitions()
+    created = []
+    for month in sorted(wanted - set(existing)):
+        with transaction.atomic(), connection.cursor() as cursor:
+            _attach_month(cursor, month)
+        created.append(partition_name(month))
+    return created
+
+
+def partition_activity_table(months_ahead: int = 3) -> bool:
+    """Convierte la tabla en particionada por mes conservando filas, índices y FK.
+
+    Solo PostgreSQL; retorna False si no aplica o ya estaba particionada.
+    Debe ejecutarse dentro de una transacción (la migración lo hace).
+    """
+    if connection.vendor != 'postgresql' or is_partitioned():
+        return False
+
+    legacy = f'{TABLE}{LEGACY_SUFFIX}'
+    with connection.cursor() as cursor:
+        indexes = _pg_indexes(cursor, TABLE)
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN(created_at) FROM {_quote(TABLE)}')
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE {_quote(TABLE)} RENAME TO {_quote(legacy)}')
+        # Liberar los nombres de índices y restricciones para la tabla nueva
+        for i, ix in enumerate(indexes):
+            temp = f'{TABLE[:40]}_lg{i}'
+            if ix['constraint']:
+                cursor.execute(f'ALTER TABLE {_quote(legacy)} RENAME CONSTRAINT {_quote(ix["name"])} TO {_quote(temp)}')
+            else:
+                cursor.execute(f'ALTER INDEX {_quote(ix["name"])} RENAME TO {_quote(temp)}')
+
+        cursor.execute(
+            f'CREATE TABLE {_quote(TABLE)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE {_quote(TABLE)} ADD CONSTRAINT {_quote(TABLE + "_pkey")} PRIMARY KEY (id, created_at)')
+        cursor.execute(f'CREATE TABLE {_quote(DEFAULT_PARTITION)} PARTITION OF {_quote(TABLE)} DEFAULT')
+
+        current = month_start(datetime.now(dt_timezone.utc))
+        month = month_start(oldest) if oldest else current
+        while month <= add_months(current, months_ahead):
+            lower, upper = month_bounds(month)
+            cursor.execute(
+                f'CREATE TABLE {_quote(partition_name(month))} PARTITION OF {_quote(TABLE)} FOR VALUES FROM (%s) TO (%s)',
+                [lower, upper],
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {_quote(TABLE)} SELECT * FROM {_quote(legacy)}')
+
+        sequence = _serial_sequence(cursor, TABLE, 'id')
+        if sequence is None:
+            # Columna serial: la tabla nueva usa la secuencia de la anterior; traspasarla antes del DROP
+            sequence = _serial_sequence(cursor, legacy, 'id')
+            if sequence:
+                cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {_quote(TABLE)}.{_quote("id")}')
+        if sequence:
+            cursor.execute(
+                f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {_quote(TABLE)}), 0) + 1, false)', [sequence]
+            )
+        cursor.execute(f'DROP TABLE {_quote(legacy)}')
+
+        for ix in indexes:
+            if ix['contype'] == 'p':
+                continue
+            cursor.execute(_CREATE_INDEX_RE.sub(
+                lambda m: f'CREATE {m.group(1) or ""}INDEX {_quote(ix["name"])} ON {_quote(TABLE)} ',
+                ix['definition'],
+                count=1,
+            ))
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {_quote(TABLE)} ADD CONSTRAINT {_quote(name)} {definition}')
+        cursor.execute(f'ANALYZE {_quote(TABLE)}')
+    return True
+
+
+def archive_path(archive_dir: str, month: date) -> str:
+    return os.path.join(archive_dir, f'{ARCHIVE_PREFIX}-{month:%Y-%m}.jsonl.gz')
+
+
+def _write_chunk(path: str, rows: list[dict], mode: str) -> None:
+    # Cada lote es un miembro gzip independiente: el archivo sigue siendo un .gz válido
+    with gzip.open(path, mode) as fh:
+        for row in rows:
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+            fh.write(b'\n')
+
+
+def _export_month(qs, path: str, chunk_size: int, delete: bool, append: bool) -> int:
+    """Exporta el mes por lotes de ``id``; con ``delete`` borra cada lote tras escribirlo."""
+    total = 0
+    last_id = 0
+    mode = 'ab' if append else 'wb'
+    while True:
+        rows = list(qs.filter(id__gt=last_id).order_by('id').values(*EXPORT_FIELDS)[:chunk_size])
+        if not rows:
+            break
+        # El archivo es autocontenido: los payloads referenciados van dentro de cada fila
+        payloads = fetch_payloads(d for row in rows for d in payload_digests(row['metadata']))
+        _write_chunk(path, [dict(row, metadata=load_payloads(row['metadata'], payloads)) for row in rows], mode)
+        mode = 'ab'
+        if delete:
+            # Mismo rango de id dentro del mes: exactamente las filas del lote
+            qs.filter(id__gt=last_id, id__lte=rows[-1]['id']).delete()
+        last_id = rows[-1]['id']
+        total += len(rows)
+    return total
+
+
+def archive_activity(retention_months: int, archive_dir: str, chunk_size: int = 5000,
+                     dry_run: bool = False, today: date | None = None) -> list[dict]:
+    """Archiva y elimina los meses anteriores a ``retention_months`` meses atrás.
+
+    Retorna una entrada por mes: ``{'month', 'rows', 'path', 'method'}``.
+    Al final elimina los payloads anteriores al corte que quedaron sin referencias.
+    """
+    from ..models import UserActivity
+
+    cutoff = add_months(month_start(today or datetime.now(dt_timezone.utc)), -max(0, retention_months))
+    cutoff_dt = month_bounds(cutoff)[0]
+    partitions = {m: name for m, name in list_partitions().items() if m < cutoff}
+    months = set(partitions)
+    months.update(
+        month_start(d) for d in UserActivity.objects.filter(created_at__lt=cutoff_dt).dates('created_at', 'month')
+    )
+    if not dry_run:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    results = []
+    for month in sorted(months):
+        lower, upper = month_bounds(month)
+        # El rango de created_at hace que PostgreSQL lea solo la partición del mes
+        qs = UserActivity.objects.filter(created_at__gte=lower, created_at__lt=upper)
+        path = archive_path(archive_dir, month)
+        partition = partitions.get(month)
+        entry = {'month': f'{month:%Y-%m}', 'path': path, 'method': 'detach' if partition else 'chunked-delete'}
+        if dry_run:
+            entry['rows'] = qs.count()
+            results.append(entry)
+            continue
+
+        if partition:
+            # La partición sigue completa hasta el DROP: reescribir el archivo si un intento anterior falló
+            entry['rows'] = _export_month(qs, path, chunk_size, delete=False, append=False)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {_quote(TABLE)} DETACH PARTITION {_quote(partition)}')
+                cursor.execute(f'DROP TABLE {_quote(partition)}')
+        else:
+            # Lo ya borrado está en el archivo: los reintentos agregan al final
+            entry['rows'] = _export_month(qs, path, chunk_size, delete=True, append=True)
+        logger.info(f"UserActivity {entry['month']}: {entry['rows']} filas archivadas en {path} ({entry['method']})")
+        results.append(entry)
+
+    if results and not dry_run:
+        purged = purge_orphan_payloads(cutoff_dt)
+        if purged:
+            logger.info(f'{purged} payloads de actividad sin referencias eliminados')
+    return results
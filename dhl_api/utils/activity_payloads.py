@@ -0,0 +1,175 @@
+"""Almacén de payloads de actividad: fuera de la tabla caliente, comprimidos y deduplicados.
+
+``split_payloads(metadata)`` recorre las claves de primer nivel de
+``metadata`` (``request_payload``, ``response_payload``,
+``raw_response_preview``...): cada valor se serializa una sola vez a JSON
+canónico y, si supera ``AUDIT_PAYLOAD_INLINE_MAX`` bytes, se reemplaza en la
+fila por una referencia en ``metadata['payload_refs']``::
+
+    {'response_payload': {'digest': 'ab12…', 'bytes': 18234, 'summary': 'objeto, 6 claves'}}
+
+y se devuelve como registro de ``ActivityPayload`` (clave = SHA-256 del
+JSON, contenido comprimido con zlib o zstd). Los payloads repetidos tienen el
+mismo digest y se insertan una sola vez (``ignore_conflicts``).
+
+``load_payloads(metadata)`` hace el camino inverso para el detalle de la
+actividad; ``purge_orphan_payloads`` elimina los que ya no referencia
+ninguna actividad (lo llama ``archive_user_activity``). Cada lote escrito
+marca ``last_referenced_at`` en sus payloads, también en los que ya existían
+(``touch_payloads``): un payload reutilizado por un evento reciente nunca es
+candidato, aunque la fila se haya creado antes del corte.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional; sin el paquete se usa zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+REFS_KEY = 'payload_refs'
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+
+
+def _codec() -> str:
+    codec = getattr(settings, 'AUDIT_PAYLOAD_CODEC', ZLIB)
+    if codec == ZSTD and zstandard is None:
+        return ZLIB
+    return codec if codec in (ZLIB, ZSTD) else ZLIB
+
+
+def compress(raw: bytes, codec: str) -> bytes:
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=6).compress(raw)
+    return zlib.compress(raw, 6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('Payload comprimido con zstd y el paquete zstandard no está instalado')
+        return zstandard.ZstdDecompressor().decompress(bytes(data))
+    return zlib.decompress(bytes(data))
+
+
+def summarize(value) -> str:
+    """Resumen corto para mostrar sin cargar el payload."""
+    if isinstance(value, dict):
+        return f'objeto, {len(value)} claves'
+    if isinstance(value, list):
+        return f'lista, {len(value)} elementos'
+    return f'{type(value).__name__}'
+
+
+def split_payloads(metadata, inline_max: int | None = None) -> tuple[dict | None, list[dict]]:
+    """Separa los valores grandes de ``metadata``.
+
+    Retorna ``(metadata_liviano, registros_ActivityPayload)``; ``metadata`` ya
+    normalizado a tipos JSON (Decimal, fechas... pasan por DjangoJSONEncoder).
+    """
+    if metadata is None:
+        return None, []
+    if not isinstance(metadata, dict):
+        return json.loads(json.dumps(metadata, cls=DjangoJSONEncoder)), []
+    if inline_max is None:
+        inline_max = getattr(settings, 'AUDIT_PAYLOAD_INLINE_MAX', 1024)
+
+    codec = _codec()
+    light: dict = {}
+    refs: dict = {}
+    records: list[dict] = []
+    for key, value in metadata.items():
+        encoded = json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+        raw = encoded.encode('utf-8')
+        if inline_max <= 0 or len(raw) <= inline_max or key == REFS_KEY:
+            light[key] = json.loads(encoded)
+            continue
+        digest = hashlib.sha256(raw).hexdigest()
+        data = compress(raw, codec)
+        refs[key] = {'digest': digest, 'bytes': len(raw), 'summary': summarize(value)}
+        records.append({'digest': digest, 'codec': codec, 'data': data, 'size': len(raw), 'stored_size': len(data)})
+    if refs:
+        light[REFS_KEY] = refs
+    return light, records
+
+
+def payload_digests(metadata) -> list[str]:
+    refs = (metadata or {}).get(REFS_KEY) if isinstance(metadata, dict) else None
+    return [ref['digest'] for ref in (refs or {}).values() if isinstance(ref, dict) and ref.get('digest')]
+
+
+def fetch_payloads(digests) -> dict:
+    """``{digest: valor}`` para los digests dados (una consulta)."""
+    from ..models import ActivityPayload
+
+    out = {}
+    for payload in ActivityPayload.objects.filter(digest__in=set(digests)):
+        out[payload.digest] = json.loads(decompress(payload.data, payload.codec))
+    return out
+
+
+def load_payloads(metadata, payloads: dict | None = None):
+    """Devuelve ``metadata`` con los payloads referenciados de vuelta en sus claves."""
+    digests = payload_digests(metadata)
+    if not digests:
+        return metadata
+    if payloads is None:
+        payloads = fetch_payloads(digests)
+    full = {k: v for k, v in metadata.items() if k != REFS_KEY}
+    missing = {}
+    for key, ref in metadata[REFS_KEY].items():
+        if ref.get('digest') in payloads:
+            full[key] = payloads[ref['digest']]
+        else:
+            missing[key] = ref
+    if missing:
+        # Purgado o aún en el buffer de escritura: se conserva la referencia
+        full[REFS_KEY] = missing
+    return full
+
+
+def touch_payloads(payloads) -> int:
+    """Marca como referenciados ahora los payloads de un lote recién escrito (hook ``on_write``)."""
+    from ..models import ActivityPayload
+
+    digests = {p.digest for p in payloads}
+    if not digests:
+        return 0
+    return ActivityPayload.objects.filter(digest__in=digests).update(last_referenced_at=timezone.now())
+
+
+def purge_orphan_payloads(created_before, chunk_size: int = 5000) -> int:
+    """Elimina payloads no referenciados desde ``created_before`` que ninguna actividad usa.
+
+    Un evento posterior al corte marcó su payload al escribirse, así que solo
+    las actividades anteriores al corte (normalmente ya archivadas) pueden
+    referenciar a los candidatos: el recorrido se limita a ellas.
+    """
+    from ..models import ActivityPayload, UserActivity
+
+    referenced = set()
+    refs = UserActivity.objects.filter(
+        created_at__lt=created_before, metadata__has_key=REFS_KEY
+    ).values_list('metadata', flat=True)
+    for metadata in refs.iterator(chunk_size=chunk_size):
+        referenced.update(payload_digests(metadata))
+
+    candidates = ActivityPayload.objects.filter(
+        created_at__lt=created_before, last_referenced_at__lt=created_before
+    ).values_list('digest', flat=True)
+    orphans = [d for d in candidates.iterator(chunk_size=chunk_size) if d not in referenced]
+    deleted = 0
+    for i in range(0, len(orphans), chunk_size):
+        deleted += ActivityPayload.objects.filter(digest__in=orphans[i:i + chunk_size]).delete()[0]
+    return deleted
@@ -0,0 +1,124 @@
+"""Resúmenes diarios de actividad (``UserActivityDailyRollup``).
+
+El recorder de auditoría llama a ``apply_activity_rollups`` con cada lote de
+``UserActivity`` recién escrito, dentro de la misma transacción: los conteos
+quedan al día sin recorrer la tabla de actividades. ``rebuild_rollups``
+recalcula un rango de días desde ``UserActivity`` (comando
+``rebuild_activity_rollups``) por si se desalinean, solo para días que aún no
+se archivaron. Los eventos omitidos por ``AUDIT_SAMPLING`` se suman con
+``apply_rollup_deltas`` sin fila en ``UserActivity``, por lo que
+``rebuild_rollups`` sobre días muestreados solo cuenta los eventos guardados.
+
+``rollup_stats`` arma las estadísticas de ``user-activities/stats/`` con
+consultas agrupadas sobre el resumen: el costo depende de los días del
+rango, no del número de actividades.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def _day(value) -> date:
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def apply_activity_rollups(activities) -> int:
+    """Suma ``activities`` (instancias ya guardadas) a los conteos diarios. Retorna filas tocadas."""
+    return apply_rollup_deltas(Counter(
+        (a.user_id, _day(a.created_at), a.action, a.status)
+        for a in activities if a.created_at is not None
+    ))
+
+
+def apply_rollup_deltas(deltas: Counter) -> int:
+    """Suma ``{(user_id, día, action, status): n}`` a los conteos diarios. Retorna filas tocadas."""
+    from ..models import UserActivityDailyRollup
+
+    for (user_id, day, action, status), n in deltas.items():
+        key = {'user_id': user_id, 'day': day, 'action': action, 'status': status}
+        if UserActivityDailyRollup.objects.filter(**key).update(count=F('count') + n):
+            continue
+        try:
+            with transaction.atomic():
+                UserActivityDailyRollup.objects.create(count=n, **key)
+        except IntegrityError:
+            # Otro worker creó la fila entre el UPDATE y el INSERT
+            UserActivityDailyRollup.objects.filter(**key).update(count=F('count') + n)
+    return len(deltas)
+
+
+def rebuild_rollups(date_from: date, date_to: date) -> int:
+    """Recalcula los resúmenes de ``[date_from, date_to]`` desde ``UserActivity``. Retorna filas creadas."""
+    from ..models import UserActivity, UserActivityDailyRollup
+
+    # Rango sobre created_at (no sobre el día calculado): en PostgreSQL lee solo las particiones del rango
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    rows = (
+        UserActivity.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day', 'action', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        UserActivityDailyRollup.objects.filter(day__gte=date_from, day__lte=date_to).delete()
+        created = UserActivityDailyRollup.objects.bulk_create(
+            [
+                UserActivityDailyRollup(user_id=r['user_id'], day=r['day'], action=r['action'],
+                                        status=r['status'], count=r['n'])
+                for r in rows.iterator()
+            ],
+            batch_size=2000,
+        )
+    return len(created)
+
+
+def rollup_stats(date_from: date, date_to: date, user=None, top_users: int = 10) -> dict:
+    """Estadísticas de ``[date_from, date_to]`` (de un usuario o de todos si ``user`` es None)."""
+    from ..models import UserActivityDailyRollup
+
+    qs = UserActivityDailyRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    if user is not None:
+        qs = qs.filter(user=user)
+
+    by_action = {
+        r['action']: r['total']
+        for r in qs.values('action').annotate(total=Sum('count')).order_by('-total', 'action')
+    }
+    by_status = {
+        r['status']: r['total']
+        for r in qs.values('status').annotate(total=Sum('count')).order_by('-total', 'status')
+    }
+    daily = [
+        {'day': r['day'].isoformat(), 'count': r['total']}
+        for r in qs.values('day').annotate(total=Sum('count')).order_by('day')
+    ]
+    total = sum(by_status.values())
+    week_start = max(date_from, date_to - timedelta(days=6))
+    stats = {
+        'summary': {
+            'total_activities': total,
+            'success_rate': round(by_status.get('success', 0) * 100 / total, 1) if total else 0,
+            'unique_users': qs.values('user_id').distinct().count(),
+            'period_days': (date_to - date_from).days + 1,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+        },
+        'by_action': by_action,
+        'by_status': by_status,
+        'daily': daily,
+        'recent_activities': sum(d['count'] for d in daily if d['day'] >= week_start.isoformat()),
+    }
+    if user is None:
+        stats['top_users'] = [
+            {'username': r['user__username'], 'activity_count': r['total']}
+            for r in qs.values('user__username').annotate(total=Sum('count')).order_by('-total')[:top_users]
+        ]
+    return stats
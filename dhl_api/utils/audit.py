@@ -0,0 +1,128 @@
+"""Registro de auditoría (``UserActivity``) fuera del camino de la petición.
+
+``UserActivity.log_activity`` ya no hace un INSERT síncrono: el evento se
+normaliza una sola vez (``metadata`` se serializa con ``DjangoJSONEncoder`` al
+encolar, así la vista puede seguir modificando sus dicts) y pasa al recorder
+``audit`` de ``write_behind``, que lo escribe en lotes con ``bulk_create``
+desde un hilo de fondo. Los valores grandes de ``metadata`` van comprimidos a
+``ActivityPayload`` y la fila guarda solo la referencia (ver
+``activity_payloads``). La cola es acotada (``AUDIT_MAX_QUEUE``): ante
+saturación los eventos se vuelcan a disco en lugar de frenar la petición.
+
+Muestreo: ``AUDIT_SAMPLING`` asigna a cada ``action`` la fracción de eventos
+exitosos que se guarda (``'*'`` es el valor por defecto). Los eventos con
+estado distinto de ``success`` se guardan siempre. Los omitidos igual se
+cuentan en ``UserActivityDailyRollup``: se acumulan en memoria por
+(usuario, día, acción, estado) y se suman al final de cada flush, así las
+estadísticas no dependen del muestreo.
+
+En tests ``AUDIT_ASYNC=False`` escribe en la misma llamada; ``flush_audit()``
+vacía el buffer de forma síncrona cuando está activo.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+from .activity_payloads import split_payloads, touch_payloads
+from .activity_rollups import _day, apply_activity_rollups, apply_rollup_deltas
+from .write_behind import WriteBehindRecorder, get_recorder
+
+logger = logging.getLogger(__name__)
+
+AUDIT_RECORDER = 'audit'
+
+
+class _SampledRollups:
+    """Conteos de eventos omitidos por muestreo pendientes de sumar al resumen diario."""
+
+    def __init__(self):
+        self._deltas: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, user_id, action: str, status: str) -> None:
+        with self._lock:
+            self._deltas[(user_id, _day(timezone.now()), action, status)] += 1
+
+    def pending(self) -> int:
+        return sum(self._deltas.values())
+
+    def apply(self) -> int:
+        with self._lock:
+            deltas, self._deltas = self._deltas, Counter()
+        if not deltas:
+            return 0
+        try:
+            return apply_rollup_deltas(deltas)
+        except Exception:
+            # BD caída: se conservan para el siguiente flush
+            with self._lock:
+                self._deltas.update(deltas)
+            raise
+
+
+_sampled_rollups = _SampledRollups()
+
+
+def audit_recorder() -> WriteBehindRecorder:
+    return get_recorder(
+        AUDIT_RECORDER,
+        flush_size=getattr(settings, 'AUDIT_FLUSH_SIZE', 200),
+        flush_interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0),
+        max_queue=getattr(settings, 'AUDIT_MAX_QUEUE', 20000),
+        enabled=getattr(settings, 'AUDIT_ASYNC', True),
+        ignore_conflicts=('dhl_api.ActivityPayload',),
+        # Los resúmenes diarios y la marca de uso de los payloads se actualizan en la transacción de cada lote
+        on_write={'dhl_api.UserActivity': apply_activity_rollups, 'dhl_api.ActivityPayload': touch_payloads},
+        on_flush=_sampled_rollups.apply,
+    )
+
+
+def sampling_rate(action: str) -> float:
+    rules = getattr(settings, 'AUDIT_SAMPLING', {}) or {}
+    return float(rules.get(action, rules.get('*', 1.0)))
+
+
+def log_activity(user, action: str, description: str, status: str = 'success', **kwargs) -> bool:
+    """Encola un evento de ``UserActivity``. Retorna False si se omitió por muestreo o se descartó."""
+    from ..models import ActivityPayload, UserActivity
+
+    recorder = audit_recorder()
+    if status == 'success':
+        rate = sampling_rate(action)
+        if rate < 1.0 and random.random() >= rate:
+            recorder.counters['sampled_out'] += 1
+            # Sin fila de detalle, pero el resumen diario sí lo cuenta
+            _sampled_rollups.add(user.pk, action, status)
+            if not recorder.enabled:
+                recorder.flush()
+            return False
+    try:
+        # Una única serialización: desacopla el evento de los dicts de la vista y separa los payloads grandes
+        metadata, payloads = split_payloads(kwargs.get('metadata'))
+        ok = recorder.enqueue(ActivityPayload, payloads)
+        return recorder.enqueue(UserActivity, [{
+            'user_id': user.pk,
+            'action': action,
+            'description': description,
+            'status': status,
+            'ip_address': kwargs.get('ip_address'),
+            'user_agent': kwargs.get('user_agent'),
+            'resource_type': kwargs.get('resource_type'),
+            'resource_id': kwargs.get('resource_id'),
+            'metadata': metadata,
+        }]) and ok
+    except Exception as e:
+        # La auditoría nunca debe romper la petición
+        logger.error(f"No se pudo registrar actividad {action} de {getattr(user, 'pk', None)}: {e}")
+        return False
+
+
+def flush_audit() -> int:
+    """Escribe de inmediato los eventos pendientes de este proceso. Retorna cuántos se escribieron."""
+    return audit_recorder().flush()
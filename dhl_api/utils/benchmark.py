@@ -0,0 +1,44 @@
+"""Arnés mínimo de benchmarks para comandos de diagnóstico.
+
+Mide latencias de un callable (con calentamiento) y formatea percentiles.
+Lo comparten los comandos ``benchmark_*`` para que los números sean comparables.
+"""
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Callable
+
+
+def time_callable(fn: Callable[[], object], repeat: int = 5, warmup: int = 1) -> dict:
+    """Ejecuta ``fn`` ``warmup + repeat`` veces y retorna estadísticas en milisegundos."""
+    for _ in range(max(0, warmup)):
+        fn()
+    samples = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    p95_idx = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+    return {
+        'runs': len(samples),
+        'min_ms': samples[0],
+        'p50_ms': statistics.median(samples),
+        'p95_ms': samples[p95_idx],
+        'max_ms': samples[-1],
+    }
+
+
+def format_stats(label: str, stats: dict) -> str:
+    return (
+        f"{label:<28} p50={stats['p50_ms']:8.2f}ms  p95={stats['p95_ms']:8.2f}ms  "
+        f"min={stats['min_ms']:8.2f}ms  (n={stats['runs']})"
+    )
+
+
+def speedup(before: dict, after: dict) -> float:
+    """Factor de mejora basado en p50 (``before / after``)."""
+    if not after['p50_ms']:
+        return float('inf')
+    return before['p50_ms'] / after['p50_ms']
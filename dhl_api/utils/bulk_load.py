@@ -0,0 +1,268 @@
+"""Carga masiva de alto rendimiento para tablas de referencia.
+
+PostgreSQL: las filas se envían con ``COPY ... FROM STDIN`` a una tabla
+temporal de staging (en bloques, sin construir instancias del modelo) y se
+fusionan con la tabla real en una sola sentencia
+``INSERT ... SELECT DISTINCT ON (...) ... ON CONFLICT DO NOTHING``.
+
+SQLite (desarrollo): ``executemany`` con ``INSERT OR IGNORE`` por bloques.
+
+En ambos casos, ante duplicados dentro del archivo gana la primera fila,
+igual que ``bulk_create(ignore_conflicts=True)``.
+
+``bulk_upsert`` aplica lotes con ``INSERT ... ON CONFLICT DO UPDATE`` (solo
+actualiza filas que cambian) y reporta creadas/actualizadas/sin cambios por
+lote; dentro de un lote gana la última fila, como ``update_or_create``
+aplicado en orden.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import time
+from typing import Callable, Iterable, Sequence
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+STAGE_TABLE = 'dhl_bulk_stage'
+
+
+def _auto_timestamp_columns(model, columns: Sequence[str]) -> list[str]:
+    """Columnas auto_now/auto_now_add que no vienen en ``columns`` (se rellenan con ahora)."""
+    return [
+        f.column for f in model._meta.concrete_fields
+        if (getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)) and f.column not in columns
+    ]
+
+
+def _chunks(rows: Iterable[Sequence], size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy_chunk(cursor, table: str, columns: Sequence[str], chunk: list[Sequence]) -> None:
+    buf = io.StringIO()
+    # QUOTE_ALL: en COPY CSV un campo vacío sin comillas es NULL; entre comillas es ''
+    writer = csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    writer.writerows(chunk)
+    buf.seek(0)
+    cols = ', '.join(columns)
+    cursor.copy_expert(f'COPY {table} ({cols}) FROM STDIN WITH (FORMAT csv)', buf)
+
+
+def _load_postgresql(model, columns, rows, conflict_columns, chunk_size, progress):
+    table = model._meta.db_table
+    stamp_cols = _auto_timestamp_columns(model, columns)
+    cols = ', '.join(columns)
+    conflict = ', '.join(conflict_columns)
+    staged = 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {STAGE_TABLE} ON COMMIT DROP AS '
+            f'SELECT {cols} FROM {table} WITH NO DATA'
+        )
+        # _seq conserva el orden del archivo para que DISTINCT ON elija la primera fila
+        cursor.execute(f'ALTER TABLE {STAGE_TABLE} ADD COLUMN _seq bigserial')
+        for chunk in _chunks(rows, chunk_size):
+            _copy_chunk(cursor, STAGE_TABLE, columns, chunk)
+            staged += len(chunk)
+            if progress:
+                progress(staged)
+
+        insert_cols = ', '.join(list(columns) + stamp_cols)
+        select_cols = ', '.join(list(columns) + ['now()'] * len(stamp_cols))
+        cursor.execute(
+            f'INSERT INTO {table} ({insert_cols}) '
+            f'SELECT DISTINCT ON ({conflict}) {select_cols} FROM {STAGE_TABLE} '
+            f'ORDER BY {conflict}, _seq '
+            f'ON CONFLICT ({conflict}) DO NOTHING'
+        )
+        inserted = max(cursor.rowcount, 0)
+    return staged, inserted
+
+
+def _load_executemany(model, columns, rows, conflict_columns, chunk_size, progress):
+    table = model._meta.db_table
+    stamp_cols = _auto_timestamp_columns(model, columns)
+    insert_cols = ', '.join(list(columns) + stamp_cols)
+    placeholders = ', '.join(['%s'] * (len(columns) + len(stamp_cols)))
+    verb = 'INSERT OR IGNORE' if connection.vendor == 'sqlite' else 'INSERT'
+    suffix = '' if connection.vendor == 'sqlite' else f" ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+    sql = f'{verb} INTO {table} ({insert_cols}) VALUES ({placeholders}){suffix}'
+
+    staged = 0
+    inserted = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for chunk in _chunks(rows, chunk_size):
+            # Adaptar la fecha una vez por bloque en lugar de una vez por fila
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+            stamps = (now,) * len(stamp_cols)
+            before = _total_changes(cursor)
+            cursor.executemany(sql, [tuple(r) + stamps for r in chunk])
+            after = _total_changes(cursor)
+            inserted += (after - before) if after is not None else max(cursor.rowcount, 0)
+            staged += len(chunk)
+            if progress:
+                progress(staged)
+    return staged, inserted
+
+
+def _total_changes(cursor) -> int | None:
+    """Filas modificadas acumuladas en la conexión (solo SQLite; INSERT OR IGNORE no cuenta las ignoradas)."""
+    if connection.vendor != 'sqlite':
+        return None
+    cursor.execute('SELECT total_changes()')
+    return cursor.fetchone()[0]
+
+
+def bulk_insert_ignore(
+    model,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    conflict_columns: Sequence[str],
+    chunk_size: int = 100000,
+    progress: Callable[[int], None] | None = None,
+) -> dict:
+    """Inserta ``rows`` (tuplas en el orden de ``columns``) ignorando conflictos.
+
+    Retorna ``{'staged', 'inserted', 'skipped', 'elapsed', 'rows_per_sec', 'method'}``.
+    """
+    t0 = time.perf_counter()
+    if connection.vendor == 'postgresql':
+        method = 'copy'
+        staged, inserted = _load_postgresql(model, columns, rows, conflict_columns, chunk_size, progress)
+    else:
+        method = 'executemany'
+        staged, inserted = _load_executemany(model, columns, rows, conflict_columns, chunk_size, progress)
+    elapsed = time.perf_counter() - t0
+    return {
+        'staged': staged,
+        'inserted': inserted,
+        'skipped': staged - inserted,
+        'elapsed': elapsed,
+        'rows_per_sec': staged / elapsed if elapsed > 0 else 0.0,
+        'method': method,
+    }
+
+
+def _dedupe_last(chunk: list[Sequence], key_idx: list[int]) -> list[Sequence]:
+    """Conserva la última fila por clave (ON CONFLICT no puede tocar la misma fila dos veces).
+
+    El lote se ordena por clave para que varios workers concurrentes bloqueen
+    filas en el mismo orden y no se produzcan deadlocks.
+    """
+    by_key = {}
+    for row in chunk:
+        by_key[tuple(row[i] for i in key_idx)] = row
+    return [by_key[key] for key in sorted(by_key)]
+
+
+def _upsert_sql(table, columns, conflict_columns, update_columns, stamp_cols, updated_stamp):
+    insert_cols = ', '.join(list(columns) + stamp_cols)
+    conflict = ', '.join(conflict_columns)
+    set_parts = [f'{c} = EXCLUDED.{c}' for c in update_columns]
+    if updated_stamp:
+        set_parts.append(f'{updated_stamp} = EXCLUDED.{updated_stamp}')
+    # SQLite: IS NOT equivale a IS DISTINCT FROM (este último requiere SQLite >= 3.39)
+    distinct = 'IS DISTINCT FROM' if connection.vendor == 'postgresql' else 'IS NOT'
+    changed = ' OR '.join(f'{table}.{c} {distinct} EXCLUDED.{c}' for c in update_columns)
+    return (
+        f'INSERT INTO {table} ({insert_cols}) VALUES %s '
+        f'ON CONFLICT ({conflict}) DO UPDATE SET {", ".join(set_parts)} '
+        f'WHERE {changed}'
+    )
+
+
+def _upsert_batch_postgresql(cursor, sql, batch):
+    from psycopg2.extras import execute_values
+
+    # xmax = 0 solo en filas recién insertadas; las no modificadas no se retornan
+    raw_cursor = getattr(cursor, 'cursor', cursor)
+    flags = execute_values(raw_cursor, sql + ' RETURNING (xmax = 0)', batch, page_size=len(batch), fetch=True)
+    created = sum(1 for (inserted,) in flags if inserted)
+    return created, len(flags) - created
+
+
+def _upsert_batch_sqlite(cursor, sql, batch, table, insert_cols):
+    """Dos sentencias por lote: INSERT OR IGNORE (creadas) y luego el upsert.
+
+    Las filas recién insertadas coinciden con EXCLUDED, así que el ``WHERE`` del
+    upsert las descarta y sus cambios cuentan solo las actualizadas.
+    """
+    width = len(batch[0])
+    values_sql = ', '.join(['(' + ', '.join(['%s'] * width) + ')'] * len(batch))
+    params = [v for row in batch for v in row]
+
+    before = _total_changes(cursor)
+    cursor.execute(f'INSERT OR IGNORE INTO {table} ({insert_cols}) VALUES {values_sql}', params)
+    middle = _total_changes(cursor)
+    cursor.execute(sql.replace('VALUES %s', f'VALUES {values_sql}'), params)
+    after = _total_changes(cursor)
+    return middle - before, after - middle
+
+
+def bulk_upsert(
+    model,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str],
+    batch_size: int = 2000,
+    on_batch: Callable[[int, int, int, int], None] | None = None,
+) -> dict:
+    """Inserta o actualiza ``rows`` por lotes con ``INSERT ... ON CONFLICT DO UPDATE``.
+
+    ``on_batch(n_lote, creadas, actualizadas, sin_cambios)`` se llama tras cada lote.
+    Retorna ``{'staged', 'created', 'updated', 'unchanged', 'batches', 'elapsed', 'rows_per_sec', 'method'}``.
+    """
+    table = model._meta.db_table
+    stamp_cols = _auto_timestamp_columns(model, columns)
+    updated_stamp = next(
+        (f.column for f in model._meta.concrete_fields if getattr(f, 'auto_now', False) and f.column in stamp_cols),
+        None,
+    )
+    key_idx = [list(columns).index(c) for c in conflict_columns]
+    insert_cols = ', '.join(list(columns) + stamp_cols)
+    sql = _upsert_sql(table, columns, conflict_columns, update_columns, stamp_cols, updated_stamp)
+    is_pg = connection.vendor == 'postgresql'
+    totals = {'staged': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'batches': 0}
+
+    t0 = time.perf_counter()
+    # SQLite limita los parámetros por sentencia (32766): acotar el lote
+    if not is_pg:
+        batch_size = max(1, min(batch_size, 32000 // (len(columns) + len(stamp_cols))))
+    with connection.cursor() as cursor:
+        for chunk in _chunks(rows, batch_size):
+            batch = _dedupe_last(chunk, key_idx)
+            now = timezone.now() if is_pg else connection.ops.adapt_datetimefield_value(timezone.now())
+            stamps = (now,) * len(stamp_cols)
+            batch = [tuple(r) + stamps for r in batch]
+            with transaction.atomic():
+                if is_pg:
+                    created, updated = _upsert_batch_postgresql(cursor, sql, batch)
+                else:
+                    created, updated = _upsert_batch_sqlite(cursor, sql, batch, table, insert_cols)
+            unchanged = len(chunk) - created - updated
+            totals['batches'] += 1
+            totals['staged'] += len(chunk)
+            totals['created'] += created
+            totals['updated'] += updated
+            totals['unchanged'] += unchanged
+            if on_batch:
+                on_batch(totals['batches'], created, updated, unchanged)
+
+    elapsed = time.perf_counter() - t0
+    totals.update({
+        'elapsed': elapsed,
+        'rows_per_sec': totals['staged'] / elapsed if elapsed > 0 else 0.0,
+        'method': 'execute_values' if is_pg else 'multi-values',
+    })
+    return totals
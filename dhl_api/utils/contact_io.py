@@ -0,0 +1,399 @@
+"""Importación y exportación masiva de la agenda de contactos.
+
+Importación (CSV, JSON o JSON Lines) en una pasada por lotes:
+
+1. Lectura en streaming del archivo (``csv.DictReader`` / una línea JSON a
+   la vez; un arreglo JSON sí se carga completo). Una línea ilegible a mitad
+   de archivo se reporta como ``error`` en su fila y la importación sigue.
+2. Normalización (espacios, email en minúsculas, país en mayúsculas,
+   favorito como booleano) y validación de cada lote contra las reglas del
+   modelo (obligatorios, longitudes, email, país ISO2) sin instanciar un
+   serializer por fila.
+3. Deduplicación contra los contactos existentes y contra las filas previas
+   del mismo archivo por huella: par (email, nombre) o dirección normalizada
+   (nombre + dirección + código postal + país). Un email que ya usa un
+   contacto con otro nombre no lo sobrescribe: la fila queda en ``conflict``.
+4. Escritura por lote con ``bulk_create``/``bulk_update`` en una transacción
+   y un reporte por fila (``created``, ``updated``, ``unchanged``,
+   ``skipped``, ``duplicate``, ``conflict`` o ``error``).
+
+La exportación recorre el queryset con ``iterator()`` y produce fragmentos
+de texto para ``StreamingHttpResponse`` en los mismos formatos; el CSV
+exportado se puede volver a importar.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from .contact_search import invalidate_contact_search
+from .text_search import fold_text
+
+CSV = 'csv'
+JSON = 'json'
+JSONL = 'jsonl'
+FORMATS = (CSV, JSON, JSONL)
+
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    JSON: 'application/json',
+    JSONL: 'application/x-ndjson',
+}
+
+IMPORT_FIELDS = ('name', 'company', 'phone', 'email', 'address', 'city', 'state', 'postal_code', 'country',
+                 'is_favorite')
+EXPORT_FIELDS = (*IMPORT_FIELDS, 'usage_count', 'last_used', 'created_at')
+
+# Acciones ante un contacto que ya existe
+UPDATE = 'update'
+SKIP = 'skip'
+
+BATCH_SIZE = 1000
+
+_TRUE_VALUES = frozenset(('1', 'true', 't', 'yes', 'y', 'si', 'sí', 's', 'x'))
+_FALSE_VALUES = frozenset(('0', 'false', 'f', 'no', 'n'))
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+_COUNTRY_RE = re.compile(r'^[A-Z]{2}$')
+
+
+def _field_rules() -> tuple[dict[str, int], tuple[str, ...]]:
+    # Longitudes máximas y obligatorios tomados del modelo
+    from ..models import Contact
+
+    limits, required = {}, []
+    for name in IMPORT_FIELDS:
+        field = Contact._meta.get_field(name)
+        if getattr(field, 'max_length', None):
+            limits[name] = field.max_length
+        if not field.blank and name != 'is_favorite':
+            required.append(name)
+    return limits, tuple(required)
+
+
+def detect_format(filename: str = '', content_type: str = '', fmt: str = '') -> str:
+    """Formato explícito, por extensión o por tipo de contenido (CSV por defecto)."""
+    fmt = (fmt or '').lower()
+    if fmt:
+        if fmt == 'ndjson':
+            return JSONL
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt} (use {', '.join(FORMATS)})")
+        return fmt
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in (content_type or ''):
+        return JSONL
+    if name.endswith('.json') or 'json' in (content_type or ''):
+        return JSON
+    return CSV
+
+
+class InvalidRecord:
+    """Registro que no se pudo leer del archivo; se reporta como fila con error."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+def iter_records(stream, fmt: str):
+    """Itera los registros (dicts) de un archivo de texto en ``fmt``.
+
+    Las líneas ilegibles de CSV y JSON Lines producen un ``InvalidRecord``.
+    """
+    if fmt == CSV:
+        try:
+            reader = csv.DictReader(stream)
+            # Un encabezado ilegible invalida todo el archivo
+            if reader.fieldnames is None:
+                return
+        except csv.Error as e:
+            raise ValueError(f'CSV inválido: {e}') from e
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield InvalidRecord(f'CSV inválido ({e})')
+                continue
+            yield {(k or '').strip().lower(): v for k, v in record.items()}
+    if fmt == JSON:
+        try:
+            data = json.load(stream)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'JSON inválido: {e}') from e
+        if isinstance(data, dict):
+            data = data.get('contacts', [])
+        if not isinstance(data, list):
+            raise ValueError('Se esperaba una lista de contactos')
+        yield from data
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield InvalidRecord(f'Línea {number}: JSON inválido ({e})')
+
+
+def text_stream(uploaded) -> io.TextIOBase:
+    """Envuelve un archivo subido (binario) como texto UTF-8, tolerando BOM."""
+    return io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+
+
+def _parse_bool(value) -> bool | None:
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else '').strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    return None
+
+
+def normalize_record(record) -> dict:
+    """Campos de importación normalizados (valores vacíos como ``''``)."""
+    if not isinstance(record, dict):
+        return {}
+    out = {}
+    for name in IMPORT_FIELDS:
+        value = record.get(name)
+        if name == 'is_favorite':
+            out[name] = value
+            continue
+        text = '' if value is None else ' '.join(str(value).split())
+        if name == 'email':
+            text = text.lower()
+        elif name == 'country':
+            text = text.upper()
+        out[name] = text
+    return out
+
+
+def validate_batch(rows: list[dict]) -> list[dict]:
+    """Valida un lote de filas normalizadas; retorna los errores por campo de cada fila."""
+    limits, required = _field_rules()
+    errors = []
+    for row in rows:
+        row_errors = {}
+        if not row:
+            errors.append({'non_field_errors': 'Registro inválido (se esperaba un objeto)'})
+            continue
+        for name in required:
+            if not row[name]:
+                row_errors[name] = 'Este campo es obligatorio.'
+        for name, limit in limits.items():
+            if len(row[name]) > limit and name not in row_errors:
+                row_errors[name] = f'Máximo {limit} caracteres.'
+        if row['email'] and 'email' not in row_errors:
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                row_errors['email'] = 'Correo electrónico inválido.'
+        if row['country'] and 'country' not in row_errors and not _COUNTRY_RE.match(row['country']):
+            row_errors['country'] = 'El código de país debe tener 2 letras (ej: PA, CO, US).'
+        # Favorito vacío = sin dato (no cambia el contacto existente)
+        raw_favorite = row['is_favorite']
+        favorite = _parse_bool(raw_favorite)
+        if favorite is None and str(raw_favorite if raw_favorite is not None else '').strip():
+            row_errors['is_favorite'] = 'Valor booleano inválido.'
+        row['is_favorite'] = favorite
+        errors.append(row_errors)
+    return errors
+
+
+def _compact(value: str) -> str:
+    return _NON_ALNUM_RE.sub('', fold_text(value))
+
+
+def fingerprints(name: str, email: str, address: str, postal_code: str, country: str) -> tuple[tuple, str, str]:
+    """Huellas de deduplicación: ``(par email+nombre, email, dirección)``."""
+    email_fp = (email or '').strip().lower()
+    address_fp = '|'.join(_compact(v) for v in (name, address, postal_code, country))
+    return (email_fp, fold_text(name)), email_fp, address_fp
+
+
+class _ContactIndex:
+    """Contactos existentes (y los creados en esta importación) por huella."""
+
+    def __init__(self, contacts):
+        self.by_pair, self.by_email, self.by_address = {}, {}, {}
+        for contact in contacts:
+            self.add(contact)
+
+    def add(self, contact) -> None:
+        pair, email_fp, address_fp = fingerprints(
+            contact.name, contact.email, contact.address, contact.postal_code, contact.country
+        )
+        self.by_pair.setdefault(pair, contact)
+        self.by_email.setdefault(email_fp, contact)
+        self.by_address.setdefault(address_fp, contact)
+
+    def find(self, row: dict):
+        """Contacto con el mismo par email+nombre o la misma dirección (o None)."""
+        pair, _, address_fp = fingerprints(
+            row['name'], row['email'], row['address'], row['postal_code'], row['country']
+        )
+        return self.by_pair.get(pair) or self.by_address.get(address_fp)
+
+    def email_owner(self, row: dict):
+        """Contacto (de otra persona) que ya usa el email de ``row``."""
+        _, email_fp, _ = fingerprints(row['name'], row['email'], '', '', '')
+        return self.by_email.get(email_fp) if email_fp else None
+
+
+def _apply(contact, row: dict) -> list[str]:
+    # Solo los valores presentes; una celda vacía no borra el dato existente
+    changed = []
+    for name in IMPORT_FIELDS:
+        value = row[name]
+        if value is None or value == '':
+            continue
+        if getattr(contact, name) != value:
+            setattr(contact, name, value)
+            changed.append(name)
+    return changed
+
+
+def import_contacts(user, records, on_duplicate: str = UPDATE, dry_run: bool = False,
+                    batch_size: int = BATCH_SIZE) -> dict:
+    """Importa ``records`` (iterable de dicts) en la agenda de ``user``.
+
+    Retorna ``summary`` (conteo por estado) y ``rows``: una entrada por
+    registro con ``row`` (1 = primer registro), ``status`` y, según el caso,
+    ``id``, ``errors``, ``duplicate_of`` o ``conflict_with`` (id del contacto
+    que ya usa el email).
+    """
+    from ..models import Contact
+
+    if on_duplicate not in (UPDATE, SKIP):
+        raise ValueError(f'on_duplicate debe ser {UPDATE} o {SKIP}')
+    index = _ContactIndex(Contact.objects.filter(created_by=user))
+    seen: dict[int, int] = {}  # id(contacto) -> fila del archivo que lo tocó primero
+    report: list[dict] = []
+    batch: list[dict] = []
+
+    def flush():
+        rows = [normalize_record(r) for r in batch]
+        errors = [
+            {'non_field_errors': record.reason} if isinstance(record, InvalidRecord) else row_errors
+            for record, row_errors in zip(batch, validate_batch(rows))
+        ]
+        to_create, to_update, update_fields = [], [], set()
+        entries = []
+        for row, row_errors in zip(rows, errors):
+            number = len(report) + len(entries) + 1
+            if row_errors:
+                entries.append(({'row': number, 'status': 'error', 'errors': row_errors}, None))
+                continue
+            contact = index.find(row)
+            if contact is None:
+                owner = index.email_owner(row)
+                if owner is not None:
+                    # Mismo email, otra persona: no se sobrescribe ni se duplica el email
+                    entry = {'row': number, 'status': 'conflict',
+                             'errors': {'email': f'El correo ya pertenece al contacto "{owner.name}".'}}
+                    if owner.pk is not None:
+                        entry['conflict_with'] = owner.pk
+                    elif id(owner) in seen:
+                        entry['duplicate_of'] = seen[id(owner)]
+                    entries.append((entry, None))
+                    continue
+            elif id(contact) in seen:
+                entries.append(({'row': number, 'status': 'duplicate', 'duplicate_of': seen[id(contact)]}, None))
+                continue
+            if contact is None:
+                contact = Contact(created_by=user, **{**row, 'is_favorite': bool(row['is_favorite'])})
+                contact.refresh_search_key()
+                index.add(contact)
+                to_create.append(contact)
+                entries.append(({'row': number, 'status': 'created'}, contact))
+            elif on_duplicate == SKIP:
+                entries.append(({'row': number, 'status': 'skipped'}, contact))
+            else:
+                changed = _apply(contact, row)
+                if changed:
+                    contact.refresh_search_key()
+                    contact.updated_at = timezone.now()
+                    to_update.append(contact)
+                    update_fields.update(changed)
+                entries.append(({'row': number, 'status': 'updated' if changed else 'unchanged'}, contact))
+            seen[id(contact)] = number
+
+        if not dry_run and (to_create or to_update):
+            with transaction.atomic():
+                Contact.objects.bulk_create(to_create, batch_size=batch_size)
+                if to_update:
+                    Contact.objects.bulk_update(
+                        to_update, [*update_fields, 'search_key', 'updated_at'], batch_size=batch_size
+                    )
+        for entry, contact in entries:
+            if contact is not None and contact.pk is not None:
+                entry['id'] = contact.pk
+            report.append(entry)
+        batch.clear()
+
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        # También si falla a mitad: los lotes anteriores ya están escritos
+        if not dry_run:
+            invalidate_contact_search(user.pk)
+    return {'summary': dict(Counter(entry['status'] for entry in report), total=len(report)), 'rows': report}
+
+
+def _export_row(contact: dict) -> dict:
+    return {name: contact[name] for name in EXPORT_FIELDS}
+
+
+def export_contacts(queryset, fmt: str = CSV, chunk_size: int = 500):
+    """Genera el contenido de la exportación en fragmentos de texto (para streaming)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt} (use {', '.join(FORMATS)})")
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    buf = io.StringIO()
+
+    if fmt == CSV:
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        for i, row in enumerate(rows, start=1):
+            row = _export_row(row)
+            for name in ('last_used', 'created_at'):
+                row[name] = row[name].isoformat() if row[name] else ''
+            writer.writerow(row)
+            if i % chunk_size == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+        return
+
+    if fmt == JSON:
+        yield '['
+    for i, row in enumerate(rows):
+        line = json.dumps(_export_row(row), cls=DjangoJSONEncoder, ensure_ascii=False)
+        if fmt == JSON:
+            buf.write(',' if i else '')
+            buf.write(line)
+        else:
+            buf.write(line + '\n')
+        if (i + 1) % chunk_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue() + (']' if fmt == JSON else '')
@@ -0,0 +1,221 @@
+"""Búsqueda y autocompletado de la agenda de contactos.
+
+Reemplaza el OR de cinco ``__icontains`` de ``contacts_view`` por:
+
+- Columna plegada ``Contact.search_key`` (``|nombre|empresa|email|teléfono|ciudad|dígitos|``)
+  mantenida por ``Contact.save()``; en PostgreSQL tiene un índice GIN trigram
+  (migración 0020), así ``LIKE %q%`` no recorre toda la tabla.
+- Ranking por calidad de coincidencia (campo exacto > prefijo de campo >
+  prefijo de palabra > subcadena), igual que la búsqueda de zonas.
+
+Para el autocompletado (una llamada por tecla) los candidatos de cada usuario
+se guardan en la caché compartida: id, campos plegados y las señales de
+ranking. Cada tecla recorre esa lista en memoria, sin tocar la BD salvo para
+cargar los ``limit`` contactos ganadores por PK. El puntaje mezcla calidad de
+coincidencia (con peso por campo), favorito, uso (escala logarítmica relativa
+al contacto más usado) y recencia (decaimiento con vida media). Las agendas
+con más de ``CONTACT_SEARCH_MAX_CANDIDATES`` contactos no se cachean: se
+preseleccionan candidatos en la BD con el mismo filtro y se rankean igual.
+
+``Contact.save()``/``delete()`` invalidan la lista del usuario; los
+``update()``/``bulk_create`` masivos deben llamar ``invalidate_contact_search``.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+
+from .text_search import FIELD_SEPARATOR, build_search_text, fold_text
+from .zone_search import trigram_available
+
+CACHE_PREFIX = 'contacts:search'
+# Valor cacheado cuando la agenda supera el tope (se consulta la BD)
+_OVER_CAP = 'over-cap'
+
+# Peso de cada campo de ``search_key`` (mismo orden que build_search_key)
+FIELD_WEIGHTS = (1.0, 0.9, 0.85, 0.85, 0.6, 0.85)
+
+# Calidad de coincidencia de un término dentro de un campo
+EXACT, FIELD_PREFIX, WORD_PREFIX, SUBSTRING = 1.0, 0.85, 0.7, 0.4
+
+# Mezcla del puntaje final (suma 1.0)
+MATCH_WEIGHT = 0.6
+FAVORITE_WEIGHT = 0.15
+USAGE_WEIGHT = 0.15
+RECENCY_WEIGHT = 0.1
+RECENCY_HALF_LIFE_DAYS = 30
+
+# Filas preseleccionadas en la BD cuando la agenda es demasiado grande para la caché
+DB_PREFILTER_LIMIT = 500
+
+_NON_DIGIT_RE = re.compile(r'\D+')
+_WORD_BOUNDARIES = frozenset(' @.-_+/,')
+
+
+def build_search_key(name='', company='', email='', phone='', city='') -> str:
+    """Columna ``search_key``: campos plegados más el teléfono solo con dígitos."""
+    return build_search_text(name, company, email, phone, city, _NON_DIGIT_RE.sub('', phone or ''))
+
+
+def _cache_key(user_id: int) -> str:
+    return f'{CACHE_PREFIX}:{user_id}'
+
+
+def _cache_timeout() -> int:
+    return getattr(settings, 'CONTACT_SEARCH_CACHE_TIMEOUT', 600)
+
+
+def _max_candidates() -> int:
+    return getattr(settings, 'CONTACT_SEARCH_MAX_CANDIDATES', 5000)
+
+
+def invalidate_contact_search(user_id: int | None) -> None:
+    """Descarta la lista de candidatos cacheada del usuario."""
+    if user_id is not None:
+        cache.delete(_cache_key(user_id))
+
+
+def _candidate_rows(queryset, limit: int) -> list[tuple]:
+    # (id, campos plegados, favorito, usos, última actividad en epoch)
+    rows = queryset.annotate(last_activity=Coalesce('last_used', 'created_at')).values_list(
+        'id', 'search_key', 'is_favorite', 'usage_count', 'last_activity',
+    )[:limit]
+    return [
+        (pk, tuple(key[1:-1].split(FIELD_SEPARATOR)), fav, usage, last.timestamp())
+        for pk, key, fav, usage, last in rows
+    ]
+
+
+def get_candidates(user_id: int, refresh: bool = False) -> list[tuple] | None:
+    """Candidatos del usuario desde la caché (o la BD); ``None`` si la agenda supera el tope."""
+    from ..models import Contact
+
+    key = _cache_key(user_id)
+    cached = None if refresh else cache.get(key)
+    if cached is not None:
+        return None if cached == _OVER_CAP else cached
+    limit = _max_candidates()
+    rows = _candidate_rows(Contact.objects.filter(created_by_id=user_id).order_by(), limit + 1)
+    if len(rows) > limit:
+        cache.set(key, _OVER_CAP, _cache_timeout())
+        return None
+    cache.set(key, rows, _cache_timeout())
+    return rows
+
+
+def _term_quality(term: str, field: str) -> float:
+    if field == term:
+        return EXACT
+    if field.startswith(term):
+        return FIELD_PREFIX
+    idx = field.find(term)
+    if idx < 0:
+        return 0.0
+    while idx >= 0:
+        if field[idx - 1] in _WORD_BOUNDARIES:
+            return WORD_PREFIX
+        idx = field.find(term, idx + 1)
+    return SUBSTRING
+
+
+def match_quality(terms: list[str], fields: tuple[str, ...]) -> float:
+    """Promedio de la mejor coincidencia de cada término (0 si alguno no aparece)."""
+    total = 0.0
+    for term in terms:
+        best = 0.0
+        for field, weight in zip(fields, FIELD_WEIGHTS):
+            if term in field:
+                best = max(best, _term_quality(term, field) * weight)
+        if not best:
+            return 0.0
+        total += best
+    return total / len(terms)
+
+
+def blend_score(match: float, is_favorite: bool, usage_count: int, last_activity: float,
+                max_usage: int, now: float) -> float:
+    """Puntaje final: coincidencia, favorito, uso relativo y recencia."""
+    usage = math.log1p(usage_count) / math.log1p(max_usage) if max_usage else 0.0
+    age_days = max(0.0, now - last_activity) / 86400
+    recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    return (MATCH_WEIGHT * match + FAVORITE_WEIGHT * bool(is_favorite)
+            + USAGE_WEIGHT * usage + RECENCY_WEIGHT * recency)
+
+
+def rank_candidates(candidates: list[tuple], query: str, limit: int = 10,
+                    favorites_only: bool = False) -> list[tuple[int, float]]:
+    """Top ``limit`` de ``(id, puntaje)``; sin término se rankea solo por favorito, uso y recencia."""
+    terms = fold_text(query).split()
+    if favorites_only:
+        candidates = [c for c in candidates if c[2]]
+    if not candidates:
+        return []
+    max_usage = max(c[3] for c in candidates)
+    now = time.time()
+    scored = []
+    for pk, fields, fav, usage, last in candidates:
+        match = match_quality(terms, fields) if terms else 0.0
+        if terms and not match:
+            continue
+        scored.append((round(blend_score(match, fav, usage, last, max_usage, now), 4), pk))
+    return [(pk, score) for score, pk in heapq.nlargest(limit, scored)]
+
+
+def filter_contacts(queryset, query: str):
+    """Filtra ``queryset`` por ``search_key`` (todos los términos) y anota ``match_rank``.
+
+    Retorna ``(queryset, folded_query)``; el llamador ordena por
+    ``('-match_rank', ...)``. Sin término retorna el queryset intacto.
+    """
+    folded = fold_text(query)
+    if not folded:
+        return queryset, folded
+    for term in folded.split():
+        queryset = queryset.filter(search_key__contains=term)
+    sep = FIELD_SEPARATOR
+    queryset = queryset.annotate(
+        match_rank=Case(
+            When(search_key__contains=f'{sep}{folded}{sep}', then=Value(4)),
+            When(search_key__contains=f'{sep}{folded}', then=Value(3)),
+            When(search_key__contains=f' {folded}', then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    )
+    return queryset, folded
+
+
+def autocomplete_contacts(user, query: str = '', limit: int = 10, favorites_only: bool = False) -> dict:
+    """Contactos del usuario rankeados para ``query``.
+
+    Retorna ``results`` (lista de ``(contacto, puntaje)``) y ``backend``:
+    ``memory`` si se rankeó sobre la lista cacheada, ``trigram``/``like`` si
+    la agenda es grande y se preseleccionó en la BD.
+    """
+    from ..models import Contact
+
+    candidates = get_candidates(user.id)
+    backend = 'memory'
+    if candidates is None:
+        backend = 'trigram' if trigram_available() else 'like'
+        queryset = Contact.objects.filter(created_by=user)
+        if favorites_only:
+            queryset = queryset.filter(is_favorite=True)
+        queryset, folded = filter_contacts(queryset, query)
+        ordering = ('-match_rank', *Contact._meta.ordering) if folded else Contact._meta.ordering
+        candidates = _candidate_rows(queryset.order_by(*ordering), DB_PREFILTER_LIMIT)
+
+    ranked = rank_candidates(candidates, query, limit=limit, favorites_only=favorites_only)
+    contacts = Contact.objects.in_bulk([pk for pk, _ in ranked])
+    return {
+        'results': [(contacts[pk], score) for pk, score in ranked if pk in contacts],
+        'folded_query': fold_text(query),
+        'backend': backend,
+    }
@@ -0,0 +1,224 @@
+"""Reporte de cobertura de los datos de referencia (ServiceZone y ServiceAreaCityMap).
+
+Un único recorrido por tabla (una consulta en streaming con solo las columnas
+necesarias) acumula por país y por estado: filas, ciudades y áreas de servicio
+distintas, rangos postales y cobertura postal (``postal_span``), además de las
+ciudades con más rangos. Reemplaza los 3–5 conteos por país de ``esd_stats``
+y los conteos bajo demanda de ``map_stats_by_country``.
+
+El reporte se guarda en la caché compartida con la versión del dataset en la
+clave, así que el comando ``reference_coverage`` y el endpoint
+``service-zones/coverage/`` lo calculan una vez por recarga.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import time
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .dataset_version import get_dataset_version
+from .esd_loader import CountryNameResolver
+from .service_area_mapping import postal_span
+
+ESD = 'esd'
+MAP = 'map'
+DATASETS = (ESD, MAP)
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Se acumulan hasta este número de ciudades por país; ``top`` recorta al servir
+_TOP_STORED = 100
+# Por debajo de esta proporción de filas con ciudad, el "top" se hace por área de servicio
+_CITY_MODE_MIN_RATIO = 0.1
+
+CSV_COLUMNS = (
+    'dataset', 'country_code', 'country_name', 'state_code', 'rows', 'cities', 'service_areas',
+    'postal_ranges', 'postal_coverage',
+)
+
+
+def _model(dataset: str):
+    from ..models import ServiceAreaCityMap, ServiceZone
+
+    return ServiceZone if dataset == ESD else ServiceAreaCityMap
+
+
+class _Bucket:
+    __slots__ = ('rows', 'cities', 'service_areas', 'postal_ranges', 'postal_coverage')
+
+    def __init__(self):
+        self.rows = 0
+        self.cities: set[str] = set()
+        self.service_areas: set[str] = set()
+        self.postal_ranges = 0
+        self.postal_coverage = 0
+
+    def add(self, city: str, service_area: str, postal_from: str, postal_to: str) -> None:
+        self.rows += 1
+        if city:
+            self.cities.add(city)
+        if service_area:
+            self.service_areas.add(service_area)
+        if postal_from and postal_to:
+            self.postal_ranges += 1
+            self.postal_coverage += postal_span(postal_from, postal_to)
+
+    def as_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'cities': len(self.cities),
+            'service_areas': len(self.service_areas),
+            'postal_ranges': self.postal_ranges,
+            'postal_coverage': self.postal_coverage,
+        }
+
+
+def compute_coverage(dataset: str, country_code: str | None = None) -> dict:
+    """Recorre la tabla una vez y arma el reporte (sin caché)."""
+    t0 = time.perf_counter()
+    model = _model(dataset)
+    name_field = 'country_name' if dataset == ESD else 'country_code'
+    qs = model.objects.all()
+    if country_code:
+        qs = qs.filter(country_code=country_code.upper())
+    rows = qs.order_by().values_list(
+        'country_code', name_field, 'state_code', 'city_name', 'service_area', 'postal_code_from', 'postal_code_to',
+    ).iterator(chunk_size=20000)
+
+    total = _Bucket()
+    countries: dict[str, _Bucket] = defaultdict(_Bucket)
+    states: dict[str, dict[str, _Bucket]] = defaultdict(lambda: defaultdict(_Bucket))
+    names: dict[str, str] = {}
+    city_ranges: dict[str, Counter] = defaultdict(Counter)
+    area_ranges: dict[str, Counter] = defaultdict(Counter)
+    city_rows: Counter = Counter()
+
+    for cc, country_name, sc, city, sa, pf, pt in rows:
+        city = city or ''
+        sa = sa or ''
+        total.add(city, sa, pf, pt)
+        countries[cc].add(city, sa, pf, pt)
+        states[cc][sc or ''].add(city, sa, pf, pt)
+        names.setdefault(cc, country_name or cc)
+        if pf and pt:
+            if city:
+                city_ranges[cc][city] += 1
+            if sa:
+                area_ranges[cc][sa] += 1
+        if city:
+            city_rows[cc] += 1
+
+    if dataset == MAP:
+        # El mapeo no guarda nombre de país: se toma de CountryISO (una consulta)
+        resolve = CountryNameResolver()
+        names = {cc: resolve(cc, cc) for cc in names}
+
+    country_list = []
+    for cc in sorted(countries, key=lambda c: names[c]):
+        bucket = countries[cc]
+        # Mismo criterio que esd_stats: listar por ciudad solo si hay suficientes nombres
+        if bucket.rows and city_rows[cc] / bucket.rows > _CITY_MODE_MIN_RATIO:
+            mode, ranking = 'city_name', city_ranges[cc]
+        elif area_ranges[cc]:
+            mode, ranking = 'service_area', area_ranges[cc]
+        else:
+            mode, ranking = None, Counter()
+        country_list.append({
+            'country_code': cc,
+            'country_name': names[cc],
+            **bucket.as_dict(),
+            'mode': mode,
+            'top': [{'name': name, 'ranges': count} for name, count in ranking.most_common(_TOP_STORED)],
+            'states': [
+                {'state_code': sc, **states[cc][sc].as_dict()}
+                for sc in sorted(states[cc])
+            ],
+        })
+
+    return {
+        'dataset': dataset,
+        'version': get_dataset_version(),
+        'generated_at': timezone.now().isoformat(),
+        'elapsed': round(time.perf_counter() - t0, 3),
+        'totals': {**total.as_dict(), 'countries': len(countries)},
+        'countries': country_list,
+    }
+
+
+def get_coverage(dataset: str, country_code: str | None = None, top: int = 15, refresh: bool = False) -> dict:
+    """Reporte de ``compute_coverage`` cacheado por versión del dataset; ``top`` recorta el ranking."""
+    if dataset not in DATASETS:
+        raise ValueError(f'Dataset desconocido: {dataset}')
+    cc = (country_code or '').upper()
+    key = f'ref:coverage:v{get_dataset_version()}:{dataset}:{cc or "*"}'
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = compute_coverage(dataset, cc or None)
+        cache.set(key, report, CACHE_TIMEOUT)
+    top = max(0, int(top))
+    return {
+        **report,
+        'countries': [dict(c, top=c['top'][:top]) for c in report['countries']],
+    }
+
+
+def coverage_rows(report: dict) -> list[dict]:
+    """Filas planas (una por país y una por estado) para CSV."""
+    out = []
+    for country in report['countries']:
+        base = {'dataset': report['dataset'], 'country_code': country['country_code'],
+                'country_name': country['country_name']}
+        out.append({**base, 'state_code': '', **{k: country[k] for k in CSV_COLUMNS[4:]}})
+        for state in country['states']:
+            if state['state_code']:
+                out.append({**base, **{k: state[k] for k in CSV_COLUMNS[3:]}})
+    return out
+
+
+def render_coverage(reports: list[dict], fmt: str = 'table') -> str:
+    """Serializa uno o más reportes como ``json``, ``csv`` o tabla de texto."""
+    if fmt == 'json':
+        return json.dumps(reports[0] if len(reports) == 1 else reports, ensure_ascii=False, indent=2)
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=CSV_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        for report in reports:
+            writer.writerows(coverage_rows(report))
+        return buf.getvalue()
+    if fmt != 'table':
+        raise ValueError(f'Formato desconocido: {fmt}')
+
+    lines = []
+    for report in reports:
+        t = report['totals']
+        lines.append(
+            f"=== Cobertura {report['dataset']} (v{report['version']}): {t['rows']} filas, {t['countries']} países, "
+            f"{t['cities']} ciudades, {t['service_areas']} áreas, {t['postal_ranges']} rangos, "
+            f"{t['postal_coverage']} códigos ==="
+        )
+        for c in report['countries']:
+            lines.append(f"{c['country_code']} - {c['country_name']}")
+            lines.append(
+                f"  Filas: {c['rows']} | ciudades: {c['cities']} | áreas: {c['service_areas']} | "
+                f"rangos: {c['postal_ranges']} | códigos cubiertos: {c['postal_coverage']}"
+            )
+            named_states = [s for s in c['states'] if s['state_code']]
+            if named_states:
+                lines.append(f"  Estados ({len(named_states)}):")
+                for s in named_states:
+                    lines.append(
+                        f"    {s['state_code']:<6} filas {s['rows']:>8}  ciudades {s['cities']:>6}  "
+                        f"áreas {s['service_areas']:>4}  rangos {s['postal_ranges']:>8}"
+                    )
+            if c['top']:
+                label = 'ciudades' if c['mode'] == 'city_name' else 'áreas'
+                lines.append(f"  Top {label} por rangos postales:")
+                for item in c['top']:
+                    lines.append(f"    - {item['name']}: {item['ranges']} rangos")
+            lines.append('')
+    return '\n'.join(lines)
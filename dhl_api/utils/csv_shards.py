@@ -0,0 +1,108 @@
+"""Partición de CSV grandes en shards por rango de bytes + checkpoint reanudable.
+
+Los shards se alinean a inicios de línea, así que cada worker hace ``seek``
+directo a su offset en lugar de releer y descartar las filas anteriores
+(como ocurría con ``--start-row``). Supone que los campos no contienen saltos
+de línea entre comillas, lo cual se cumple en Postal_Locations_fullset.
+
+El checkpoint es un JSON junto al archivo con los shards completados; se
+reescribe de forma atómica después de cada shard, de modo que una carga
+interrumpida se reanuda exactamente en el primer shard pendiente.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Iterator
+
+
+def plan_shards(path: str, shard_bytes: int, skip_header: bool = False) -> list[tuple[int, int, int]]:
+    """Retorna ``[(índice, inicio, fin), ...]`` cubriendo el archivo completo sin solaparse."""
+    size = os.path.getsize(path)
+    shard_bytes = max(1, int(shard_bytes))
+    shards = []
+    with open(path, 'rb') as f:
+        start = 0
+        if skip_header:
+            f.readline()
+            start = f.tell()
+        while start < size:
+            target = start + shard_bytes
+            if target >= size:
+                end = size
+            else:
+                f.seek(target)
+                f.readline()  # avanzar hasta el final de la línea en curso
+                end = f.tell()
+            shards.append((len(shards), start, end))
+            start = end
+    return shards
+
+
+def iter_lines(path: str, start: int, end: int, encoding: str = 'utf-8') -> Iterator[str]:
+    """Líneas decodificadas del rango ``[start, end)`` (ambos en inicio de línea)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            raw = f.readline()
+            if not raw:
+                break
+            if pos == 0 and raw.startswith(b'\xef\xbb\xbf'):
+                raw = raw[3:]  # BOM
+            pos = f.tell()
+            yield raw.decode(encoding, errors='replace')
+
+
+def read_first_line(path: str, encoding: str = 'utf-8-sig') -> str:
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        return f.readline()
+
+
+class ShardCheckpoint:
+    """Registro persistente de shards completados para un archivo y unas opciones dadas."""
+
+    def __init__(self, path: str, signature: dict):
+        self.path = path
+        self.signature = signature
+        self.completed: dict[str, dict] = {}
+
+    @staticmethod
+    def file_signature(path: str) -> dict:
+        st = os.stat(path)
+        return {'file': os.path.abspath(path), 'size': st.st_size, 'mtime': int(st.st_mtime)}
+
+    def load(self) -> bool:
+        """Carga el checkpoint existente. Retorna False si no existe.
+
+        Lanza ``ValueError`` si pertenece a otro archivo u otras opciones.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('signature') != self.signature:
+            raise ValueError(
+                f'El checkpoint {self.path} corresponde a otro archivo u otras opciones; '
+                'elimínelo o use --clear para empezar de nuevo'
+            )
+        self.completed = data.get('completed', {})
+        return True
+
+    def is_done(self, index: int) -> bool:
+        return str(index) in self.completed
+
+    def mark_done(self, index: int, stats: dict) -> None:
+        self.completed[str(index)] = stats
+        self.save()
+
+    def save(self) -> None:
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'signature': self.signature, 'completed': self.completed}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def reset(self) -> None:
+        self.completed = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,60 @@
+"""Versión de los datos de referencia (países, ESD, mapeos de áreas de servicio).
+
+La fuente de verdad es la tabla ``DatasetVersion``; el valor se replica en la
+caché compartida para que leerlo en cada petición no cueste una consulta. Los
+comandos de carga llaman ``bump_dataset_version`` al terminar. Con una caché
+por proceso (locmem) el valor expira a los ``DATASET_VERSION_CACHE_TIMEOUT``
+segundos para que cada worker relea la tabla.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATASET = 'reference'
+
+
+def _cache_key(name: str) -> str:
+    return f'dataset_version:{name}'
+
+
+def _cache_timeout() -> int | None:
+    return getattr(settings, 'DATASET_VERSION_CACHE_TIMEOUT', None)
+
+
+def get_dataset_version_info(name: str = REFERENCE_DATASET) -> dict:
+    """Retorna ``{'version': int, 'updated_at': datetime | None}``."""
+    info = cache.get(_cache_key(name))
+    if info is not None:
+        return info
+    from ..models import DatasetVersion
+
+    row = DatasetVersion.objects.filter(name=name).values('version', 'updated_at').first()
+    info = row or {'version': 0, 'updated_at': None}
+    cache.set(_cache_key(name), info, _cache_timeout())
+    return info
+
+
+def get_dataset_version(name: str = REFERENCE_DATASET) -> int:
+    return get_dataset_version_info(name)['version']
+
+
+def bump_dataset_version(name: str = REFERENCE_DATASET, reason: str = '') -> int:
+    """Incrementa la versión y publica el nuevo valor en la caché compartida."""
+    from ..models import DatasetVersion
+
+    obj, created = DatasetVersion.objects.get_or_create(name=name, defaults={'version': 1, 'reason': reason[:200]})
+    if not created:
+        DatasetVersion.objects.filter(pk=obj.pk).update(
+            version=F('version') + 1, reason=reason[:200], updated_at=timezone.now()
+        )
+    row = DatasetVersion.objects.filter(pk=obj.pk).values('version', 'updated_at').first()
+    cache.set(_cache_key(name), row, _cache_timeout())
+    logger.info(f"Dataset '{name}' actualizado a v{row['version']} ({reason})")
+    return row['version']
@@ -0,0 +1,330 @@
+"""Parseo de ESD.TXT y recarga incremental de ``ServiceZone`` por diferencias.
+
+Cada fila normalizada tiene una huella (``row_hash``) sobre todos sus campos.
+La recarga incremental carga en memoria solo ``{clave: (id, huella)}`` de la
+tabla actual (la clave es el ``unique_together`` del modelo), recorre el
+archivo una vez y clasifica cada fila en nueva, modificada o sin cambios; las
+claves que no aparecen en el archivo se eliminan. Las filas de país que crea
+``load_countries`` (``service_area=COUNTRY_PLACEHOLDER_AREA``) no vienen del
+ESD y nunca se eliminan; si el archivo trae una fila con su misma clave, la
+fila del ESD la reemplaza. Solo las diferencias se
+escriben, en lotes y dentro de una única transacción, así que publicar un ESD
+nuevo toca miles de filas en lugar de millones.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Iterator
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk_load import bulk_insert_ignore
+from .text_search import build_search_text, fold_text
+
+# Campos del modelo en el orden en que entran en la huella
+ESD_FIELDS = (
+    'country_code', 'country_name', 'state_code', 'state_name', 'city_name',
+    'service_area', 'postal_code_from', 'postal_code_to',
+)
+# unique_together de ServiceZone
+KEY_FIELDS = ('country_code', 'state_code', 'city_name', 'postal_code_from', 'postal_code_to')
+
+_HASH_SEPARATOR = '\x1f'
+
+# service_area de las filas de país de ``load_countries`` (no provienen del ESD)
+COUNTRY_PLACEHOLDER_AREA = 'DEFAULT'
+
+
+class EsdLineError(ValueError):
+    """Línea de ESD.TXT que no se puede cargar."""
+
+
+class CountryNameResolver:
+    """Nombres de país normalizados desde un dict precargado (una consulta a ``CountryISO``).
+
+    Misma semántica que ``CountryISO.resolve_name``: nombre ISO si el código
+    existe; si no, el nombre del archivo (o el código) en mayúsculas.
+    """
+
+    def __init__(self):
+        self._by_code: dict[str, str] | None = None
+
+    def preload(self) -> None:
+        from ..models import CountryISO
+
+        self._by_code = {
+            country.code.upper(): country.display_name
+            for country in CountryISO.objects.only('code', 'iso_short_name', 'iso_full_name', 'dhl_short_name')
+        }
+
+    def __call__(self, code: str, fallback: str) -> str:
+        if not code:
+            return fallback or ''
+        if self._by_code is None:
+            self.preload()
+        return self._by_code.get(code.upper()) or (fallback or code).upper()
+
+
+# Campos de una línea ``CO|COLOMBIA||||BUN|051430|051430|``
+_ESD_COLUMNS = itemgetter(0, 1, 2, 3, 4, 5, 6, 7)
+
+# fold_text memorizado: países, estados y ciudades se repiten en miles de filas
+_fold = lru_cache(maxsize=200_000)(fold_text)
+
+
+def split_esd_line(line: str) -> tuple[str, ...] | None:
+    """Fase de parseo: los 8 campos de la línea, sin espacios. None para líneas vacías."""
+    line = line.strip()
+    if not line:
+        return None
+    parts = line.split('|', 8)
+    if len(parts) < 8:
+        raise EsdLineError('formato inválido')
+    return tuple(p.strip() for p in _ESD_COLUMNS(parts))
+
+
+def normalize_esd_fields(fields: tuple[str, ...], resolve_country_name: Callable[[str, str], str]) -> dict:
+    """Fase de normalización: dict de campos del modelo con el nombre de país resuelto."""
+    country_code, raw_country_name, state_code, state_name, city_name, service_area, postal_from, postal_to = fields
+    row = {
+        'country_code': country_code,
+        'country_name': resolve_country_name(country_code, raw_country_name),
+        'state_code': state_code,
+        'state_name': state_name,
+        'city_name': city_name,
+        'service_area': service_area,
+        'postal_code_from': postal_from,
+        'postal_code_to': postal_to,
+    }
+    if not country_code or not row['country_name'] or not service_area:
+        raise EsdLineError('datos obligatorios faltantes')
+    return row
+
+
+def parse_esd_line(line: str, resolve_country_name: Callable[[str, str], str]) -> dict | None:
+    """Convierte una línea ``CO|COLOMBIA||||BUN|051430|051430|`` en un dict de campos.
+
+    Retorna None para líneas vacías y lanza ``EsdLineError`` si faltan datos.
+    """
+    fields = split_esd_line(line)
+    return normalize_esd_fields(fields, resolve_country_name) if fields is not None else None
+
+
+def iter_esd_rows(path: str, on_error: Callable[[int, str, str], None] | None = None,
+                  resolve_country_name: Callable[[str, str], str] | None = None) -> Iterator[dict]:
+    """Filas normalizadas del archivo; las inválidas se reportan con ``on_error(línea, motivo, texto)``."""
+    resolve = resolve_country_name or CountryNameResolver()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                row = parse_esd_line(line, resolve)
+            except EsdLineError as e:
+                if on_error:
+                    on_error(line_number, str(e), line.strip())
+                continue
+            if row is not None:
+                yield row
+
+
+def row_hash(row: dict) -> str:
+    """Huella de 128 bits (hex) de los campos de la fila."""
+    payload = _HASH_SEPARATOR.join(row[f] or '' for f in ESD_FIELDS)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def search_text_for(row: dict) -> str:
+    """``ServiceZone.search_text`` para una fila (mismo orden que ``compose_search_text``)."""
+    return build_search_text(
+        row['city_name'], row['state_name'], row['state_code'], row['service_area'], row['country_name'], fold=_fold
+    )
+
+
+def _key_digest(values) -> bytes:
+    # La clave se guarda como digest para acotar la memoria con millones de filas
+    payload = _HASH_SEPARATOR.join(v or '' for v in values)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=12).digest()
+
+
+def build_service_zone(row: dict, pk: int | None = None):
+    """Instancia ``ServiceZone`` con ``search_text`` y ``row_hash`` calculados (bulk_create no llama a save())."""
+    from ..models import ServiceZone
+
+    zone = ServiceZone(id=pk, **row)
+    zone.search_text = search_text_for(row)
+    zone.row_hash = row_hash(row)
+    return zone
+
+
+def _existing_state() -> dict[bytes, list]:
+    from ..models import ServiceZone
+
+    rows = (
+        ServiceZone.objects.exclude(service_area=COUNTRY_PLACEHOLDER_AREA)
+        .values_list('id', 'row_hash', *KEY_FIELDS)
+        .iterator(chunk_size=20000)
+    )
+    # Valor mutable [id, huella, país]: id=None marca la clave como vista en el archivo
+    return {_key_digest(r[2:]): [r[0], r[1], r[2]] for r in rows}
+
+
+def _placeholder_ids() -> dict[bytes, int]:
+    """``{clave: id}`` de las filas de país de ``load_countries``."""
+    from ..models import ServiceZone
+
+    rows = ServiceZone.objects.filter(service_area=COUNTRY_PLACEHOLDER_AREA).values_list('id', *KEY_FIELDS)
+    return {_key_digest(r[1:]): r[0] for r in rows}
+
+
+def incremental_load_esd(path: str, batch_size: int = 1000, dry_run: bool = False,
+                         on_error: Callable[[int, str, str], None] | None = None) -> dict:
+    """Sincroniza ``ServiceZone`` con el archivo escribiendo solo las diferencias.
+
+    Ante claves repetidas en el archivo gana la primera fila (igual que la carga
+    con ``ignore_conflicts``). Con ``dry_run`` solo calcula el resumen.
+    Retorna ``{'inserted', 'updated', 'deleted', 'unchanged', 'duplicates', 'rows',
+    'by_country', 'elapsed'}``; ``by_country`` cuenta cambios por país.
+    """
+    from ..models import ServiceZone
+
+    t0 = time.perf_counter()
+    existing = _existing_state()
+    placeholders = _placeholder_ids()
+    stats = Counter()
+    by_country: Counter = Counter()
+    inserts: list = []
+    updates: list = []
+    new_keys: set[bytes] = set()
+    update_fields = [f for f in ESD_FIELDS if f not in KEY_FIELDS] + ['search_text', 'row_hash', 'updated_at']
+
+    def flush(force: bool = False) -> None:
+        if inserts and (force or len(inserts) >= batch_size):
+            if not dry_run:
+                ServiceZone.objects.bulk_create(inserts, batch_size=batch_size)
+            inserts.clear()
+        if updates and (force or len(updates) >= batch_size):
+            if not dry_run:
+                ServiceZone.objects.bulk_update(updates, update_fields, batch_size=batch_size)
+            updates.clear()
+
+    with transaction.atomic():
+        for row in iter_esd_rows(path, on_error=on_error):
+            stats['rows'] += 1
+            key = _key_digest(row[f] for f in KEY_FIELDS)
+            current = existing.get(key)
+            if current is None and key in placeholders:
+                # Misma clave que una fila de país: la fila del ESD ocupa su lugar
+                current = existing[key] = [placeholders.pop(key), '', row['country_code']]
+            if current is None:
+                if key in new_keys:
+                    stats['duplicates'] += 1
+                    continue
+                new_keys.add(key)
+                inserts.append(build_service_zone(row))
+                stats['inserted'] += 1
+                by_country[row['country_code']] += 1
+            elif current[0] is None:
+                # Clave existente ya vista en este archivo
+                stats['duplicates'] += 1
+                continue
+            else:
+                pk, stored_hash, _ = current
+                current[0] = None
+                if stored_hash == row_hash(row):
+                    stats['unchanged'] += 1
+                    continue
+                zone = build_service_zone(row, pk=pk)
+                zone.updated_at = timezone.now()
+                updates.append(zone)
+                stats['updated'] += 1
+                by_country[row['country_code']] += 1
+            flush()
+        flush(force=True)
+
+        stale_ids = []
+        for pk, _, country_code in existing.values():
+            if pk is not None:
+                stale_ids.append(pk)
+                by_country[country_code] += 1
+        stats['deleted'] = len(stale_ids)
+        if not dry_run:
+            for i in range(0, len(stale_ids), batch_size):
+                ServiceZone.objects.filter(id__in=stale_ids[i:i + batch_size]).delete()
+
+    return {
+        'rows': stats['rows'],
+        'inserted': stats['inserted'],
+        'updated': stats['updated'],
+        'deleted': stats['deleted'],
+        'unchanged': stats['unchanged'],
+        'duplicates': stats['duplicates'],
+        'by_country': dict(by_country),
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+COPY_COLUMNS = ESD_FIELDS + ('search_text', 'row_hash')
+
+
+def bulk_load_esd(path: str, chunk_size: int = 100000,
+                  on_error: Callable[[int, str, str], None] | None = None,
+                  progress: Callable[[int], None] | None = None) -> dict:
+    """Carga completa en streaming: parseo → normalización → COPY/executemany por bloques.
+
+    Los nombres de país salen de un dict precargado y las filas nunca se
+    materializan como instancias del modelo. Ante claves repetidas gana la
+    primera fila (``ON CONFLICT DO NOTHING`` / ``INSERT OR IGNORE``).
+    Retorna ``{'rows', 'inserted', 'skipped', 'errors', 'by_country', 'phases',
+    'elapsed', 'method'}``; ``phases`` tiene los segundos de ``parse``,
+    ``normalize`` y ``write``.
+    """
+    from ..models import ServiceZone
+
+    resolve = CountryNameResolver()
+    resolve.preload()
+    by_country: Counter = Counter()
+    counters = {'rows': 0, 'errors': 0, 'parse': 0.0, 'normalize': 0.0}
+    clock = time.perf_counter
+
+    def rows():
+        with open(path, 'r', encoding='utf-8') as f:
+            t_read = clock()
+            for line_number, line in enumerate(f, 1):
+                try:
+                    fields = split_esd_line(line)
+                    t_parsed = clock()
+                    counters['parse'] += t_parsed - t_read
+                    if fields is None:
+                        t_read = clock()
+                        continue
+                    row = normalize_esd_fields(fields, resolve)
+                except EsdLineError as e:
+                    counters['errors'] += 1
+                    if on_error:
+                        on_error(line_number, str(e), line.strip())
+                    t_read = clock()
+                    continue
+                values = tuple(row[c] for c in ESD_FIELDS) + (search_text_for(row), row_hash(row))
+                by_country[row['country_code']] += 1
+                counters['rows'] += 1
+                counters['normalize'] += clock() - t_parsed
+                yield values
+                # El tiempo del consumidor (escritura) queda fuera de las fases de parseo/normalización
+                t_read = clock()
+
+    stats = bulk_insert_ignore(ServiceZone, COPY_COLUMNS, rows(), KEY_FIELDS, chunk_size=chunk_size, progress=progress)
+    write = max(0.0, stats['elapsed'] - counters['parse'] - counters['normalize'])
+    return {
+        'rows': counters['rows'],
+        'inserted': stats['inserted'],
+        'skipped': stats['skipped'],
+        'errors': counters['errors'],
+        'by_country': dict(by_country),
+        'phases': {'parse': counters['parse'], 'normalize': counters['normalize'], 'write': write},
+        'elapsed': stats['elapsed'],
+        'method': stats['method'],
+    }
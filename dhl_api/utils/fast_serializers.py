@@ -0,0 +1,227 @@
+"""Serialización rápida de solo lectura para listados grandes.
+
+Los serializers de DRF recorren, por cada fila y campo, ``get_attribute``,
+``to_representation`` y la detección de ``None``/``SkipField``; con miles de
+filas (ciudades, códigos postales, zonas) ese costo domina la respuesta, y
+``ShipmentSerializer``/``RateQuoteSerializer`` anidan ``UserSerializer``
+con una consulta extra por fila.
+
+``FastSerializer`` compila una vez el serializer de DRF existente en una
+lista de extractores por campo, con la misma salida:
+
+- Columnas del modelo: ``getattr`` (o clave del dict) más un conversor
+  directo (``str``/``int``) o el ``to_representation`` del campo
+  de DRF (fechas, decimales, choices) llamado sin el resto del ciclo.
+- Serializers anidados: se compilan igual y la relación se carga con
+  ``select_related`` (querysets) o ``prefetch_related_objects`` (listas ya
+  evaluadas), así nunca hay una consulta por fila.
+- Si todos los campos son columnas, un queryset se lee con ``values_list``
+  sin instanciar modelos.
+- Campos calculados (``SerializerMethodField``, ``source`` a un método) usan
+  el campo de DRF tal cual.
+
+``json_response`` renderiza el payload directamente a bytes (con ``orjson``
+si está instalado; si no, ``json`` con el encoder de DRF) y omite la
+negociación de contenido; el resultado es el mismo JSON que ``Response``.
+
+Uso::
+
+    SHIPMENTS = FastSerializer(ShipmentSerializer)
+    return json_response({'success': True, 'data': SHIPMENTS.serialize(rows)})
+"""
+from __future__ import annotations
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Page
+from django.db.models import QuerySet, prefetch_related_objects
+from django.http import HttpResponse
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+_DIRECT_CONVERTERS = (
+    (serializers.CharField, str),
+    (serializers.IntegerField, int),
+)
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _converter(field):
+    # Conversores directos solo si la clase no redefine to_representation
+    for base, convert in _DIRECT_CONVERTERS:
+        if isinstance(field, base) and type(field).to_representation is base.to_representation:
+            return convert
+    return field.to_representation
+
+
+class _Entry:
+    __slots__ = ('key', 'source', 'column', 'convert', 'nested', 'drf_field')
+
+    def __init__(self, key, source=None, column=None, convert=None, nested=None, drf_field=None):
+        self.key = key
+        self.source = source        # atributo o clave del dict
+        self.column = column        # columna para values_list (None = requiere instancia)
+        self.convert = convert
+        self.nested = nested        # _Plan del serializer anidado
+        self.drf_field = drf_field  # respaldo: ciclo completo del campo de DRF
+
+
+class _Plan:
+    def __init__(self, serializer, model):
+        self.entries: list[_Entry] = []
+        self.related: list[str] = []
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.entries.append(self._compile(key, field, model))
+        # values_list solo si ningún campo necesita la instancia
+        self.columns = None
+        if model is not None and all(e.column is not None for e in self.entries):
+            self.columns = []
+            for e in self.entries:
+                self.columns.extend(
+                    [e.column, *(f'{e.column}__{c}' for c in e.nested.columns)] if e.nested else [e.column]
+                )
+
+    def _compile(self, key, field, model) -> _Entry:
+        source = field.source
+        model_field = None
+        if model is not None and source != '*' and '.' not in source:
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                model_field = None
+
+        if isinstance(field, serializers.BaseSerializer):
+            if getattr(field, 'many', False) or model_field is None or not model_field.many_to_one:
+                return _Entry(key, drf_field=field)
+            nested = _Plan(field, model_field.related_model)
+            self.related.append(source)
+            self.related.extend(f'{source}__{r}' for r in nested.related)
+            return _Entry(key, source=source, column=source if nested.columns is not None else None,
+                          nested=nested)
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and model_field is not None:
+            return _Entry(key, source=model_field.attname, column=source, convert=lambda v: v)
+
+        if model is None:
+            # Serializer sobre dicts (listas de referencia)
+            if source == '*' or '.' in source or isinstance(field, serializers.SerializerMethodField):
+                return _Entry(key, drf_field=field)
+            return _Entry(key, source=source, convert=_converter(field))
+
+        if model_field is not None and model_field.concrete and not model_field.is_relation:
+            return _Entry(key, source=source, column=source, convert=_converter(field))
+        return _Entry(key, drf_field=field)
+
+    def from_object(self, obj) -> dict:
+        out = {}
+        for e in self.entries:
+            if e.drf_field is not None:
+                attribute = e.drf_field.get_attribute(obj)
+                out[e.key] = None if attribute is None else e.drf_field.to_representation(attribute)
+                continue
+            value = getattr(obj, e.source)
+            if value is None:
+                out[e.key] = None
+            elif e.nested is not None:
+                out[e.key] = e.nested.from_object(value)
+            else:
+                out[e.key] = e.convert(value)
+        return out
+
+    def from_mapping(self, row) -> dict:
+        out = {}
+        for e in self.entries:
+            if e.drf_field is not None:
+                attribute = e.drf_field.get_attribute(row)
+                out[e.key] = None if attribute is None else e.drf_field.to_representation(attribute)
+                continue
+            value = row.get(e.source)
+            out[e.key] = None if value is None else e.convert(value)
+        return out
+
+    def from_values(self, values, start: int = 0) -> tuple[dict, int]:
+        # Consume la tupla de values_list en el mismo orden que ``columns``
+        out = {}
+        i = start
+        for e in self.entries:
+            if e.nested is not None:
+                fk = values[i]
+                nested, i = e.nested.from_values(values, i + 1)
+                out[e.key] = None if fk is None else nested
+                continue
+            value = values[i]
+            i += 1
+            out[e.key] = None if value is None else e.convert(value)
+        return out, i
+
+
+class FastSerializer:
+    """Versión de solo lectura, compilada y sin consultas por fila, de un serializer de DRF."""
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+
+    @property
+    def plan(self) -> _Plan:
+        # Compilación diferida: los serializers de modelo necesitan las apps cargadas
+        if self._plan is None:
+            meta = getattr(self.serializer_class, 'Meta', None)
+            self._plan = _Plan(self.serializer_class(), getattr(meta, 'model', None))
+        return self._plan
+
+    @property
+    def related(self) -> list[str]:
+        """Relaciones que se cargan junto a las filas (``select_related``)."""
+        return self.plan.related
+
+    def serialize(self, rows) -> list[dict]:
+        """Serializa un queryset, una página de Paginator, una lista de instancias o de dicts."""
+        plan = self.plan
+        if isinstance(rows, Page):
+            rows = rows.object_list
+        if isinstance(rows, QuerySet):
+            if plan.columns is not None:
+                return [plan.from_values(values)[0] for values in rows.values_list(*plan.columns)]
+            if plan.related:
+                rows = rows.select_related(*plan.related)
+            return [plan.from_object(obj) for obj in rows]
+
+        rows = list(rows)
+        if not rows:
+            return []
+        if isinstance(rows[0], dict):
+            return [plan.from_mapping(row) for row in rows]
+        if plan.related:
+            prefetch_related_objects(rows, *plan.related)
+        return [plan.from_object(obj) for obj in rows]
+
+    def serialize_one(self, obj) -> dict:
+        return self.serialize([obj])[0]
+
+
+def render_json(payload) -> bytes:
+    """Bytes JSON compactos y UTF-8, equivalentes a los de ``JSONRenderer`` de DRF."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return _encoder.encode(payload).encode('utf-8')
+
+
+class FastJSONResponse(HttpResponse):
+    """Respuesta con el payload ya renderizado; conserva ``data`` como ``Response`` de DRF."""
+
+    def __init__(self, data, status: int = 200):
+        super().__init__(render_json(data), status=status, content_type='application/json')
+        self.data = data
+
+
+def json_response(payload, status: int = 200) -> FastJSONResponse:
+    """Renderiza ``payload`` directamente (sin negociación de contenido de DRF)."""
+    return FastJSONResponse(payload, status=status)
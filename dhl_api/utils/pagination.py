@@ -0,0 +1,243 @@
+"""Paginación por cursor (keyset) para los listados de historial.
+
+``Paginator`` hace ``COUNT(*)`` y luego ``OFFSET``: cada página profunda lee
+y descarta todas las anteriores. Con cursor, cada página filtra a partir de
+la última fila vista sobre una clave de orden indexada y única (por ejemplo
+``('-created_at', '-id')``), así la página 500 cuesta lo mismo que la 1.
+
+El cursor es opaco para el cliente: JSON en base64url con los valores de la
+clave de orden de la fila límite y la dirección (``n`` siguiente, ``p``
+anterior). El total es opcional (``include_total=1``): exacto hasta
+``EXACT_COUNT_CAP`` filas y estimado por el planificador por encima.
+
+Uso en una vista::
+
+    if wants_cursor(request):
+        rows, pagination = cursor_paginate(request, qs, ('-created_at', '-id'), page_size)
+
+El modo por número de página (``?page=``) sigue disponible en cada endpoint.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+import logging
+from urllib.parse import urlencode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# Conteo exacto hasta este número de filas; por encima se reporta una estimación
+EXACT_COUNT_CAP = 1000
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorError(ValueError):
+    """Cursor mal formado o que no corresponde al orden del listado."""
+
+
+def estimate_count(queryset) -> int | None:
+    """Estimación de filas del planificador de PostgreSQL (None si no aplica)."""
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.debug(f"EXPLAIN para estimar conteo falló: {e}")
+        return None
+
+
+def count_with_estimate(queryset, cap: int = EXACT_COUNT_CAP) -> tuple[int, bool]:
+    """Cuenta exacto hasta ``cap`` filas; por encima devuelve una estimación.
+
+    Retorna ``(total, is_estimate)``.
+    """
+    bounded = queryset.order_by()[:cap + 1].count()
+    if bounded <= cap:
+        return bounded, False
+    estimate = estimate_count(queryset)
+    return max(estimate or 0, bounded), True
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder recorta las fechas a milisegundos: el cursor necesita el valor exacto
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values: list, direction: str = NEXT) -> str:
+    raw = json.dumps([direction, *values], cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, ordering: tuple[str, ...]) -> tuple[list, str]:
+    """Retorna ``(valores, dirección)``; ``CursorError`` si el cursor no es válido para ``ordering``."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise CursorError('Cursor inválido') from e
+    if not isinstance(data, list) or len(data) != len(ordering) + 1 or data[0] not in (NEXT, PREVIOUS):
+        raise CursorError('Cursor inválido para este listado')
+    # Las claves del orden no admiten NULL y son escalares
+    if any(value is None or isinstance(value, (dict, list)) for value in data[1:]):
+        raise CursorError('Cursor inválido para este listado')
+    return data[1:], data[0]
+
+
+def _field_name(key: str) -> str:
+    return key.lstrip('-')
+
+
+def _to_python(queryset, key: str, value):
+    # Convertir desde JSON (fechas, decimales) con el tipo de la columna o de la anotación
+    name = _field_name(key)
+    try:
+        field = queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        annotation = queryset.query.annotations.get(name)
+        if annotation is None:
+            return value
+        field = annotation.output_field
+    try:
+        converted = field.to_python(value)
+    except (ValidationError, TypeError, ValueError) as e:
+        raise CursorError('Cursor inválido para este listado') from e
+    if converted is None:
+        raise CursorError('Cursor inválido para este listado')
+    return converted
+
+
+def _row_values(row, ordering: tuple[str, ...]) -> list:
+    values = []
+    for key in ordering:
+        name = _field_name(key)
+        value = row.get(name) if isinstance(row, dict) else getattr(row, name)
+        if hasattr(value, 'pk'):
+            value = value.pk
+        values.append(value)
+    return values
+
+
+def keyset_filter(ordering: tuple[str, ...], values: list, forward: bool = True) -> Q:
+    """Condición "después de ``values``" en ``ordering`` (o "antes", con ``forward=False``).
+
+    Para ``(a DESC, b DESC)``: ``a < va OR (a = va AND b < vb)``. Las claves
+    no deben admitir NULL.
+    """
+    condition = Q()
+    for i, key in enumerate(ordering):
+        descending = key.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        term = Q(**{f'{_field_name(k)}': v for k, v in zip(ordering[:i], values[:i])})
+        term &= Q(**{f'{_field_name(key)}__{lookup}': values[i]})
+        condition |= term
+    return condition
+
+
+def _reverse(ordering: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(key[1:] if key.startswith('-') else f'-{key}' for key in ordering)
+
+
+def keyset_paginate(queryset, ordering: tuple[str, ...], page_size: int, cursor: str | None = None,
+                    include_total: bool = False) -> dict:
+    """Una página de ``queryset`` ordenado por ``ordering`` a partir de ``cursor``.
+
+    ``ordering`` debe ser único (terminar en la PK) para que el cursor sea
+    estable. Retorna ``results``, ``next_cursor``/``prev_cursor``,
+    ``has_next``/``has_previous`` y, con ``include_total``, ``total_count``
+    y ``total_is_estimate``.
+    """
+    page_size = max(1, int(page_size))
+    direction = NEXT
+    qs = queryset.order_by(*ordering)
+    if cursor:
+        values, direction = decode_cursor(cursor, ordering)
+        values = [_to_python(queryset, key, value) for key, value in zip(ordering, values)]
+        if direction == NEXT:
+            qs = qs.filter(keyset_filter(ordering, values, forward=True))
+        else:
+            qs = queryset.order_by(*_reverse(ordering)).filter(keyset_filter(ordering, values, forward=False))
+
+    # Una fila extra indica si hay más páginas en la dirección recorrida, sin COUNT(*)
+    rows = list(qs[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == PREVIOUS:
+        rows.reverse()
+        has_next, has_previous = True, more
+    else:
+        has_next, has_previous = more, bool(cursor)
+
+    result = {
+        'results': rows,
+        'has_next': has_next and bool(rows),
+        'has_previous': has_previous and bool(rows),
+        'next_cursor': encode_cursor(_row_values(rows[-1], ordering), NEXT) if has_next and rows else None,
+        'prev_cursor': encode_cursor(_row_values(rows[0], ordering), PREVIOUS) if has_previous and rows else None,
+    }
+    if include_total:
+        result['total_count'], result['total_is_estimate'] = count_with_estimate(queryset)
+    return result
+
+
+def page_size_param(request, default: int = 20, maximum: int = 100) -> int:
+    try:
+        return min(max(1, int(request.GET.get('page_size', default))), maximum)
+    except (TypeError, ValueError):
+        return default
+
+
+def wants_cursor(request) -> bool:
+    """El cliente pidió paginación por cursor (``?cursor=`` o ``?pagination=cursor``)."""
+    return 'cursor' in request.GET or request.GET.get('pagination') == 'cursor'
+
+
+def _page_url(request, cursor: str | None) -> str | None:
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{urlencode(params, doseq=True)}')
+
+
+def cursor_paginate(request, queryset, ordering: tuple[str, ...], page_size: int) -> tuple[list, dict]:
+    """``keyset_paginate`` con los parámetros de ``request``; retorna ``(filas, paginación)``.
+
+    La paginación incluye los cursores y los enlaces ``next``/``previous``
+    listos para seguir. ``CursorError`` si el cursor recibido no es válido.
+    """
+    include_total = request.GET.get('include_total', '').lower() in ('1', 'true', 'yes')
+    page = keyset_paginate(queryset, ordering, page_size, cursor=request.GET.get('cursor') or None,
+                           include_total=include_total)
+    pagination = {
+        'mode': 'cursor',
+        'page_size': max(1, int(page_size)),
+        'has_next': page['has_next'],
+        'has_previous': page['has_previous'],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+        'next': _page_url(request, page['next_cursor']),
+        'previous': _page_url(request, page['prev_cursor']),
+    }
+    if include_total:
+        pagination['total_count'] = page['total_count']
+        pagination['total_is_estimate'] = page['total_is_estimate']
+    return page['results'], pagination
@@ -0,0 +1,97 @@
+"""Índice en memoria de rangos postales → área de servicio.
+
+Reemplaza la consulta por fila ``ServiceZone.filter(postal_code_from__lte=pc,
+postal_code_to__gte=pc).first()`` durante las cargas masivas. Los rangos de
+cada país se cargan una sola vez, se ordenan por ``postal_code_from`` y se
+resuelven con búsqueda binaria. Un máximo acumulado de ``postal_code_to``
+permite cortar la búsqueda hacia atrás en cuanto ningún rango anterior puede
+contener el código, así que con rangos que no se solapan (el caso del ESD)
+cada búsqueda es O(log n).
+
+Se conserva la semántica de la consulta original: comparación de cadenas y,
+si varios rangos contienen el código, gana el de menor id.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Iterable
+
+
+class PostalIntervalIndex:
+    """Rangos ``[desde, hasta]`` (cadenas) con un valor y un orden de prioridad."""
+
+    __slots__ = ('_starts', '_ends', '_max_end', '_values', '_priority')
+
+    def __init__(self, intervals: Iterable[tuple[str, str, str, int]]):
+        """``intervals``: tuplas ``(desde, hasta, valor, prioridad)``; menor prioridad gana."""
+        rows = sorted(intervals, key=lambda r: (r[0], r[3]))
+        self._starts = [r[0] for r in rows]
+        self._ends = [r[1] for r in rows]
+        self._values = [r[2] for r in rows]
+        self._priority = [r[3] for r in rows]
+        self._max_end = []
+        running = ''
+        for end in self._ends:
+            if end > running:
+                running = end
+            self._max_end.append(running)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def lookup(self, code: str) -> str | None:
+        """Valor del rango que contiene ``code`` (menor prioridad si hay varios) o None."""
+        i = bisect_right(self._starts, code) - 1
+        best = None
+        best_priority = None
+        while i >= 0 and self._max_end[i] >= code:
+            if self._ends[i] >= code and (best_priority is None or self._priority[i] < best_priority):
+                best = self._values[i]
+                best_priority = self._priority[i]
+            i -= 1
+        return best
+
+
+class ServiceAreaPostalIndex:
+    """Índices ``PostalIntervalIndex`` por país construidos desde ``ServiceZone``.
+
+    Cada país se carga una vez, la primera vez que se consulta (o con ``preload``).
+    ``derived`` y ``unresolved`` cuentan los resultados de ``derive``.
+    """
+
+    def __init__(self):
+        self._indexes: dict[str, PostalIntervalIndex] = {}
+        self.derived = 0
+        self.unresolved = 0
+
+    def preload(self, country_codes: Iterable[str]) -> None:
+        for cc in country_codes:
+            self._get(cc)
+
+    def _get(self, country_code: str) -> PostalIntervalIndex:
+        index = self._indexes.get(country_code)
+        if index is None:
+            from ..models import ServiceZone
+
+            rows = (
+                ServiceZone.objects.filter(country_code=country_code)
+                .exclude(postal_code_to='')
+                .values_list('postal_code_from', 'postal_code_to', 'service_area', 'id')
+                .iterator(chunk_size=10000)
+            )
+            index = PostalIntervalIndex(rows)
+            self._indexes[country_code] = index
+        return index
+
+    def derive(self, country_code: str, postal_code: str) -> str | None:
+        """Área de servicio para ``postal_code`` o None; actualiza los contadores."""
+        service_area = self._get(country_code).lookup(postal_code) if postal_code else None
+        if service_area:
+            self.derived += 1
+        else:
+            self.unresolved += 1
+        return service_area
+
+    @property
+    def loaded_ranges(self) -> int:
+        return sum(len(ix) for ix in self._indexes.values())
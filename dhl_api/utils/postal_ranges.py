@@ -0,0 +1,359 @@
+"""Compactación reversible de rangos postales en ServiceZone y ServiceAreaCityMap.
+
+La importación de Postal_Locations escribe una fila por código postal
+(``desde = hasta = código``), así que las tablas crecen a millones de filas de
+un solo código. La compactación agrupa las filas con los mismos datos (país,
+estado, área de servicio, ciudad, ...) y fusiona los rangos contiguos o
+solapados en uno solo; los pares originales se archivan en
+``PostalRangeCompaction`` para poder expandirlos de nuevo.
+
+Contigüidad: dos códigos son adyacentes si tienen el mismo patrón (posición
+por posición, dígito o letra; ej. ``A9A9A9``) y el segundo es el sucesor del
+primero contando como un odómetro (``L4B1Z9`` → ``L4B2A0``). Dentro de un
+mismo patrón el orden de cadenas coincide con el del odómetro, por lo que la
+búsqueda ``desde <= código <= hasta`` sobre el rango fusionado encuentra
+exactamente los mismos códigos bien formados que los rangos originales.
+Rangos con patrones distintos, vacíos o con caracteres no alfanuméricos no se
+fusionan.
+
+En ServiceAreaCityMap solo se fusionan filas de un código cuyo
+``display_name`` es el derivado por la carga (``"<ciudad> <código>"``);
+``ServiceAreaCityMap.resolve_display`` lo vuelve a componer para el código
+consultado.
+"""
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+SERVICE_ZONE = 'service_zone'
+SERVICE_AREA_MAP = 'service_area_map'
+DATASETS = (SERVICE_ZONE, SERVICE_AREA_MAP)
+
+# Campos que deben coincidir para fusionar (además del patrón del código)
+_GROUP_FIELDS = {
+    SERVICE_ZONE: ('country_code', 'country_name', 'state_code', 'state_name', 'city_name', 'service_area'),
+    SERVICE_AREA_MAP: ('country_code', 'state_code', 'service_area', 'city_name', 'notes'),
+}
+
+
+def postal_ordinal(code: str) -> tuple[str, int] | None:
+    """``(patrón, posición)`` del código en el odómetro de su patrón, o None si no es alfanumérico.
+
+    El patrón marca cada carácter como ``9`` (dígito, base 10) o ``A`` (letra, base 26).
+    """
+    if not code or not code.isascii() or not code.isalnum():
+        return None
+    pattern = []
+    value = 0
+    for ch in code.upper():
+        if ch.isdigit():
+            pattern.append('9')
+            value = value * 10 + (ord(ch) - 48)
+        else:
+            pattern.append('A')
+            value = value * 26 + (ord(ch) - 65)
+    return ''.join(pattern), value
+
+
+def map_display_name(city_name: str, postal_from: str, postal_to: str) -> str:
+    """``display_name`` que deriva la carga del CSV para un código o un rango."""
+    if postal_from == postal_to:
+        return f"{city_name} {postal_from}"
+    return f"{city_name} {postal_from}-{postal_to}"
+
+
+def is_compacted(dataset: str, row_id: int) -> bool:
+    """True si la fila es resultado de una compactación vigente."""
+    from ..models import PostalRangeCompaction
+
+    return PostalRangeCompaction.objects.filter(dataset=dataset, row_id=row_id).exists()
+
+
+def compacted_ids(dataset: str, row_ids) -> set[int]:
+    """Subconjunto de ``row_ids`` que son resultado de una compactación vigente (una consulta)."""
+    from ..models import PostalRangeCompaction
+
+    row_ids = set(row_ids)
+    if not row_ids:
+        return set()
+    return set(
+        PostalRangeCompaction.objects.filter(dataset=dataset, row_id__in=row_ids).values_list('row_id', flat=True)
+    )
+
+
+def _model(dataset: str):
+    from ..models import ServiceAreaCityMap, ServiceZone
+
+    return ServiceZone if dataset == SERVICE_ZONE else ServiceAreaCityMap
+
+
+def _load_archive(dataset: str, country_code: str) -> dict[int, list[list[str]]]:
+    """Rangos originales archivados por id de fila (solo entradas vigentes)."""
+    from ..models import PostalRangeCompaction
+
+    entries = PostalRangeCompaction.objects.filter(dataset=dataset, country_code=country_code)
+    return {e.row_id: json.loads(e.original_ranges) for e in entries}
+
+
+def purge_stale_archive(dataset: str) -> int:
+    """Elimina entradas cuya fila ya no existe o cambió de límites (recarga, swap). Retorna cuántas."""
+    from ..models import PostalRangeCompaction
+
+    model = _model(dataset)
+    entries = list(
+        PostalRangeCompaction.objects.filter(dataset=dataset)
+        .values_list('id', 'row_id', 'postal_code_from', 'postal_code_to')
+    )
+    stale = []
+    for i in range(0, len(entries), 5000):
+        chunk = entries[i:i + 5000]
+        live = {
+            pk: (pf, pt)
+            for pk, pf, pt in model.objects.filter(id__in=[e[1] for e in chunk])
+            .values_list('id', 'postal_code_from', 'postal_code_to')
+        }
+        stale.extend(e[0] for e in chunk if live.get(e[1]) != (e[2], e[3]))
+    for i in range(0, len(stale), 5000):
+        PostalRangeCompaction.objects.filter(id__in=stale[i:i + 5000]).delete()
+    return len(stale)
+
+
+def _eligible(dataset: str, row: dict, archived: bool) -> tuple[str, int, int] | None:
+    """``(patrón, ordinal desde, ordinal hasta)`` si la fila puede fusionarse."""
+    pf, pt = row['postal_code_from'], row['postal_code_to']
+    start = postal_ordinal(pf)
+    end = postal_ordinal(pt)
+    if start is None or end is None or start[0] != end[0] or start[1] > end[1]:
+        return None
+    if dataset == SERVICE_AREA_MAP:
+        # Solo filas de un código (o ya compactadas) con el display derivado por la carga
+        if (pf != pt and not archived) or row['display_name'] != map_display_name(row['city_name'], pf, pt):
+            return None
+    return start[0], start[1], end[1]
+
+
+def _plan_country(dataset: str, country_code: str) -> tuple[list[dict], int, int]:
+    """Corridas a fusionar en un país: ``([{'keep', 'drop', 'ranges'}], filas, filas_resultantes)``."""
+    model = _model(dataset)
+    fields = _GROUP_FIELDS[dataset]
+    archive = _load_archive(dataset, country_code)
+    unique_fields = model._meta.unique_together[0]
+
+    groups: dict[tuple, list] = defaultdict(list)
+    taken: set[tuple] = set()
+    total = 0
+    qs = (
+        model.objects.filter(country_code=country_code)
+        .values('id', 'postal_code_from', 'postal_code_to', *fields,
+                *(('display_name',) if dataset == SERVICE_AREA_MAP else ()))
+        .order_by()
+        .iterator(chunk_size=20000)
+    )
+    for row in qs:
+        total += 1
+        taken.add(tuple(row[f] for f in unique_fields))
+        key = _eligible(dataset, row, row['id'] in archive)
+        if key is None:
+            continue
+        pattern, start, end = key
+        group = tuple(row[f] for f in fields) + (pattern,)
+        groups[group].append((start, end, row))
+
+    runs = []
+    removed = 0
+    for group, members in groups.items():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda m: (m[0], m[1], m[2]['id']))
+        current = [members[0]]
+        run_end = members[0][1]
+        for member in members[1:]:
+            if member[0] <= run_end + 1:
+                current.append(member)
+                run_end = max(run_end, member[1])
+                continue
+            removed += _close_run(dataset, current, archive, unique_fields, taken, runs)
+            current = [member]
+            run_end = member[1]
+        removed += _close_run(dataset, current, archive, unique_fields, taken, runs)
+    return runs, total, total - removed
+
+
+def _close_run(dataset, members, archive, unique_fields, taken, runs) -> int:
+    if len(members) < 2:
+        return 0
+    rows = [m[2] for m in members]
+    keep = rows[0]
+    # El mayor "hasta" según el odómetro (mismo patrón: también el mayor como cadena)
+    postal_to = max(members, key=lambda m: m[1])[2]['postal_code_to']
+    merged = dict(keep, postal_code_to=postal_to)
+    if dataset == SERVICE_AREA_MAP:
+        merged['display_name'] = map_display_name(keep['city_name'], keep['postal_code_from'], postal_to)
+    new_key = tuple(merged[f] for f in unique_fields)
+    old_keys = {tuple(r[f] for f in unique_fields) for r in rows}
+    if new_key in taken and new_key not in old_keys:
+        # Otra fila (de otro grupo) ya ocupa esos límites: no fusionar
+        return 0
+    taken.difference_update(old_keys)
+    taken.add(new_key)
+
+    ranges = set()
+    for r in rows:
+        for pair in archive.get(r['id']) or [[r['postal_code_from'], r['postal_code_to']]]:
+            ranges.add(tuple(pair))
+    runs.append({
+        'keep': merged,
+        'drop': [r['id'] for r in rows[1:]],
+        'ranges': sorted(ranges),
+    })
+    return len(rows) - 1
+
+
+def _apply_runs(dataset: str, country_code: str, runs: list[dict], batch_size: int) -> None:
+    from ..models import PostalRangeCompaction
+
+    model = _model(dataset)
+    now = timezone.now()
+    update_fields = ['postal_code_to', 'updated_at']
+    if dataset == SERVICE_AREA_MAP:
+        update_fields.append('display_name')
+    else:
+        from .esd_loader import ESD_FIELDS, row_hash
+
+        update_fields.append('row_hash')
+
+    kept = []
+    for run in runs:
+        row = run['keep']
+        obj = model(**{k: v for k, v in row.items()})
+        obj.updated_at = now
+        if dataset == SERVICE_ZONE:
+            obj.row_hash = row_hash({f: row[f] for f in ESD_FIELDS})
+        kept.append(obj)
+    drop = [pk for run in runs for pk in run['drop']]
+
+    # Primero liberar los límites de las filas absorbidas (unique_together)
+    for i in range(0, len(drop), batch_size):
+        model.objects.filter(id__in=drop[i:i + batch_size]).delete()
+        PostalRangeCompaction.objects.filter(dataset=dataset, row_id__in=drop[i:i + batch_size]).delete()
+    model.objects.bulk_update(kept, update_fields, batch_size=batch_size)
+
+    kept_ids = [run['keep']['id'] for run in runs]
+    for i in range(0, len(kept_ids), batch_size):
+        PostalRangeCompaction.objects.filter(dataset=dataset, row_id__in=kept_ids[i:i + batch_size]).delete()
+    PostalRangeCompaction.objects.bulk_create(
+        [
+            PostalRangeCompaction(
+                dataset=dataset,
+                row_id=run['keep']['id'],
+                country_code=country_code,
+                postal_code_from=run['keep']['postal_code_from'],
+                postal_code_to=run['keep']['postal_code_to'],
+                source_rows=len(run['ranges']),
+                original_ranges=json.dumps([list(p) for p in run['ranges']], separators=(',', ':')),
+            )
+            for run in runs
+        ],
+        batch_size=batch_size,
+    )
+
+
+def _countries(dataset: str, country_codes: list[str] | None) -> list[str]:
+    if country_codes:
+        return sorted({c.upper() for c in country_codes})
+    return sorted(_model(dataset).objects.values_list('country_code', flat=True).distinct())
+
+
+def compact_postal_ranges(dataset: str, country_codes: list[str] | None = None, dry_run: bool = False,
+                          batch_size: int = 2000) -> dict:
+    """Fusiona rangos contiguos de ``dataset`` país por país (una transacción por país).
+
+    Retorna ``{'dataset', 'rows_before', 'rows_after', 'merged_runs', 'purged',
+    'by_country': {cc: (antes, después)}, 'elapsed'}``. Con ``dry_run`` solo
+    calcula el resultado.
+    """
+    t0 = time.perf_counter()
+    purged = 0 if dry_run else purge_stale_archive(dataset)
+    stats = Counter()
+    by_country = {}
+    for cc in _countries(dataset, country_codes):
+        with transaction.atomic():
+            runs, before, after = _plan_country(dataset, cc)
+            if runs and not dry_run:
+                _apply_runs(dataset, cc, runs, batch_size)
+        stats['rows_before'] += before
+        stats['rows_after'] += after
+        stats['merged_runs'] += len(runs)
+        by_country[cc] = (before, after)
+    return {
+        'dataset': dataset,
+        'rows_before': stats['rows_before'],
+        'rows_after': stats['rows_after'],
+        'merged_runs': stats['merged_runs'],
+        'purged': purged,
+        'by_country': by_country,
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+def expand_postal_ranges(dataset: str, country_codes: list[str] | None = None, batch_size: int = 2000) -> dict:
+    """Restaura las filas originales de las filas compactadas de ``dataset``.
+
+    Retorna ``{'dataset', 'expanded', 'rows_restored', 'purged', 'elapsed'}``.
+    """
+    from ..models import PostalRangeCompaction
+
+    t0 = time.perf_counter()
+    model = _model(dataset)
+    purged = purge_stale_archive(dataset)
+    entries = PostalRangeCompaction.objects.filter(dataset=dataset)
+    if country_codes:
+        entries = entries.filter(country_code__in=[c.upper() for c in country_codes])
+    expanded = restored = 0
+    with transaction.atomic():
+        entry_list = list(entries)
+        for i in range(0, len(entry_list), batch_size):
+            chunk = entry_list[i:i + batch_size]
+            rows = {obj.id: obj for obj in model.objects.filter(id__in=[e.row_id for e in chunk])}
+            originals = []
+            for entry in chunk:
+                row = rows[entry.row_id]
+                for postal_from, postal_to in json.loads(entry.original_ranges):
+                    originals.append(_original_row(dataset, row, postal_from, postal_to))
+            model.objects.filter(id__in=list(rows)).delete()
+            PostalRangeCompaction.objects.filter(id__in=[e.id for e in chunk]).delete()
+            model.objects.bulk_create(originals, batch_size=batch_size)
+            expanded += len(chunk)
+            restored += len(originals)
+    return {
+        'dataset': dataset,
+        'expanded': expanded,
+        'rows_restored': restored,
+        'purged': purged,
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+def _original_row(dataset: str, row, postal_from: str, postal_to: str):
+    if dataset == SERVICE_ZONE:
+        from .esd_loader import ESD_FIELDS, build_service_zone
+
+        fields = {f: getattr(row, f) for f in ESD_FIELDS}
+        fields.update(postal_code_from=postal_from, postal_code_to=postal_to)
+        return build_service_zone(fields)
+    return type(row)(
+        country_code=row.country_code,
+        state_code=row.state_code,
+        service_area=row.service_area,
+        city_name=row.city_name,
+        display_name=map_display_name(row.city_name, postal_from, postal_to),
+        postal_code_from=postal_from,
+        postal_code_to=postal_to,
+        notes=row.notes,
+    )
+
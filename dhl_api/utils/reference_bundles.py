@@ -0,0 +1,216 @@
+"""Bundles estáticos de datos de referencia por país.
+
+Países, estados y ciudades solo cambian cuando corre un loader, pero cada
+fallo de caché los reconstruye con consultas, mezcla mapa+ESD y
+serialización. ``build_reference_bundles`` los pre-renderiza al final de la
+carga (``load_reference_all``) en archivos JSON servidos como estáticos:
+
+- ``countries.<hash>.json``: lista de países del selector.
+- ``<CC>.<hash>.json``: estados, ciudades por estado (``''`` = todo el país)
+  y perfil de estructura (el mismo payload de ``analyze-country``).
+
+``<hash>`` son los primeros 12 hex del SHA-256 del contenido: un país sin
+cambios conserva su nombre (y la caché del navegador) entre recargas, y uno
+modificado obtiene un nombre nuevo, por lo que nginx/whitenoise pueden
+servirlos como ``immutable`` con caché de un año. Junto a cada archivo se
+escribe ``.json.gz`` para ``gzip_static``/whitenoise.
+
+El manifiesto (versión del dataset + archivo de cada país) se guarda fuera
+del árbol estático, en ``REFERENCE_BUNDLES_MANIFEST``, y lo publica el
+endpoint ``service-zones/bundles/`` solo mientras coincide con la versión
+vigente; si no, el cliente usa la API. Se conservan los archivos del
+manifiesto anterior para clientes con una sesión abierta.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .dataset_version import get_dataset_version
+from .reference_lists import city_list, country_structure, state_list
+from .reference_snapshot import db_country_list, get_reference_snapshot
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 12
+BUNDLE_FILE_RE = re.compile(r'^[\w-]+\.[0-9a-f]{%d}\.json(\.gz)?$' % HASH_LENGTH)
+
+
+def bundles_dir() -> str:
+    return getattr(settings, 'REFERENCE_BUNDLES_DIR', '') or os.path.join(settings.STATIC_ROOT, 'reference')
+
+
+def bundles_url() -> str:
+    return getattr(settings, 'REFERENCE_BUNDLES_URL', '') or f'{settings.STATIC_URL}reference/'
+
+
+def manifest_path() -> str:
+    return getattr(settings, 'REFERENCE_BUNDLES_MANIFEST', '') or os.path.join(settings.CACHE_DIR, 'reference-bundles.json')
+
+
+def _render(payload) -> bytes:
+    # Claves ordenadas y separadores fijos: mismo contenido -> mismo hash
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_bundle(directory: str, name: str, payload) -> dict:
+    """Escribe ``<name>.<hash>.json`` (+ ``.gz``) si no existe. Retorna la entrada del manifiesto."""
+    data = _render(payload)
+    digest = hashlib.sha256(data).hexdigest()
+    filename = f'{name}.{digest[:HASH_LENGTH]}.json'
+    path = os.path.join(directory, filename)
+    # mtime=0: el .gz también es determinista
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    if len(compressed) < len(data) and not os.path.exists(f'{path}.gz'):
+        _write_atomic(f'{path}.gz', compressed)
+    return {'file': filename, 'sha256': digest, 'bytes': len(data), 'gzip_bytes': len(compressed)}
+
+
+def country_bundle(country: dict, snapshot=None) -> dict:
+    """Contenido del bundle de un país (sin versión, para que el hash dependa solo de los datos)."""
+    cc = country['country_code']
+    states = state_list(cc, snapshot)
+    cities = {'': city_list(cc, None, snapshot=snapshot)[0]}
+    for state in states:
+        cities[state['state_code']] = city_list(cc, state['state_code'], snapshot=snapshot)[0]
+    return {
+        'country_code': cc,
+        'country_name': country['country_name'],
+        'states': states,
+        'cities': cities,
+        'structure': country_structure(cc),
+    }
+
+
+def load_manifest(path: str | None = None) -> dict | None:
+    try:
+        with open(path or manifest_path(), 'rb') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_files(manifest: dict | None) -> set[str]:
+    if not manifest:
+        return set()
+    entries = [manifest.get('countries') or {}, *(manifest.get('bundles') or {}).values()]
+    return {name for e in entries if e.get('file') for name in (e['file'], f"{e['file']}.gz")}
+
+
+def build_reference_bundles(output_dir: str | None = None, manifest_file: str | None = None) -> dict:
+    """Genera los bundles de todos los países y publica el manifiesto. Retorna estadísticas."""
+    from ..serializers import FAST_COUNTRIES
+
+    t0 = time.perf_counter()
+    directory = output_dir or bundles_dir()
+    manifest_file = manifest_file or manifest_path()
+    os.makedirs(directory, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_file)), exist_ok=True)
+
+    # Versión leída antes de consultar (igual que el snapshot): si una carga la
+    # incrementa mientras tanto, el manifiesto no se publica en el endpoint
+    version = get_dataset_version()
+    snapshot = get_reference_snapshot()
+    countries, source = snapshot.countries() if snapshot else db_country_list()
+
+    entries = {}
+    for country in countries:
+        entries[country['country_code']] = _write_bundle(
+            directory, country['country_code'], country_bundle(country, snapshot)
+        )
+    countries_entry = _write_bundle(directory, 'countries', {
+        'countries': FAST_COUNTRIES.serialize(countries),
+        'source': source,
+    })
+
+    previous = load_manifest(manifest_file)
+    current = {
+        'version': version,
+        'built_at': timezone.now().isoformat(),
+        'source': 'snapshot' if snapshot else 'db',
+        'countries': countries_entry,
+        'bundles': entries,
+    }
+    _write_atomic(manifest_file, json.dumps(current, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    # Borrar generaciones anteriores a la previa
+    keep = _manifest_files(current) | _manifest_files(previous)
+    removed = 0
+    for name in os.listdir(directory):
+        if BUNDLE_FILE_RE.match(name) and name not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except OSError as e:
+                logger.warning(f"No se pudo borrar el bundle {name}: {e}")
+
+    written = {n for n in _manifest_files(current) - _manifest_files(previous) if not n.endswith('.gz')}
+    return {
+        'directory': directory,
+        'manifest': manifest_file,
+        'version': version,
+        'countries': len(entries),
+        'new_files': len(written),
+        'removed': removed,
+        'bytes': sum(e['bytes'] for e in entries.values()) + countries_entry['bytes'],
+        'gzip_bytes': sum(e['gzip_bytes'] for e in entries.values()) + countries_entry['gzip_bytes'],
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+_cache = {'signature': None, 'manifest': None}
+
+
+def current_manifest() -> dict | None:
+    """Manifiesto publicable: existe y corresponde a la versión vigente del dataset.
+
+    Se relee solo cuando cambia el archivo (inode/mtime).
+    """
+    path = manifest_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if _cache['signature'] != signature:
+        _cache['manifest'] = load_manifest(path)
+        _cache['signature'] = signature
+    manifest = _cache['manifest']
+    if not manifest or manifest.get('version') != get_dataset_version():
+        return None
+    return manifest
+
+
+def manifest_payload(manifest: dict) -> dict:
+    """Manifiesto con URLs públicas (sin rutas del servidor)."""
+    base = bundles_url()
+
+    def entry(e):
+        return {'url': f"{base}{e['file']}", 'sha256': e['sha256'], 'bytes': e['bytes'], 'gzip_bytes': e['gzip_bytes']}
+
+    return {
+        'version': manifest['version'],
+        'built_at': manifest['built_at'],
+        'base_url': base,
+        'countries': entry(manifest['countries']),
+        'bundles': {cc: entry(e) for cc, e in sorted(manifest['bundles'].items())},
+    }
@@ -0,0 +1,84 @@
+"""Caché de respuestas para endpoints de datos de referencia.
+
+``reference_cache_page`` se usa igual que ``cache_page`` pero incluye la
+versión del dataset en el prefijo de la clave: tras una recarga la versión
+cambia y las respuestas anteriores dejan de usarse (expiran solas), sin
+prefijos manuales como ``cities_v2``.
+
+``reference_conditional`` agrega ETag/Last-Modified derivados de la misma
+versión y responde ``304 Not Modified`` antes de ejecutar la vista.
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_page
+
+from .dataset_version import REFERENCE_DATASET, get_dataset_version, get_dataset_version_info
+
+# El navegador/nginx pueden guardar la respuesta pero deben revalidarla (barato gracias al ETag)
+REFERENCE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def reference_cache_page(timeout: int, namespace: str, dataset: str = REFERENCE_DATASET):
+    """Decorador ``cache_page`` con clave ``ref:<namespace>:v<versión>``."""
+    def decorator(view_func):
+        cached_views = {}
+
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            version = get_dataset_version(dataset)
+            view = cached_views.get(version)
+            if view is None:
+                view = cache_page(timeout, key_prefix=f'ref:{namespace}:v{version}')(view_func)
+                # Solo se conserva la versión vigente
+                cached_views.clear()
+                cached_views[version] = view
+            return view(request, *args, **kwargs)
+
+        return _wrapped
+    return decorator
+
+
+def reference_etag(request, namespace: str, version: int) -> str:
+    """ETag fuerte: namespace + versión + ruta + parámetros (ordenados) + Accept."""
+    query = '&'.join(f'{k}={v}' for k, v in sorted(request.GET.items()))
+    raw = '|'.join([namespace, str(version), request.path, query, request.META.get('HTTP_ACCEPT', '')])
+    return '"' + hashlib.sha1(raw.encode('utf-8')).hexdigest() + '"'
+
+
+def reference_conditional(namespace: str, dataset: str = REFERENCE_DATASET):
+    """Soporte de GET condicional (If-None-Match / If-Modified-Since) para datos de referencia.
+
+    Debe ir por encima de ``reference_cache_page`` para que el 304 se resuelva
+    sin consultar la caché ni la BD.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            info = get_dataset_version_info(dataset)
+            etag = reference_etag(request, namespace, info['version'])
+            updated_at = info.get('updated_at')
+            last_modified = int(updated_at.timestamp()) if updated_at else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = REFERENCE_CACHE_CONTROL
+            if response.has_header('Expires'):
+                del response['Expires']
+            return response
+
+        return _wrapped
+    return decorator
@@ -0,0 +1,179 @@
+"""Listas de referencia por país (estados, ciudades, estructura).
+
+Lógica compartida entre las vistas de ``service-zones`` y el generador de
+bundles estáticos (``reference_bundles``), para que ambos entreguen
+exactamente los mismos datos. Cada función recibe el snapshot vigente (o
+``None`` para consultar la BD).
+"""
+from __future__ import annotations
+
+from django.db.models import Q
+
+
+def state_codes(country_code: str, snapshot=None) -> list[str]:
+    """Códigos de estado de ``ServiceAreaCityMap`` (fuente de verdad), ordenados."""
+    from ..models import ServiceAreaCityMap
+
+    if snapshot:
+        return snapshot.states(country_code)
+    return list(
+        ServiceAreaCityMap.objects
+        .filter(country_code=country_code)
+        .exclude(state_code__isnull=True)
+        .exclude(state_code='')
+        .values_list('state_code', flat=True)
+        .distinct()
+        .order_by('state_code')
+    )
+
+
+def state_list(country_code: str, snapshot=None) -> list[dict]:
+    return [{'state_code': sc, 'state_name': sc} for sc in state_codes(country_code, snapshot)]
+
+
+def city_list(country_code: str, state_code: str | None = None, q: str = '', snapshot=None) -> tuple[list[dict], int]:
+    """Ciudades del mapa más las del ESD que no estén en él.
+
+    Retorna ``(ciudades, agregadas_desde_esd)``. Para CA el mapa no se filtra
+    por estado para asegurar la lista completa.
+    """
+    from ..models import ServiceAreaCityMap, ServiceZone
+
+    cc = country_code
+    sc = state_code or None
+    map_state = sc if sc and cc != 'CA' else None
+
+    if snapshot:
+        names = snapshot.map_cities(cc, map_state, q)
+    else:
+        # Fuente única: ServiceAreaCityMap
+        qs_map = ServiceAreaCityMap.objects.filter(country_code=cc)
+        if map_state:
+            qs_map = qs_map.filter(state_code=map_state)
+        # Ciudades únicas por city_name para evitar explosión por cada rango postal
+        if q:
+            qs_map = qs_map.filter(city_name__icontains=q)
+        names = qs_map.exclude(city_name='').values_list('city_name', flat=True).distinct().order_by('city_name')
+    cities = [{'name': c, 'code': c, 'display_name': c, 'type': 'map_city'} for c in names]
+
+    # Fallback/append: incluir ciudades desde ServiceZone (ESD) que no estén en el mapa
+    appended = 0
+    try:
+        esd_items = snapshot.esd_cities(cc, sc) if snapshot else ServiceZone.get_cities_smart(cc, sc)
+        if q:
+            q_low = q.lower()
+            esd_items = [it for it in esd_items if (it.get('display_name') or '').lower().find(q_low) >= 0]
+
+        existing = set((ci.get('display_name') or '').strip().lower() for ci in cities)
+        for it in esd_items:
+            disp = (it.get('display_name') or '').strip()
+            if not disp:
+                continue
+            key = disp.lower()
+            if key in existing:
+                continue
+            # Normalizar estructura al mismo formato
+            cities.append({
+                'name': it.get('code') or disp,
+                'code': it.get('code') or disp,
+                'display_name': disp,
+                'type': f"esd_{it.get('type') or 'city'}"
+            })
+            existing.add(key)
+            appended += 1
+    except Exception:
+        # No bloquear si ESD falla
+        appended = 0
+    return cities, appended
+
+
+def country_structure(country_code: str) -> dict | None:
+    """Perfil de estructura de datos del país (patrón, estadísticas, recomendaciones).
+
+    ``None`` si el país no tiene zonas de servicio en el ESD.
+    """
+    from ..models import ServiceAreaCityMap, ServiceZone
+
+    base_zones = ServiceZone.objects.filter(country_code=country_code)
+    total_records = base_zones.count()
+    if not total_records:
+        return None
+
+    states_count = base_zones.exclude(Q(state_code__isnull=True) | Q(state_code='')).count()
+    cities_count = base_zones.exclude(Q(city_name__isnull=True) | Q(city_name='')).count()
+    service_area_count = base_zones.exclude(Q(service_area__isnull=True) | Q(service_area='')).count()
+    postal_codes_count = base_zones.exclude(Q(postal_code_from__isnull=True) | Q(postal_code_from='')).count()
+
+    has_states = (states_count / total_records) > 0.1
+    has_cities = (cities_count / total_records) > 0.1
+    has_service_areas = (service_area_count / total_records) > 0.1
+    has_postal_codes = (postal_codes_count / total_records) > 0.1
+
+    # Complementar con ServiceAreaCityMap para detectar ciudades aunque ServiceZone no las tenga pobladas
+    try:
+        if ServiceAreaCityMap.objects.filter(country_code=country_code).exclude(city_name='').exists():
+            has_cities = True
+    except Exception:
+        pass
+
+    effective_cities = has_cities or has_service_areas
+
+    if has_postal_codes and not effective_cities:
+        pattern = 'POSTAL_CODES'
+    elif effective_cities and not has_postal_codes:
+        pattern = 'CITY'
+    elif effective_cities and has_postal_codes:
+        pattern = 'MIXED'
+    elif has_states:
+        pattern = 'STATES'
+    else:
+        pattern = 'BASIC'
+
+    # Siempre preferir city_name cuando esté disponible para evitar mostrar códigos (YMG, YHM) al usuario;
+    # solo cuando NO haya city_name disponible, caer a service_area
+    if has_cities:
+        recommended_city_field = 'city_name'
+    else:
+        recommended_city_field = 'service_area' if has_service_areas else 'city_name'
+
+    # Orden por pk: ejemplos estables (el bundle se identifica por el hash de su contenido)
+    zones = list(base_zones.order_by('pk')[:3])
+    examples = [{
+        'country': zone.country_name,
+        'state': zone.state_code or zone.state_name,
+        'city': zone.city_name,
+        'service_area': zone.service_area,
+        'postal_range': f"{zone.postal_code_from}-{zone.postal_code_to}" if zone.postal_code_from else None
+    } for zone in zones]
+
+    return {
+        'country_code': country_code,
+        'country_name': zones[0].country_name,
+        'hasStates': has_states,
+        'hasCities': effective_cities,
+        'hasPostalCodes': has_postal_codes,
+        'pattern': pattern,
+        'statistics': {
+            'total_records': total_records,
+            'states_percentage': round((states_count / total_records) * 100, 1),
+            'cities_percentage': round((cities_count / total_records) * 100, 1),
+            'service_areas_percentage': round((service_area_count / total_records) * 100, 1),
+            'postal_codes_percentage': round((postal_codes_count / total_records) * 100, 1)
+        },
+        'examples': examples,
+        'data_structure': {
+            'city_name_available': has_cities,
+            'service_area_available': has_service_areas,
+            'recommended_city_field': recommended_city_field
+        },
+        'recommendations': {
+            'priority_fields': [
+                'country',
+                'state' if has_states else '',
+                'city' if effective_cities else '',
+                'postal_code' if has_postal_codes else ''
+            ],
+            'search_strategy': 'postal_code' if pattern == 'POSTAL_CODES' else 'city' if pattern == 'CITY' else 'mixed',
+            'city_field_to_use': recommended_city_field
+        }
+    }
@@ -0,0 +1,372 @@
+"""Snapshot binario de los datos de referencia para consultas sin base de datos.
+
+``build_reference_snapshot`` compila ``CountryISO``, ``ServiceZone`` y
+``ServiceAreaCityMap`` en un archivo compacto (tabla de cadenas + arreglos
+uint32 ordenados con offsets) etiquetado con la versión del dataset. Cada
+worker lo abre con ``mmap`` de solo lectura, de modo que todos comparten las
+mismas páginas a través del page cache del sistema operativo.
+
+Formato (little endian)::
+
+    cabecera   magic(8) versión(u64) creado(u64) marca_endian(u32) n_secciones(u32)
+    secciones  n × [nombre(8) offset(u64) longitud(u64)]
+    strdata    UTF-8 concatenado
+    stroffs    u32[n+1]  offsets de cada cadena dentro de strdata
+    countries  u32[2·k]  (código, nombre) en el orden de respuesta
+    lists      u32[...]  ids de cadena ordenados (estados, ciudades, áreas)
+    listidx    u32[6·m]  (tipo, país, estado, inicio, fin, flags) → rango en lists
+    meta       JSON con el origen de la lista de países y conteos
+
+``get_reference_snapshot`` retorna el snapshot solo si su versión coincide
+con la del dataset; tras una recarga (que incrementa la versión) el snapshot
+anterior deja de usarse y las vistas consultan la BD hasta que se compile el
+nuevo, que se publica con ``os.replace`` y se detecta por inode/mtime.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+
+from .dataset_version import get_dataset_version
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DHLREF01'
+_ENDIAN_MARK = 0x01020304
+_HEADER = struct.Struct('<8sQQII')
+_SECTION = struct.Struct('<8sQQ')
+
+# Tipos de lista en ``listidx``
+STATES = 0
+MAP_CITIES = 1
+ESD_CITIES = 2
+ESD_CITY_TYPES = ('city_name', 'service_area')
+
+
+def snapshot_path() -> str:
+    return getattr(settings, 'REFERENCE_SNAPSHOT_PATH', '') or os.path.join(settings.CACHE_DIR, 'reference.snap')
+
+
+# ----------------------------------------------------------------------------
+# Consultas a BD (fuente del snapshot y respaldo de las vistas)
+# ----------------------------------------------------------------------------
+
+def db_country_list() -> tuple[list[dict], str]:
+    """Países para los selectores: los de ``ServiceAreaCityMap`` o, si no hay, los del ESD.
+
+    Retorna ``(países, origen)``.
+    """
+    from ..models import CountryISO, ServiceAreaCityMap, ServiceZone
+    from .country_utils import get_country_name_from_iso
+
+    map_country_codes = list(
+        ServiceAreaCityMap.objects.values_list('country_code', flat=True).distinct().order_by('country_code')
+    )
+    if map_country_codes:
+        countries = []
+        for cc in map_country_codes:
+            # Priorizar CountryISO; luego el nombre del ESD; luego util local
+            esd_name = (
+                ServiceZone.objects.filter(country_code=cc)
+                .exclude(country_name__isnull=True)
+                .exclude(country_name='')
+                .values_list('country_name', flat=True)
+                .first() or ''
+            )
+            name = CountryISO.resolve_name(cc, fallback=esd_name or get_country_name_from_iso(cc))
+            countries.append({'country_code': cc, 'country_name': name})
+        return countries, 'ServiceAreaCityMap'
+
+    countries = []
+    for c in ServiceZone.get_countries():
+        code = (c.get('country_code') or '').upper()
+        name = CountryISO.resolve_name(code, fallback=c.get('country_name') or '') or get_country_name_from_iso(code)
+        countries.append({'country_code': code, 'country_name': name})
+    return countries, 'ServiceZone'
+
+
+def _smart_cities(total: int, city_count: int, area_count: int, cities: set, areas: set) -> tuple[list[str], int]:
+    """Misma regla que ``ServiceZone.get_cities_smart`` sobre contadores ya agregados."""
+    if not total:
+        return [], 0
+    use_city_name = city_count / total > 0.1
+    use_service_area = area_count / total > 0.1
+    if use_city_name and use_service_area:
+        use_city_name = len(areas) <= len(cities)
+        use_service_area = not use_city_name
+    if use_city_name:
+        return sorted(cities), 0
+    if use_service_area:
+        return sorted(areas), 1
+    return [], 0
+
+
+def _collect_lists() -> list[tuple[int, str, str, list[str], int]]:
+    """Listas ``(tipo, país, estado, valores, flags)``; estado '' = todo el país."""
+    from ..models import ServiceAreaCityMap, ServiceZone
+
+    states: dict[str, set] = defaultdict(set)
+    map_cities: dict[tuple[str, str], set] = defaultdict(set)
+    rows = ServiceAreaCityMap.objects.values_list('country_code', 'state_code', 'city_name').iterator(chunk_size=20000)
+    for cc, sc, city in rows:
+        if sc:
+            states[cc].add(sc)
+        if city:
+            map_cities[(cc, '')].add(city)
+            if sc:
+                map_cities[(cc, sc)].add(city)
+
+    # [total, con ciudad, con área, ciudades, áreas] por (país, estado) y por país
+    esd: dict[tuple[str, str], list] = defaultdict(lambda: [0, 0, 0, set(), set()])
+    rows = ServiceZone.objects.values_list('country_code', 'state_code', 'city_name', 'service_area').iterator(chunk_size=20000)
+    for cc, sc, city, area in rows:
+        for key in ((cc, ''), (cc, sc)) if sc else ((cc, ''),):
+            agg = esd[key]
+            agg[0] += 1
+            if city:
+                agg[1] += 1
+                agg[3].add(city)
+            if area:
+                agg[2] += 1
+                agg[4].add(area)
+
+    lists = [(STATES, cc, '', sorted(values), 0) for cc, values in states.items()]
+    lists += [(MAP_CITIES, cc, sc, sorted(values), 0) for (cc, sc), values in map_cities.items()]
+    for (cc, sc), agg in esd.items():
+        values, kind = _smart_cities(*agg)
+        lists.append((ESD_CITIES, cc, sc, values, kind))
+    return lists
+
+
+# ----------------------------------------------------------------------------
+# Compilación
+# ----------------------------------------------------------------------------
+
+class _StringTable:
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._chunks: list[bytes] = []
+        self._offsets = array('I', [0])
+
+    def add(self, value: str) -> int:
+        sid = self._ids.get(value)
+        if sid is None:
+            encoded = value.encode('utf-8')
+            sid = len(self._chunks)
+            self._ids[value] = sid
+            self._chunks.append(encoded)
+            self._offsets.append(self._offsets[-1] + len(encoded))
+        return sid
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def sections(self) -> tuple[bytes, bytes]:
+        return b''.join(self._chunks), _u32_bytes(self._offsets)
+
+
+def _u32_bytes(values) -> bytes:
+    arr = values if isinstance(values, array) else array('I', values)
+    if sys.byteorder != 'little':
+        arr = array('I', arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def build_reference_snapshot(path: str | None = None) -> dict:
+    """Compila el snapshot y lo publica de forma atómica. Retorna estadísticas."""
+    t0 = time.perf_counter()
+    path = path or snapshot_path()
+    # Versión leída antes de consultar: si una carga la incrementa mientras tanto,
+    # el snapshot queda desactualizado y no se usa
+    version = get_dataset_version()
+    countries, source = db_country_list()
+    lists = _collect_lists()
+
+    strings = _StringTable()
+    strings.add('')
+    country_ids = []
+    for c in countries:
+        country_ids += [strings.add(c['country_code']), strings.add(c['country_name'])]
+    list_values = array('I')
+    list_index = []
+    for kind, cc, sc, values, flags in sorted(lists, key=lambda item: item[:3]):
+        start = len(list_values)
+        list_values.extend(strings.add(v) for v in values)
+        list_index += [kind, strings.add(cc), strings.add(sc), start, len(list_values), flags]
+
+    strdata, stroffs = strings.sections()
+    meta = json.dumps({
+        'countries_source': source,
+        'countries': len(countries),
+        'lists': len(lists),
+        'strings': len(strings),
+    }).encode('utf-8')
+    sections = [
+        (b'strdata ', strdata),
+        (b'stroffs ', stroffs),
+        (b'countrs ', _u32_bytes(country_ids)),
+        (b'lists   ', _u32_bytes(list_values)),
+        (b'listidx ', _u32_bytes(list_index)),
+        (b'meta    ', meta),
+    ]
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    table = []
+    for name, payload in sections:
+        # Alinear cada sección a 8 bytes para poder verla como arreglo u32
+        offset += -offset % 8
+        table.append((name, offset, len(payload)))
+        offset += len(payload)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, version, int(time.time()), _ENDIAN_MARK, len(sections)))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for (name, start, _), (_, payload) in zip(table, sections):
+            f.write(b'\0' * (start - f.tell()))
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    return {
+        'path': path,
+        'version': version,
+        'bytes': os.path.getsize(path),
+        'countries': len(countries),
+        'lists': len(lists),
+        'strings': len(strings),
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+# ----------------------------------------------------------------------------
+# Lectura
+# ----------------------------------------------------------------------------
+
+class ReferenceSnapshot:
+    """Vista de solo lectura sobre un snapshot mapeado en memoria."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            st = os.fstat(f.fileno())
+        self.signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        magic, self.version, self.built_at, endian, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} no es un snapshot de referencia')
+        if endian != _ENDIAN_MARK or sys.byteorder != 'little':
+            raise ValueError(f'{path}: orden de bytes no soportado')
+        view = memoryview(self._mm)
+        sections = {}
+        for i in range(count):
+            name, start, length = _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+            sections[name.decode('ascii').strip()] = view[start:start + length]
+        self._strdata = sections['strdata']
+        self._stroffs = sections['stroffs'].cast('I')
+        self._countries = sections['countrs'].cast('I')
+        self._lists = sections['lists'].cast('I')
+        self.meta = json.loads(bytes(sections['meta']))
+        # Índice de listas en un dict (miles de entradas, se construye una vez por proceso)
+        idx = sections['listidx'].cast('I')
+        self._index = {
+            (idx[i], self._str(idx[i + 1]), self._str(idx[i + 2])): (idx[i + 3], idx[i + 4], idx[i + 5])
+            for i in range(0, len(idx), 6)
+        }
+
+    def _str(self, sid: int) -> str:
+        return bytes(self._strdata[self._stroffs[sid]:self._stroffs[sid + 1]]).decode('utf-8')
+
+    def _list(self, kind: int, cc: str, sc: str = '') -> tuple[list[str], int]:
+        entry = self._index.get((kind, cc, sc or ''))
+        if entry is None:
+            return [], 0
+        start, end, flags = entry
+        return [self._str(sid) for sid in self._lists[start:end]], flags
+
+    def countries(self) -> tuple[list[dict], str]:
+        c = self._countries
+        countries = [
+            {'country_code': self._str(c[i]), 'country_name': self._str(c[i + 1])}
+            for i in range(0, len(c), 2)
+        ]
+        return countries, self.meta['countries_source']
+
+    def states(self, country_code: str) -> list[str]:
+        """Códigos de estado del mapa para el país (ordenados, sin vacíos)."""
+        return self._list(STATES, country_code)[0]
+
+    def map_cities(self, country_code: str, state_code: str | None = None, q: str = '') -> list[str]:
+        """Ciudades distintas del mapa; ``state_code`` vacío = todo el país; ``q`` filtra sin mayúsculas."""
+        cities = self._list(MAP_CITIES, country_code, state_code or '')[0]
+        if q:
+            q_low = q.lower()
+            cities = [c for c in cities if q_low in c.lower()]
+        return cities
+
+    def esd_cities(self, country_code: str, state_code: str | None = None) -> list[dict]:
+        """Equivalente a ``ServiceZone.get_cities_smart`` sin consultas."""
+        values, flags = self._list(ESD_CITIES, country_code, state_code or '')
+        kind = ESD_CITY_TYPES[flags]
+        return [{'name': v, 'code': v, 'display_name': v, 'type': kind} for v in values]
+
+
+_lock = threading.Lock()
+_state = {'snapshot': None, 'checked': None}
+
+
+def get_reference_snapshot() -> ReferenceSnapshot | None:
+    """Snapshot vigente (misma versión que el dataset) o None para consultar la BD."""
+    try:
+        version = get_dataset_version()
+    except Exception:
+        return None
+    snapshot = _state['snapshot']
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    path = snapshot_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    # Evitar reabrir un archivo desactualizado en cada petición
+    if _state['checked'] == (version, signature):
+        return None
+    with _lock:
+        snapshot = _state['snapshot']
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        if snapshot is None or snapshot.signature != signature:
+            try:
+                snapshot = ReferenceSnapshot(path)
+            except Exception as e:
+                logger.warning(f"No se pudo abrir el snapshot de referencia {path}: {e}")
+                snapshot = None
+        if snapshot is not None and snapshot.version == version:
+            # El mmap anterior se libera cuando ninguna petición en curso lo referencia
+            _state['snapshot'] = snapshot
+            return snapshot
+        _state['checked'] = (version, signature)
+        return None
+
+
+def reset_reference_snapshot() -> None:
+    """Olvida el snapshot cargado en el proceso (tests / tras recompilar en el mismo proceso)."""
+    with _lock:
+        _state['snapshot'] = None
+        _state['checked'] = None
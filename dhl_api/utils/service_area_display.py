@@ -0,0 +1,169 @@
+"""Resolución de nombres amigables de áreas de servicio (ServiceAreaCityMap).
+
+Mantiene la semántica del endpoint ``resolve-display`` (coincidencia directa,
+luego ciudad de respaldo, luego rango postal; en cada paso gana la fila con
+menor id, igual que ``.first()``) pero resuelve muchas entradas a la vez:
+las entradas se agrupan por país y los dos primeros pasos son una sola
+consulta por país, que agrupa en la BD (``MIN(id)`` por área o por ciudad) y
+trae solo una fila por clave aunque el área tenga una fila por código
+postal. El rango postal es una consulta acotada por código
+distinto (``desde <= código <= hasta``, índice por país y rango) en lugar de
+traer todos los rangos entre el menor y el mayor código pedido.
+
+Las filas producidas por ``compact_postal_ranges`` guardan el nombre del
+rango fusionado (``"Toronto M5A1Z8-M5A2A0"``); el resultado se recompone con
+el nombre por código que tenía la fila original (``"Toronto M5A1Z9"``).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.db.models import Min
+from django.db.models.functions import Lower
+
+# Límite de entradas aceptadas por una petición bulk
+MAX_BULK_ITEMS = 500
+
+
+def normalize_item(raw: dict) -> dict:
+    """Normaliza una entrada (mismas reglas que los query params del endpoint individual)."""
+    raw = raw or {}
+    return {
+        'country_code': str(raw.get('country_code') or '').upper().strip(),
+        'service_area': str(raw.get('service_area') or '').upper().strip(),
+        'postal_code': str(raw.get('postal_code') or '').strip() or None,
+        'state_code': str(raw.get('state_code') or '').strip() or None,
+        'fallback_city': str(raw.get('fallback_city') or '').strip() or None,
+    }
+
+
+def _item_key(item: dict) -> tuple:
+    return (
+        item['country_code'], item['service_area'], item['postal_code'] or '',
+        item['fallback_city'] or '',
+    )
+
+
+def _found(row: dict, match_type: str, compacted: set, postal_code: str | None = None) -> dict:
+    display = row['display_name']
+    if row['id'] in compacted and row['postal_code_from'] != row['postal_code_to']:
+        from .postal_ranges import map_display_name
+
+        # Rango compactado (solo fusiona filas de un código): el código consultado,
+        # o el primero del rango, que era la fila de menor id antes de compactar
+        code = postal_code if match_type == 'fallback_postal' else row['postal_code_from']
+        display = map_display_name(row['city_name'], code, code)
+    return {
+        'success': True,
+        'service_area': row['service_area'],
+        'display_name': display or row['service_area'],
+        'type': match_type,
+    }
+
+
+def _resolve_country(country_code: str, items: list[dict]) -> dict:
+    """Resuelve todas las entradas de un país. Retorna ``{item_key: resultado}``."""
+    from ..models import ServiceAreaCityMap
+    from .postal_ranges import SERVICE_AREA_MAP, compacted_ids
+
+    base = ServiceAreaCityMap.objects.filter(country_code=country_code)
+    fields = ('id', 'service_area', 'display_name', 'city_name', 'postal_code_from', 'postal_code_to')
+    # item_key -> (fila, tipo, código consultado); se arman al final para consultar compactaciones una vez
+    matches: dict[tuple, tuple] = {}
+    resolved: dict[tuple, dict] = {}
+
+    # 1. Coincidencia directa por service_area (fila de menor id por código)
+    areas = {it['service_area'] for it in items}
+    first_ids = (
+        base.filter(service_area__in=areas)
+        .values('service_area').annotate(first_id=Min('id')).order_by()
+        .values('first_id')
+    )
+    direct = {row['service_area']: row for row in base.filter(id__in=first_ids).values(*fields)}
+    pending = []
+    for it in items:
+        row = direct.get(it['service_area'])
+        if row:
+            matches[_item_key(it)] = (row, 'direct', None)
+        else:
+            pending.append(it)
+
+    # 2. Ciudad de respaldo (case-insensitive)
+    cities = {it['fallback_city'].lower() for it in pending if it['fallback_city']}
+    by_city: dict[str, dict] = {}
+    if cities:
+        first_ids = (
+            base.annotate(city_lower=Lower('city_name'))
+            .filter(city_lower__in=cities)
+            .values('city_lower').annotate(first_id=Min('id')).order_by()
+            .values('first_id')
+        )
+        rows = base.filter(id__in=first_ids).annotate(city_lower=Lower('city_name')).values('city_lower', *fields)
+        by_city = {row['city_lower']: row for row in rows}
+    still_pending = []
+    for it in pending:
+        row = by_city.get((it['fallback_city'] or '').lower())
+        if row:
+            matches[_item_key(it)] = (row, 'fallback_city', None)
+        else:
+            still_pending.append(it)
+
+    # 3. Rango postal: una consulta acotada (limit 1) por código distinto
+    by_postal: dict[str, dict | None] = {}
+    for pc in sorted({it['postal_code'] for it in still_pending if it['postal_code']}):
+        by_postal[pc] = (
+            base.filter(postal_code_from__lte=pc, postal_code_to__gte=pc)
+            .order_by('id')
+            .values(*fields)
+            .first()
+        )
+    for it in still_pending:
+        pc = it['postal_code']
+        row = by_postal.get(pc) if pc else None
+        if row:
+            matches[_item_key(it)] = (row, 'fallback_postal', pc)
+        else:
+            resolved[_item_key(it)] = {
+                'success': False,
+                'service_area': it['service_area'],
+                'display_name': it['service_area'],
+                'type': 'not_found',
+            }
+
+    compacted = compacted_ids(SERVICE_AREA_MAP, (row['id'] for row, _, _ in matches.values()))
+    for key, (row, match_type, pc) in matches.items():
+        resolved[key] = _found(row, match_type, compacted, pc)
+    return resolved
+
+
+def resolve_service_area_displays(raw_items: list[dict]) -> list[dict]:
+    """Resuelve una lista de entradas y retorna un resultado por entrada, en el mismo orden.
+
+    Cada entrada acepta ``country_code``, ``service_area``, ``postal_code``,
+    ``state_code`` y ``fallback_city``. Las entradas repetidas se resuelven una vez.
+    Las entradas sin ``country_code`` o ``service_area`` retornan ``type='invalid'``.
+    """
+    items = [normalize_item(raw) for raw in raw_items]
+
+    by_country: dict[str, dict[tuple, dict]] = defaultdict(dict)
+    for it in items:
+        if it['country_code'] and it['service_area']:
+            by_country[it['country_code']].setdefault(_item_key(it), it)
+
+    resolved: dict[tuple, dict] = {}
+    for country_code, unique_items in by_country.items():
+        resolved.update(_resolve_country(country_code, list(unique_items.values())))
+
+    results = []
+    for it in items:
+        if not (it['country_code'] and it['service_area']):
+            result = {
+                'success': False,
+                'service_area': it['service_area'],
+                'display_name': it['service_area'],
+                'type': 'invalid',
+            }
+        else:
+            result = resolved[_item_key(it)]
+        results.append({'country_code': it['country_code'], **result})
+    return results
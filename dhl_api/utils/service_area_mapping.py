@@ -0,0 +1,186 @@
+"""Mapeo canónico ciudad → área de servicio.
+
+La tabla ``CityServiceAreaMap`` se reconstruye en tiempo de carga a partir de
+``ServiceAreaCityMap`` (CSV de ubicaciones) y ``ServiceZone`` (ESD). Para cada
+(país, estado, ciudad normalizada) se acumula la cobertura postal de cada
+área de servicio candidata y gana la de mayor cobertura (desempate: número de
+rangos y luego código alfabético, para que el resultado sea determinista).
+
+En tiempo de petición ``get_city_service_area_mapping`` responde desde un dict
+por proceso cargado una vez por país (y por versión del dataset), de modo que
+filtrar códigos postales por ciudad es una búsqueda por clave en lugar de
+consultas agregadas.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+from .dataset_version import get_dataset_version
+from .postal_ranges import postal_ordinal
+from .text_search import fold_text
+
+logger = logging.getLogger(__name__)
+
+# país -> (versión del dataset, {(estado, ciudad_normalizada): área})
+_cache: dict[str, tuple[int, dict[tuple[str, str], str]]] = {}
+_cache_lock = threading.Lock()
+
+
+def postal_span(postal_from: str, postal_to: str) -> int:
+    """Cantidad aproximada de códigos postales cubiertos por un rango.
+
+    Numéricos: diferencia decimal. Alfanuméricos con el mismo patrón
+    dígito/letra: diferencia en el odómetro del patrón (así un rango compactado
+    cuenta lo mismo que sus filas originales). Otros de igual longitud:
+    diferencia en base 36. Vacíos o no comparables: 1 (la fila cuenta como
+    presencia).
+    """
+    f = (postal_from or '').strip().upper()
+    t = (postal_to or '').strip().upper()
+    if not f and not t:
+        return 1
+    if not f or not t or f == t:
+        return 1
+    try:
+        if f.isdigit() and t.isdigit():
+            return max(1, int(t) - int(f) + 1)
+        start, end = postal_ordinal(f), postal_ordinal(t)
+        if start and end and start[0] == end[0]:
+            return max(1, end[1] - start[1] + 1)
+        if len(f) == len(t) and f.isalnum() and t.isalnum():
+            return max(1, int(t, 36) - int(f, 36) + 1)
+    except ValueError:
+        pass
+    return 1
+
+
+def _accumulate(totals, names, rows):
+    """Suma cobertura por (país, estado, ciudad, área) y por (país, '', ciudad, área)."""
+    for cc, sc, city, sa, pf, pt in rows:
+        key = fold_text(city)
+        sa = (sa or '').strip().upper()
+        if not key or not sa:
+            continue
+        cc = (cc or '').upper()
+        sc = (sc or '').strip().upper()
+        span = postal_span(pf, pt)
+        for scope in {sc, ''}:
+            entry = totals[(cc, scope, key)][sa]
+            entry[0] += span
+            entry[1] += 1
+        names.setdefault((cc, key), (city or '').strip())
+
+
+def compute_city_service_areas(country_codes: list[str] | None = None) -> list[dict]:
+    """Deriva el área de servicio canónica por ciudad sin escribir en BD."""
+    from ..models import ServiceAreaCityMap, ServiceZone
+
+    fields = ('country_code', 'state_code', 'city_name', 'service_area', 'postal_code_from', 'postal_code_to')
+    totals: dict[tuple, dict[str, list[int]]] = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    names: dict[tuple, str] = {}
+
+    for model in (ServiceAreaCityMap, ServiceZone):
+        qs = model.objects.all()
+        if country_codes:
+            qs = qs.filter(country_code__in=country_codes)
+        _accumulate(totals, names, qs.values_list(*fields).iterator(chunk_size=5000))
+
+    results = []
+    for (cc, sc, key), candidates in totals.items():
+        service_area, (coverage, _ranges) = min(
+            candidates.items(), key=lambda kv: (-kv[1][0], -kv[1][1], kv[0])
+        )
+        results.append({
+            'country_code': cc,
+            'state_code': sc,
+            'city_key': key[:120],
+            'city_name': names.get((cc, key), key)[:120],
+            'service_area': service_area,
+            'postal_coverage': coverage,
+            'candidate_count': len(candidates),
+        })
+    return results
+
+
+def rebuild_city_service_area_map(country_codes: list[str] | None = None, batch_size: int = 5000) -> dict:
+    """Reconstruye ``CityServiceAreaMap`` (todo o solo los países indicados).
+
+    Retorna estadísticas: filas escritas y ciudades con más de un candidato.
+    """
+    from ..models import CityServiceAreaMap
+
+    country_codes = [c.upper() for c in (country_codes or []) if c]
+    rows = compute_city_service_areas(country_codes or None)
+
+    with transaction.atomic():
+        qs = CityServiceAreaMap.objects.all()
+        if country_codes:
+            qs = qs.filter(country_code__in=country_codes)
+        qs.delete()
+        CityServiceAreaMap.objects.bulk_create(
+            [CityServiceAreaMap(**row) for row in rows], batch_size=batch_size
+        )
+
+    clear_mapping_cache()
+    return {
+        'rows': len(rows),
+        'conflicts': sum(1 for r in rows if r['candidate_count'] > 1),
+        'countries': len({r['country_code'] for r in rows}),
+    }
+
+
+def _load_country(country_code: str) -> dict[tuple[str, str], str]:
+    from ..models import CityServiceAreaMap
+
+    return {
+        (sc, key): sa
+        for sc, key, sa in CityServiceAreaMap.objects.filter(country_code=country_code)
+        .values_list('state_code', 'city_key', 'service_area')
+        .iterator(chunk_size=5000)
+    }
+
+
+def _country_mapping(country_code: str) -> dict[tuple[str, str], str]:
+    version = get_dataset_version()
+    cached = _cache.get(country_code)
+    if cached and cached[0] == version:
+        return cached[1]
+    with _cache_lock:
+        cached = _cache.get(country_code)
+        if cached and cached[0] == version:
+            return cached[1]
+        mapping = _load_country(country_code)
+        _cache[country_code] = (version, mapping)
+        return mapping
+
+
+def clear_mapping_cache() -> None:
+    """Vacía el dict del proceso (tras reconstruir la tabla)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_city_service_area_mapping(country_code: str, city_name: str, state_code: str | None = None) -> str | None:
+    """Área de servicio canónica para una ciudad, o None si no hay mapeo.
+
+    Con ``state_code`` se busca primero la entrada del estado y luego la del país.
+    """
+    cc = (country_code or '').upper().strip()
+    key = fold_text(city_name)
+    if not cc or not key:
+        return None
+    try:
+        mapping = _country_mapping(cc)
+    except Exception as e:
+        logger.warning(f"No se pudo cargar el mapeo ciudad→área para {cc}: {e}")
+        return None
+    sc = (state_code or '').upper().strip()
+    if sc:
+        found = mapping.get((sc, key))
+        if found:
+            return found
+    return mapping.get(('', key))
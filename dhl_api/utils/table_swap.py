@@ -0,0 +1,218 @@
+"""Recarga blue/green de tablas de referencia: cargar en una tabla sombra y
+reemplazar la tabla viva en una sola transacción.
+
+PostgreSQL: ``shadow_reload(Model)`` crea ``<tabla>__shadow`` con la misma
+estructura (columnas, defaults, identidad, PK y restricciones únicas, que los
+cargadores necesitan para ``ON CONFLICT``) y redirige el modelo hacia ella
+mientras dura el bloque. Al salir crea los índices secundarios (ya con los
+datos cargados, mucho más rápido), valida el número de filas y, en una
+transacción, renombra la tabla viva a ``__old``, la sombra al nombre real y
+restaura los nombres originales de índices y restricciones, de modo que las
+migraciones siguientes no noten el cambio. El tráfico sigue leyendo la tabla
+anterior completa hasta el ``COMMIT``; el bloqueo exclusivo dura solo los
+renombres.
+
+SQLite (desarrollo): borrar y recargar dentro de una única transacción; los
+lectores ven los datos anteriores hasta el commit.
+
+Solo aplica a tablas sin claves foráneas entrantes (las de referencia).
+"""
+from __future__ import annotations
+
+import re
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+SHADOW_SUFFIX = '__shadow'
+OLD_SUFFIX = '__old'
+
+_CREATE_INDEX_RE = re.compile(r'^CREATE (UNIQUE )?INDEX \S+ ON (?:ONLY )?\S+ ', re.IGNORECASE)
+
+
+class TableSwapError(Exception):
+    """La tabla sombra no pasó la validación o no se pudo intercambiar."""
+
+
+class SwapResult:
+    """Resultado del intercambio (se completa al salir del bloque)."""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.rows = 0
+        self.previous_rows = 0
+        self.method = 'shadow-swap' if connection.vendor == 'postgresql' else 'transaction'
+        self.index_seconds = 0.0
+        self.swap_seconds = 0.0
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _pg_indexes(cursor, table: str) -> list[dict]:
+    """Índices de ``table`` con su definición y la restricción (p/u) que respaldan, si la hay."""
+    cursor.execute(
+        """
+        SELECT ic.relname, pg_get_indexdef(i.indexrelid), con.conname, con.contype
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid AND con.contype IN ('p', 'u')
+        WHERE i.indrelid = %s::regclass
+        ORDER BY ic.relname
+        """,
+        [table],
+    )
+    return [
+        {'name': name, 'definition': definition, 'constraint': conname, 'contype': contype}
+        for name, definition, conname, contype in cursor.fetchall()
+    ]
+
+
+def _shadow_name(index: int, table: str) -> str:
+    return f'{table[:40]}_sw{index}'
+
+
+def _create_index(cursor, index: dict, shadow: str, temp_name: str) -> None:
+    definition = _CREATE_INDEX_RE.sub(
+        lambda m: f'CREATE {m.group(1) or ""}INDEX {_quote(temp_name)} ON {_quote(shadow)} ',
+        index['definition'],
+        count=1,
+    )
+    cursor.execute(definition)
+    if index['constraint']:
+        kind = 'PRIMARY KEY' if index['contype'] == 'p' else 'UNIQUE'
+        cursor.execute(
+            f'ALTER TABLE {_quote(shadow)} ADD CONSTRAINT {_quote(temp_name)} {kind} USING INDEX {_quote(temp_name)}'
+        )
+
+
+def _rename_index(cursor, table: str, index: dict, old: str, new: str) -> None:
+    # Renombrar la restricción renombra también su índice
+    if index['constraint']:
+        cursor.execute(f'ALTER TABLE {_quote(table)} RENAME CONSTRAINT {_quote(old)} TO {_quote(new)}')
+    else:
+        cursor.execute(f'ALTER INDEX {_quote(old)} RENAME TO {_quote(new)}')
+
+
+def _serial_sequence(cursor, table: str, column: str) -> str | None:
+    cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, column])
+    return cursor.fetchone()[0]
+
+
+def _count(cursor, table: str) -> int:
+    cursor.execute(f'SELECT COUNT(*) FROM {_quote(table)}')
+    return cursor.fetchone()[0]
+
+
+def _validate(result: SwapResult, min_rows: int, min_ratio: float) -> None:
+    if result.rows < min_rows:
+        raise TableSwapError(
+            f'{result.table}: la recarga produjo {result.rows} filas (mínimo {min_rows}); se conserva la tabla actual'
+        )
+    if result.previous_rows and result.rows < result.previous_rows * min_ratio:
+        raise TableSwapError(
+            f'{result.table}: la recarga produjo {result.rows} filas frente a {result.previous_rows} actuales '
+            f'(mínimo {min_ratio:.0%}); se conserva la tabla actual'
+        )
+
+
+@contextmanager
+def _redirect(model, table: str):
+    original = model._meta.db_table
+    model._meta.db_table = table
+    try:
+        yield
+    finally:
+        model._meta.db_table = original
+
+
+def _reload_postgresql(model, min_rows: int, min_ratio: float):
+    table = model._meta.db_table
+    shadow = f'{table}{SHADOW_SUFFIX}'
+    old = f'{table}{OLD_SUFFIX}'
+    result = SwapResult(table)
+
+    with connection.cursor() as cursor:
+        indexes = _pg_indexes(cursor, table)
+        cursor.execute(f'DROP TABLE IF EXISTS {_quote(shadow)}')
+        cursor.execute(
+            f'CREATE TABLE {_quote(shadow)} (LIKE {_quote(table)} '
+            f'INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED INCLUDING CONSTRAINTS)'
+        )
+        temp_names = {ix['name']: _shadow_name(i, table) for i, ix in enumerate(indexes)}
+        # PK y únicos desde el inicio: los cargadores usan ON CONFLICT sobre ellos
+        for ix in indexes:
+            if ix['constraint']:
+                _create_index(cursor, ix, shadow, temp_names[ix['name']])
+
+    try:
+        with _redirect(model, shadow):
+            yield result
+        with connection.cursor() as cursor:
+            t0 = time.perf_counter()
+            for ix in indexes:
+                if not ix['constraint']:
+                    _create_index(cursor, ix, shadow, temp_names[ix['name']])
+            cursor.execute(f'ANALYZE {_quote(shadow)}')
+            result.index_seconds = time.perf_counter() - t0
+            result.rows = _count(cursor, shadow)
+            result.previous_rows = _count(cursor, table)
+        _validate(result, min_rows, min_ratio)
+
+        t0 = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(old)}')
+            for i, ix in enumerate(indexes):
+                _rename_index(cursor, old, ix, ix['name'], f'{table[:40]}_old{i}')
+                _rename_index(cursor, shadow, ix, temp_names[ix['name']], ix['name'])
+            cursor.execute(f'ALTER TABLE {_quote(shadow)} RENAME TO {_quote(table)}')
+            pk_column = model._meta.pk.column
+            sequence = _serial_sequence(cursor, table, pk_column)
+            if sequence is None:
+                # Columna serial (no identidad): la sombra comparte la secuencia de la tabla
+                # anterior; traspasarla antes del DROP para que no se elimine con ella
+                shared = _serial_sequence(cursor, old, pk_column)
+                if shared:
+                    cursor.execute(f'ALTER SEQUENCE {shared} OWNED BY {_quote(table)}.{_quote(pk_column)}')
+            cursor.execute(f'DROP TABLE {_quote(old)}')
+            # La secuencia de identidad de la sombra hereda el nombre de la anterior
+            expected = f'{table}_{pk_column}_seq'
+            if sequence and sequence.split('.')[-1].strip('"') != expected:
+                cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {_quote(expected)}')
+        result.swap_seconds = time.perf_counter() - t0
+    except BaseException:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {_quote(shadow)}')
+        raise
+
+
+def _reload_transaction(model, min_rows: int, min_ratio: float):
+    result = SwapResult(model._meta.db_table)
+    with transaction.atomic():
+        result.previous_rows = model.objects.count()
+        model.objects.all().delete()
+        yield result
+        result.rows = model.objects.count()
+        # Una excepción aquí revierte el borrado y la carga
+        _validate(result, min_rows, min_ratio)
+
+
+@contextmanager
+def shadow_reload(model, min_rows: int = 1, min_ratio: float = 0.0):
+    """Recarga ``model`` por completo sin exponer una tabla vacía o a medio cargar.
+
+    Dentro del bloque el modelo apunta a una tabla vacía con la misma
+    estructura; al salir sin errores se valida que tenga al menos ``min_rows``
+    filas y ``min_ratio`` veces las filas actuales y se intercambia con la
+    tabla viva. Ante cualquier error la tabla viva queda intacta.
+    Produce un ``SwapResult`` que se completa al salir.
+    """
+    if any(rel.concrete for rel in model._meta.related_objects):
+        raise TableSwapError(f'{model._meta.db_table} tiene claves foráneas entrantes; no se puede intercambiar')
+    if connection.vendor == 'postgresql':
+        yield from _reload_postgresql(model, min_rows, min_ratio)
+    else:
+        yield from _reload_transaction(model, min_rows, min_ratio)
@@ -0,0 +1,42 @@
+"""Utilidades de normalización de texto para búsquedas.
+
+Centraliza el "plegado" de acentos y mayúsculas que usan las columnas de
+búsqueda (ej: ``ServiceZone.search_text``) para que el valor almacenado y el
+término consultado se normalicen exactamente igual.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Callable
+
+# Separador de campos dentro de una columna de búsqueda compuesta.
+# Permite distinguir coincidencias exactas/prefijo por campo con LIKE.
+FIELD_SEPARATOR = '|'
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fold_text(value: str | None) -> str:
+    """Normaliza texto para búsqueda: sin acentos, minúsculas y espacios colapsados.
+
+    Ej: ``'  Bogotá  D.C. '`` -> ``'bogota d.c.'``
+    """
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    without_marks = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = without_marks.replace(FIELD_SEPARATOR, ' ').lower()
+    return _WHITESPACE_RE.sub(' ', cleaned).strip()
+
+
+def build_search_text(*parts: str | None, fold: Callable[[str | None], str] = fold_text) -> str:
+    """Compone una columna de búsqueda a partir de varios campos.
+
+    Cada campo se pliega con ``fold_text`` y se encierra entre separadores
+    (``|bogota|cundinamarca|bog|colombia|``) para poder rankear coincidencias
+    exactas (``|q|``) o por prefijo de campo (``|q``) usando solo LIKE.
+    Los cargadores masivos pueden pasar una versión memorizada en ``fold``.
+    """
+    folded = [fold(p) for p in parts]
+    return FIELD_SEPARATOR + FIELD_SEPARATOR.join(folded) + FIELD_SEPARATOR
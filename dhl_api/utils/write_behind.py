@@ -0,0 +1,435 @@
+"""Persistencia diferida (write-behind) de registros que no bloquean la respuesta.
+
+``rate_view`` y ``landed_cost_view`` guardan cotizaciones (``RateQuote``,
+``LandedCostQuote``) que nadie lee en la misma petición. En lugar de un
+INSERT síncrono por tarifa, las vistas encolan los campos en un buffer del
+proceso y un hilo en segundo plano los escribe con ``bulk_create`` cuando
+el buffer alcanza ``WRITE_BEHIND_FLUSH_SIZE`` registros o pasan
+``WRITE_BEHIND_FLUSH_INTERVAL`` segundos.
+
+Durabilidad:
+- Al terminar el worker (``atexit`` y el hook ``worker_exit`` de gunicorn)
+  se vacía el buffer de forma síncrona.
+- Si la BD falla, el lote se vuelca a un archivo JSONL en
+  ``WRITE_BEHIND_SPILL_DIR``; el siguiente flush exitoso (de cualquier
+  worker) lo reintenta, conservando la fecha original del registro.
+- Si el lote falla por sus datos (``IntegrityError``/``DataError``, ej. un
+  usuario borrado o un valor demasiado largo), se reintenta fila por fila:
+  las válidas se escriben y solo las que no pueden entrar nunca se apartan
+  en ``write_behind-<nombre>-<pid>.jsonl.failed`` para revisión manual.
+- Si el buffer está lleno (``WRITE_BEHIND_MAX_QUEUE``) el excedente va
+  directo al archivo; solo se descarta si tampoco se puede escribir ahí.
+
+``WRITE_BEHIND_ENABLED=False`` escribe en la misma petición (un
+``bulk_create`` por llamada), como se hace al correr tests.
+"""
+from __future__ import annotations
+
+import atexit
+import base64
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+_RECORDED_AT = '_recorded_at'
+# Segundos de espera antes de reintentar volcados tras un fallo de BD
+_REPLAY_BACKOFF = 30.0
+# Errores que dependen de los datos de la fila: reintentar no sirve
+_ROW_ERRORS = (IntegrityError, DataError, LookupError, TypeError, ValueError)
+
+
+class _SpillEncoder(DjangoJSONEncoder):
+    """Como DjangoJSONEncoder, más bytes (``BinaryField``) en base64."""
+
+    def default(self, o):
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(bytes(o)).decode('ascii')
+        return super().default(o)
+
+
+
+class WriteBehindRecorder:
+    """Buffer en memoria + hilo de escritura por lotes para un conjunto de modelos."""
+
+    def __init__(self, name: str, flush_size: int = 100, flush_interval: float = 2.0, max_queue: int = 10000,
+                 spill_dir: str | None = None, enabled: bool = True, ignore_conflicts: tuple = (),
+                 on_write: dict | None = None, on_flush=None):
+        self.name = name
+        # Modelos (``app.Model``) deduplicados por PK: los duplicados se ignoran en el INSERT
+        self.ignore_conflicts = frozenset(ignore_conflicts)
+        # ``{'app.Model': callable(objs)}``: se llama en la misma transacción del lote escrito
+        self.on_write = dict(on_write or {})
+        # ``callable()``: se llama al final de cada flush (datos agregados fuera de la cola)
+        self.on_flush = on_flush
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.max_queue = max(1, int(max_queue))
+        self.spill_dir = spill_dir
+        self.enabled = enabled
+        self.counters: Counter = Counter()
+        self.last_flush_at = None
+        self.last_error = ''
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._pid = None
+        self._next_replay = 0.0
+
+    # --- Encolado (hilo de la petición) ---
+
+    def enqueue(self, model, records: list[dict]) -> bool:
+        """Encola ``records`` (kwargs del modelo). Retorna False si alguno se descartó."""
+        if not records:
+            return True
+        label = model._meta.label
+        recorded_at = timezone.now().isoformat()
+        items = [(label, dict(r, **{_RECORDED_AT: recorded_at})) for r in records]
+        self.counters['enqueued'] += len(items)
+        if not self.enabled:
+            dropped = self.counters['dropped']
+            self._write(items)
+            return self.counters['dropped'] == dropped
+
+        with self._lock:
+            room = max(0, self.max_queue - len(self._queue))
+            accepted, overflow = items[:room], items[room:]
+            self._queue.extend(accepted)
+            depth = len(self._queue)
+        self.counters['max_depth'] = max(self.counters['max_depth'], depth)
+        ok = True
+        if overflow:
+            self.counters['overflow'] += len(overflow)
+            ok = self._spill(overflow)
+        self._ensure_thread()
+        if depth >= self.flush_size:
+            self._wakeup.set()
+        return ok
+
+    def _ensure_thread(self) -> None:
+        # Tras un fork (gunicorn --preload) el hilo del padre no existe en el hijo
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=f'write-behind-{self.name}', daemon=True)
+            self._thread.start()
+
+    # --- Escritura (hilo de fondo) ---
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self.flush()
+        finally:
+            connection.close()
+
+    def _drain(self) -> list:
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+        return items
+
+    def flush(self) -> int:
+        """Escribe todo lo encolado (y reintenta archivos de volcado). Retorna registros escritos."""
+        with self._flush_lock:
+            items = self._drain()
+            failures = self.counters['flush_errors']
+            written = self._write(items) if items else 0
+            # Reintentar volcados solo si la BD respondió (o no hubo nada que escribir), con espera tras un fallo
+            if self.counters['flush_errors'] == failures and time.monotonic() >= self._next_replay:
+                written += self.replay_spill()
+            if self.on_flush is not None:
+                try:
+                    self.on_flush()
+                except Exception as e:
+                    self._record_failure('on_flush', 0, e)
+            return written
+
+    def _write(self, items: list) -> int:
+        by_model = defaultdict(list)
+        for label, fields in items:
+            by_model[label].append(fields)
+        written = 0
+        for label, records in by_model.items():
+            try:
+                written += self._bulk_create(label, records)
+                self.last_error = ''
+                continue
+            except _ROW_ERRORS as e:
+                # Alguna fila inválida: separar las válidas de las que nunca van a entrar
+                logger.warning(f"write-behind {self.name}: lote de {len(records)} {label} rechazado ({e}); fila por fila")
+                count, pending = self._write_rows(label, records)
+                written += count
+            except Exception as e:
+                pending = records
+                self._record_failure(label, len(records), e)
+            # BD caída: a disco para reintentar después
+            if pending:
+                self._spill([(label, r) for r in pending])
+        self.last_flush_at = timezone.now()
+        return written
+
+    def _record_failure(self, label: str, count: int, error: Exception) -> None:
+        self.counters['flush_errors'] += 1
+        self.last_error = f'{type(error).__name__}: {error}'
+        logger.error(f"write-behind {self.name}: error escribiendo {count} {label}: {error}")
+        self._reset_connection()
+
+    def _write_rows(self, label: str, records: list[dict], restore_dates: bool = False) -> tuple[int, list[dict]]:
+        """Escribe fila por fila; aparta las inválidas. Retorna ``(escritas, pendientes)``.
+
+        Las pendientes son las que quedaron sin intentar porque la BD dejó de responder.
+        """
+        written = 0
+        for i, record in enumerate(records):
+            try:
+                written += self._bulk_create(label, [record], restore_dates=restore_dates)
+            except _ROW_ERRORS as e:
+                self._reject(label, record, e)
+            except Exception as e:
+                self._record_failure(label, len(records) - i, e)
+                return written, records[i:]
+        return written, []
+
+    def _reset_connection(self) -> None:
+        # Solo en el hilo de fondo: en modo síncrono la conexión es la de la petición
+        if threading.current_thread() is self._thread:
+            connection.close()
+
+    def _bulk_create(self, label: str, records: list[dict], restore_dates: bool = False) -> int:
+        model = apps.get_model(label)
+        # En los volcados los BinaryField vienen en base64
+        binary = [f for f in model._meta.concrete_fields if f.get_internal_type() == 'BinaryField'] if restore_dates else []
+        objs = []
+        dates = []
+        for fields in records:
+            fields = dict(fields)
+            dates.append(fields.pop(_RECORDED_AT, None))
+            for field in binary:
+                if isinstance(fields.get(field.attname), str):
+                    fields[field.attname] = field.to_python(fields[field.attname])
+            objs.append(model(**fields))
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=self.flush_size, ignore_conflicts=label in self.ignore_conflicts)
+            if restore_dates and connection.features.can_return_rows_from_bulk_insert:
+                # auto_now_add pone la hora del reintento; restaurar la de la petición original
+                stamped = []
+                for obj, recorded in zip(objs, dates):
+                    recorded = parse_datetime(recorded) if recorded else None
+                    if obj.pk and recorded:
+                        obj.created_at = recorded
+                        stamped.append(obj)
+                if stamped and any(f.name == 'created_at' for f in model._meta.concrete_fields):
+                    model.objects.bulk_update(stamped, ['created_at'], batch_size=self.flush_size)
+            if label in self.on_write:
+                self.on_write[label](objs)
+        self.counters['written'] += len(objs)
+        return len(objs)
+
+    # --- Volcado a disco ---
+
+    def _spill_path(self) -> str:
+        return os.path.join(self.spill_dir, f'write_behind-{self.name}-{os.getpid()}.jsonl')
+
+    def _reject(self, label: str, fields, error: Exception) -> None:
+        """Aparta una fila que nunca va a entrar (``.failed``, fuera de los reintentos)."""
+        self.counters['rejected'] += 1
+        self.last_error = f'{type(error).__name__}: {error}'
+        logger.error(f"write-behind {self.name}: fila {label} rechazada: {error}")
+        if not self.spill_dir:
+            self.counters['dropped'] += 1
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(f'{self._spill_path()}.failed', 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'model': label, 'fields': fields, 'error': self.last_error},
+                                   cls=_SpillEncoder) + '\n')
+        except OSError as e:
+            self.counters['dropped'] += 1
+            logger.error(f"write-behind {self.name}: no se pudo apartar la fila rechazada: {e}")
+
+    def _spill(self, items: list) -> bool:
+        if not self.spill_dir:
+            self.counters['dropped'] += len(items)
+            return False
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_path(), 'a', encoding='utf-8') as f:
+                for label, fields in items:
+                    f.write(json.dumps({'model': label, 'fields': fields}, cls=_SpillEncoder) + '\n')
+            self.counters['spilled'] += len(items)
+            return True
+        except OSError as e:
+            self.counters['dropped'] += len(items)
+            self.last_error = f'{type(e).__name__}: {e}'
+            logger.error(f"write-behind {self.name}: se descartan {len(items)} registros: {e}")
+            return False
+
+    def spill_files(self) -> list[str]:
+        if not self.spill_dir:
+            return []
+        return sorted(glob.glob(os.path.join(self.spill_dir, f'write_behind-{self.name}-[0-9]*.jsonl')))
+
+    def replay_spill(self) -> int:
+        """Reintenta los archivos de volcado pendientes. Retorna registros escritos."""
+        written = 0
+        for path in self.spill_files():
+            claimed = f'{path}.{os.getpid()}.replay'
+            try:
+                # Renombrar reclama el archivo: otro worker no lo reintentará a la vez
+                os.replace(path, claimed)
+            except OSError:
+                continue
+            by_model = defaultdict(list)
+            with open(claimed, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        by_model[entry['model']].append(entry['fields'])
+                    except (KeyError, TypeError, ValueError) as e:
+                        self._reject('?', line.rstrip('\n'), e)
+
+            # Una transacción por modelo; si un lote tiene filas inválidas se reintenta fila por fila
+            pending = []
+            count = 0
+            labels = list(by_model)
+            for i, label in enumerate(labels):
+                records = by_model[label]
+                try:
+                    count += self._bulk_create(label, records, restore_dates=True)
+                    continue
+                except _ROW_ERRORS:
+                    done, rest = self._write_rows(label, records, restore_dates=True)
+                    count += done
+                except DatabaseError as e:
+                    self._record_failure(label, len(records), e)
+                    rest = records
+                if rest:
+                    pending = [(label, r) for r in rest]
+                    pending += [(other, r) for other in labels[i + 1:] for r in by_model[other]]
+                    break
+            written += count
+            self.counters['replayed'] += count
+
+            if pending:
+                # BD caída: devolver solo lo no escrito y esperar antes de reintentar
+                logger.error(f"write-behind {self.name}: no se pudo reintentar {path}: {self.last_error}")
+                with open(claimed, 'w', encoding='utf-8') as f:
+                    for label, fields in pending:
+                        f.write(json.dumps({'model': label, 'fields': fields}, cls=_SpillEncoder) + '\n')
+                os.replace(claimed, path)
+                self._next_replay = time.monotonic() + _REPLAY_BACKOFF
+                break
+            os.remove(claimed)
+        return written
+
+    # --- Ciclo de vida y diagnóstico ---
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Detiene el hilo y escribe lo pendiente de forma síncrona."""
+        self._stopping = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+        if self._queue or self.on_flush is not None:
+            self.flush()
+
+    def stats(self) -> dict:
+        out = {
+            'name': self.name,
+            'enabled': self.enabled,
+            'pid': os.getpid(),
+            'queue_depth': len(self._queue),
+            'max_queue': self.max_queue,
+            'flush_size': self.flush_size,
+            'flush_interval': self.flush_interval,
+            'thread_alive': bool(self._thread and self._thread.is_alive() and self._pid == os.getpid()),
+            'enqueued': self.counters['enqueued'],
+            'written': self.counters['written'],
+            'spilled': self.counters['spilled'],
+            'replayed': self.counters['replayed'],
+            'dropped': self.counters['dropped'],
+            'overflow': self.counters['overflow'],
+            'flush_errors': self.counters['flush_errors'],
+            'rejected': self.counters['rejected'],
+            'max_depth': self.counters['max_depth'],
+            'pending_spill_files': len(self.spill_files()),
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+            'last_error': self.last_error,
+        }
+        # Contadores propios de cada uso (ej. muestreo de auditoría)
+        out.update((k, v) for k, v in self.counters.items() if k not in out)
+        return out
+
+
+_recorders: dict[str, WriteBehindRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(name: str = 'quotes', **options) -> WriteBehindRecorder:
+    """Recorder del proceso (se crea en el primer uso).
+
+    Los valores por defecto salen de ``WRITE_BEHIND_*``; ``options`` (mismos
+    nombres que ``WriteBehindRecorder``) los reemplazan para este recorder.
+    """
+    recorder = _recorders.get(name)
+    if recorder is None:
+        with _recorders_lock:
+            recorder = _recorders.get(name)
+            if recorder is None:
+                config = {
+                    'flush_size': getattr(settings, 'WRITE_BEHIND_FLUSH_SIZE', 100),
+                    'flush_interval': getattr(settings, 'WRITE_BEHIND_FLUSH_INTERVAL', 2.0),
+                    'max_queue': getattr(settings, 'WRITE_BEHIND_MAX_QUEUE', 10000),
+                    'spill_dir': getattr(settings, 'WRITE_BEHIND_SPILL_DIR', '') or None,
+                    'enabled': getattr(settings, 'WRITE_BEHIND_ENABLED', True),
+                }
+                config.update(options)
+                recorder = WriteBehindRecorder(name, **config)
+                _recorders[name] = recorder
+    return recorder
+
+
+def record_quotes(model, records: list[dict]) -> bool:
+    """Encola cotizaciones para escritura diferida. Retorna False si alguna se descartó."""
+    return get_recorder('quotes').enqueue(model, records)
+
+
+def shutdown_recorders() -> None:
+    """Vacía todos los buffers (atexit y hook ``worker_exit`` de gunicorn)."""
+    for recorder in list(_recorders.values()):
+        try:
+            recorder.shutdown()
+        except Exception as e:
+            logger.error(f"write-behind {recorder.name}: error al vaciar en el cierre: {e}")
+
+
+def write_behind_stats() -> list[dict]:
+    return [recorder.stats() for recorder in _recorders.values()]
+
+
+atexit.register(shutdown_recorders)
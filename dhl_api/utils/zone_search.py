@@ -0,0 +1,154 @@
+"""Backend de búsqueda de zonas de servicio (ServiceZone).
+
+Reemplaza el OR de cuatro ``__icontains`` + ``Paginator`` por:
+
+- Filtro sobre la columna plegada ``search_text`` (LIKE ``%q%``), que en
+  PostgreSQL usa el índice GIN trigram creado en la migración 0010.
+- Ranking por calidad de coincidencia (campo exacto > prefijo de campo >
+  prefijo de palabra > subcadena) y, en PostgreSQL, similitud trigram.
+- Total estimado: conteo exacto acotado y, si se supera el tope, estimación
+  del planificador (EXPLAIN) en vez de ``COUNT(*)`` sobre toda la tabla.
+
+En SQLite (desarrollo) se usa el mismo filtro LIKE sin índice trigram.
+"""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .pagination import EXACT_COUNT_CAP, count_with_estimate, estimate_count, keyset_paginate  # noqa: F401
+from .text_search import FIELD_SEPARATOR, fold_text
+
+logger = logging.getLogger(__name__)
+
+ORDERING = ('country_name', 'state_name', 'city_name', 'id')
+
+
+@lru_cache(maxsize=1)
+def trigram_available() -> bool:
+    """Indica si la BD es PostgreSQL con la extensión pg_trgm instalada."""
+    if connection.vendor != 'postgresql':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            return cursor.fetchone() is not None
+    except Exception as e:  # pragma: no cover - depende del servidor
+        logger.warning(f"No se pudo verificar pg_trgm: {e}")
+        return False
+
+
+def get_backend_name() -> str:
+    return 'trigram' if trigram_available() else 'like'
+
+
+def build_search_queryset(query: str = '', country_code: str = '', base_queryset=None):
+    """Construye el queryset filtrado y rankeado para ``query``.
+
+    Retorna ``(queryset, folded_query)``. Sin término de búsqueda se ordena
+    alfabéticamente como antes.
+    """
+    from ..models import ServiceZone
+
+    qs = base_queryset if base_queryset is not None else ServiceZone.objects.all()
+    if country_code:
+        qs = qs.filter(country_code=country_code.upper())
+
+    folded = fold_text(query)
+    if not folded:
+        return qs.order_by(*ORDERING), folded
+
+    sep = FIELD_SEPARATOR
+    qs = qs.filter(search_text__contains=folded).annotate(
+        match_rank=Case(
+            When(search_text__contains=f'{sep}{folded}{sep}', then=Value(4)),
+            When(search_text__contains=f'{sep}{folded}', then=Value(3)),
+            When(search_text__contains=f' {folded}', then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    )
+    if trigram_available():
+        from django.contrib.postgres.search import TrigramSimilarity
+        qs = qs.annotate(similarity=TrigramSimilarity('search_text', folded))
+    return qs.order_by(*search_ordering(folded)), folded
+
+
+def search_ordering(folded: str) -> tuple[str, ...]:
+    """Orden total de los resultados (termina en ``id``: sirve como clave de cursor)."""
+    if not folded:
+        return ORDERING
+    if trigram_available():
+        return ('-match_rank', '-similarity', *ORDERING)
+    return ('-match_rank', *ORDERING)
+
+
+def search_zones(query: str = '', country_code: str = '', page: int = 1, page_size: int = 50,
+                 cursor: str | None = None) -> dict:
+    """Ejecuta la búsqueda paginada y retorna resultados + metadatos de paginación.
+
+    Con ``cursor`` (``''`` para la primera página) pagina por keyset sobre el
+    orden de ``search_ordering`` en lugar de ``OFFSET``.
+    """
+    qs, folded = build_search_queryset(query, country_code)
+    if cursor is not None:
+        page_data = keyset_paginate(qs, search_ordering(folded), page_size, cursor=cursor or None, include_total=True)
+        return {
+            'results': page_data.pop('results'),
+            'folded_query': folded,
+            'backend': get_backend_name(),
+            'pagination': {'mode': 'cursor', 'page_size': page_size, **page_data},
+        }
+    page = max(1, int(page))
+    start = (page - 1) * page_size
+
+    # Pedir una fila extra para saber si hay página siguiente sin COUNT(*)
+    rows = list(qs[start:start + page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    total, is_estimate = count_with_estimate(qs)
+    total = max(total, start + len(rows) + (1 if has_next else 0))
+    total_pages = max(1, (total + page_size - 1) // page_size)
+
+    return {
+        'results': rows,
+        'folded_query': folded,
+        'backend': get_backend_name(),
+        'pagination': {
+            'page': page,
+            'page_size': page_size,
+            'total_pages': total_pages,
+            'total_count': total,
+            'total_is_estimate': is_estimate,
+            'has_next': has_next,
+            'has_previous': page > 1,
+        },
+    }
+
+
+def legacy_search_zones(query: str = '', country_code: str = '', page: int = 1, page_size: int = 50) -> dict:
+    """Implementación previa (OR de ``__icontains`` + Paginator); usada solo en benchmarks."""
+    from django.core.paginator import Paginator
+    from ..models import ServiceZone
+
+    queryset = ServiceZone.objects.all()
+    if country_code:
+        queryset = queryset.filter(country_code=country_code.upper())
+    if query:
+        queryset = queryset.filter(
+            Q(country_name__icontains=query) |
+            Q(state_name__icontains=query) |
+            Q(city_name__icontains=query) |
+            Q(service_area__icontains=query)
+        )
+    queryset = queryset.order_by('country_name', 'state_name', 'city_name')
+    paginator = Paginator(queryset, page_size)
+    page_obj = paginator.get_page(page)
+    return {
+        'results': list(page_obj.object_list),
+        'pagination': {'total_count': paginator.count, 'total_pages': paginator.num_pages},
+    }
@@ -1,6 +1,6 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
@@ -8,12 +8,15 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 import logging
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
 import requests
 import pytz
 from django.db.models import Q, Count
+from django.db.models.functions import Coalesce
 from .models import DHLAccount
 from .throttles import ServiceZoneThrottle, ServiceZoneAnonThrottle
 from .serializers import (
@@ -29,7 +32,10 @@ from .serializers import (
     UserActivitySerializer,
     UserActivityFilterSerializer,
     ContactSerializer,
-    ContactCreateSerializer
+    ContactCreateSerializer,
+    FAST_RATE_QUOTES,
+    FAST_SHIPMENTS,
+    FAST_USER_ACTIVITIES,
 )
 from .services import DHLService
 from .models import Shipment, RateQuote, LandedCostQuote, UserActivity, Contact, ServiceZone
@@ -43,15 +49,25 @@ from django.db.models import Q
 from decimal import Decimal, ROUND_HALF_UP
 from .utils.country_utils import get_country_name_from_iso as _get_country_name_from_iso
 
-# Intentar importar helper de mapeo si existe; definir fallback
-try:
-    from .utils.service_area_mapping import get_city_service_area_mapping  # type: ignore
-except Exception:  # pragma: no cover - fallback seguro
-    def get_city_service_area_mapping(country_code: str, city_name: str):
-        return None
+from .utils.service_area_mapping import get_city_service_area_mapping
+from .utils.dataset_version import get_dataset_version
+from .utils.reference_cache import reference_cache_page, reference_conditional
+from .utils.reference_snapshot import db_country_list, get_reference_snapshot
+from .utils.write_behind import record_quotes, write_behind_stats
+from .utils.coverage import DATASETS as COVERAGE_DATASETS, MAP as COVERAGE_MAP, get_coverage, render_coverage
+from .utils.activity_payloads import load_payloads
+from .utils.activity_rollups import rollup_stats
+from .utils.pagination import CursorError, cursor_paginate, page_size_param, wants_cursor
+from .utils.contact_search import autocomplete_contacts, filter_contacts
+from .utils import contact_io
+from .utils.fast_serializers import json_response
 
 logger = logging.getLogger(__name__)
 
+# Claves de orden únicas (terminan en id) para la paginación por cursor
+HISTORY_ORDERING = ('-created_at', '-id')
+CONTACT_CURSOR_ORDERING = ('-is_favorite', '-usage_count', '-last_used_sort', '-created_at', '-id')
+
 
 def validate_required_fields(data, required_fields):
     """
@@ -507,32 +523,40 @@ def rate_view(request):
                 'rule': 'max(base, total_weight, sum_pieces, sum_dimensional(round-then-sum), max_piece)'
             })
             
-            # Guardar cotización en la base de datos si es exitosa
+            # Guardar cotizaciones en segundo plano (write-behind) si la consulta fue exitosa
             if result.get('success') and result.get('rates'):
-                for rate in result['rates']:
-                    try:
-                        RateQuote.objects.create(
-                            origin_postal_code=serializer.validated_data['origin'].get('postal_code', ''),
-                            origin_city=serializer.validated_data['origin'].get('city', ''),
-                            origin_country=serializer.validated_data['origin'].get('country', ''),
-                            origin_state=serializer.validated_data['origin'].get('state', ''),
-                            destination_postal_code=serializer.validated_data['destination'].get('postal_code', ''),
-                            destination_city=serializer.validated_data['destination'].get('city', ''),
-                            destination_country=serializer.validated_data['destination'].get('country', ''),
-                            destination_state=serializer.validated_data['destination'].get('state', ''),
-                            weight=serializer.validated_data['weight'],
-                            length=serializer.validated_data['dimensions'].get('length', 0),
-                            width=serializer.validated_data['dimensions'].get('width', 0),
-                            height=serializer.validated_data['dimensions'].get('height', 0),
+                origin = serializer.validated_data['origin']
+                destination = serializer.validated_data['destination']
+                dimensions = serializer.validated_data['dimensions']
+                quote_fields = {
+                    'origin_postal_code': origin.get('postal_code', ''),
+                    'origin_city': origin.get('city', ''),
+                    'origin_country': origin.get('country', ''),
+                    'origin_state': origin.get('state', ''),
+                    'destination_postal_code': destination.get('postal_code', ''),
+                    'destination_city': destination.get('city', ''),
+                    'destination_country': destination.get('country', ''),
+                    'destination_state': destination.get('state', ''),
+                    'weight': serializer.validated_data['weight'],
+                    'length': dimensions.get('length', 0),
+                    'width': dimensions.get('width', 0),
+                    'height': dimensions.get('height', 0),
+                    'created_by_id': request.user.id,
+                }
+                try:
+                    record_quotes(RateQuote, [
+                        dict(
+                            quote_fields,
                             service_name=rate.get('service_name', 'Unknown'),
                             service_code=rate.get('service_code', 'Unknown'),
                             total_price=rate.get('total_charge', 0),
                             currency=rate.get('currency', 'USD'),
                             delivery_time=rate.get('delivery_time', 'Unknown'),
-                            created_by=request.user
                         )
-                    except Exception as db_error:
-                        logger.warning(f"Error saving rate quote to DB: {str(db_error)}")
+                        for rate in result['rates']
+                    ])
+                except Exception as db_error:
+                    logger.warning(f"Error saving rate quote to DB: {str(db_error)}")
             
             # Log del resultado para debugging
             logger.info(f"Rate request by {request.user.username}: {result.get('success', False)}, rates found: {len(result.get('rates', []))}")
@@ -1027,8 +1051,8 @@ def landed_cost_view(request):
                 # Guardar landed cost en la base de datos
                 try:
                     landed_cost_data = result.get('landed_cost', {})
-                    LandedCostQuote.objects.create(
-                        created_by=request.user,
+                    saved = record_quotes(LandedCostQuote, [dict(
+                        created_by_id=request.user.id,
                         origin_postal_code=serializer.validated_data['origin'].get('postal_code', ''),
                         origin_city=serializer.validated_data['origin'].get('city', ''),
                         origin_country=serializer.validated_data['origin'].get('country', ''),
@@ -1054,9 +1078,11 @@ def landed_cost_view(request):
                         items_count=len(serializer.validated_data.get('items', [])),
                         total_declared_value=sum([item.get('customs_value', 0) for item in serializer.validated_data.get('items', [])]),
                         warnings_count=len(result.get('warnings', [])),
-                        full_response=result
-                    )
-                    logger.info(f"Landed cost quote saved to database for user {request.user.username}")
+                        full_response=dict(result)
+                    )])
+                    if not saved:
+                        result['db_warning'] = 'Landed cost calculated but not saved to database'
+                    logger.info(f"Landed cost quote queued for user {request.user.username}")
                 except Exception as db_error:
                     logger.warning(f"Error saving landed cost quote to DB: {str(db_error)}")
                     # No fallar la request si hay error en DB, pero informar
@@ -1161,7 +1187,7 @@ def pickup_view(request):
         
         if result.get('success'):
             # Log de actividad del usuario
-            UserActivity.objects.create(
+            UserActivity.log_activity(
                 user=request.user,
                 action='system_action',
                 description=f"Pickup creado: {result.get('dispatch_confirmation_number', 'N/A')}",
@@ -1183,7 +1209,7 @@ def pickup_view(request):
             # Log de error con detalles completos
             logger.error(f"Error al crear pickup - Respuesta completa de DHL: {result}")
             
-            UserActivity.objects.create(
+            UserActivity.log_activity(
                 user=request.user,
                 action='api_error',
                 description=f"Error al crear pickup: {result.get('error', 'Unknown error')}",
@@ -1204,8 +1230,8 @@ def pickup_view(request):
         logger.error(f"Error en pickup_view: {str(e)}")
         
         # Log de error del sistema
-        UserActivity.objects.create(
-            user=request.user if request.user.is_authenticated else None,
+        UserActivity.log_activity(
+            user=request.user,
             action='system_action',
             description=f"Error del sistema: {str(e)}",
             ip_address=get_client_ip(request),
@@ -1262,21 +1288,27 @@ def contacts_view(request):
             # Construir query base
             queryset = Contact.objects.filter(created_by=request.user)
             
-            # Aplicar filtros
-            if search:
-                queryset = queryset.filter(
-                    Q(name__icontains=search) |
-                    Q(company__icontains=search) |
-                    Q(email__icontains=search) |
-                    Q(phone__icontains=search) |
-                    Q(city__icontains=search)
-                )
+            # Aplicar filtros (búsqueda sin acentos sobre search_key, rankeada por calidad de coincidencia)
+            queryset, folded = filter_contacts(queryset, search)
+            rank = ('-match_rank',) if folded else ()
             
             if favorites_only:
                 queryset = queryset.filter(is_favorite=True)
             
+            if wants_cursor(request):
+                # Mismo orden que Contact.Meta, sin NULL en la clave (last_used vacío = fecha de creación)
+                queryset = queryset.annotate(last_used_sort=Coalesce('last_used', 'created_at'))
+                rows, pagination = cursor_paginate(request, queryset, (*rank, *CONTACT_CURSOR_ORDERING), page_size)
+                return Response({
+                    'success': True,
+                    'data': {
+                        'contacts': ContactSerializer(rows, many=True, context={'request': request}).data,
+                        'pagination': pagination
+                    }
+                }, status=status.HTTP_200_OK)
+            
             # Paginación
-            paginator = Paginator(queryset, page_size)
+            paginator = Paginator(queryset.order_by(*rank, *Contact._meta.ordering, '-id'), page_size)
             contacts_page = paginator.get_page(page)
             
             # Serializar datos
@@ -1296,6 +1328,12 @@ def contacts_view(request):
                 }
             }, status=status.HTTP_200_OK)
             
+        except CursorError as e:
+            return Response({
+                'success': False,
+                'message': 'Ha ocurrido un error',
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error obteniendo contactos: {str(e)}")
             return Response({
@@ -1311,9 +1349,9 @@ def contacts_view(request):
                 contact = serializer.save(created_by=request.user)
                 
                 # Registrar actividad
-                UserActivity.create_activity(
+                UserActivity.log_activity(
                     user=request.user,
-                    action='CREATE_CONTACT',
+                    action='create_contact',
                     description=f'Contacto creado: {contact.name}',
                     resource_type='contact',
                     resource_id=str(contact.id)
@@ -1340,6 +1378,49 @@ def contacts_view(request):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def contact_autocomplete_view(request):
+    """
+    Autocompletado de contactos (pensado para llamarse en cada tecla).
+
+    Rankea sin acentos por calidad de coincidencia (nombre, empresa, email,
+    teléfono, ciudad), favorito, uso y recencia sobre la lista de candidatos
+    del usuario cacheada; solo consulta la BD para cargar los ganadores.
+
+    Query parameters:
+        - q: Término de búsqueda (vacío = más relevantes por favorito/uso/recencia)
+        - limit: Máximo de resultados (por defecto: 10, máximo: 50)
+        - favorites: 'true' para limitar a favoritos
+    """
+    try:
+        query = request.GET.get('q', '').strip()
+        favorites_only = request.GET.get('favorites', '').lower() == 'true'
+        try:
+            limit = min(max(1, int(request.GET.get('limit', 10))), 50)
+        except (TypeError, ValueError):
+            limit = 10
+
+        result = autocomplete_contacts(request.user, query, limit=limit, favorites_only=favorites_only)
+
+        return Response({
+            'success': True,
+            'data': {
+                'contacts': [{**contact.to_dict(), 'score': score} for contact, score in result['results']],
+                'query': result['folded_query'],
+                'search_backend': result['backend'],
+            }
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Error en autocompletado de contactos: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Ha ocurrido un error',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def contact_detail_view(request, contact_id):
@@ -1381,9 +1462,9 @@ def contact_detail_view(request, contact_id):
                 updated_contact = serializer.save()
                 
                 # Registrar actividad
-                UserActivity.create_activity(
+                UserActivity.log_activity(
                     user=request.user,
-                    action='UPDATE_CONTACT',
+                    action='update_contact',
                     description=f'Contacto actualizado: {updated_contact.name}',
                     resource_type='contact',
                     resource_id=str(contact_id)
@@ -1415,9 +1496,9 @@ def contact_detail_view(request, contact_id):
             contact.delete()
             
             # Registrar actividad
-            UserActivity.create_activity(
+            UserActivity.log_activity(
                 user=request.user,
-                action='DELETE_CONTACT',
+                action='delete_contact',
                 description=f'Contacto eliminado: {contact_name}',
                 resource_type='contact',
                 resource_id=str(contact_id)
@@ -1449,8 +1530,8 @@ def contact_toggle_favorite_view(request, contact_id):
         contact.save(update_fields=['is_favorite'])
         
         # Registrar actividad
-        action = 'ADD_FAVORITE' if contact.is_favorite else 'REMOVE_FAVORITE'
-        UserActivity.create_activity(
+        action = 'add_favorite' if contact.is_favorite else 'remove_favorite'
+        UserActivity.log_activity(
             user=request.user,
             action=action,
             description=f'Contacto {"agregado a" if contact.is_favorite else "removido de"} favoritos: {contact.name}',
@@ -1565,9 +1646,9 @@ def create_contact_from_shipment_view(request):
         
         # Registrar actividad si se crearon contactos
         if created_contacts:
-            UserActivity.create_activity(
+            UserActivity.log_activity(
                 user=request.user,
-                action='AUTO_CREATE_CONTACTS',
+                action='auto_create_contacts',
                 description=f'Contactos creados automáticamente desde envío: {len(created_contacts)} contactos',
                 resource_type='contact'
             )
@@ -1590,13 +1671,131 @@ def create_contact_from_shipment_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def contacts_import_view(request):
+    """
+    Importación masiva de contactos (CSV, JSON o JSON Lines).
+
+    Recibe un archivo en ``file`` (multipart) o una lista JSON en el cuerpo.
+    Normaliza, valida y deduplica contra la agenda por email o dirección
+    normalizada, escribe por lotes y devuelve un reporte por fila.
+
+    Parámetros (query o formulario):
+        - file_format: csv | json | jsonl (por defecto según la extensión del archivo)
+        - on_duplicate: update (por defecto) | skip
+        - dry_run: 'true' para validar y reportar sin escribir
+    """
+    try:
+        params = {**request.query_params.dict(), **(request.data.dict() if hasattr(request.data, 'dict') else {})}
+        on_duplicate = (params.get('on_duplicate') or contact_io.UPDATE).lower()
+        dry_run = str(params.get('dry_run', '')).lower() == 'true'
+
+        uploaded = request.FILES.get('file')
+        if uploaded is not None:
+            fmt = contact_io.detect_format(uploaded.name, uploaded.content_type, params.get('file_format'))
+            records = contact_io.iter_records(contact_io.text_stream(uploaded.file), fmt)
+        elif isinstance(request.data, list):
+            records = request.data
+        elif isinstance(request.data, dict) and isinstance(request.data.get('contacts'), list):
+            records = request.data['contacts']
+        else:
+            return Response({
+                'success': False,
+                'message': 'Envíe un archivo en "file" o una lista de contactos en el cuerpo',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        result = contact_io.import_contacts(request.user, records, on_duplicate=on_duplicate, dry_run=dry_run)
+        summary = result['summary']
+
+        if not dry_run:
+            UserActivity.log_activity(
+                user=request.user,
+                action='import_contacts',
+                description=f"Importación de contactos: {summary.get('created', 0)} creados, "
+                            f"{summary.get('updated', 0)} actualizados, {summary.get('error', 0)} con error",
+                resource_type='contact',
+                metadata={'summary': summary}
+            )
+
+        return Response({
+            'success': True,
+            'message': f"{'Validación' if dry_run else 'Importación'} completada: {summary['total']} registros",
+            'data': {**result, 'dry_run': dry_run}
+        }, status=status.HTTP_200_OK)
+
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': 'Ha ocurrido un error',
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error importando contactos: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Ha ocurrido un error',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def contacts_export_view(request):
+    """
+    Exportación en streaming de la agenda del usuario.
+
+    Query parameters:
+        - export: csv (por defecto) | json | jsonl
+        - favorites: 'true' para exportar solo favoritos
+        - search: mismo filtro que el listado de contactos
+    """
+    try:
+        fmt = request.GET.get('export', contact_io.CSV).lower()
+        if fmt not in contact_io.FORMATS:
+            return Response({
+                'success': False,
+                'message': f"Formato inválido: use {', '.join(contact_io.FORMATS)}",
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Contact.objects.filter(created_by=request.user)
+        queryset, _ = filter_contacts(queryset, request.GET.get('search', '').strip())
+        if request.GET.get('favorites', '').lower() == 'true':
+            queryset = queryset.filter(is_favorite=True)
+
+        UserActivity.log_activity(
+            user=request.user,
+            action='export_contacts',
+            description=f'Exportación de contactos ({fmt})',
+            resource_type='contact'
+        )
+
+        response = StreamingHttpResponse(
+            contact_io.export_contacts(queryset.order_by('id'), fmt),
+            content_type=contact_io.CONTENT_TYPES[fmt]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="contactos_{timezone.now():%Y%m%d}.{fmt}"'
+        )
+        return response
+
+    except Exception as e:
+        logger.error(f"Error exportando contactos: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Ha ocurrido un error',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # =================================
 # VISTAS PARA ZONAS DE SERVICIO (ESD)
 # =================================
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-@cache_page(60 * 15)  # Cache por 15 minutos
+@reference_conditional('countries')
+@reference_cache_page(60 * 60, 'countries')  # 1 hora; se invalida al recargar datos
 def get_countries(request):
     """
     Obtiene lista de países disponibles para envío DHL.
@@ -1605,58 +1804,20 @@ def get_countries(request):
         - Lista de países con código y nombre
     """
     try:
-        from .models import ServiceZone, ServiceAreaCityMap, CountryISO
-        from .utils.country_utils import get_country_name_from_iso
-        from .serializers import CountrySerializer
-
-        # Fuente primaria: ServiceAreaCityMap (países con mapeo disponible)
-        map_country_codes = list(
-            ServiceAreaCityMap.objects
-            .values_list('country_code', flat=True)
-            .distinct()
-            .order_by('country_code')
-        )
+        from .serializers import FAST_COUNTRIES
 
-        countries_list = []
-        if map_country_codes:
-            # Resolver country_name desde ServiceZone como referencia
-            for cc in map_country_codes:
-                # Priorizar CountryISO DB; luego ServiceZone; luego util local
-                name = CountryISO.resolve_name(
-                    cc,
-                    fallback=(
-                        ServiceZone.objects
-                        .filter(country_code=cc)
-                        .exclude(country_name__isnull=True)
-                        .exclude(country_name='')
-                        .values_list('country_name', flat=True)
-                        .first() or ''
-                    ) or get_country_name_from_iso(cc)
-                )
-                countries_list.append({'country_code': cc, 'country_name': name})
-        else:
-            # Fallback: usar ServiceZone
-            countries_list = ServiceZone.get_countries()
-            # Normalizar nombres si vinieran vacíos
-            if countries_list:
-                norm = []
-                for c in countries_list:
-                    code = (c.get('country_code') or '').upper()
-                    # Resolver desde CountryISO con fallback a util
-                    name = CountryISO.resolve_name(code, fallback=c.get('country_name') or '')
-                    if not name:
-                        name = get_country_name_from_iso(code)
-                    norm.append({'country_code': code, 'country_name': name})
-                countries_list = norm
-
-        serializer = CountrySerializer(countries_list, many=True)
+        # Snapshot mapeado en memoria si está al día con el dataset; si no, BD
+        snapshot = get_reference_snapshot()
+        countries_list, source = snapshot.countries() if snapshot else db_country_list()
 
-        return Response({
+        data = FAST_COUNTRIES.serialize(countries_list)
+
+        return json_response({
             'success': True,
             'message': 'Países obtenidos exitosamente',
-            'data': serializer.data,
-            'count': len(serializer.data),
-            'source': 'ServiceAreaCityMap' if map_country_codes else 'ServiceZone'
+            'data': data,
+            'count': len(data),
+            'source': source
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -1670,7 +1831,8 @@ def get_countries(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-@cache_page(60 * 15)  # Cache por 15 minutos
+@reference_conditional('states')
+@reference_cache_page(60 * 60, 'states')  # 1 hora; se invalida al recargar datos
 def get_states_by_country(request, country_code):
     """
     Obtiene lista de estados/provincias por país.
@@ -1682,31 +1844,19 @@ def get_states_by_country(request, country_code):
         - Lista de estados/provincias del país especificado
     """
     try:
-        from .models import ServiceAreaCityMap
-        from .serializers import StateSerializer
-
-        cc = country_code.upper()
-
-        # Usar únicamente ServiceAreaCityMap como fuente de verdad
-        map_state_codes = list(
-            ServiceAreaCityMap.objects
-            .filter(country_code=cc)
-            .exclude(state_code__isnull=True)
-            .exclude(state_code='')
-            .values_list('state_code', flat=True)
-            .distinct()
-            .order_by('state_code')
-        )
+        from .serializers import FAST_STATES
+        from .utils.reference_lists import state_list
 
-        states = [{'state_code': sc, 'state_name': sc} for sc in map_state_codes]
+        # Usar únicamente ServiceAreaCityMap como fuente de verdad (vía snapshot si está al día)
+        states = state_list(country_code.upper(), get_reference_snapshot())
 
-        serializer = StateSerializer(states, many=True)
+        data = FAST_STATES.serialize(states)
         
-        return Response({
+        return json_response({
             'success': True,
             'message': f'Estados de {country_code} obtenidos exitosamente',
-            'data': serializer.data,
-            'count': len(serializer.data),
+            'data': data,
+            'count': len(data),
             'country_code': country_code.upper(),
             'source': 'ServiceAreaCityMap'
         }, status=status.HTTP_200_OK)
@@ -1722,7 +1872,8 @@ def get_states_by_country(request, country_code):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-@cache_page(60 * 5, key_prefix='cities_v2')  # Cache por 5 minutos (v2 para invalidar caché vieja)
+@reference_conditional('cities')
+@reference_cache_page(60 * 60, 'cities')  # 1 hora; se invalida al recargar datos
 def get_cities_by_country_state(request, country_code, state_code=None):
     """
     Obtiene lista de ciudades por país y opcionalmente por estado.
@@ -1736,8 +1887,7 @@ def get_cities_by_country_state(request, country_code, state_code=None):
         - Lista de ciudades/áreas de servicio del país/estado especificado
     """
     try:
-        from .models import ServiceAreaCityMap, ServiceZone
-        from .serializers import CitySerializer
+        from .utils.reference_lists import city_list
 
         prefer = (request.GET.get('prefer') or '').strip().lower()
         allowed = {'', 'city_name', 'service_area', 'map'}
@@ -1746,59 +1896,10 @@ def get_cities_by_country_state(request, country_code, state_code=None):
 
         cc = country_code.upper()
         sc = state_code.upper() if state_code else None
-
-        # Fuente única: ServiceAreaCityMap
-        qs_map = ServiceAreaCityMap.objects.filter(country_code=cc)
-        # Para CA, no filtramos por estado para asegurar lista completa
-        if sc and cc != 'CA':
-            qs_map = qs_map.filter(state_code=sc)
-
-        # Optimizar: devolver ciudades únicas por city_name para evitar explosión por cada rango postal
         q = (request.GET.get('q') or '').strip()
-        if q:
-            qs_map = qs_map.filter(city_name__icontains=q)
-
-        city_list = (
-            qs_map
-            .exclude(city_name='')
-            .values_list('city_name', flat=True)
-            .distinct()
-            .order_by('city_name')
-        )
-        cities = [
-            {'name': c, 'code': c, 'display_name': c, 'type': 'map_city'}
-            for c in city_list
-        ]
 
-        # Fallback/append: incluir ciudades desde ServiceZone (ESD) que no estén en el mapa
-        try:
-            esd_items = ServiceZone.get_cities_smart(cc, sc)
-            # Aplicar filtro de búsqueda si corresponde
-            if q:
-                q_low = q.lower()
-                esd_items = [it for it in esd_items if (it.get('display_name') or '').lower().find(q_low) >= 0]
-
-            existing = set((ci.get('display_name') or '').strip().lower() for ci in cities)
-            appended = 0
-            for it in esd_items:
-                disp = (it.get('display_name') or '').strip()
-                if not disp:
-                    continue
-                key = disp.lower()
-                if key in existing:
-                    continue
-                # Normalizar estructura al mismo formato
-                cities.append({
-                    'name': it.get('code') or disp,
-                    'code': it.get('code') or disp,
-                    'display_name': disp,
-                    'type': f"esd_{it.get('type') or 'city'}"
-                })
-                existing.add(key)
-                appended += 1
-        except Exception as _e:
-            # No bloquear si ESD falla
-            appended = 0
+        # Mapa (para CA sin filtrar por estado) + ciudades del ESD que no estén en el mapa
+        cities, appended = city_list(cc, sc, q, get_reference_snapshot())
 
         location = f'{country_code}'
         if state_code:
@@ -1824,9 +1925,9 @@ def get_cities_by_country_state(request, country_code, state_code=None):
             },
             'merge': {
                 'source': 'map+esd',
-                'appended_from_esd': appended if 'appended' in locals() else 0
+                'appended_from_esd': appended
             },
-            'cache_version': 'cities_v2'
+            'cache_version': get_dataset_version()
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -1840,7 +1941,8 @@ def get_cities_by_country_state(request, country_code, state_code=None):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-@cache_page(60 * 15)  # Cache por 15 minutos
+@reference_conditional('service_areas')
+@reference_cache_page(60 * 60, 'service_areas')  # 1 hora; se invalida al recargar datos
 def get_service_areas_by_location(request, country_code):
     """
     Obtiene áreas de servicio por ubicación.
@@ -1857,7 +1959,7 @@ def get_service_areas_by_location(request, country_code):
     """
     try:
         from .models import ServiceAreaCityMap
-        from .serializers import ServiceAreaSerializer, PostalCodeSerializer
+        from .serializers import FAST_POSTAL_CODES
         from django.db.models import Q, Count
 
         state_code = request.GET.get('state_code')
@@ -1871,8 +1973,11 @@ def get_service_areas_by_location(request, country_code):
         if state_code and country_code != 'CA':
             qs = qs.filter(state_code=state_code.upper())
 
+        # Área de servicio canónica de la ciudad (búsqueda por clave en el dict del proceso)
+        city_correct_area = get_city_service_area_mapping(country_code, city_name, state_code) if city_name else None
+
         if city_name:
-            correct_service_area = get_city_service_area_mapping(country_code, city_name)
+            correct_service_area = city_correct_area
             if correct_service_area:
                 qs = qs.filter(
                     Q(city_name__iexact=city_name) | Q(display_name__icontains=city_name),
@@ -1899,8 +2004,7 @@ def get_service_areas_by_location(request, country_code):
         # Fallback/append: complementar con rangos desde ServiceZone (ESD)
         try:
             if city_name and not service_area:
-                correct_service_area = get_city_service_area_mapping(country_code, city_name)
-                esd_qs = ServiceZone.get_postal_codes_by_location(country_code, state_code, city_name, correct_service_area)
+                esd_qs = ServiceZone.get_postal_codes_by_location(country_code, state_code, city_name, city_correct_area)
             else:
                 esd_qs = ServiceZone.get_postal_codes_by_location(country_code, state_code, city_name, service_area)
             esd_list = list(esd_qs)
@@ -1910,7 +2014,6 @@ def get_service_areas_by_location(request, country_code):
         # Unificar y deduplicar por (from,to,service_area)
         seen = set()
         unified = []
-        city_correct_area = get_city_service_area_mapping(country_code, city_name) if city_name else None
         for item in data_all + esd_list:
             f = (item.get('postal_code_from') or '').strip()
             t = (item.get('postal_code_to') or '').strip()
@@ -1934,15 +2037,14 @@ def get_service_areas_by_location(request, country_code):
         start = (page - 1) * page_size
         end = start + page_size
         data = unified[start:end]
-        serializer = PostalCodeSerializer(data, many=True)
+        postal_codes = FAST_POSTAL_CODES.serialize(data)
 
         # Debug info opcional
         debug_info = {}
         if request.GET.get('debug') == '1' and city_name:
-            correct_area = get_city_service_area_mapping(country_code, city_name)
             debug_info = {
-                'detected_service_area': correct_area,
-                'filter_applied': bool(correct_area),
+                'detected_service_area': city_correct_area,
+                'filter_applied': bool(city_correct_area),
                 'total_before_filter': len(data_all + esd_list),
                 'total_after_filter': len(unified)
             }
@@ -1954,7 +2056,7 @@ def get_service_areas_by_location(request, country_code):
         response_data = {
             'success': True,
             'message': 'Códigos postales obtenidos exitosamente',
-            'data': serializer.data,
+            'data': postal_codes,
             'count': total_limited,
             'page': page,
             'page_size': page_size,
@@ -1970,7 +2072,7 @@ def get_service_areas_by_location(request, country_code):
         if debug_info:
             response_data['debug'] = debug_info
 
-        return Response(response_data, status=status.HTTP_200_OK)
+        return json_response(response_data, status=status.HTTP_200_OK)
 
     except ValueError as e:
         logger.error(f"Error de parámetros obteniendo códigos postales: {str(e)}")
@@ -1991,23 +2093,28 @@ def get_service_areas_by_location(request, country_code):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([ServiceZoneThrottle])
-@cache_page(60 * 15)  # Cache por 15 minutos - búsquedas frecuentes
+@reference_cache_page(60 * 15, 'zone_search')  # Cache por 15 minutos - búsquedas frecuentes
 def search_service_zones(request):
     """
     Búsqueda avanzada de zonas de servicio.
     
+    Usa la columna plegada ``search_text`` (sin acentos) con ranking por
+    relevancia; en PostgreSQL se apoya en un índice GIN trigram. El total es
+    exacto hasta 1000 filas y estimado por encima (``total_is_estimate``).
+    
     Query parameters:
-        - q: Término de búsqueda (nombre de país, estado, ciudad)
+        - q: Término de búsqueda (nombre de país, estado, ciudad, área de servicio)
         - country_code: Filtrar por código de país
         - page: Número de página (por defecto: 1)
+        - cursor: Paginación por cursor en lugar de ``page`` (vacío = primera página)
         - page_size: Tamaño de página (por defecto: 50, máximo: 200)
     
     Returns:
         - Lista paginada de zonas de servicio que coincidan con los criterios
     """
     try:
-        from .models import ServiceZone
-        from .serializers import ServiceZoneSerializer
+        from .serializers import FAST_SERVICE_ZONES
+        from .utils.zone_search import search_zones
         
         # Parámetros de búsqueda
         query = request.GET.get('q', '').strip()
@@ -2015,46 +2122,19 @@ def search_service_zones(request):
         page = int(request.GET.get('page', 1))
         page_size = min(int(request.GET.get('page_size', 50)), 200)
         
-        # Construir queryset
-        queryset = ServiceZone.objects.all()
-        
-        # Filtrar por país si se especifica
-        if country_code:
-            queryset = queryset.filter(country_code=country_code.upper())
+        cursor = (request.GET.get('cursor') or '') if wants_cursor(request) else None
+        result = search_zones(query=query, country_code=country_code, page=page, page_size=page_size, cursor=cursor)
         
-        # Búsqueda por texto
-        if query:
-            queryset = queryset.filter(
-                Q(country_name__icontains=query) |
-                Q(state_name__icontains=query) |
-                Q(city_name__icontains=query) |
-                Q(service_area__icontains=query)
-            )
-        
-        # Ordenar y paginar
-        queryset = queryset.order_by('country_name', 'state_name', 'city_name')
-        paginator = Paginator(queryset, page_size)
-        page_obj = paginator.get_page(page)
-        
-        # Serializar datos
-        serializer = ServiceZoneSerializer(page_obj.object_list, many=True)
-        
-        return Response({
+        return json_response({
             'success': True,
             'message': 'Búsqueda completada exitosamente',
-            'data': serializer.data,
-            'pagination': {
-                'page': page,
-                'page_size': page_size,
-                'total_pages': paginator.num_pages,
-                'total_count': paginator.count,
-                'has_next': page_obj.has_next(),
-                'has_previous': page_obj.has_previous()
-            },
+            'data': FAST_SERVICE_ZONES.serialize(result['results']),
+            'pagination': result['pagination'],
             'filters': {
                 'query': query,
                 'country_code': country_code.upper() if country_code else None
-            }
+            },
+            'search_backend': result['backend']
         }, status=status.HTTP_200_OK)
         
     except ValueError as e:
@@ -2076,17 +2156,19 @@ def search_service_zones(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @throttle_classes([ServiceZoneAnonThrottle])
-@cache_page(60 * 30, key_prefix='analyze_v2')  # Cache por 30 minutos - v2 para invalidar caché previa
+@reference_conditional('analyze')
+@reference_cache_page(60 * 60, 'analyze')  # 1 hora; se invalida al recargar datos
 def analyze_country_structure(request, country_code):
     """
     Analiza la estructura de datos disponible para un país específico
     Retorna información sobre qué campos están disponibles
     """
     try:
-        country_code = country_code.upper()
+        from .utils.reference_lists import country_structure
 
-        base_zones = ServiceZone.objects.filter(country_code=country_code)
-        if not base_zones.exists():
+        country_code = country_code.upper()
+        structure = country_structure(country_code)
+        if structure is None:
             return Response({
                 'success': False,
                 'message': f'No se encontraron zonas de servicio para el país {country_code}',
@@ -2097,93 +2179,48 @@ def analyze_country_structure(request, country_code):
                 'pattern': 'NO_DATA'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        total_records = base_zones.count()
-        states_count = base_zones.exclude(Q(state_code__isnull=True) | Q(state_code='')).count()
-        cities_count = base_zones.exclude(Q(city_name__isnull=True) | Q(city_name='')).count()
-        service_area_count = base_zones.exclude(Q(service_area__isnull=True) | Q(service_area='')).count()
-        postal_codes_count = base_zones.exclude(Q(postal_code_from__isnull=True) | Q(postal_code_from='')).count()
-
-        has_states = (states_count / total_records) > 0.1
-        has_cities = (cities_count / total_records) > 0.1
-        has_service_areas = (service_area_count / total_records) > 0.1
-        has_postal_codes = (postal_codes_count / total_records) > 0.1
+        return Response({'success': True, **structure})
+    except Exception as e:
+        logger.error(f"Error analizando estructura del país {country_code}: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Ha ocurrido un error',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Complementar con ServiceAreaCityMap para detectar ciudades aunque ServiceZone no las tenga pobladas
-        try:
-            from .models import ServiceAreaCityMap
-            map_city_exists = ServiceAreaCityMap.objects.filter(
-                country_code=country_code.upper()
-            ).exclude(city_name='').exists()
-            if map_city_exists:
-                has_cities = True
-        except Exception:
-            pass
 
-        effective_cities = has_cities or has_service_areas
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@reference_conditional('bundles')
+def reference_bundles_manifest(request):
+    """
+    Manifiesto de los bundles estáticos de referencia por país.
 
-        if has_postal_codes and not effective_cities:
-            pattern = 'POSTAL_CODES'
-        elif effective_cities and not has_postal_codes:
-            pattern = 'CITY'
-        elif effective_cities and has_postal_codes:
-            pattern = 'MIXED'
-        elif has_states:
-            pattern = 'STATES'
-        else:
-            pattern = 'BASIC'
+    Retorna la URL (con hash de contenido) del bundle de países y del de cada
+    país; el cliente los descarga como estáticos (nginx/whitenoise, caché
+    immutable). 404 si no hay bundles para la versión vigente del dataset:
+    en ese caso se usan los endpoints de service-zones.
+    """
+    try:
+        from .utils.reference_bundles import current_manifest, manifest_payload
 
-        # Recomendación de campo de ciudad
-        # Siempre preferir city_name cuando esté disponible para evitar mostrar códigos (YMG, YHM) al usuario
-        # Excepción: solo cuando NO haya city_name disponible, caer a service_area
-        if has_cities:
-            recommended_city_field = 'city_name'
-        else:
-            recommended_city_field = 'service_area' if has_service_areas else 'city_name'
-
-        examples = []
-        for zone in base_zones[:3]:
-            examples.append({
-                'country': zone.country_name,
-                'state': zone.state_code or zone.state_name,
-                'city': zone.city_name,
-                'service_area': zone.service_area,
-                'postal_range': f"{zone.postal_code_from}-{zone.postal_code_to}" if zone.postal_code_from else None
-            })
+        manifest = current_manifest()
+        if manifest is None:
+            return Response({
+                'success': False,
+                'message': 'No hay bundles de referencia para la versión actual de los datos',
+                'version': get_dataset_version()
+            }, status=status.HTTP_404_NOT_FOUND)
 
-        return Response({
+        data = manifest_payload(manifest)
+        return json_response({
             'success': True,
-            'country_code': country_code,
-            'country_name': base_zones.first().country_name,
-            'hasStates': has_states,
-            'hasCities': effective_cities,
-            'hasPostalCodes': has_postal_codes,
-            'pattern': pattern,
-            'statistics': {
-                'total_records': total_records,
-                'states_percentage': round((states_count / total_records) * 100, 1),
-                'cities_percentage': round((cities_count / total_records) * 100, 1),
-                'service_areas_percentage': round((service_area_count / total_records) * 100, 1),
-                'postal_codes_percentage': round((postal_codes_count / total_records) * 100, 1)
-            },
-            'examples': examples,
-            'data_structure': {
-                'city_name_available': has_cities,
-                'service_area_available': has_service_areas,
-                'recommended_city_field': recommended_city_field
-            },
-            'recommendations': {
-                'priority_fields': [
-                    'country',
-                    'state' if has_states else '',
-                    'city' if effective_cities else '',
-                    'postal_code' if has_postal_codes else ''
-                ],
-                'search_strategy': 'postal_code' if pattern == 'POSTAL_CODES' else 'city' if pattern == 'CITY' else 'mixed',
-                'city_field_to_use': recommended_city_field
-            }
-        })
+            'data': data,
+            'count': len(data['bundles'])
+        }, status=status.HTTP_200_OK)
+
     except Exception as e:
-        logger.error(f"Error analizando estructura del país {country_code}: {str(e)}")
+        logger.error(f"Error obteniendo manifiesto de bundles de referencia: {str(e)}")
         return Response({
             'success': False,
             'message': 'Ha ocurrido un error',
@@ -2193,7 +2230,7 @@ def analyze_country_structure(request, country_code):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-@cache_page(60 * 10)
+@reference_cache_page(60 * 10, 'resolve_display')
 def resolve_service_area_display(request):
     """Resuelve nombre amigable para un service_area dado.
 
@@ -2205,75 +2242,33 @@ def resolve_service_area_display(request):
       - fallback_city (opcional)
     """
     try:
-        from django.db.models import Q
-        from .models import ServiceAreaCityMap
-        
-        country_code = (request.GET.get('country_code') or '').upper().strip()
-        service_area = (request.GET.get('service_area') or '').upper().strip()
-        postal_code = request.GET.get('postal_code')
-        state_code = request.GET.get('state_code')
-        fallback_city = request.GET.get('fallback_city')
+        from .utils.service_area_display import normalize_item, resolve_service_area_displays
 
-        if not country_code or not service_area:
+        item = normalize_item(request.GET)
+        if not item['country_code'] or not item['service_area']:
             return Response({
                 'success': False,
                 'message': 'country_code y service_area son requeridos'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 1. Intentar resolver directamente el nombre del área de servicio
-        direct_match = ServiceAreaCityMap.objects.filter(
-            country_code=country_code,
-            service_area=service_area
-        ).first()
-
-        if direct_match:
+        result = resolve_service_area_displays([item])[0]
+        if result['success']:
             return Response({
                 'success': True,
-                'service_area': direct_match.service_area,
-                'display_name': direct_match.display_name or direct_match.service_area,
-                'type': 'direct'
+                'service_area': result['service_area'],
+                'display_name': result['display_name'],
+                'type': result['type']
             }, status=status.HTTP_200_OK)
 
-        # 2. Si no hay coincidencia directa, intentar con city_name como fallback
-        if fallback_city:
-            city_fallback = ServiceAreaCityMap.objects.filter(
-                country_code=country_code,
-                city_name__iexact=fallback_city
-            ).first()
-
-            if city_fallback:
-                return Response({
-                    'success': True,
-                    'service_area': city_fallback.service_area,
-                    'display_name': city_fallback.display_name or city_fallback.service_area,
-                    'type': 'fallback_city'
-                }, status=status.HTTP_200_OK)
-
-        # 3. Si aún no hay coincidencia, buscar por patrones en postal_code
-        if postal_code:
-            postal_fallback = ServiceAreaCityMap.objects.filter(
-                country_code=country_code,
-                postal_code_from__lte=postal_code,
-                postal_code_to__gte=postal_code
-            ).first()
-
-            if postal_fallback:
-                return Response({
-                    'success': True,
-                    'service_area': postal_fallback.service_area,
-                    'display_name': postal_fallback.display_name or postal_fallback.service_area,
-                    'type': 'fallback_postal'
-                }, status=status.HTTP_200_OK)
-
-        # 4. Si no se encuentra nada, devolver error amigable
+        # Si no se encuentra nada, devolver error amigable
         return Response({
             'success': False,
-            'message': f'No se pudo determinar el área de servicio para {service_area}',
-            'country_code': country_code,
-            'service_area': service_area,
-            'postal_code': postal_code,
-            'state_code': state_code,
-            'fallback_city': fallback_city
+            'message': f"No se pudo determinar el área de servicio para {item['service_area']}",
+            'country_code': item['country_code'],
+            'service_area': item['service_area'],
+            'postal_code': request.GET.get('postal_code'),
+            'state_code': request.GET.get('state_code'),
+            'fallback_city': request.GET.get('fallback_city')
         }, status=status.HTTP_404_NOT_FOUND)
     
     except Exception as e:
@@ -2285,6 +2280,57 @@ def resolve_service_area_display(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def resolve_service_area_display_bulk(request):
+    """Resuelve nombres amigables para muchas áreas de servicio en una sola petición.
+
+    Body JSON:
+      {"items": [{"country_code", "service_area", "postal_code"?, "state_code"?, "fallback_city"?}, ...]}
+
+    Retorna un resultado por entrada, en el mismo orden, con la misma semántica
+    que ``resolve-display`` (type: direct, fallback_city, fallback_postal,
+    not_found o invalid).
+    """
+    try:
+        from .utils.service_area_display import MAX_BULK_ITEMS, resolve_service_area_displays
+
+        items = request.data.get('items') if isinstance(request.data, dict) else None
+        if not isinstance(items, list):
+            return Response({
+                'success': False,
+                'message': 'Se requiere una lista "items"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(items) > MAX_BULK_ITEMS:
+            return Response({
+                'success': False,
+                'message': f'Máximo {MAX_BULK_ITEMS} entradas por petición'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not all(isinstance(it, dict) for it in items):
+            return Response({
+                'success': False,
+                'message': 'Cada entrada debe ser un objeto'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = resolve_service_area_displays(items)
+        return Response({
+            'success': True,
+            'data': results,
+            'count': len(results),
+            'resolved': sum(1 for r in results if r['success'])
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Error resolviendo display de service_area (bulk): {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Ha ocurrido un error',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def map_stats_by_country(request, country_code):
@@ -2293,19 +2339,14 @@ def map_stats_by_country(request, country_code):
     Útil para comprobar que el API apunta a la BD con el dataset completo.
     """
     try:
-        from .models import ServiceAreaCityMap
-
         cc = (country_code or '').upper()
-        qs = ServiceAreaCityMap.objects.filter(country_code=cc)
-        total_rows = qs.count()
-        distinct_cities = qs.exclude(city_name='').values_list('city_name', flat=True).distinct().count()
-        distinct_service_areas = qs.exclude(service_area='').values_list('service_area', flat=True).distinct().count()
-
-        sample = list(
-            qs.exclude(city_name='')
-              .values_list('city_name', flat=True)
-              .distinct()[:10]
-        )
+        # Reporte de cobertura compartido (un recorrido, cacheado por versión del dataset)
+        report = get_coverage(COVERAGE_MAP, cc, top=10)
+        country = report['countries'][0] if report['countries'] else {}
+        total_rows = country.get('rows', 0)
+        distinct_cities = country.get('cities', 0)
+        distinct_service_areas = country.get('service_areas', 0)
+        sample = [item['name'] for item in country.get('top', [])] if country.get('mode') == 'city_name' else []
 
         db_conf = settings.DATABASES.get('default', {})
         db_info = {
@@ -2331,6 +2372,71 @@ def map_stats_by_country(request, country_code):
         return Response({'success': False, 'message': 'Error', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+# Cada fallo de caché (p. ej. tras una recarga) recorre las tablas completas; por usuario o por IP si es anónimo
+@throttle_classes([ServiceZoneThrottle])
+@reference_conditional('coverage')
+def reference_coverage_view(request):
+    """
+    Diagnóstico: cobertura de los datos de referencia por país y estado.
+
+    Query parameters:
+        - dataset: esd (ServiceZone, por defecto) o map (ServiceAreaCityMap)
+        - country: código de país ISO (opcional)
+        - top: ciudades/áreas con más rangos por país (por defecto 15, máximo 100)
+        - export: json (por defecto) o csv
+    """
+    try:
+        dataset = (request.GET.get('dataset') or 'esd').lower()
+        export = (request.GET.get('export') or 'json').lower()
+        if dataset not in COVERAGE_DATASETS or export not in ('json', 'csv'):
+            return Response({
+                'success': False,
+                'message': f"Parámetros inválidos: dataset debe ser {' o '.join(COVERAGE_DATASETS)} y export json o csv",
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            top = min(max(1, int(request.GET.get('top', 15))), 100)
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': 'Parámetro inválido: top debe ser un número entero',
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        report = get_coverage(dataset, request.GET.get('country') or None, top=top)
+        if export == 'csv':
+            response = HttpResponse(render_coverage([report], 'csv'), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="coverage_{dataset}_v{report["version"]}.csv"'
+            return response
+
+        return Response({
+            'success': True,
+            'message': 'Cobertura obtenida exitosamente',
+            'data': report,
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error en reference_coverage_view: {e}")
+        return Response({'success': False, 'message': 'Error', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def write_behind_stats_view(request):
+    """
+    Diagnóstico: estado de los buffers de escritura diferida de este worker
+    (profundidad de la cola, escritos, volcados a disco, reintentados y descartados).
+    """
+    try:
+        return Response({
+            'success': True,
+            'message': 'Estado de escritura diferida',
+            'data': write_behind_stats(),
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error en write_behind_stats_view: {e}")
+        return Response({'success': False, 'message': 'Error', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def test_city_service_area_mapping(request, country_code, city_name):
@@ -2593,24 +2699,30 @@ def shipment_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def shipments_list_view(request):
-    """Vista para listar envíos"""
+    """Vista para listar envíos (``?page=`` o ``?cursor=``, ver utils/pagination.py)"""
     try:
         page = request.GET.get('page', 1)
-        page_size = request.GET.get('page_size', 20)
+        page_size = page_size_param(request)
         
-        shipments = Shipment.objects.filter(user=request.user).order_by('-created_at')
-        paginator = Paginator(shipments, page_size)
+        shipments = Shipment.objects.filter(created_by=request.user)
+        if wants_cursor(request):
+            rows, pagination = cursor_paginate(request, shipments, HISTORY_ORDERING, page_size)
+            return json_response({
+                'success': True,
+                'data': FAST_SHIPMENTS.serialize(rows),
+                'pagination': pagination
+            }, status=status.HTTP_200_OK)
+        
+        paginator = Paginator(shipments.order_by(*HISTORY_ORDERING), page_size)
         
         try:
             shipments_page = paginator.page(page)
         except:
             shipments_page = paginator.page(1)
         
-        serializer = ShipmentSerializer(shipments_page, many=True)
-        
-        return Response({
+        return json_response({
             'success': True,
-            'data': serializer.data,
+            'data': FAST_SHIPMENTS.serialize(shipments_page),
             'pagination': {
                 'page': shipments_page.number,
                 'total_pages': paginator.num_pages,
@@ -2620,6 +2732,11 @@ def shipments_list_view(request):
             }
         }, status=status.HTTP_200_OK)
         
+    except CursorError as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error en shipments_list_view: {str(e)}")
         return Response({
@@ -2657,24 +2774,30 @@ def shipment_detail_view(request, shipment_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def rates_history_view(request):
-    """Vista para obtener historial de cotizaciones"""
+    """Vista para obtener historial de cotizaciones (``?page=`` o ``?cursor=``)"""
     try:
         page = request.GET.get('page', 1)
-        page_size = request.GET.get('page_size', 20)
+        page_size = page_size_param(request)
+        
+        rates = RateQuote.objects.filter(created_by=request.user)
+        if wants_cursor(request):
+            rows, pagination = cursor_paginate(request, rates, HISTORY_ORDERING, page_size)
+            return json_response({
+                'success': True,
+                'data': FAST_RATE_QUOTES.serialize(rows),
+                'pagination': pagination
+            }, status=status.HTTP_200_OK)
         
-        rates = RateQuote.objects.filter(user=request.user).order_by('-created_at')
-        paginator = Paginator(rates, page_size)
+        paginator = Paginator(rates.order_by(*HISTORY_ORDERING), page_size)
         
         try:
             rates_page = paginator.page(page)
         except:
             rates_page = paginator.page(1)
         
-        serializer = RateQuoteSerializer(rates_page, many=True)
-        
-        return Response({
+        return json_response({
             'success': True,
-            'data': serializer.data,
+            'data': FAST_RATE_QUOTES.serialize(rates_page),
             'pagination': {
                 'page': rates_page.number,
                 'total_pages': paginator.num_pages,
@@ -2684,6 +2807,11 @@ def rates_history_view(request):
             }
         }, status=status.HTTP_200_OK)
         
+    except CursorError as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error en rates_history_view: {str(e)}")
         return Response({
@@ -2856,36 +2984,100 @@ def dhl_account_set_default(request, account_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _activity_bound(value, end=False):
+    """Límite de ``created_at`` desde un parámetro de fecha o fecha/hora (None si viene vacío).
+
+    Con ``end`` el límite es exclusivo; una fecha sin hora cubre el día completo.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day + timedelta(days=1) if end else day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_activities_view(request):
-    """Vista para obtener actividades del usuario"""
+    """
+    Vista para obtener actividades del usuario (``?page=`` o ``?cursor=``)
+    
+    Query parameters:
+        - date_from / date_to: Rango YYYY-MM-DD o YYYY-MM-DDTHH:MM (``date_to`` con solo
+          fecha incluye ese día completo)
+        - days: Sin ``date_from``, días hacia atrás desde ``date_to`` (o desde ahora);
+          por defecto 90, máximo el período de retención
+    
+    La respuesta incluye ``window`` con los límites aplicados; en PostgreSQL solo
+    se leen las particiones de esos meses.
+    """
     try:
         page = request.GET.get('page', 1)
-        page_size = request.GET.get('page_size', 20)
+        page_size = page_size_param(request)
+        try:
+            since = _activity_bound(request.GET.get('date_from'))
+            until = _activity_bound(request.GET.get('date_to'), end=True)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Fechas inválidas (formato YYYY-MM-DD o YYYY-MM-DDTHH:MM)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        days = None
+        if since is None:
+            max_days = (getattr(settings, 'USER_ACTIVITY_RETENTION_MONTHS', 12) + 1) * 31
+            try:
+                days = min(max(1, int(request.GET.get('days', 90))), max_days)
+            except (TypeError, ValueError):
+                days = 90
+            since = (until or timezone.now()) - timezone.timedelta(days=days)
+        
+        activities = UserActivity.objects.filter(
+            user=request.user, created_at__gte=since
+        ).select_related('user')
+        if until is not None:
+            activities = activities.filter(created_at__lt=until)
+        window = {'days': days, 'since': since.isoformat(), 'until': until.isoformat() if until else None}
+        if wants_cursor(request):
+            rows, pagination = cursor_paginate(request, activities, HISTORY_ORDERING, page_size)
+            return json_response({
+                'success': True,
+                'data': FAST_USER_ACTIVITIES.serialize(rows),
+                'pagination': pagination,
+                'window': window
+            }, status=status.HTTP_200_OK)
         
-        activities = UserActivity.objects.filter(user=request.user).order_by('-timestamp')
-        paginator = Paginator(activities, page_size)
+        paginator = Paginator(activities.order_by(*HISTORY_ORDERING), page_size)
         
         try:
             activities_page = paginator.page(page)
         except:
             activities_page = paginator.page(1)
         
-        serializer = UserActivitySerializer(activities_page, many=True)
-        
-        return Response({
+        return json_response({
             'success': True,
-            'data': serializer.data,
+            'data': FAST_USER_ACTIVITIES.serialize(activities_page),
             'pagination': {
                 'page': activities_page.number,
                 'total_pages': paginator.num_pages,
                 'total_items': paginator.count,
                 'has_next': activities_page.has_next(),
                 'has_previous': activities_page.has_previous()
-            }
+            },
+            'window': window
         }, status=status.HTTP_200_OK)
         
+    except CursorError as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error en user_activities_view: {str(e)}")
         return Response({
@@ -2896,31 +3088,74 @@ def user_activities_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def user_activity_stats_view(request):
-    """Vista para obtener estadísticas de actividades del usuario"""
+def user_activity_detail_view(request, activity_id):
+    """Detalle de una actividad con sus payloads (request/response) descomprimidos"""
     try:
-        # Estadísticas básicas
-        total_activities = UserActivity.objects.filter(user=request.user).count()
+        activities = UserActivity.objects.select_related('user')
+        if not request.user.is_staff:
+            activities = activities.filter(user=request.user)
+        activity = activities.filter(id=activity_id).first()
+        if activity is None:
+            return Response({
+                'success': False,
+                'error': 'Actividad no encontrada'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        # Actividades por tipo
-        activities_by_type = UserActivity.objects.filter(user=request.user).values('activity_type').annotate(
-            count=Count('activity_type')
-        ).order_by('-count')
+        data = UserActivitySerializer(activity).data
+        data['metadata'] = load_payloads(activity.metadata)
+        return Response({
+            'success': True,
+            'data': data
+        }, status=status.HTTP_200_OK)
         
-        # Actividades recientes (últimos 7 días)
-        seven_days_ago = timezone.now() - timezone.timedelta(days=7)
-        recent_activities = UserActivity.objects.filter(
-            user=request.user, 
-            timestamp__gte=seven_days_ago
-        ).count()
+    except Exception as e:
+        logger.error(f"Error en user_activity_detail_view: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Error interno del servidor'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_activity_stats_view(request):
+    """
+    Estadísticas de actividades desde los resúmenes diarios (UserActivityDailyRollup).
+    
+    Query parameters:
+        - date_from / date_to: Rango de fechas YYYY-MM-DD (por defecto los últimos ``days`` días)
+        - days: Días hacia atrás desde hoy si no se indica rango (por defecto: 30)
+    
+    Los administradores ven las estadísticas de todos los usuarios.
+    """
+    try:
+        today = timezone.localdate()
+        try:
+            days = max(1, int(request.GET.get('days', 30)))
+            date_to = date.fromisoformat(request.GET['date_to']) if request.GET.get('date_to') else today
+            date_from = (date.fromisoformat(request.GET['date_from']) if request.GET.get('date_from')
+                         else date_to - timedelta(days=days - 1))
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Fechas inválidas (formato YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if date_from > date_to:
+            return Response({
+                'success': False,
+                'error': 'date_from debe ser anterior o igual a date_to'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        stats = rollup_stats(date_from, date_to, user=None if request.user.is_staff else request.user)
+        # Claves anteriores, para clientes existentes
+        stats['total_activities'] = stats['summary']['total_activities']
+        stats['activities_by_type'] = [
+            {'action': action, 'count': count} for action, count in stats['by_action'].items()
+        ]
         
         return Response({
             'success': True,
-            'data': {
-                'total_activities': total_activities,
-                'activities_by_type': list(activities_by_type),
-                'recent_activities': recent_activities
-            }
+            'data': stats
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -3,6 +3,7 @@ Django settings for dhl_project project.
 """
 
 import os
+import re
 from pathlib import Path
 from decouple import config, Csv
 import environ
@@ -134,6 +135,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
+# Archivos con hash de contenido en el nombre (ej. bundles de referencia CA.3f9a1c2b7d4e.json):
+# whitenoise los sirve con Cache-Control immutable y max-age de 10 años
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^%s.+\.[0-9a-f]{12}\.\w+$' % re.escape(STATIC_URL)
 
 # Media files
 MEDIA_URL = '/media/'
@@ -201,12 +205,94 @@ DHL_BASE_URL = config('DHL_BASE_URL', default='https://express.api.dhl.com')
 DHL_ENVIRONMENT = config('DHL_ENVIRONMENT', default='production')
 
 # Cache configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+# Caché compartida entre workers de gunicorn:
+#   - REDIS_URL definido (y paquete redis instalado) -> Redis
+#   - CACHE_BACKEND=db -> tabla en la BD (requiere `manage.py createcachetable`)
+#   - CACHE_BACKEND=file (por defecto) -> archivos en CACHE_DIR, compartida en una sola máquina
+#   - CACHE_BACKEND=locmem -> por proceso (solo desarrollo; los tests usan dhl_project.settings_test)
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'file').lower()
+CACHE_DIR = config('CACHE_DIR', default=str(BASE_DIR / 'cache'))
+# Snapshot binario de datos de referencia (manage.py build_reference_snapshot); los workers lo mapean con mmap
+REFERENCE_SNAPSHOT_PATH = config('REFERENCE_SNAPSHOT_PATH', default=str(Path(CACHE_DIR) / 'reference.snap'))
+# Bundles JSON estáticos por país (manage.py build_reference_bundles); el manifiesto queda fuera del árbol estático
+REFERENCE_BUNDLES_DIR = config('REFERENCE_BUNDLES_DIR', default=os.path.join(STATIC_ROOT, 'reference'))
+REFERENCE_BUNDLES_URL = config('REFERENCE_BUNDLES_URL', default=f'{STATIC_URL}reference/')
+REFERENCE_BUNDLES_MANIFEST = config('REFERENCE_BUNDLES_MANIFEST', default=str(Path(CACHE_DIR) / 'reference-bundles.json'))
+
+# Escritura diferida de cotizaciones (dhl_api/utils/write_behind.py)
+WRITE_BEHIND_ENABLED = config('WRITE_BEHIND_ENABLED', default=True, cast=bool)
+WRITE_BEHIND_FLUSH_SIZE = config('WRITE_BEHIND_FLUSH_SIZE', default=100, cast=int)
+WRITE_BEHIND_FLUSH_INTERVAL = config('WRITE_BEHIND_FLUSH_INTERVAL', default=2.0, cast=float)
+WRITE_BEHIND_MAX_QUEUE = config('WRITE_BEHIND_MAX_QUEUE', default=10000, cast=int)
+WRITE_BEHIND_SPILL_DIR = config('WRITE_BEHIND_SPILL_DIR', default=str(BASE_DIR / 'logs' / 'write_behind'))
+
+# Auditoría asíncrona de UserActivity (dhl_api/utils/audit.py)
+AUDIT_ASYNC = config('AUDIT_ASYNC', default=True, cast=bool)
+AUDIT_FLUSH_SIZE = config('AUDIT_FLUSH_SIZE', default=200, cast=int)
+AUDIT_FLUSH_INTERVAL = config('AUDIT_FLUSH_INTERVAL', default=1.0, cast=float)
+AUDIT_MAX_QUEUE = config('AUDIT_MAX_QUEUE', default=20000, cast=int)
+# Fracción de eventos exitosos que se guarda por acción, ej. "track_shipment=0.2,get_rate=0.5,*=1"
+AUDIT_SAMPLING = {
+    action.strip(): float(rate)
+    for action, _, rate in (
+        item.partition('=') for item in config('AUDIT_SAMPLING', default='').split(',') if '=' in item
+    )
 }
+# Valores de metadata mayores a este tamaño (bytes de JSON) van comprimidos a ActivityPayload; codec zlib o zstd
+AUDIT_PAYLOAD_INLINE_MAX = config('AUDIT_PAYLOAD_INLINE_MAX', default=1024, cast=int)
+AUDIT_PAYLOAD_CODEC = config('AUDIT_PAYLOAD_CODEC', default='zlib')
+
+# Retención de UserActivity (manage.py archive_user_activity): meses completos a conservar
+USER_ACTIVITY_RETENTION_MONTHS = config('USER_ACTIVITY_RETENTION_MONTHS', default=12, cast=int)
+USER_ACTIVITY_ARCHIVE_DIR = config('USER_ACTIVITY_ARCHIVE_DIR', default=str(BASE_DIR / 'logs' / 'archive'))
+
+# Autocompletado de contactos: candidatos por usuario en caché (segundos) y tope de agenda cacheable
+CONTACT_SEARCH_CACHE_TIMEOUT = config('CONTACT_SEARCH_CACHE_TIMEOUT', default=600, cast=int)
+CONTACT_SEARCH_MAX_CANDIDATES = config('CONTACT_SEARCH_MAX_CANDIDATES', default=5000, cast=int)
+
+if CACHE_BACKEND == 'redis':
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        CACHE_BACKEND = 'file'
+# Segundos que cada proceso confía en la versión del dataset cacheada (None = hasta que un loader la publique).
+# Con locmem la caché no se comparte: sin un TTL corto un worker nunca vería la recarga hecha por otro proceso.
+DATASET_VERSION_CACHE_TIMEOUT = config(
+    'DATASET_VERSION_CACHE_TIMEOUT', default=5 if CACHE_BACKEND == 'locmem' else 0, cast=int
+) or None
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'dhl',
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'dhl_cache_table',
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
 
 # Logging configuration ÓPTIMO - Enfoque híbrido con nombres timestamped
 # Para máximo rendimiento + navegación fácil, usar configuración híbrida:
@@ -0,0 +1,28 @@
+"""
+Settings para correr los tests. ``manage.py test`` los elige siempre (aunque
+el entorno defina DJANGO_SETTINGS_MODULE); pytest los toma de pytest.ini
+(requiere pytest-django, ver requirements-dev.txt).
+"""
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHE_DIR
+
+# Caché aislada por proceso: los tests limpian la caché sin tocar la de desarrollo
+CACHE_BACKEND = 'locmem'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dhl-tests',
+    }
+}
+# Los tests publican la versión del dataset en el mismo proceso que la lee
+DATASET_VERSION_CACHE_TIMEOUT = None
+
+# Los tests no deben leer un snapshot compilado en desarrollo
+REFERENCE_SNAPSHOT_PATH = str(Path(CACHE_DIR) / 'reference-test.snap')
+REFERENCE_BUNDLES_MANIFEST = str(Path(CACHE_DIR) / 'reference-bundles-test.json')
+
+# Escritura síncrona: los tests leen las cotizaciones y la auditoría en la misma petición
+WRITE_BEHIND_ENABLED = False
+AUDIT_ASYNC = False
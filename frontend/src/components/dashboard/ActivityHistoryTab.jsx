@@ -22,6 +22,9 @@ const ActivityHistoryTab = () => {
     const [pagination, setPagination] = useState(null);
     const [filterOptions, setFilterOptions] = useState({ actions: [], statuses: [] });
     const [activeTab, setActiveTab] = useState('activities'); // 'activities' o 'stats'
+    // Payloads grandes guardados aparte (metadata.payload_refs): se cargan al pedir el detalle
+    const [payloadDetails, setPayloadDetails] = useState({});
+    const [loadingPayloadId, setLoadingPayloadId] = useState(null);
 
     const fetchActivities = useCallback(async () => {
         setLoading(true);
@@ -73,7 +76,11 @@ const ActivityHistoryTab = () => {
     const fetchStats = async () => {
         try {
             const token = localStorage.getItem('token');
-            const response = await fetch('/api/user-activities/stats/', {
+            // Rango de fechas de los filtros (solo la fecha: las estadísticas son por día)
+            const statsParams = new URLSearchParams();
+            if (filters.date_from) statsParams.append('date_from', filters.date_from.slice(0, 10));
+            if (filters.date_to) statsParams.append('date_to', filters.date_to.slice(0, 10));
+            const response = await fetch(`/api/user-activities/stats/?${statsParams}`, {
                 method: 'GET',
                 headers: {
                     'Authorization': `Bearer ${token}`,
@@ -91,6 +98,32 @@ const ActivityHistoryTab = () => {
         }
     };
 
+    const fetchActivityPayloads = async (activityId) => {
+        setLoadingPayloadId(activityId);
+        try {
+            const token = localStorage.getItem('token');
+            const response = await fetch(`/api/user-activities/${activityId}/`, {
+                method: 'GET',
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                    'Content-Type': 'application/json',
+                },
+            });
+            
+            const data = await response.json();
+            
+            if (response.ok && data.success) {
+                setPayloadDetails(prev => ({ ...prev, [activityId]: data.data.metadata || {} }));
+            }
+        } catch (err) {
+            console.error('Error fetching activity payloads:', err);
+        } finally {
+            setLoadingPayloadId(null);
+        }
+    };
+
+    const formatBytes = (bytes) => (bytes >= 1024 ? `${(bytes / 1024).toFixed(1)} KB` : `${bytes} B`);
+
     const handleFilterChange = (key, value) => {
         setFilters(prev => ({
             ...prev,
@@ -377,29 +410,53 @@ const ActivityHistoryTab = () => {
                                                         )}
                                                     </div>
 
-                                                    {/* Payloads */}
-                                                    {activity.metadata && (activity.metadata.request_payload || activity.metadata.response_payload) && (
-                                                        <div className="mt-3 space-y-2">
-                                                            {activity.metadata.request_payload && (
-                                                                <div>
-                                                                    <div className="text-xs font-semibold text-gray-700">Request</div>
-                                                                    <JsonPreview data={activity.metadata.request_payload} />
-                                                                </div>
-                                                            )}
-                                                            {activity.metadata.response_payload && (
-                                                                <div>
-                                                                    <div className="text-xs font-semibold text-gray-700">Response</div>
-                                                                    <JsonPreview data={activity.metadata.response_payload} />
-                                                                </div>
-                                                            )}
-                                                            {activity.metadata.raw_response_preview && (
-                                                                <div>
-                                                                    <div className="text-xs font-semibold text-gray-700">Respuesta cruda (preview)</div>
-                                                                    <JsonPreview data={activity.metadata.raw_response_preview} />
-                                                                </div>
-                                                            )}
+                                                    {/* Payloads guardados aparte: se cargan bajo demanda */}
+                                                    {activity.metadata?.payload_refs && !payloadDetails[activity.id] && (
+                                                        <div className="mt-3 flex flex-wrap items-center gap-2 text-xs text-gray-600">
+                                                            {Object.entries(activity.metadata.payload_refs).map(([key, ref]) => (
+                                                                <span key={key} className="px-2 py-1 bg-gray-100 rounded">
+                                                                    {key}: {ref.summary} ({formatBytes(ref.bytes)})
+                                                                </span>
+                                                            ))}
+                                                            <button
+                                                                onClick={() => fetchActivityPayloads(activity.id)}
+                                                                disabled={loadingPayloadId === activity.id}
+                                                                className="text-blue-600 hover:underline disabled:opacity-50"
+                                                            >
+                                                                {loadingPayloadId === activity.id ? 'Cargando...' : 'Ver payloads'}
+                                                            </button>
                                                         </div>
                                                     )}
+
+                                                    {/* Payloads */}
+                                                    {(() => {
+                                                        const metadata = payloadDetails[activity.id] || activity.metadata;
+                                                        if (!metadata || !(metadata.request_payload || metadata.response_payload)) {
+                                                            return null;
+                                                        }
+                                                        return (
+                                                            <div className="mt-3 space-y-2">
+                                                                {metadata.request_payload && (
+                                                                    <div>
+                                                                        <div className="text-xs font-semibold text-gray-700">Request</div>
+                                                                        <JsonPreview data={metadata.request_payload} />
+                                                                    </div>
+                                                                )}
+                                                                {metadata.response_payload && (
+                                                                    <div>
+                                                                        <div className="text-xs font-semibold text-gray-700">Response</div>
+                                                                        <JsonPreview data={metadata.response_payload} />
+                                                                    </div>
+                                                                )}
+                                                                {metadata.raw_response_preview && (
+                                                                    <div>
+                                                                        <div className="text-xs font-semibold text-gray-700">Respuesta cruda (preview)</div>
+                                                                        <JsonPreview data={metadata.raw_response_preview} />
+                                                                    </div>
+                                                                )}
+                                                            </div>
+                                                        );
+                                                    })()}
                                                 </div>
                                             </div>
                                         </div>
@@ -15,6 +15,10 @@ class ServiceZoneService {
       serviceAreas: {}, // Cache por país  
       postalCodes: {} // Cache por filtros
     };
+
+    // Bundles estáticos por país (nombre con hash de contenido => inmutables, sin TTL)
+    this.bundleManifest = { data: null, timestamp: 0, ttl: 10 * 60 * 1000 };
+    this.bundles = {};
     
     // TTL por defecto para diferentes tipos de datos
     this.defaultTTL = {
@@ -99,6 +103,7 @@ class ServiceZoneService {
         serviceAreas: {},
         postalCodes: {}
       };
+      this.bundleManifest = { data: null, timestamp: 0, ttl: this.bundleManifest.ttl };
       console.log('🧹 Cache completamente limpiado');
     } else if (key) {
       // Limpiar cache específico
@@ -117,6 +122,46 @@ class ServiceZoneService {
     }
   }
   
+  /**
+   * Manifiesto de bundles estáticos (null si no hay bundles para la versión vigente)
+   */
+  async _getBundleManifest() {
+    if (this._isCacheValid(this.bundleManifest) || (this.bundleManifest.timestamp && this.bundleManifest.data === false
+        && Date.now() - this.bundleManifest.timestamp < 2 * 60 * 1000)) {
+      return this.bundleManifest.data || null;
+    }
+    try {
+      const response = await api.get('/service-zones/bundles/');
+      this.bundleManifest = { ...this.bundleManifest, data: response.data.data, timestamp: Date.now() };
+    } catch (error) {
+      // Sin bundles: usar los endpoints de la API y reintentar en 2 minutos
+      this.bundleManifest = { ...this.bundleManifest, data: false, timestamp: Date.now() };
+    }
+    return this.bundleManifest.data || null;
+  }
+
+  /**
+   * Bundle estático del país (estados, ciudades por estado y estructura) o null
+   */
+  async _getCountryBundle(countryCode) {
+    const manifest = await this._getBundleManifest();
+    const entry = manifest?.bundles?.[countryCode];
+    if (!entry) {
+      return null;
+    }
+    if (!this.bundles[entry.url]) {
+      // Archivo estático servido por nginx/whitenoise: fuera de la API (sin baseURL ni token)
+      this.bundles[entry.url] = fetch(entry.url)
+        .then((response) => (response.ok ? response.json() : null))
+        .catch(() => null);
+    }
+    const bundle = await this.bundles[entry.url];
+    if (!bundle) {
+      delete this.bundles[entry.url];
+    }
+    return bundle;
+  }
+
   /**
    * Analiza la estructura de datos disponible para un país específico (con cache)
    */
@@ -129,17 +174,19 @@ class ServiceZoneService {
     }
 
     try {
-      const response = await api.get(`/service-zones/analyze-country/${countryCode}/`);
+      const bundle = await this._getCountryBundle(countryCode.toUpperCase());
+      const structure = bundle?.structure
+        || (await api.get(`/service-zones/analyze-country/${countryCode}/`)).data;
       const result = {
         success: true,
-        hasStates: response.data.hasStates,
-        hasCities: response.data.hasCities,
-        hasPostalCodes: response.data.hasPostalCodes,
-        pattern: response.data.pattern,
-        statistics: response.data.statistics,
-        recommendations: response.data.recommendations,
+        hasStates: structure.hasStates,
+        hasCities: structure.hasCities,
+        hasPostalCodes: structure.hasPostalCodes,
+        pattern: structure.pattern,
+        statistics: structure.statistics,
+        recommendations: structure.recommendations,
         // Nueva información sobre estructura de datos
-        dataStructure: response.data.data_structure || {
+        dataStructure: structure.data_structure || {
           city_name_available: true,
           service_area_available: false,
           recommended_city_field: 'city_name'
@@ -228,6 +275,13 @@ class ServiceZoneService {
     }
 
     try {
+      const bundle = await this._getCountryBundle(cacheKey);
+      if (bundle) {
+        const result = { success: true, data: bundle.states, count: bundle.states.length, countryCode: cacheKey };
+        this._setCache('states', cacheKey, result);
+        return result;
+      }
+
       const response = await api.get(`/service-zones/states/${countryCode.toUpperCase()}/`);
       const result = {
         success: true,
@@ -280,6 +334,27 @@ class ServiceZoneService {
     }
 
     try {
+      // Bundle estático: misma lista que la API (mapa + ESD); la búsqueda se filtra aquí
+      const bundle = options.bypassCache ? null : await this._getCountryBundle(cc);
+      const bundleCities = bundle?.cities?.[effectiveState ? effectiveState.toUpperCase() : ''];
+      if (bundleCities) {
+        const qLow = options.q ? String(options.q).toLowerCase() : '';
+        const data = qLow
+          ? bundleCities.filter((c) => (c.display_name || '').toLowerCase().includes(qLow))
+          : bundleCities;
+        const result = {
+          success: true,
+          data,
+          count: data.length,
+          countryCode: cc,
+          stateCode: effectiveState ? effectiveState.toUpperCase() : null,
+          data_type: data.length ? data[0].type : 'none',
+          preferences: { prefer: 'map_city_name', optimized: true }
+        };
+        this._setCache('cities', cacheKey, result);
+        return result;
+      }
+
       let endpoint = `/service-zones/cities/${cc}/`;
       if (effectiveState) {
         endpoint += `${effectiveState.toUpperCase()}/`;
@@ -802,27 +877,19 @@ class ServiceZoneService {
       const response = await api.get(`/service-zones/areas/${countryCode.toUpperCase()}/`);
       const baseAreas = response.data.data || [];
 
-      // Resolver nombres amigables por área de servicio usando el endpoint dedicado
-      const resolved = await Promise.all(
-        baseAreas.map(async (item) => {
-          const code = item.service_area || item.code || item.name;
-          if (!code) {
-            return { service_area: '', display_name: '' };
-          }
-          try {
-            const res = await api.get('/service-zones/resolve-display/', {
-              params: {
-                country_code: countryCode.toUpperCase(),
-                service_area: String(code).toUpperCase()
-              }
-            });
-            const dn = res.data?.data?.display_name || String(code).toUpperCase();
-            return { service_area: String(code).toUpperCase(), display_name: dn };
-          } catch (e) {
-            return { service_area: String(code).toUpperCase(), display_name: String(code).toUpperCase() };
-          }
-        })
+      // Resolver nombres amigables de todas las áreas en una sola petición
+      const codes = baseAreas.map(item => String(item.service_area || item.code || item.name || '').toUpperCase());
+      const displays = await this.resolveServiceAreaDisplays(
+        codes.filter(Boolean).map(code => ({ country_code: countryCode.toUpperCase(), service_area: code }))
       );
+      const displayByCode = {};
+      codes.filter(Boolean).forEach((code, i) => {
+        displayByCode[code] = displays[i]?.success ? displays[i].display_name : code;
+      });
+      const resolved = codes.map(code => ({
+        service_area: code,
+        display_name: code ? displayByCode[code] : ''
+      }));
 
       // Evitar nombres duplicados: si se repite display_name, concatenar el código
       const counts = resolved.reduce((acc, a) => {
@@ -851,6 +918,30 @@ class ServiceZoneService {
     }
   }
 
+  /**
+   * Resuelve nombres amigables de varias áreas de servicio en una sola petición
+   * @param {Array<Object>} items - [{ country_code, service_area, postal_code?, state_code?, fallback_city? }]
+   * @returns {Array<Object>} Un resultado por entrada, en el mismo orden ({ success, service_area, display_name, type })
+   */
+  async resolveServiceAreaDisplays(items) {
+    const result = [];
+    if (!items || items.length === 0) {
+      return result;
+    }
+    const BATCH_SIZE = 500;
+    try {
+      for (let i = 0; i < items.length; i += BATCH_SIZE) {
+        const response = await api.post('/service-zones/resolve-display/bulk/', {
+          items: items.slice(i, i + BATCH_SIZE)
+        });
+        result.push(...(response.data?.data || []));
+      }
+    } catch (error) {
+      console.error('Error resolviendo nombres de áreas de servicio:', error);
+    }
+    return result;
+  }
+
   /**
    * Métodos públicos para gestión de cache
    */
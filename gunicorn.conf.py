@@ -19,6 +19,16 @@ worker_tmp_dir = "/dev/shm"
 graceful_timeout = 120
 keepalive = 5
 
+
+def worker_exit(server, worker):
+    """Vacía los buffers de escritura diferida (cotizaciones) antes de que el worker termine."""
+    try:
+        from dhl_api.utils.write_behind import shutdown_recorders
+    except Exception:
+        return
+    shutdown_recorders()
+
+
 # Configuración de proceso
 daemon = False
 pidfile = None
@@ -6,7 +6,12 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dhl_project.settings')
+    if sys.argv[1:2] == ['test']:
+        # Asignación (no setdefault): el Dockerfile fija DJANGO_SETTINGS_MODULE a los settings de producción.
+        # Solo --settings puede elegir otro módulo para los tests.
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'dhl_project.settings_test'
+    else:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dhl_project.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: